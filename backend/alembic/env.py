@@ -33,6 +33,10 @@ from app.models import (
     User,
     AlertRule,
     AlertHistory,
+    ReadingRollup,
+    RollupWatermark,
+    RetentionPolicy,
+    ReadingCursor,
 )
 
 # this is the Alembic Config object, which provides
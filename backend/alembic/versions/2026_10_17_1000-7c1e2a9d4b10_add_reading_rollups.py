@@ -0,0 +1,60 @@
+"""add_reading_rollups
+
+Agrega las tablas de rollups incrementales:
+- reading_rollups: count/sum/min/max/sum_sq por device, variable,
+  resolucion (1m, 1h, 1d) y bucket
+- rollup_watermarks: high-water mark del job que los mantiene
+
+Revision ID: 7c1e2a9d4b10
+Revises: 5494f0ce411a
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e2a9d4b10'
+down_revision: Union[str, None] = '5494f0ce411a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1. Tabla reading_rollups
+    op.create_table(
+        'reading_rollups',
+        sa.Column('device_id', sa.Integer(), nullable=False, comment='ID del device'),
+        sa.Column('variable', sa.String(length=64), nullable=False, comment='Key del data_payload (temp_c, humidity_pct, etc.)'),
+        sa.Column('resolution', sa.String(length=4), nullable=False, comment='Resolucion del bucket: 1m, 1h, 1d'),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False, comment='Inicio del bucket (UTC)'),
+        sa.Column('count', sa.BigInteger(), nullable=False, comment='Cantidad de mediciones numericas en el bucket'),
+        sa.Column('sum', sa.Float(), nullable=False, comment='Suma de los valores'),
+        sa.Column('min', sa.Float(), nullable=False, comment='Valor minimo'),
+        sa.Column('max', sa.Float(), nullable=False, comment='Valor maximo'),
+        sa.Column('sum_sq', sa.Float(), nullable=False, comment='Suma de los cuadrados (para stddev)'),
+        sa.CheckConstraint("resolution IN ('1m', '1h', '1d')", name='check_rollup_resolution'),
+        sa.ForeignKeyConstraint(['device_id'], ['devices.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('device_id', 'variable', 'resolution', 'bucket_start')
+    )
+    op.create_index('idx_rollups_resolution_time', 'reading_rollups', ['resolution', 'bucket_start'], unique=False)
+
+    # 2. Tabla rollup_watermarks
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(length=64), nullable=False, comment='Nombre del job (ej: sensor_readings)'),
+        sa.Column('last_reading_id', sa.BigInteger(), nullable=False, server_default='0', comment='Ultimo sensor_readings.id incorporado a los rollups'),
+        sa.Column('pending_reading_id', sa.BigInteger(), nullable=True, comment='Candidato a proximo watermark'),
+        sa.Column('pending_snapshot', sa.Text(), nullable=True, comment='pg_current_snapshot() al tomar el candidato'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()'), comment='Ultima ejecucion del job'),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_index('idx_rollups_resolution_time', table_name='reading_rollups')
+    op.drop_table('reading_rollups')
@@ -0,0 +1,176 @@
+"""partition_sensor_readings
+
+Convierte sensor_readings en una tabla particionada por rango de timestamp:
+- PK (id, timestamp) (toda constraint unica debe incluir la clave de particion)
+- la tabla existente queda adjunta como particion sensor_readings_legacy
+  [MINVALUE, limite) sin copiar datos
+- particion DEFAULT para timestamps sin particion
+- se elimina la FK alert_history.sensor_reading_id -> sensor_readings.id
+
+Las particiones por periodo las crea la app al arrancar (ensure_partitions).
+
+En tablas grandes correr antes scripts/partition_readings.py, que hace la
+misma conversion sin bloquear la ingesta; esta migracion detecta que la
+tabla ya esta particionada y no hace nada.
+
+Los helpers son una copia fija de los de app.services.partitioning al
+momento de la migracion: los cambios de la app no alteran esta revision.
+
+Revision ID: 9a4f3c2e8d51
+Revises: 7c1e2a9d4b10
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f3c2e8d51'
+down_revision: Union[str, None] = '7c1e2a9d4b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARENT_TABLE = 'sensor_readings'
+DEFAULT_PARTITION = 'sensor_readings_default'
+LEGACY_TABLE = 'sensor_readings_legacy'
+LEGACY_UNIQUE_INDEX = 'sensor_readings_legacy_id_ts'
+LEGACY_RANGE_CHECK = 'sensor_readings_legacy_range'
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """True si sensor_readings ya es una tabla particionada."""
+    relkind = conn.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": PARENT_TABLE},
+    ).scalar()
+    return relkind == 'p'
+
+
+def legacy_upper_bound(conn: Connection) -> datetime:
+    """
+    Limite superior de la particion legacy: inicio del segundo mes posterior
+    al actual (o al timestamp mas nuevo). Un mes de margen cubre cualquier
+    READINGS_PARTITION_INTERVAL; la app crea las particiones que falten.
+    """
+    newest = conn.execute(sa.text(f"SELECT max(timestamp) FROM {PARENT_TABLE}")).scalar()
+    reference = max(newest or datetime.min, datetime.utcnow())
+    months = reference.year * 12 + reference.month - 1 + 2
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def prepare_legacy_table(conn: Connection, upper: datetime) -> None:
+    """Indice unico (id, timestamp) y CHECK (timestamp < upper) validado en la tabla original."""
+    conn.execute(sa.text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {LEGACY_UNIQUE_INDEX} ON {PARENT_TABLE} (id, timestamp)"
+    ))
+    exists = conn.execute(
+        sa.text("SELECT 1 FROM pg_constraint WHERE conname = :name AND conrelid = to_regclass(:table)"),
+        {"name": LEGACY_RANGE_CHECK, "table": PARENT_TABLE},
+    ).scalar()
+    if not exists:
+        conn.execute(sa.text(
+            f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {LEGACY_RANGE_CHECK} "
+            f"CHECK (timestamp < '{upper.isoformat()}') NOT VALID"
+        ))
+    conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} VALIDATE CONSTRAINT {LEGACY_RANGE_CHECK}"))
+
+
+def swap_to_partitioned(conn: Connection, upper: datetime) -> None:
+    """
+    Reemplaza sensor_readings por una tabla particionada con la tabla
+    original adjunta como particion [MINVALUE, upper) y una DEFAULT.
+    """
+    index_defs = conn.execute(sa.text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table AND indexname NOT IN (:pkey, :unique)"
+    ), {"table": PARENT_TABLE, "pkey": f"{PARENT_TABLE}_pkey", "unique": LEGACY_UNIQUE_INDEX}).all()
+
+    conn.execute(sa.text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+
+    # alert_history no puede referenciar solo `id` de una tabla particionada
+    conn.execute(sa.text("ALTER TABLE alert_history DROP CONSTRAINT IF EXISTS alert_history_sensor_reading_id_fkey"))
+
+    # Liberar nombres: tabla, PK e indices pasan a la particion legacy
+    conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+    for name, _ in index_defs:
+        conn.execute(sa.text(f"ALTER INDEX {name} RENAME TO {name[:56]}_legacy"))
+    conn.execute(sa.text(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {PARENT_TABLE}_pkey"))
+    conn.execute(sa.text(
+        f"ALTER TABLE {LEGACY_TABLE} ADD CONSTRAINT {LEGACY_TABLE}_pkey PRIMARY KEY USING INDEX {LEGACY_UNIQUE_INDEX}"
+    ))
+
+    # Tabla padre particionada con la misma forma
+    conn.execute(sa.text(
+        f"CREATE TABLE {PARENT_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS) "
+        f"PARTITION BY RANGE (timestamp)"
+    ))
+    conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} DROP CONSTRAINT IF EXISTS {LEGACY_RANGE_CHECK}"))
+    conn.execute(sa.text(f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id, timestamp)"))
+    conn.execute(sa.text(
+        f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {PARENT_TABLE}_device_id_fkey "
+        f"FOREIGN KEY (device_id) REFERENCES devices (id) ON DELETE CASCADE"
+    ))
+    conn.execute(sa.text(f"ALTER SEQUENCE {PARENT_TABLE}_id_seq OWNED BY {PARENT_TABLE}.id"))
+    for _, indexdef in index_defs:
+        conn.execute(sa.text(indexdef))
+
+    # Adjuntar: el CHECK validado evita el escaneo y los indices se reutilizan
+    conn.execute(sa.text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {LEGACY_TABLE} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')"
+    ))
+    conn.execute(sa.text(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {LEGACY_RANGE_CHECK}"))
+    conn.execute(sa.text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if is_partitioned(conn):
+        return
+
+    upper = legacy_upper_bound(conn)
+    prepare_legacy_table(conn, upper)
+    swap_to_partitioned(conn, upper)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if not is_partitioned(conn):
+        return
+
+    index_defs = conn.execute(sa.text(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = 'sensor_readings' AND indexname <> 'sensor_readings_pkey'"
+    )).scalars().all()
+
+    # 1. Copiar todas las particiones a una tabla comun
+    op.execute(
+        "CREATE TABLE sensor_readings_unpartitioned "
+        "(LIKE sensor_readings INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS)"
+    )
+    op.execute("INSERT INTO sensor_readings_unpartitioned SELECT * FROM sensor_readings")
+
+    # 2. Reemplazar la tabla particionada (la secuencia de ids se conserva)
+    op.execute("ALTER SEQUENCE sensor_readings_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE sensor_readings")
+    op.execute("ALTER TABLE sensor_readings_unpartitioned RENAME TO sensor_readings")
+    op.execute("ALTER SEQUENCE sensor_readings_id_seq OWNED BY sensor_readings.id")
+    op.create_primary_key('sensor_readings_pkey', 'sensor_readings', ['id'])
+    op.create_foreign_key(None, 'sensor_readings', 'devices', ['device_id'], ['id'], ondelete='CASCADE')
+    for indexdef in index_defs:
+        op.execute(indexdef.replace(" ON ONLY ", " ON "))
+
+    # 3. Restaurar la FK de alert_history (referencias a readings ya borrados -> NULL)
+    op.execute(
+        "UPDATE alert_history SET sensor_reading_id = NULL "
+        "WHERE sensor_reading_id IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM sensor_readings r WHERE r.id = alert_history.sensor_reading_id)"
+    )
+    op.create_foreign_key(
+        'alert_history_sensor_reading_id_fkey', 'alert_history', 'sensor_readings',
+        ['sensor_reading_id'], ['id'], ondelete='SET NULL'
+    )
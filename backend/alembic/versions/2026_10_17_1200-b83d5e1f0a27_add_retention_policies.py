@@ -0,0 +1,56 @@
+"""add_retention_policies
+
+Agrega la tabla retention_policies: dias de retencion de mediciones crudas
+y de cada resolucion de rollup, por grupo de ubicaciones y/o tipo de asset.
+
+Revision ID: b83d5e1f0a27
+Revises: 9a4f3c2e8d51
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83d5e1f0a27'
+down_revision: Union[str, None] = '9a4f3c2e8d51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'retention_policies',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=128), nullable=False, comment='Nombre descriptivo de la politica'),
+        sa.Column('location_group_id', sa.Integer(), nullable=True, comment='Alcance: grupo de ubicaciones (NULL = todos)'),
+        sa.Column('asset_type', sa.String(length=64), nullable=True, comment='Alcance: tipo de asset (NULL = todos)'),
+        sa.Column('raw_days', sa.Integer(), nullable=True, comment='Dias de mediciones crudas (NULL = para siempre)'),
+        sa.Column('rollup_1m_days', sa.Integer(), nullable=True, comment='Dias de rollups de 1 minuto (NULL = para siempre)'),
+        sa.Column('rollup_1h_days', sa.Integer(), nullable=True, comment='Dias de rollups de 1 hora (NULL = para siempre)'),
+        sa.Column('rollup_1d_days', sa.Integer(), nullable=True, comment='Dias de rollups de 1 dia (NULL = para siempre)'),
+        sa.Column('enabled', sa.Boolean(), nullable=False, server_default='true', comment='Si la politica se aplica'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()'), comment='Fecha de creacion'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()'), comment='Ultima modificacion'),
+        sa.CheckConstraint(
+            '(raw_days IS NULL OR raw_days > 0) AND (rollup_1m_days IS NULL OR rollup_1m_days > 0) '
+            'AND (rollup_1h_days IS NULL OR rollup_1h_days > 0) AND (rollup_1d_days IS NULL OR rollup_1d_days > 0)',
+            name='check_retention_days_positive'
+        ),
+        sa.ForeignKeyConstraint(['location_group_id'], ['location_groups.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_retention_policies_scope',
+        'retention_policies',
+        [sa.text('coalesce(location_group_id, 0)'), sa.text("coalesce(asset_type, '')")],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_retention_policies_scope', table_name='retention_policies')
+    op.drop_table('retention_policies')
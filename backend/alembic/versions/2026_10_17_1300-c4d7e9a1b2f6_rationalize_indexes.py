@@ -0,0 +1,122 @@
+"""rationalize_indexes
+
+La migracion inicial creo los indices dos veces (index=True en la columna
+genera ix_* y __table_args__ genera idx_*), ademas del UNIQUE de
+devices.device_eui y users.email. Cada indice extra se paga en cada
+INSERT/UPDATE. Se eliminan:
+
+- sensor_readings: ix_id (cubierto por la PK (id, timestamp)), ix_device_id
+  (prefijo de idx_readings_device_time), ix_processed e idx_readings_processed
+  (ninguna query filtra por processed) y el btree ix_timestamp, reemplazado
+  por un btree (timestamp, id) (idx_readings_time_id): sirve los rangos de
+  tiempo sin device_id y, ademas, las paginas de GET /readings sin device_id
+  (ORDER BY timestamp DESC, id DESC LIMIT n) sin sort
+- devices: ix_id, ix_device_eui e idx_devices_eui (queda el UNIQUE),
+  ix_last_seen_at e idx_devices_last_seen (sin indice el UPDATE del
+  write-behind de last_seen_at es HOT)
+- users: ix_id, ix_email e idx_users_email (queda el UNIQUE), ix_role, ix_is_active
+- alert_rules: ix_id, ix_device_id, ix_location_id, ix_enabled
+
+Los indices nuevos se construyen particion por particion con CONCURRENTLY
+(no bloquea la ingesta) antes de eliminar los viejos. Los DROP INDEX toman
+un lock exclusivo breve.
+
+Revision ID: c4d7e9a1b2f6
+Revises: b83d5e1f0a27
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e9a1b2f6'
+down_revision: Union[str, None] = 'b83d5e1f0a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (indice, tabla, columnas, unique) para poder recrearlos en el downgrade
+DROPPED_INDEXES = [
+    ('ix_sensor_readings_id', 'sensor_readings', ['id'], False),
+    ('ix_sensor_readings_device_id', 'sensor_readings', ['device_id'], False),
+    ('ix_sensor_readings_processed', 'sensor_readings', ['processed'], False),
+    ('idx_readings_processed', 'sensor_readings', ['processed'], False),
+    ('ix_sensor_readings_timestamp', 'sensor_readings', ['timestamp'], False),
+    ('ix_devices_id', 'devices', ['id'], False),
+    ('ix_devices_device_eui', 'devices', ['device_eui'], True),
+    ('idx_devices_eui', 'devices', ['device_eui'], True),
+    ('ix_devices_last_seen_at', 'devices', ['last_seen_at'], False),
+    ('idx_devices_last_seen', 'devices', ['last_seen_at'], False),
+    ('ix_users_id', 'users', ['id'], False),
+    ('ix_users_email', 'users', ['email'], True),
+    ('idx_users_email', 'users', ['email'], True),
+    ('ix_users_role', 'users', ['role'], False),
+    ('ix_users_is_active', 'users', ['is_active'], False),
+    ('ix_alert_rules_id', 'alert_rules', ['id'], False),
+    ('ix_alert_rules_device_id', 'alert_rules', ['device_id'], False),
+    ('ix_alert_rules_location_id', 'alert_rules', ['location_id'], False),
+    ('ix_alert_rules_enabled', 'alert_rules', ['enabled'], False),
+]
+
+def create_index_online(conn: Connection, name: str, definition: str) -> None:
+    """
+    Crea un indice sobre sensor_readings sin bloquear INSERTs (copia fija
+    de app.services.partitioning.create_index_online).
+
+    Una tabla particionada no admite CREATE INDEX CONCURRENTLY: se crea el
+    indice padre ON ONLY, el de cada particion con CONCURRENTLY y se
+    adjuntan. Requiere AUTOCOMMIT. Idempotente.
+    """
+    relkind = conn.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('sensor_readings')")).scalar()
+    if relkind != 'p':
+        conn.execute(sa.text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON sensor_readings {definition}"))
+        return
+
+    conn.execute(sa.text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY sensor_readings {definition}"))
+
+    # Particiones que ya tienen el indice (corrida anterior)
+    attached = set(conn.execute(sa.text("""
+        SELECT ix.indrelid::regclass::text
+        FROM pg_inherits inh
+        JOIN pg_index ix ON ix.indexrelid = inh.inhrelid
+        WHERE inh.inhparent = to_regclass(:name)
+    """), {"name": name}).scalars())
+
+    partitions = conn.execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass('sensor_readings')"
+    )).scalars().all()
+
+    for partition in partitions:
+        if partition in attached:
+            continue
+        child = f"{partition}_{name}"[:63]
+        conn.execute(sa.text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition} {definition}"))
+        conn.execute(sa.text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+
+
+# (indice, definicion) creados con create_index_online
+CREATED_INDEXES = [
+    ('idx_readings_time_id', '(timestamp, id)'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, definition in CREATED_INDEXES:
+            create_index_online(op.get_bind(), name, definition)
+
+    for name, _, _, _ in DROPPED_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def downgrade() -> None:
+    for name, _ in CREATED_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    for name, table, columns, unique in DROPPED_INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
@@ -0,0 +1,53 @@
+"""reading_cursors_drop_processed
+
+sensor_readings pasa a ser insert-only:
+- se elimina sensor_readings.processed (marcar cada medicion era un UPDATE
+  que reescribia la tupla y sus indices)
+- se agrega reading_cursors: ultimo id procesado por consumidor y shard
+
+En una tabla particionada DROP COLUMN solo cambia el catalogo (no
+reescribe las particiones).
+
+Revision ID: d2a8f5c3e7b9
+Revises: c4d7e9a1b2f6
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a8f5c3e7b9'
+down_revision: Union[str, None] = 'c4d7e9a1b2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reading_cursors',
+        sa.Column('consumer', sa.String(length=64), nullable=False, comment='Nombre del consumidor (ej: alerts)'),
+        sa.Column('shard', sa.Integer(), nullable=False, comment='Shard: procesa los devices con device_id % shards = shard'),
+        sa.Column('shards', sa.Integer(), nullable=False, comment='Cantidad de shards del consumidor'),
+        sa.Column('last_reading_id', sa.BigInteger(), nullable=False, server_default='0', comment='Ultimo sensor_readings.id procesado por el shard'),
+        sa.Column('pending_reading_id', sa.BigInteger(), nullable=True, comment='Candidato a proximo cursor'),
+        sa.Column('pending_snapshot', sa.Text(), nullable=True, comment='pg_current_snapshot() al tomar el candidato'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('now()'), comment='Ultimo avance o intento del shard'),
+        sa.CheckConstraint('shard >= 0 AND shard < shards', name='check_cursor_shard_range'),
+        sa.PrimaryKeyConstraint('consumer', 'shard'),
+    )
+
+    op.drop_column('sensor_readings', 'processed')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'sensor_readings',
+        sa.Column('processed', sa.Boolean(), nullable=False, server_default=sa.false(),
+                  comment='Indica si ya fue procesado por el sistema de alertas'),
+    )
+
+    op.drop_table('reading_cursors')
@@ -0,0 +1,49 @@
+"""alert_history_pending_index
+
+Estado de notificacion de alert_history para el dispatcher:
+
+- notification_attempts: intentos de envio de la alerta
+- notification_next_attempt_at: fin del lease mientras un dispatcher la
+  envia, o proximo reintento si algun canal fallo
+
+Indice parcial sobre las alertas pendientes de notificar
+(notification_sent IS NULL) o con un reintento programado: el dispatcher
+las toma en orden de id sin recorrer el historial ya notificado.
+
+Revision ID: e5b1c7d9a3f2
+Revises: d2a8f5c3e7b9
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1c7d9a3f2'
+down_revision: Union[str, None] = 'd2a8f5c3e7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('alert_history', sa.Column(
+        'notification_attempts', sa.Integer(), server_default=sa.text('0'), nullable=False,
+        comment='Intentos de notificación (batches del dispatcher que la tomaron)',
+    ))
+    op.add_column('alert_history', sa.Column(
+        'notification_next_attempt_at', sa.DateTime(), nullable=True,
+        comment='Fin del lease mientras se envía, o próximo reintento si algún canal falló',
+    ))
+    op.create_index(
+        'idx_alert_history_pending', 'alert_history', ['id'],
+        postgresql_where=sa.text('notification_sent IS NULL OR notification_next_attempt_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_alert_history_pending', table_name='alert_history')
+    op.drop_column('alert_history', 'notification_next_attempt_at')
+    op.drop_column('alert_history', 'notification_attempts')
@@ -6,18 +6,29 @@ Incluye:
 - get_current_user: Dependencia para obtener usuario autenticado
 - get_current_active_user: Usuario autenticado y activo
 - require_admin: Requiere que el usuario sea admin
+- require_device_api_key / get_device_from_api_key: API Key de devices ESP32
+- Variantes *_async con AsyncSession para los routers de DB_MODE=async
+
+Las dependencias son `async def`: las queries (Session sincronica) se
+ejecutan con run_db() para no bloquear el event loop. Las que solo leen
+atributos del usuario ya cargado no tocan la DB.
 """
 
-from typing import Generator, Optional
+from typing import Callable, Generator, Optional
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError
 
-from app.core.database import SessionLocal
-from app.core.security import decode_access_token
+from app.core.concurrency import run_db
+from app.core.database import SessionLocal, get_async_db
+from app.core.config import settings
+from app.core.security import decode_access_token, validate_device_api_key
 from app.models.user import User
 from app.schemas.auth import TokenData
+from app.services.device_registry import device_registry
+from app.services.user_registry import user_registry
 
 
 # Security scheme para JWT
@@ -43,6 +54,52 @@ def get_db() -> Generator:
         db.close()
 
 
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudo validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_data(credentials: HTTPAuthorizationCredentials) -> TokenData:
+    """Valida el token JWT y retorna sus claims (401 si es invalido)."""
+    try:
+        # Decodificar token
+        payload = decode_access_token(credentials.credentials)
+        if payload is None:
+            raise _credentials_exception()
+
+        email: str = payload.get("sub")
+        user_id: int = payload.get("user_id")
+
+        if email is None or user_id is None:
+            raise _credentials_exception()
+
+        return TokenData(email=email, user_id=user_id)
+
+    except JWTError:
+        raise _credentials_exception()
+
+
+def _ensure_active(user: User) -> User:
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuario inactivo"
+        )
+    return user
+
+
+def _ensure_admin(user: User) -> User:
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos de administrador"
+        )
+    return user
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -60,36 +117,12 @@ async def get_current_user(
     Raises:
         HTTPException: Si el token es invalido o el usuario no existe
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudo validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    token_data = _token_data(credentials)
 
-    try:
-        # Extraer token del header
-        token = credentials.credentials
-
-        # Decodificar token
-        payload = decode_access_token(token)
-        if payload is None:
-            raise credentials_exception
-
-        email: str = payload.get("sub")
-        user_id: int = payload.get("user_id")
-
-        if email is None or user_id is None:
-            raise credentials_exception
-
-        token_data = TokenData(email=email, user_id=user_id)
-
-    except JWTError:
-        raise credentials_exception
-
-    # Buscar usuario en DB
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    # Buscar usuario (cache con TTL corto; la DB solo si no esta cacheado)
+    user = await run_db(user_registry.get, db, token_data.user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
@@ -109,12 +142,7 @@ async def get_current_active_user(
     Raises:
         HTTPException: Si el usuario esta inactivo
     """
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario inactivo"
-        )
-    return current_user
+    return _ensure_active(current_user)
 
 
 async def require_admin(
@@ -132,12 +160,7 @@ async def require_admin(
     Raises:
         HTTPException: Si el usuario no es admin
     """
-    if not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permisos de administrador"
-        )
-    return current_user
+    return _ensure_admin(current_user)
 
 
 async def require_super_admin(
@@ -163,48 +186,118 @@ async def require_super_admin(
     return current_user
 
 
+def _api_key_exception(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "ApiKey"},
+    )
+
+
+def require_device_api_key(device_eui: str, x_api_key: Optional[str]) -> None:
+    """
+    Valida la API Key de un device (HMAC del device_eui, sin query a la DB).
+
+    Args:
+        device_eui: Device que envia la medicion
+        x_api_key: API Key en el header X-API-Key
+
+    Raises:
+        HTTPException 401: Si falta el header o la API Key no corresponde al device
+    """
+    if not x_api_key:
+        raise _api_key_exception("X-API-Key header requerido")
+
+    if not validate_device_api_key(device_eui, x_api_key):
+        raise _api_key_exception("API Key invalida")
+
+
+def device_api_key_checker(x_api_key: Optional[str]) -> Optional[Callable[[str], bool]]:
+    """
+    Arma el chequeo por device_eui de un batch autenticado con X-API-Key.
+
+    Returns:
+        Optional[Callable[[str], bool]]: None si DEVICE_API_KEY_REQUIRED=false
+
+    Raises:
+        HTTPException 401: Si se requiere API Key y falta el header
+    """
+    if not settings.device_api_key_required:
+        return None
+
+    if not x_api_key:
+        raise _api_key_exception("X-API-Key header requerido")
+
+    return lambda device_eui: validate_device_api_key(device_eui, x_api_key)
+
+
 async def get_device_from_api_key(
+    x_device_eui: Optional[str] = Header(None),
     x_api_key: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
     Dependencia para autenticar devices ESP32 mediante API Key.
 
+    Para endpoints sin device_eui en el body: el device se identifica con
+    el header X-Device-EUI. La key se valida antes de tocar la DB y el
+    device se resuelve por el registro en memoria.
+
     Args:
+        x_device_eui: Device EUI en el header X-Device-EUI
         x_api_key: API Key en el header X-API-Key
         db: Sesion de base de datos
 
     Returns:
-        Device: Device autenticado
+        DeviceInfo: Device autenticado
 
     Raises:
-        HTTPException: Si la API Key es invalida
+        HTTPException: Si falta algun header, la API Key es invalida o el
+            device no existe
     """
-    from app.models.device import Device
-    from app.core.security import validate_device_api_key
+    if not x_device_eui:
+        raise _api_key_exception("X-Device-EUI header requerido")
 
-    if not x_api_key:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="X-API-Key header requerido"
-        )
+    require_device_api_key(x_device_eui, x_api_key)
 
-    # Buscar device por API key
-    # NOTA: Aqui deberiamos buscar en la DB si guardamos las API keys
-    # Por ahora validamos contra el device_eui
-    device = db.query(Device).filter(Device.device_eui == x_api_key.split("_")[0]).first()
+    device = await run_db(device_registry.get, db, x_device_eui)
 
     if not device:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="API Key invalida"
-        )
-
-    # Validar API key (opcional: implementar validacion HMAC)
-    # if not validate_device_api_key(x_api_key, device.device_eui):
-    #     raise HTTPException(
-    #         status_code=status.HTTP_401_UNAUTHORIZED,
-    #         detail="API Key invalida"
-    #     )
+        raise _api_key_exception("API Key invalida")
 
     return device
+
+
+# ============================================================
+# Variantes Async (DB_MODE=async)
+# ============================================================
+# Misma validacion que las anteriores sobre una AsyncSession: el cache de
+# usuarios trabaja con la Session sincronica subyacente (run_sync), cuyas
+# queries van por asyncpg sin salir del event loop.
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Variante de get_current_user con AsyncSession."""
+    token_data = _token_data(credentials)
+
+    user = await db.run_sync(user_registry.get, token_data.user_id)
+    if user is None:
+        raise _credentials_exception()
+
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """Variante de get_current_active_user con AsyncSession."""
+    return _ensure_active(current_user)
+
+
+async def require_admin_async(
+    current_user: User = Depends(get_current_active_user_async)
+) -> User:
+    """Variante de require_admin con AsyncSession."""
+    return _ensure_admin(current_user)
@@ -0,0 +1,24 @@
+"""
+Variantes async de los routers de auth, devices y readings (DB_MODE=async).
+
+Mismas rutas, schemas y validaciones que los routers sincronicos (cuyos
+helpers reutilizan), pero con AsyncSession sobre asyncpg: las queries no
+ocupan un thread del pool de FastAPI mientras esperan a PostgreSQL.
+
+Los servicios escritos para Session (device_registry, ingest_readings,
+aggregate_readings, etc.) se ejecutan con AsyncSession.run_sync(): su SQL
+pasa por la misma conexion asyncpg sin bloquear el event loop.
+"""
+
+from typing import Callable, TypeVar
+
+
+F = TypeVar("F", bound=Callable)
+
+
+def mirrors(endpoint: Callable) -> Callable[[F], F]:
+    """Copia el docstring del endpoint sincronico (OpenAPI identico en ambos modos)."""
+    def decorator(func: F) -> F:
+        func.__doc__ = endpoint.__doc__
+        return func
+    return decorator
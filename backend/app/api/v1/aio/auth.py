@@ -0,0 +1,54 @@
+"""
+Endpoints de autenticacion con AsyncSession (DB_MODE=async).
+"""
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_async_db, get_current_active_user_async
+from app.api.v1 import auth
+from app.api.v1.aio import mirrors
+from app.models.user import User
+from app.schemas.auth import Token, LoginRequest
+from app.schemas.user import User as UserSchema
+
+
+router = APIRouter(prefix="/auth", tags=["Authentication"])
+
+
+@router.post(
+    "/login",
+    response_model=Token,
+    summary="Login de usuario",
+    responses={503: {"description": "Demasiados logins en cola, reintentar"}},
+)
+@mirrors(auth.login)
+async def login(
+    login_data: LoginRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.scalar(select(User).where(User.email == login_data.email))
+
+    await auth.check_password(user, login_data.password)
+
+    token = auth.issue_token(user)
+    await db.commit()
+
+    return token
+
+
+@router.get("/me", response_model=UserSchema, summary="Obtener usuario actual")
+@mirrors(auth.get_current_user_info)
+async def get_current_user_info(
+    current_user: User = Depends(get_current_active_user_async)
+):
+    return current_user
+
+
+@router.post("/logout", summary="Logout de usuario")
+@mirrors(auth.logout)
+async def logout(
+    current_user: User = Depends(get_current_active_user_async)
+):
+    return {"message": "Logout exitoso"}
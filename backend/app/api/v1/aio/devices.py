@@ -0,0 +1,175 @@
+"""
+Endpoints de Devices con AsyncSession (DB_MODE=async).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_async_db, get_current_active_user_async, require_admin_async
+from app.api.v1 import devices
+from app.api.v1.aio import mirrors
+from app.models.device import Device
+from app.models.user import User
+from app.schemas.device import Device as DeviceSchema, DeviceCreate, DeviceUpdate, DeviceSchema as DeviceSchemaResponse
+from app.schemas.timeseries import DeviceSeries
+from app.services.device_registry import device_registry
+from app.services.last_seen import last_seen_tracker
+from app.services.timeseries import device_series
+
+
+router = APIRouter(prefix="/devices", tags=["Devices"])
+
+
+@router.get("", response_model=List[DeviceSchema], summary="Listar devices")
+@mirrors(devices.list_devices)
+async def list_devices(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    result = (await db.scalars(select(Device).offset(skip).limit(limit))).all()
+
+    last_seen_tracker.apply(result)
+
+    return result
+
+
+@router.get("/{device_id}", response_model=DeviceSchema, summary="Obtener device por ID")
+@mirrors(devices.get_device)
+async def get_device(
+    device_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    device = await db.get(Device, device_id)
+
+    if not device:
+        raise devices.device_not_found(device_id)
+
+    last_seen_tracker.apply([device])
+
+    return device
+
+
+@router.post("", response_model=DeviceSchema, status_code=status.HTTP_201_CREATED, summary="Crear device")
+@mirrors(devices.create_device)
+async def create_device(
+    device_data: DeviceCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin_async)
+):
+    existing_device = await db.scalar(select(Device.id).where(Device.device_eui == device_data.device_eui))
+    if existing_device:
+        raise devices.device_already_exists(device_data.device_eui)
+
+    device = Device(**device_data.model_dump())
+    db.add(device)
+    await db.commit()
+    await db.refresh(device)
+
+    device_registry.invalidate(device.device_eui)
+
+    return device
+
+
+@router.patch("/{device_id}", response_model=DeviceSchema, summary="Actualizar device")
+@mirrors(devices.update_device)
+async def update_device(
+    device_id: int,
+    device_data: DeviceUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin_async)
+):
+    device = await db.get(Device, device_id)
+
+    if not device:
+        raise devices.device_not_found(device_id)
+
+    previous_eui = device.device_eui
+
+    for field, value in device_data.model_dump(exclude_unset=True).items():
+        setattr(device, field, value)
+
+    await db.commit()
+    await db.refresh(device)
+
+    device_registry.invalidate(previous_eui, device.device_eui)
+
+    return device
+
+
+@router.delete("/{device_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar device")
+@mirrors(devices.delete_device)
+async def delete_device(
+    device_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_admin_async)
+):
+    device = await db.get(Device, device_id)
+
+    if not device:
+        raise devices.device_not_found(device_id)
+
+    device_eui = device.device_eui
+    await db.delete(device)
+    await db.commit()
+
+    device_registry.invalidate(device_eui)
+
+    return None
+
+
+@router.get("/{device_id}/schema", response_model=DeviceSchemaResponse, summary="Obtener schema del device")
+@mirrors(devices.get_device_schema)
+async def get_device_schema(
+    device_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    exists = await db.scalar(select(Device.id).where(Device.id == device_id))
+
+    if not exists:
+        raise devices.device_not_found(device_id)
+
+    return devices.example_device_schema(device_id)
+
+
+@router.get(
+    "/{device_id}/series",
+    response_model=DeviceSeries,
+    response_model_by_alias=True,
+    summary="Serie downsampleada de una variable (graficos)"
+)
+@mirrors(devices.get_device_series)
+async def get_device_series(
+    device_id: int,
+    variable: str = Query(..., min_length=1, max_length=64, description="Key del data_payload: temp_c, humidity_pct, etc."),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Desde (UTC, default: to - 24h)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Hasta (UTC, default: ahora)"),
+    points: int = Query(500, ge=10, le=5000, description="Cantidad maxima de puntos"),
+    mode: str = Query("lttb", description="lttb (puntos reales) | minmax (promedio/min/max por bucket)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    date_from, date_to = devices.series_range(mode, date_from, date_to)
+
+    exists = await db.scalar(select(Device.id).where(Device.id == device_id))
+    if not exists:
+        raise devices.device_not_found(device_id)
+
+    data, raw_count = await db.run_sync(device_series, device_id, variable, date_from, date_to, points, mode)
+
+    return DeviceSeries(
+        device_id=device_id,
+        variable=variable,
+        mode=mode,
+        date_from=date_from,
+        date_to=date_to,
+        points=points,
+        raw_count=raw_count,
+        data=data
+    )
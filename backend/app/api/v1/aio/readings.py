@@ -0,0 +1,149 @@
+"""
+Endpoints de SensorReadings con AsyncSession (DB_MODE=async).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, Response, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import device_api_key_checker, get_async_db, get_current_active_user_async
+from app.api.v1 import readings
+from app.api.v1.aio import mirrors
+from app.core.config import settings
+from app.models.sensor_reading import SensorReading
+from app.models.user import User
+from app.schemas.sensor_reading import (
+    SensorReadingCreate,
+    SensorReading as SensorReadingSchema,
+    SensorReadingBatchCreate,
+    SensorReadingBatchResponse,
+)
+from app.schemas.timeseries import AggregateResponse
+from app.services.aggregation import aggregate_readings
+from app.services.device_registry import device_registry
+from app.services.ingestion import ingest_readings
+from app.services.last_seen import last_seen_tracker
+
+
+router = APIRouter(prefix="/readings", tags=["Sensor Readings"])
+
+
+@router.post(
+    "",
+    response_model=SensorReadingSchema,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear reading (ESP32)",
+    responses={
+        202: {"description": "Reading encolado (INGEST_MODE=buffered)"},
+        401: {"description": "X-API-Key faltante o invalida (DEVICE_API_KEY_REQUIRED=true)"},
+        503: {"description": "Buffer de ingesta lleno, reintentar"},
+    },
+)
+@mirrors(readings.create_reading)
+async def create_reading(
+    reading_data: SensorReadingCreate,
+    x_api_key: Optional[str] = Header(None, description="API Key del device"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    readings.authenticate_reading(reading_data, x_api_key)
+
+    if settings.ingest_mode == "buffered":
+        return readings.enqueue_reading(reading_data)
+
+    device = await db.run_sync(device_registry.get, reading_data.device_eui)
+
+    if not device:
+        raise readings.device_not_found(reading_data.device_eui)
+
+    reading = readings.new_reading(device.id, reading_data)
+
+    db.add(reading)
+
+    await db.run_sync(last_seen_tracker.record, {device.id}, datetime.utcnow())
+
+    await db.commit()
+    await db.refresh(reading)
+
+    return reading
+
+
+@router.post(
+    "/batch",
+    response_model=SensorReadingBatchResponse,
+    summary="Crear readings en batch (gateway)",
+    responses={401: {"description": "X-API-Key faltante (DEVICE_API_KEY_REQUIRED=true)"}},
+)
+@mirrors(readings.create_readings_batch)
+async def create_readings_batch(
+    batch_data: SensorReadingBatchCreate,
+    x_api_key: Optional[str] = Header(None, description="API Key del device"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    authorize = device_api_key_checker(x_api_key)
+    results = await db.run_sync(ingest_readings, batch_data.readings, authorize=authorize)
+
+    return readings.batch_response(results)
+
+
+@router.get(
+    "",
+    response_model=List[SensorReadingSchema],
+    summary="Listar readings",
+    responses={200: {"headers": {"X-Next-Cursor": {"description": "Cursor de la pagina siguiente (si hay mas readings)"}}}},
+)
+@mirrors(readings.list_readings)
+async def list_readings(
+    response: Response,
+    device_id: Optional[int] = Query(None, description="Filtrar por device ID"),
+    date_from: Optional[datetime] = Query(None, description="Fecha desde (UTC)"),
+    date_to: Optional[datetime] = Query(None, description="Fecha hasta (UTC)"),
+    cursor: Optional[str] = Query(None, description="Cursor de X-Next-Cursor de la pagina anterior"),
+    skip: int = Query(0, ge=0, description="Registros a saltar (deprecado, usar cursor)"),
+    limit: int = Query(100, ge=1, le=1000, description="Registros a retornar"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    query = readings.readings_page_query(device_id, date_from, date_to, cursor, skip, limit)
+    rows = (await db.scalars(query)).all()
+
+    return readings.readings_page(rows, limit, response)
+
+
+@router.get(
+    "/aggregate",
+    response_model=AggregateResponse,
+    response_model_by_alias=True,
+    summary="Agregar variables por bucket de tiempo"
+)
+@mirrors(readings.aggregate)
+async def aggregate(
+    device_id: List[int] = Query(..., description="Devices a incluir (repetible: ?device_id=1&device_id=2)"),
+    variable: List[str] = Query(..., description="Variables del data_payload (repetible)"),
+    bucket: str = Query("1h", description="Tamano del bucket: 1m, 5m, 15m, 30m, 1h, 6h, 12h, 1d"),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Desde (UTC, default: to - 24h)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Hasta (UTC, default: ahora)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    date_from, date_to = readings.aggregate_range(bucket, device_id, variable, date_from, date_to)
+
+    series = await db.run_sync(aggregate_readings, device_id, variable, bucket, date_from, date_to)
+
+    return AggregateResponse(bucket=bucket, date_from=date_from, date_to=date_to, series=series)
+
+
+@router.get("/{reading_id}", response_model=SensorReadingSchema, summary="Obtener reading por ID")
+@mirrors(readings.get_reading)
+async def get_reading(
+    reading_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    reading = (await db.scalars(select(SensorReading).where(SensorReading.id == reading_id))).first()
+
+    if not reading:
+        raise readings.reading_not_found(reading_id)
+
+    return reading
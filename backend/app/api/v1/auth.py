@@ -3,51 +3,66 @@ Endpoints de autenticacion (Login, Logout, Get Current User).
 """
 
 from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user
-from app.core.security import verify_password, create_access_token
+from app.core.concurrency import run_db
+from app.core.security import create_access_token
 from app.models.user import User
 from app.schemas.auth import Token, LoginRequest
 from app.schemas.user import User as UserSchema
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
 
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/login", response_model=Token, summary="Login de usuario")
-def login(
-    login_data: LoginRequest,
-    db: Session = Depends(get_db)
-):
-    """
-    Login de usuario con email y password.
+# ============================================================
+# Helpers (compartidos con la variante async)
+# ============================================================
 
-    Retorna un token JWT que debe ser usado en requests subsiguientes
-    en el header Authorization: Bearer <token>
+def invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Email o password incorrectos",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-    Args:
-        login_data: Email y password del usuario
-        db: Sesion de base de datos
 
-    Returns:
-        Token: access_token y token_type
+async def check_password(user: Optional[User], password: str) -> None:
+    """
+    Verifica la password en el pool de bcrypt (401 si no coincide).
 
-    Raises:
-        HTTPException 401: Si las credenciales son incorrectas
+    Si el hash guardado usa otro cost que BCRYPT_ROUNDS se reemplaza en el
+    usuario por uno nuevo; el caller lo guarda con el commit del login.
     """
-    # Buscar usuario por email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    if user is None:
+        raise invalid_credentials()
 
-    # Verificar que el usuario existe y la password es correcta
-    if not user or not verify_password(login_data.password, user.password_hash):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    except PasswordHasherBusy as e:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email o password incorrectos",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
         )
 
+    if not valid:
+        raise invalid_credentials()
+
+    if new_hash is not None:
+        user.password_hash = new_hash
+
+
+def issue_token(user: User) -> dict:
+    """
+    Verifica que el usuario este activo y arma su token JWT.
+
+    Marca last_login_at en el usuario; el caller hace el commit.
+    """
     # Verificar que el usuario este activo
     if not user.is_active:
         raise HTTPException(
@@ -62,7 +77,6 @@ def login(
 
     # Actualizar last_login_at
     user.last_login_at = datetime.utcnow()
-    db.commit()
 
     return {
         "access_token": access_token,
@@ -70,6 +84,53 @@ def login(
     }
 
 
+# ============================================================
+# Endpoints
+# ============================================================
+
+
+@router.post(
+    "/login",
+    response_model=Token,
+    summary="Login de usuario",
+    responses={503: {"description": "Demasiados logins en cola, reintentar"}},
+)
+async def login(
+    login_data: LoginRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Login de usuario con email y password.
+
+    Retorna un token JWT que debe ser usado en requests subsiguientes
+    en el header Authorization: Bearer <token>
+
+    bcrypt corre en un pool propio (PASSWORD_HASH_WORKERS): un pico de
+    logins no ocupa los threads que atienden al resto de los endpoints.
+
+    Args:
+        login_data: Email y password del usuario
+        db: Sesion de base de datos
+
+    Returns:
+        Token: access_token y token_type
+
+    Raises:
+        HTTPException 401: Si las credenciales son incorrectas
+        HTTPException 503: Si la cola de verificaciones de password esta llena
+    """
+    # Buscar usuario por email
+    user = await run_db(lambda: db.query(User).filter(User.email == login_data.email).first())
+
+    # Verificar que el usuario existe y la password es correcta
+    await check_password(user, login_data.password)
+
+    token = issue_token(user)
+    await run_db(db.commit)
+
+    return token
+
+
 @router.get("/me", response_model=UserSchema, summary="Obtener usuario actual")
 def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
@@ -1,20 +1,106 @@
 """
 Endpoints de Devices (GET, POST, PATCH, DELETE, schema).
+
+Las validaciones compartidas con la variante async (app.api.v1.aio.devices)
+estan en los helpers de este modulo.
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, get_current_active_user, require_admin
 from app.models.device import Device
 from app.models.user import User
 from app.schemas.device import Device as DeviceSchema, DeviceCreate, DeviceUpdate, DeviceSchema as DeviceSchemaResponse, DeviceVariableSchema
+from app.schemas.timeseries import DeviceSeries
+from app.services.device_registry import device_registry
+from app.services.last_seen import last_seen_tracker
+from app.services.timeseries import SERIES_MODES, device_series, to_utc_naive
 
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
 
+# ============================================================
+# Helpers (compartidos con la variante async)
+# ============================================================
+
+def device_not_found(device_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Device con ID {device_id} no encontrado"
+    )
+
+
+def device_already_exists(device_eui: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Device con EUI '{device_eui}' ya existe"
+    )
+
+
+def example_device_schema(device_id: int) -> DeviceSchemaResponse:
+    """Schema de variables de ejemplo (hasta auto-descubrirlo del ultimo reading)."""
+    return DeviceSchemaResponse(
+        device_id=device_id,
+        variables=[
+            DeviceVariableSchema(
+                key="temp_c",
+                label="Temperatura",
+                unit="°C",
+                type="float",
+                color="#ff6b6b"
+            ),
+            DeviceVariableSchema(
+                key="humidity_pct",
+                label="Humedad Relativa",
+                unit="%",
+                type="float",
+                color="#4ecdc4"
+            ),
+            DeviceVariableSchema(
+                key="battery_mv",
+                label="Bateria",
+                unit="mV",
+                type="int",
+                color="#95e1d3"
+            ),
+        ]
+    )
+
+
+def series_range(mode: str, date_from: Optional[datetime], date_to: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """
+    Valida el modo de GET /devices/{id}/series y resuelve el rango (UTC naive).
+
+    Raises:
+        HTTPException 400: Si el rango o el modo son invalidos
+    """
+    if mode not in SERIES_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"mode debe ser uno de: {', '.join(SERIES_MODES)}"
+        )
+
+    date_to = to_utc_naive(date_to) if date_to else datetime.utcnow()
+    date_from = to_utc_naive(date_from) if date_from else date_to - timedelta(days=1)
+
+    if date_from >= date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' debe ser anterior a 'to'"
+        )
+
+    return date_from, date_to
+
+
+# ============================================================
+# Endpoints
+# ============================================================
+
+
 @router.get("", response_model=List[DeviceSchema], summary="Listar devices")
 def list_devices(
     skip: int = 0,
@@ -42,6 +128,10 @@ def list_devices(
         pass
 
     devices = query.offset(skip).limit(limit).all()
+
+    # last_seen_at fresco (puede no estar volcado aun a la tabla)
+    last_seen_tracker.apply(devices)
+
     return devices
 
 
@@ -68,10 +158,9 @@ def get_device(
     device = db.query(Device).filter(Device.id == device_id).first()
 
     if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Device con ID {device_id} no encontrado"
-        )
+        raise device_not_found(device_id)
+
+    last_seen_tracker.apply([device])
 
     return device
 
@@ -99,10 +188,7 @@ def create_device(
     # Verificar que el device_eui no exista
     existing_device = db.query(Device).filter(Device.device_eui == device_data.device_eui).first()
     if existing_device:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Device con EUI '{device_data.device_eui}' ya existe"
-        )
+        raise device_already_exists(device_data.device_eui)
 
     # Crear device
     device = Device(**device_data.model_dump())
@@ -110,6 +196,8 @@ def create_device(
     db.commit()
     db.refresh(device)
 
+    device_registry.invalidate(device.device_eui)
+
     return device
 
 
@@ -138,10 +226,9 @@ def update_device(
     device = db.query(Device).filter(Device.id == device_id).first()
 
     if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Device con ID {device_id} no encontrado"
-        )
+        raise device_not_found(device_id)
+
+    previous_eui = device.device_eui
 
     # Actualizar campos
     update_data = device_data.model_dump(exclude_unset=True)
@@ -151,6 +238,9 @@ def update_device(
     db.commit()
     db.refresh(device)
 
+    # Invalidar el EUI anterior y el nuevo (si cambio)
+    device_registry.invalidate(previous_eui, device.device_eui)
+
     return device
 
 
@@ -174,14 +264,14 @@ def delete_device(
     device = db.query(Device).filter(Device.id == device_id).first()
 
     if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Device con ID {device_id} no encontrado"
-        )
+        raise device_not_found(device_id)
 
+    device_eui = device.device_eui
     db.delete(device)
     db.commit()
 
+    device_registry.invalidate(device_eui)
+
     return None
 
 
@@ -214,38 +304,68 @@ def get_device_schema(
     device = db.query(Device).filter(Device.id == device_id).first()
 
     if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Device con ID {device_id} no encontrado"
-        )
+        raise device_not_found(device_id)
 
     # TODO: Auto-descubrir schema del ultimo reading
     # Por ahora retornamos un schema de ejemplo
-    schema = DeviceSchemaResponse(
-        device_id=device.id,
-        variables=[
-            DeviceVariableSchema(
-                key="temp_c",
-                label="Temperatura",
-                unit="°C",
-                type="float",
-                color="#ff6b6b"
-            ),
-            DeviceVariableSchema(
-                key="humidity_pct",
-                label="Humedad Relativa",
-                unit="%",
-                type="float",
-                color="#4ecdc4"
-            ),
-            DeviceVariableSchema(
-                key="battery_mv",
-                label="Bateria",
-                unit="mV",
-                type="int",
-                color="#95e1d3"
-            ),
-        ]
-    )
+    return example_device_schema(device.id)
+
+
+@router.get(
+    "/{device_id}/series",
+    response_model=DeviceSeries,
+    response_model_by_alias=True,
+    summary="Serie downsampleada de una variable (graficos)"
+)
+def get_device_series(
+    device_id: int,
+    variable: str = Query(..., min_length=1, max_length=64, description="Key del data_payload: temp_c, humidity_pct, etc."),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Desde (UTC, default: to - 24h)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Hasta (UTC, default: ahora)"),
+    points: int = Query(500, ge=10, le=5000, description="Cantidad maxima de puntos"),
+    mode: str = Query("lttb", description="lttb (puntos reales) | minmax (promedio/min/max por bucket)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Obtiene la serie temporal de una variable con a lo sumo `points` puntos.
+
+    El tamano de la respuesta es constante sin importar el rango pedido
+    (24h, 7d, 30d...), asi los graficos no quedan truncados ni necesitan
+    paginar readings crudos.
+
+    Args:
+        device_id: ID del device
+        variable: Variable a graficar
+        date_from: Inicio del rango (UTC)
+        date_to: Fin del rango (UTC)
+        points: Cantidad maxima de puntos
+        mode: Algoritmo de downsampling
+        db: Sesion de base de datos
+        current_user: Usuario autenticado
+
+    Returns:
+        DeviceSeries: Serie downsampleada
 
-    return schema
+    Raises:
+        HTTPException 400: Si el rango o el modo son invalidos
+        HTTPException 404: Si el device no existe
+    """
+    date_from, date_to = series_range(mode, date_from, date_to)
+
+    exists = db.query(Device.id).filter(Device.id == device_id).first()
+    if not exists:
+        raise device_not_found(device_id)
+
+    data, raw_count = device_series(db, device_id, variable, date_from, date_to, points, mode)
+
+    return DeviceSeries(
+        device_id=device_id,
+        variable=variable,
+        mode=mode,
+        date_from=date_from,
+        date_to=date_to,
+        points=points,
+        raw_count=raw_count,
+        data=data
+    )
@@ -1,25 +1,244 @@
 """
 Endpoints de SensorReadings (POST desde ESP32, GET con filtros).
+
+Las validaciones y queries compartidas con la variante async
+(app.api.v1.aio.readings) estan en los helpers de este modulo.
 """
 
 from datetime import datetime, timedelta
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_active_user
-from app.models.device import Device
+from app.api.deps import device_api_key_checker, get_db, get_current_active_user, require_device_api_key
+from app.core.config import settings
 from app.models.sensor_reading import SensorReading
 from app.models.user import User
-from app.schemas.sensor_reading import SensorReadingCreate, SensorReading as SensorReadingSchema
+from app.schemas.sensor_reading import (
+    SensorReadingCreate,
+    SensorReading as SensorReadingSchema,
+    SensorReadingBatchCreate,
+    SensorReadingBatchItemResult,
+    SensorReadingBatchResponse,
+)
+from app.schemas.timeseries import AggregateResponse
+from app.services.aggregation import BUCKET_SIZES, MAX_AGGREGATE_BUCKETS, aggregate_readings, count_buckets
+from app.services.device_registry import device_registry
+from app.services.ingestion import STATUS_CREATED, calculate_quality_score, ingest_readings
+from app.services.last_seen import last_seen_tracker
+from app.services.timeseries import to_utc_naive
+from app.services.write_buffer import WriteBufferUnavailable, write_buffer
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 
 router = APIRouter(prefix="/readings", tags=["Sensor Readings"])
 
 
-@router.post("", response_model=SensorReadingSchema, status_code=status.HTTP_201_CREATED, summary="Crear reading (ESP32)")
+# ============================================================
+# Helpers (compartidos con la variante async)
+# ============================================================
+
+def authenticate_reading(reading_data: SensorReadingCreate, x_api_key: Optional[str]) -> None:
+    """
+    Valida la X-API-Key del device si DEVICE_API_KEY_REQUIRED=true (sin DB).
+
+    Raises:
+        HTTPException 401: Si falta la API Key o no corresponde al device
+    """
+    if settings.device_api_key_required:
+        require_device_api_key(reading_data.device_eui, x_api_key)
+
+
+def enqueue_reading(reading_data: SensorReadingCreate) -> JSONResponse:
+    """Encola el reading en el write buffer (INGEST_MODE=buffered) y arma el 202."""
+    try:
+        write_buffer.submit(reading_data)
+    except WriteBufferUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "queued", "device_eui": reading_data.device_eui}
+    )
+
+
+def device_not_found(device_eui: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Device con EUI '{device_eui}' no encontrado"
+    )
+
+
+def new_reading(device_id: int, reading_data: SensorReadingCreate) -> SensorReading:
+    """Arma el SensorReading de una medicion (quality_score incluido)."""
+    return SensorReading(
+        device_id=device_id,
+        data_payload=reading_data.data_payload,
+        # Calcular quality_score basico (en produccion seria mas sofisticado)
+        quality_score=calculate_quality_score(reading_data.data_payload),
+        timestamp=reading_data.timestamp or datetime.utcnow()
+    )
+
+
+def batch_response(results: Sequence[SensorReadingBatchItemResult]) -> SensorReadingBatchResponse:
+    created = sum(1 for result in results if result.status == STATUS_CREATED)
+
+    return SensorReadingBatchResponse(
+        received=len(results),
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+
+def readings_page_query(
+    device_id: Optional[int],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+) -> Select:
+    """
+    Arma el SELECT de una pagina de GET /readings (con una fila extra).
+
+    Raises:
+        HTTPException 400: Si el cursor es invalido o se combina con skip
+    """
+    query = select(SensorReading)
+
+    # Fechas como UTC naive (igual que la columna): una comparacion contra
+    # timestamptz castea la columna e impide el pruning de particiones
+    if date_from:
+        date_from = to_utc_naive(date_from)
+    if date_to:
+        date_to = to_utc_naive(date_to)
+
+    # Aplicar filtros
+    if device_id:
+        query = query.where(SensorReading.device_id == device_id)
+
+    if date_from:
+        query = query.where(SensorReading.timestamp >= date_from)
+
+    if date_to:
+        query = query.where(SensorReading.timestamp <= date_to)
+    else:
+        # Por defecto, solo ultimas 24 horas si no se especifica date_to
+        if not date_from:
+            date_from = datetime.utcnow() - timedelta(days=1)
+            query = query.where(SensorReading.timestamp >= date_from)
+
+    if cursor:
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se puede combinar cursor con skip"
+            )
+        try:
+            cursor_timestamp, cursor_id = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        # Keyset: solo filas "despues" del cursor en el orden (timestamp DESC, id DESC).
+        # La condicion redundante sobre timestamp acota el range scan de
+        # idx_readings_device_time; la comparacion de tuplas desempata por id.
+        query = query.where(
+            SensorReading.timestamp <= cursor_timestamp,
+            tuple_(SensorReading.timestamp, SensorReading.id) < tuple_(cursor_timestamp, cursor_id)
+        )
+
+    # Ordenar por timestamp descendente (mas recientes primero); id desempata
+    query = query.order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+
+    # Se pide una fila extra para saber si hay pagina siguiente
+    return query.offset(skip).limit(limit + 1)
+
+
+def readings_page(readings: Sequence[SensorReading], limit: int, response: Response) -> Sequence[SensorReading]:
+    """Recorta la fila extra y, si la habia, agrega el header X-Next-Cursor."""
+    if len(readings) > limit:
+        readings = readings[:limit]
+        last = readings[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.timestamp, last.id)
+
+    return readings
+
+
+def aggregate_range(
+    bucket: str,
+    device_id: List[int],
+    variable: List[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> Tuple[datetime, datetime]:
+    """
+    Valida los parametros de GET /readings/aggregate y resuelve el rango (UTC naive).
+
+    Raises:
+        HTTPException 400: Si el bucket o el rango son invalidos, o el
+            resultado superaria MAX_AGGREGATE_BUCKETS filas
+    """
+    if bucket not in BUCKET_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"bucket debe ser uno de: {', '.join(BUCKET_SIZES)}"
+        )
+
+    date_to = to_utc_naive(date_to) if date_to else datetime.utcnow()
+    date_from = to_utc_naive(date_from) if date_from else date_to - timedelta(days=1)
+
+    if date_from >= date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' debe ser anterior a 'to'"
+        )
+
+    expected = count_buckets(bucket, date_from, date_to) * len(set(device_id)) * len(set(variable))
+    if expected > MAX_AGGREGATE_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"El resultado tendria hasta {expected} buckets (maximo {MAX_AGGREGATE_BUCKETS}). "
+                "Usar un bucket mas grande o un rango menor."
+            )
+        )
+
+    return date_from, date_to
+
+
+def reading_not_found(reading_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Reading con ID {reading_id} no encontrado"
+    )
+
+
+# ============================================================
+# Endpoints
+# ============================================================
+
+
+@router.post(
+    "",
+    response_model=SensorReadingSchema,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear reading (ESP32)",
+    responses={
+        202: {"description": "Reading encolado (INGEST_MODE=buffered)"},
+        401: {"description": "X-API-Key faltante o invalida (DEVICE_API_KEY_REQUIRED=true)"},
+        503: {"description": "Buffer de ingesta lleno, reintentar"},
+    },
+)
 def create_reading(
     reading_data: SensorReadingCreate,
+    x_api_key: Optional[str] = Header(None, description="API Key del device"),
     db: Session = Depends(get_db)
 ):
     """
@@ -28,44 +247,44 @@ def create_reading(
     Este es el endpoint CRITICO que los devices ESP32 llaman cada vez
     que toman una medicion. Debe ser rapido y eficiente.
 
-    NOTA: En esta version inicial no requiere autenticacion para simplificar.
-    En produccion deberia validar X-API-Key header.
+    Con DEVICE_API_KEY_REQUIRED=true el header X-API-Key debe traer la
+    API Key del device (generate_device_api_key). La validacion no consulta
+    la DB: las keys ya verificadas quedan en memoria por device_eui.
+
+    Con INGEST_MODE=buffered el reading se encola y se responde 202 sin
+    tocar la base de datos; el write buffer lo escribe en un group commit.
 
     Args:
         reading_data: Datos de la medicion (device_eui, data_payload, timestamp)
+        x_api_key: API Key del device (header X-API-Key)
         db: Sesion de base de datos
 
     Returns:
-        SensorReadingSchema: Reading creado
+        SensorReadingSchema: Reading creado (201), o confirmacion de encolado (202)
 
     Raises:
+        HTTPException 401: Si la API Key falta o es invalida
         HTTPException 404: Si el device no existe
+        HTTPException 503: Si el buffer de ingesta esta lleno
     """
-    # Buscar device por EUI
-    device = db.query(Device).filter(Device.device_eui == reading_data.device_eui).first()
+    authenticate_reading(reading_data, x_api_key)
 
-    if not device:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Device con EUI '{reading_data.device_eui}' no encontrado"
-        )
+    if settings.ingest_mode == "buffered":
+        return enqueue_reading(reading_data)
+
+    # Resolver device por EUI (cache en memoria, sin query en el hot path)
+    device = device_registry.get(db, reading_data.device_eui)
 
-    # Calcular quality_score basico (en produccion seria mas sofisticado)
-    quality_score = calculate_quality_score(reading_data.data_payload)
+    if not device:
+        raise device_not_found(reading_data.device_eui)
 
     # Crear reading
-    reading = SensorReading(
-        device_id=device.id,
-        data_payload=reading_data.data_payload,
-        quality_score=quality_score,
-        timestamp=reading_data.timestamp or datetime.utcnow(),
-        processed=False
-    )
+    reading = new_reading(device.id, reading_data)
 
     db.add(reading)
 
-    # Actualizar last_seen_at del device
-    device.last_seen_at = datetime.utcnow()
+    # Actualizar last_seen_at del device (write-behind, sin fila caliente)
+    last_seen_tracker.record(db, {device.id}, datetime.utcnow())
 
     db.commit()
     db.refresh(reading)
@@ -73,12 +292,60 @@ def create_reading(
     return reading
 
 
-@router.get("", response_model=List[SensorReadingSchema], summary="Listar readings")
+@router.post(
+    "/batch",
+    response_model=SensorReadingBatchResponse,
+    summary="Crear readings en batch (gateway)",
+    responses={401: {"description": "X-API-Key faltante (DEVICE_API_KEY_REQUIRED=true)"}},
+)
+def create_readings_batch(
+    batch_data: SensorReadingBatchCreate,
+    x_api_key: Optional[str] = Header(None, description="API Key del device"),
+    db: Session = Depends(get_db)
+):
+    """
+    Crea multiples sensor readings en un solo request.
+
+    Pensado para gateways que acumulan mediciones de uno o varios devices.
+    Todo el batch se resuelve con una query de devices, un INSERT multi-fila,
+    un UPDATE de last_seen_at y un unico commit.
+
+    Las mediciones de devices inexistentes no hacen fallar el batch:
+    se informan individualmente en `results` con status "device_not_found".
+
+    Con DEVICE_API_KEY_REQUIRED=true se exige X-API-Key; las mediciones de
+    devices a los que no corresponde la key se informan con status
+    "unauthorized" (sin buscar el device en la DB).
+
+    Args:
+        batch_data: Lista de mediciones (device_eui, data_payload, timestamp)
+        x_api_key: API Key del device (header X-API-Key)
+        db: Sesion de base de datos
+
+    Returns:
+        SensorReadingBatchResponse: Resumen y resultado por medicion
+
+    Raises:
+        HTTPException 401: Si se requiere API Key y falta el header
+    """
+    results = ingest_readings(db, batch_data.readings, authorize=device_api_key_checker(x_api_key))
+
+    return batch_response(results)
+
+
+@router.get(
+    "",
+    response_model=List[SensorReadingSchema],
+    summary="Listar readings",
+    responses={200: {"headers": {"X-Next-Cursor": {"description": "Cursor de la pagina siguiente (si hay mas readings)"}}}},
+)
 def list_readings(
+    response: Response,
     device_id: Optional[int] = Query(None, description="Filtrar por device ID"),
     date_from: Optional[datetime] = Query(None, description="Fecha desde (UTC)"),
     date_to: Optional[datetime] = Query(None, description="Fecha hasta (UTC)"),
-    skip: int = Query(0, ge=0, description="Registros a saltar"),
+    cursor: Optional[str] = Query(None, description="Cursor de X-Next-Cursor de la pagina anterior"),
+    skip: int = Query(0, ge=0, description="Registros a saltar (deprecado, usar cursor)"),
     limit: int = Query(100, ge=1, le=1000, description="Registros a retornar"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
@@ -86,42 +353,76 @@ def list_readings(
     """
     Lista sensor readings con filtros opcionales.
 
+    Paginacion por cursor: si hay mas resultados, la respuesta incluye el
+    header `X-Next-Cursor`; para la pagina siguiente se repite el request con
+    los mismos filtros y `cursor=<valor>`. A diferencia de `skip`, el costo
+    no crece con la profundidad de la pagina.
+
     Args:
+        response: Respuesta HTTP (para el header X-Next-Cursor)
         device_id: Filtrar por device ID
         date_from: Fecha desde (UTC)
         date_to: Fecha hasta (UTC)
-        skip: Registros a saltar (paginacion)
+        cursor: Cursor opaco de la pagina anterior
+        skip: Registros a saltar (paginacion por offset, deprecado)
         limit: Registros a retornar (max 1000)
         db: Sesion de base de datos
         current_user: Usuario autenticado
 
     Returns:
         List[SensorReadingSchema]: Lista de readings
+
+    Raises:
+        HTTPException 400: Si el cursor es invalido o se combina con skip
+    """
+    query = readings_page_query(device_id, date_from, date_to, cursor, skip, limit)
+    readings = db.scalars(query).all()
+
+    return readings_page(readings, limit, response)
+
+
+@router.get(
+    "/aggregate",
+    response_model=AggregateResponse,
+    response_model_by_alias=True,
+    summary="Agregar variables por bucket de tiempo"
+)
+def aggregate(
+    device_id: List[int] = Query(..., description="Devices a incluir (repetible: ?device_id=1&device_id=2)"),
+    variable: List[str] = Query(..., description="Variables del data_payload (repetible)"),
+    bucket: str = Query("1h", description="Tamano del bucket: 1m, 5m, 15m, 30m, 1h, 6h, 12h, 1d"),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Desde (UTC, default: to - 24h)"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Hasta (UTC, default: ahora)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
     """
-    query = db.query(SensorReading)
+    Calcula avg/min/max/stddev/count por bucket de tiempo.
 
-    # Aplicar filtros
-    if device_id:
-        query = query.filter(SensorReading.device_id == device_id)
+    Soporta varios devices y varias variables en una sola llamada. Todo el
+    calculo se hace en PostgreSQL (date_bin + GROUP BY).
 
-    if date_from:
-        query = query.filter(SensorReading.timestamp >= date_from)
+    Args:
+        device_id: IDs de devices
+        variable: Keys de data_payload (temp_c, humidity_pct...)
+        bucket: Tamano del bucket
+        date_from: Inicio del rango (UTC)
+        date_to: Fin del rango (UTC)
+        db: Sesion de base de datos
+        current_user: Usuario autenticado
 
-    if date_to:
-        query = query.filter(SensorReading.timestamp <= date_to)
-    else:
-        # Por defecto, solo ultimas 24 horas si no se especifica date_to
-        if not date_from:
-            date_from = datetime.utcnow() - timedelta(days=1)
-            query = query.filter(SensorReading.timestamp >= date_from)
+    Returns:
+        AggregateResponse: Una serie por (device, variable)
 
-    # Ordenar por timestamp descendente (mas recientes primero)
-    query = query.order_by(SensorReading.timestamp.desc())
+    Raises:
+        HTTPException 400: Si el bucket o el rango son invalidos, o el
+            resultado superaria MAX_AGGREGATE_BUCKETS filas
+    """
+    date_from, date_to = aggregate_range(bucket, device_id, variable, date_from, date_to)
 
-    # Aplicar paginacion
-    readings = query.offset(skip).limit(limit).all()
+    series = aggregate_readings(db, device_id, variable, bucket, date_from, date_to)
 
-    return readings
+    return AggregateResponse(bucket=bucket, date_from=date_from, date_to=date_to, series=series)
 
 
 @router.get("/{reading_id}", response_model=SensorReadingSchema, summary="Obtener reading por ID")
@@ -147,41 +448,7 @@ def get_reading(
     reading = db.query(SensorReading).filter(SensorReading.id == reading_id).first()
 
     if not reading:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Reading con ID {reading_id} no encontrado"
-        )
+        raise reading_not_found(reading_id)
 
     return reading
 
-
-def calculate_quality_score(data_payload: dict) -> float:
-    """
-    Calcula un score de calidad basico para el reading.
-
-    En produccion, esto seria mas sofisticado:
-    - Detectar valores fuera de rango fisico
-    - Detectar cambios bruscos sospechosos
-    - Verificar timestamp valido
-    - etc.
-
-    Args:
-        data_payload: Datos del sensor
-
-    Returns:
-        float: Score entre 0.0 y 1.0
-    """
-    score = 1.0
-
-    # Verificar que haya al menos una variable
-    if not data_payload or len(data_payload) == 0:
-        return 0.0
-
-    # Detectar valores de error (-999)
-    for key, value in data_payload.items():
-        if isinstance(value, (int, float)):
-            if value == -999 or value == -999.0:
-                score -= 0.3
-
-    # Asegurar que el score este entre 0 y 1
-    return max(0.0, min(1.0, score))
@@ -0,0 +1,142 @@
+"""
+Endpoints de Politicas de Retencion (CRUD + reporte dry-run).
+"""
+
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, require_admin, require_super_admin
+from app.models.location import LocationGroup
+from app.models.retention import RetentionPolicy
+from app.models.user import User
+from app.schemas.retention import (
+    RetentionPolicy as RetentionPolicySchema,
+    RetentionPolicyCreate,
+    RetentionPolicyUpdate,
+    RetentionReport,
+)
+from app.services.retention import apply_retention
+
+
+router = APIRouter(prefix="/retention-policies", tags=["Retention"])
+
+
+def _get_policy_or_404(db: Session, policy_id: int) -> RetentionPolicy:
+    policy = db.query(RetentionPolicy).filter(RetentionPolicy.id == policy_id).first()
+    if not policy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Politica de retencion con ID {policy_id} no encontrada"
+        )
+    return policy
+
+
+@router.get("", response_model=List[RetentionPolicySchema], summary="Listar politicas de retencion")
+def list_retention_policies(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Lista las politicas de retencion (solo admins).
+
+    Returns:
+        List[RetentionPolicySchema]: Politicas ordenadas por ID
+    """
+    return db.query(RetentionPolicy).order_by(RetentionPolicy.id).all()
+
+
+@router.get("/report", response_model=RetentionReport, summary="Simular politicas de retencion")
+def retention_report(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Dry-run: que eliminaria hoy el job de retencion, sin modificar nada.
+
+    Reporta por accion las filas y los bytes estimados que se liberarian
+    (drops de particion, DELETE de readings y DELETE de rollups).
+
+    Returns:
+        RetentionReport: Acciones planificadas con totales
+    """
+    return apply_retention(db, dry_run=True)
+
+
+@router.post("", response_model=RetentionPolicySchema, status_code=status.HTTP_201_CREATED, summary="Crear politica de retencion")
+def create_retention_policy(
+    policy_data: RetentionPolicyCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_super_admin)
+):
+    """
+    Crea una politica de retencion (solo super admins).
+
+    Raises:
+        HTTPException 400: Si el location_group no existe
+        HTTPException 409: Si ya hay una politica para ese alcance
+    """
+    if policy_data.location_group_id is not None:
+        exists = db.query(LocationGroup.id).filter(LocationGroup.id == policy_data.location_group_id).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"LocationGroup con ID {policy_data.location_group_id} no existe"
+            )
+
+    policy = RetentionPolicy(**policy_data.model_dump())
+    db.add(policy)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya existe una politica de retencion para ese alcance"
+        )
+    db.refresh(policy)
+    return policy
+
+
+@router.patch("/{policy_id}", response_model=RetentionPolicySchema, summary="Actualizar politica de retencion")
+def update_retention_policy(
+    policy_id: int,
+    policy_data: RetentionPolicyUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_super_admin)
+):
+    """
+    Actualiza dias, nombre o estado de una politica (solo super admins).
+
+    Un campo de dias enviado como null pasa a "conservar para siempre".
+
+    Raises:
+        HTTPException 404: Si la politica no existe
+    """
+    policy = _get_policy_or_404(db, policy_id)
+
+    for field, value in policy_data.model_dump(exclude_unset=True).items():
+        setattr(policy, field, value)
+
+    db.commit()
+    db.refresh(policy)
+    return policy
+
+
+@router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Eliminar politica de retencion")
+def delete_retention_policy(
+    policy_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_super_admin)
+):
+    """
+    Elimina una politica (solo super admins).
+
+    Raises:
+        HTTPException 404: Si la politica no existe
+    """
+    policy = _get_policy_or_404(db, policy_id)
+    db.delete(policy)
+    db.commit()
+    return None
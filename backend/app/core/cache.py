@@ -0,0 +1,207 @@
+"""
+Sistema de Monitoreo IoT
+Utilidades de Cache en Proceso
+
+Provee:
+- TTLCache: cache LRU thread-safe con expiracion por TTL
+- InvalidationBus: propaga invalidaciones entre workers via Redis pub/sub
+
+Cada worker de uvicorn tiene su propia copia de los caches en memoria.
+Cuando CACHE_REDIS_ENABLED=true, las invalidaciones se publican en un canal
+de Redis para que todos los workers descarten la entrada al mismo tiempo.
+Sin Redis, el TTL acota cuanto puede quedar desactualizado otro worker.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Marcador para distinguir "no esta en cache" de un valor None cacheado
+MISSING = object()
+
+
+# ============================================================
+# Cache LRU con TTL
+# ============================================================
+
+class TTLCache:
+    """
+    Cache LRU thread-safe con expiracion por TTL.
+
+    Example:
+        ```python
+        cache = TTLCache(max_size=1000, ttl_seconds=60)
+        cache.set("ESP32_LAB_001", 42)
+        value = cache.get("ESP32_LAB_001")  # 42, o MISSING si expiro
+        ```
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Retorna el valor cacheado o `default` si no existe o expiro."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Guarda un valor (reemplaza el TTL por defecto si se indica)."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Elimina una entrada (no falla si no existe)."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Metricas del cache para monitoreo."""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+# ============================================================
+# Redis (opcional)
+# ============================================================
+
+_redis_client = None
+
+
+def get_redis():
+    """
+    Retorna un cliente Redis compartido (lazy).
+
+    Solo se usa si CACHE_REDIS_ENABLED=true; el import de redis es local
+    para que el resto de la app no dependa de que Redis este disponible.
+    """
+    global _redis_client
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis.from_url(settings.redis_url, socket_timeout=2)
+    return _redis_client
+
+
+class InvalidationBus:
+    """
+    Canal de invalidaciones de cache compartido entre workers.
+
+    `publish(key)` invalida localmente y, si Redis esta habilitado, publica
+    la key para que los demas workers ejecuten el mismo handler.
+
+    Example:
+        ```python
+        bus = InvalidationBus("cache:devices", on_invalidate=cache.invalidate, on_reset=cache.clear)
+        bus.start()         # Suscribirse (solo si Redis esta habilitado)
+        bus.publish("ESP32_LAB_001")
+        ```
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_invalidate: Callable[[str], None],
+        on_reset: Callable[[], None],
+        enabled: Optional[bool] = None,
+    ):
+        """
+        Args:
+            channel: Nombre del canal de Redis
+            on_invalidate: Handler que descarta una key del cache local
+            on_reset: Handler que vacia el cache local (al reconectar a Redis
+                se pudieron perder mensajes, asi que se descarta todo)
+            enabled: Forzar uso de Redis (default: CACHE_REDIS_ENABLED)
+        """
+        self.channel = channel
+        self.on_invalidate = on_invalidate
+        self.on_reset = on_reset
+        self.enabled = settings.cache_redis_enabled if enabled is None else enabled
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def publish(self, key: str) -> None:
+        """Invalida la key en este worker y la propaga a los demas."""
+        self.on_invalidate(key)
+
+        if not self.enabled:
+            return
+
+        try:
+            get_redis().publish(self.channel, key)
+        except Exception as e:
+            # El TTL del cache acota la inconsistencia si Redis no responde
+            logger.warning(f"No se pudo publicar invalidacion en {self.channel}: {e}")
+
+    def start(self) -> None:
+        """Arranca el thread suscriptor (no hace nada sin Redis)."""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._listen, name=f"invalidation-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el thread suscriptor."""
+        self._stopping.set()
+
+    def _listen(self) -> None:
+        """Loop de suscripcion con reconexion automatica."""
+        while not self._stopping.is_set():
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Mientras no estuvimos suscriptos se pudieron perder invalidaciones
+                self.on_reset()
+
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        data = message["data"]
+                        self.on_invalidate(data.decode("utf-8") if isinstance(data, bytes) else data)
+            except Exception as e:
+                logger.warning(f"Suscripcion a {self.channel} interrumpida: {e}")
+                self._stopping.wait(5)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,52 @@
+"""
+Sistema de Monitoreo IoT
+Trabajo Bloqueante Fuera del Event Loop
+
+Las dependencias y endpoints `async def` corren en el event loop de
+uvicorn: una query con la Session sincronica de SQLAlchemy ejecutada ahi
+bloquea todos los requests del worker mientras dura. run_db() ejecuta la
+funcion en un thread de anyio, acotado por un CapacityLimiter propio
+(DB_THREAD_LIMIT) para no pedir mas conexiones concurrentes que las que
+tiene el pool del engine.
+
+Los endpoints `def` no lo necesitan: FastAPI ya los corre en threads.
+"""
+
+import asyncio
+import functools
+from typing import Callable, TypeVar
+from weakref import WeakKeyDictionary
+
+import anyio
+from anyio import to_thread
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+# Un limiter por event loop (TestClient y los tests async crean loops propios)
+_limiters: "WeakKeyDictionary[asyncio.AbstractEventLoop, anyio.CapacityLimiter]" = WeakKeyDictionary()
+
+
+def db_limiter() -> anyio.CapacityLimiter:
+    """CapacityLimiter de trabajo de DB del event loop actual."""
+    loop = asyncio.get_running_loop()
+    limiter = _limiters.get(loop)
+    if limiter is None:
+        limiter = _limiters[loop] = anyio.CapacityLimiter(settings.db_thread_limit)
+    return limiter
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Ejecuta una funcion bloqueante (queries sincronicas) en el pool de threads de DB.
+
+    Example:
+        ```python
+        user = await run_db(user_registry.get, db, user_id)
+        ```
+    """
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+    return await to_thread.run_sync(func, *args, limiter=db_limiter())
@@ -62,6 +62,23 @@ class Settings(BaseSettings):
             f"@{self.db_host}:{self.db_port}/{self.db_name}"
         )
 
+    @property
+    def async_database_url(self) -> str:
+        """URL de conexión para el engine async (driver asyncpg)."""
+        return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # sync: endpoints de auth/devices/readings con Session (threads de FastAPI)
+    # async: mismos endpoints con AsyncSession (asyncpg) en el event loop
+    db_mode: str = "sync"  # sync | async
+
+    @field_validator("db_mode")
+    @classmethod
+    def validate_db_mode(cls, v: str) -> str:
+        """Validar modo de acceso a la base de datos."""
+        if v not in ("sync", "async"):
+            raise ValueError("DB_MODE debe ser 'sync' o 'async'")
+        return v
+
     # ============================================================
     # Redis (Cache y Sesiones)
     # ============================================================
@@ -79,6 +96,49 @@ class Settings(BaseSettings):
         """
         return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db}"
 
+    # ============================================================
+    # Threads de DB para codigo async
+    # ============================================================
+    db_thread_limit: int = 30  # Queries simultaneas via run_db (pool_size + max_overflow del engine)
+
+    @field_validator("db_thread_limit")
+    @classmethod
+    def validate_db_thread_limit(cls, v: int) -> int:
+        """Validar limite de threads de DB."""
+        if v < 1:
+            raise ValueError("DB_THREAD_LIMIT debe ser >= 1")
+        return v
+
+    # ============================================================
+    # Caches en Proceso
+    # ============================================================
+    # Con Redis habilitado, las invalidaciones se propagan a todos los workers
+    cache_redis_enabled: bool = False
+    device_cache_ttl_sec: int = 300  # Red de seguridad si se pierde una invalidacion
+    device_cache_max_size: int = 50000
+    user_cache_ttl_sec: int = 30  # Usuarios autenticados (get_current_user)
+    user_cache_max_size: int = 10000
+    token_cache_max_size: int = 10000  # JWT ya verificados, hasta su expiracion
+    device_key_cache_max_size: int = 50000  # API keys de devices ya verificadas
+
+    # ============================================================
+    # Last Seen de Devices (write-behind)
+    # ============================================================
+    # true: last_seen_at se guarda en memoria y se vuelca en un UPDATE masivo
+    # false: cada medicion hace UPDATE devices SET last_seen_at (fila caliente)
+    last_seen_write_behind: bool = True
+    last_seen_flush_interval_sec: float = 5.0
+    # Sin contacto por mas de este tiempo un device se considera offline
+    # (offline_monitor.online_status); una regla DEVICE_OFFLINE del device lo reemplaza
+    device_offline_threshold_minutes: int = 10
+
+    @field_validator("device_offline_threshold_minutes")
+    def validate_device_offline_threshold(cls, v: int) -> int:
+        """Validar umbral de offline."""
+        if v < 1:
+            raise ValueError("DEVICE_OFFLINE_THRESHOLD_MINUTES debe ser >= 1")
+        return v
+
     # ============================================================
     # Autenticación JWT
     # ============================================================
@@ -96,6 +156,27 @@ class Settings(BaseSettings):
             )
         return v
 
+    # Passwords (bcrypt en un pool propio, fuera de los threads de requests)
+    bcrypt_rounds: int = 12  # Cost de los hashes nuevos; los existentes se rehashean en el login
+    password_hash_workers: int = 2  # Threads del pool de bcrypt
+    password_hash_max_pending: int = 64  # Logins en cola antes de responder 503
+
+    @field_validator("bcrypt_rounds")
+    @classmethod
+    def validate_bcrypt_rounds(cls, v: int) -> int:
+        """Validar cost de bcrypt (rango soportado por el algoritmo)."""
+        if not 4 <= v <= 31:
+            raise ValueError("BCRYPT_ROUNDS debe estar entre 4 y 31")
+        return v
+
+    @field_validator("password_hash_workers", "password_hash_max_pending")
+    @classmethod
+    def validate_password_hash_pool(cls, v: int) -> int:
+        """Validar tamaño del pool de bcrypt."""
+        if v < 1:
+            raise ValueError("PASSWORD_HASH_WORKERS y PASSWORD_HASH_MAX_PENDING deben ser >= 1")
+        return v
+
     # ============================================================
     # CORS (Cross-Origin Resource Sharing)
     # ============================================================
@@ -120,6 +201,101 @@ class Settings(BaseSettings):
     # Seguridad de Devices
     # ============================================================
     device_api_key_salt: str
+    # true: POST /readings y /readings/batch exigen el header X-API-Key
+    # false: se aceptan mediciones sin autenticar (firmware sin API key)
+    device_api_key_required: bool = False
+
+    # ============================================================
+    # Ingesta de Readings
+    # ============================================================
+    # sync: cada POST /readings hace su propia transaccion (201)
+    # buffered: se encola en memoria y un writer hace group commits (202)
+    ingest_mode: str = "sync"  # sync | buffered
+    ingest_buffer_max_size: int = 10000  # Readings en cola antes de responder 503
+    ingest_flush_max_rows: int = 500  # Flush al juntar N readings...
+    ingest_flush_interval_ms: int = 200  # ...o al pasar T milisegundos
+    # full: commit sincronico (default de PostgreSQL)
+    # relaxed: synchronous_commit=off, puede perder los ultimos ms ante un crash de PostgreSQL
+    ingest_durability: str = "full"  # full | relaxed
+    ingest_shutdown_timeout_sec: float = 10.0  # Tiempo maximo para drenar la cola al cerrar
+    # Errores transitorios de la DB (caida, failover, pool agotado): reintentos
+    # con backoff exponencial antes de devolver el batch al frente de la cola
+    ingest_flush_max_retries: int = 5
+    ingest_flush_retry_base_ms: int = 100
+
+    @field_validator("ingest_mode")
+    def validate_ingest_mode(cls, v: str) -> str:
+        """Validar modo de ingesta."""
+        if v not in ("sync", "buffered"):
+            raise ValueError("INGEST_MODE debe ser 'sync' o 'buffered'")
+        return v
+
+    @field_validator("ingest_durability")
+    def validate_ingest_durability(cls, v: str) -> str:
+        """Validar nivel de durabilidad de la ingesta."""
+        if v not in ("full", "relaxed"):
+            raise ValueError("INGEST_DURABILITY debe ser 'full' o 'relaxed'")
+        return v
+
+    # ============================================================
+    # Particionado de sensor_readings
+    # ============================================================
+    readings_partition_interval: str = "month"  # day | week | month
+    readings_partitions_ahead: int = 3  # Particiones futuras a mantener creadas
+    partition_maintenance_interval_sec: float = 3600.0
+
+    @field_validator("readings_partition_interval")
+    def validate_readings_partition_interval(cls, v: str) -> str:
+        """Validar intervalo de particionado."""
+        if v not in ("day", "week", "month"):
+            raise ValueError("READINGS_PARTITION_INTERVAL debe ser 'day', 'week' o 'month'")
+        return v
+
+    # ============================================================
+    # Retencion (politicas en la tabla retention_policies)
+    # ============================================================
+    retention_enabled: bool = True
+    retention_interval_sec: float = 86400.0  # Una vez por dia
+    retention_batch_size: int = 10000  # Filas por DELETE (un commit por batch)
+
+    # ============================================================
+    # Rollups (agregados 1m / 1h / 1d)
+    # ============================================================
+    # false: /readings/aggregate y series minmax leen siempre las mediciones crudas
+    rollups_enabled: bool = True
+    rollup_refresh_interval_sec: float = 60.0
+    rollup_batch_size: int = 50000  # ids de sensor_readings por transaccion del job
+
+    # ============================================================
+    # Consumidores de sensor_readings (cursores en reading_cursors)
+    # ============================================================
+    reading_consumer_shards: int = 4  # Workers que pueden consumir en paralelo (device_id % shards)
+    reading_consumer_batch_size: int = 1000  # Mediciones por transaccion
+    reading_consumer_poll_interval_sec: float = 1.0  # Espera cuando no hay mediciones nuevas
+
+    @field_validator("reading_consumer_shards")
+    def validate_reading_consumer_shards(cls, v: int) -> int:
+        """Validar cantidad de shards."""
+        if v < 1:
+            raise ValueError("READING_CONSUMER_SHARDS debe ser >= 1")
+        return v
+
+    # ============================================================
+    # Motor de Alertas
+    # ============================================================
+    alerts_enabled: bool = True
+    alert_workers: int = 1  # Threads del consumidor "alerts" por proceso
+    alert_rules_refresh_sec: float = 30.0  # Reconstruccion del indice de reglas
+    alert_vectorized_min_batch: int = 256  # Desde este tamano de batch se evalua con NumPy
+    alert_cooldown_cache_size: int = 100_000  # Pares (regla, device) en el LRU de cooldown
+
+    @field_validator("alert_cooldown_cache_size")
+    @classmethod
+    def validate_alert_cooldown_cache_size(cls, v: int) -> int:
+        """Validar tamano del LRU de cooldown."""
+        if v < 1:
+            raise ValueError("ALERT_COOLDOWN_CACHE_SIZE debe ser >= 1")
+        return v
 
     # ============================================================
     # Notificaciones - Email (SMTP)
@@ -131,6 +307,8 @@ class Settings(BaseSettings):
     smtp_password: Optional[str] = None
     smtp_from_email: Optional[str] = None
     smtp_from_name: Optional[str] = None
+    smtp_starttls: bool = True  # STARTTLS tras conectar (el puerto 465 usa SSL directo)
+    smtp_alert_recipients: Optional[str] = None  # Destinatarios de las alertas, separados por coma
 
     # ============================================================
     # Notificaciones - Telegram
@@ -138,6 +316,34 @@ class Settings(BaseSettings):
     telegram_enabled: bool = False
     telegram_bot_token: Optional[str] = None
     telegram_chat_id: Optional[str] = None
+    telegram_api_url: str = "https://api.telegram.org"
+
+    # ============================================================
+    # Notificaciones - Dispatcher
+    # ============================================================
+    notifications_enabled: bool = True
+    notification_batch_size: int = 100  # Alertas pendientes por batch
+    notification_poll_interval_sec: float = 2.0
+    notification_max_age_minutes: int = 60  # Alertas mas viejas se marcan "expired" sin enviar
+    notification_max_retries: int = 3  # Reintentos de errores transitorios
+    notification_retry_backoff_sec: float = 1.0  # Base del backoff exponencial (con jitter)
+    notification_lease_sec: int = 300  # Una alerta tomada no se vuelve a tomar antes (mayor al envio de un batch)
+    notification_max_attempts: int = 5  # Intentos por alerta con canales fallidos antes de dejarla "failed"
+    notification_retry_interval_sec: float = 60.0  # Base del backoff entre intentos de una alerta
+    notification_http_timeout_sec: float = 10.0
+    notification_webhook_concurrency: int = 10  # Envios simultaneos por canal
+    notification_telegram_concurrency: int = 2
+
+    @field_validator(
+        "notification_batch_size", "notification_max_attempts",
+        "notification_webhook_concurrency", "notification_telegram_concurrency",
+    )
+    @classmethod
+    def validate_notification_limits(cls, v: int) -> int:
+        """Validar tamano de batch, intentos y concurrencia de notificaciones."""
+        if v < 1:
+            raise ValueError("El batch, los intentos y la concurrencia de notificaciones deben ser >= 1")
+        return v
 
     # ============================================================
     # Configuración de Pydantic Settings
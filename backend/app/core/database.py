@@ -4,10 +4,15 @@ Configuración de Base de Datos (PostgreSQL + SQLAlchemy)
 
 Este módulo configura la conexión a PostgreSQL usando SQLAlchemy 2.0.
 Proporciona el engine, sessionmaker y la base declarativa para los modelos.
+
+Con DB_MODE=async los endpoints de auth/devices/readings usan ademas un
+engine async (asyncpg) y AsyncSession; el engine sincronico sigue
+sirviendo a los jobs en background, scripts y Alembic.
 """
 
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 from sqlalchemy.pool import QueuePool
 
@@ -62,6 +67,65 @@ SessionLocal = sessionmaker(
 )
 
 
+# ============================================================
+# Engine Async (DB_MODE=async)
+# ============================================================
+
+# Se crean en el primer uso: en modo sync no se importa asyncpg ni se abre
+# un segundo pool de conexiones
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Retorna el engine async (asyncpg), creandolo si no existe.
+
+    Mismo dimensionamiento de pool que el engine sincronico. Las conexiones
+    de asyncpg quedan atadas al event loop que las abrio: el engine se usa
+    desde el loop de uvicorn y se cierra con dispose_async_engine().
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            settings.async_database_url,
+            pool_size=10,
+            max_overflow=20,
+            pool_timeout=30,
+            pool_recycle=3600,
+            pool_pre_ping=True,
+            echo=settings.debug and settings.environment == "development",
+            # Equivalente al SET timezone del listener "connect" del engine sincronico
+            connect_args={"server_settings": {"timezone": "UTC"}},
+        )
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """
+    Crea una AsyncSession ligada al engine async.
+
+    expire_on_commit=False: despues del commit los atributos siguen
+    cargados (en async no se pueden refrescar de forma implicita al leerlos).
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_session_factory()
+
+
+async def dispose_async_engine() -> None:
+    """Cierra las conexiones del engine async (si se llego a crear)."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_session_factory = None
+
+
 # ============================================================
 # Base Declarativa para Modelos ORM
 # ============================================================
@@ -104,6 +168,29 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency para obtener una AsyncSession (endpoints de DB_MODE=async).
+
+    Yields:
+        AsyncSession: Sesión async de SQLAlchemy
+
+    Example:
+        ```python
+        @router.get("/devices")
+        async def get_devices(db: AsyncSession = Depends(get_async_db)):
+            devices = (await db.scalars(select(Device))).all()
+            return devices
+        ```
+
+    Notas:
+        - Al salir del context se hace rollback de lo no commiteado y la
+          conexión vuelve al pool
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # ============================================================
 # Funciones Helper para Gestión de DB
 # ============================================================
@@ -162,6 +249,22 @@ def check_db_connection() -> bool:
         return False
 
 
+async def check_async_db_connection() -> bool:
+    """
+    Verifica la conexión a la base de datos con el engine async.
+
+    Returns:
+        bool: True si la conexión es exitosa, False en caso contrario
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"✗ Error de conexión a base de datos (async): {e}")
+        return False
+
+
 def drop_all_tables() -> None:
     """
     PELIGRO: Elimina TODAS las tablas de la base de datos.
@@ -11,10 +11,14 @@ Maneja:
 from datetime import datetime, timedelta
 from typing import Optional
 import hashlib
+import hmac
+import math
+import time
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
 
 
@@ -27,7 +31,7 @@ from app.core.config import settings
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12,  # Cost factor (12 es un buen balance seguridad/performance)
+    bcrypt__rounds=settings.bcrypt_rounds,  # Cost factor (12 es un buen balance seguridad/performance)
 )
 
 
@@ -55,6 +59,7 @@ def hash_password(password: str) -> str:
         - NUNCA almacenar contraseñas en texto plano
         - El hash bcrypt incluye el salt automáticamente
         - Cada hash es único incluso para la misma contraseña
+        - Bloquea ~250 ms de CPU: desde endpoints usar password_hasher.hash()
     """
     return pwd_context.hash(password)
 
@@ -75,6 +80,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         if verify_password(input_password, user.password_hash):
             print("Contraseña correcta")
         ```
+
+    Notas:
+        - Bloquea ~250 ms de CPU: el login usa password_hasher.verify_and_update()
+          (pool propio, con rehash si cambió BCRYPT_ROUNDS)
     """
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -83,6 +92,13 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # Funciones JWT (JSON Web Tokens)
 # ============================================================
 
+# Tokens con firma ya verificada -> payload (cada entrada vence con su token)
+verified_tokens = TTLCache(
+    max_size=settings.token_cache_max_size,
+    ttl_seconds=settings.access_token_expire_minutes * 60,
+)
+
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None
@@ -157,24 +173,41 @@ def decode_access_token(token: str) -> Optional[dict]:
     Notas:
         - Valida automáticamente la firma y la expiración
         - Retorna None si el token está expirado o tiene firma inválida
+        - Los tokens válidos se memorizan hasta su expiración: el dashboard
+          reenvía el mismo token en cada request y la firma no se
+          vuelve a verificar
     """
+    cached = verified_tokens.get(token)
+    if cached is not MISSING:
+        return dict(cached)
+
     try:
         payload = jwt.decode(
             token,
             settings.jwt_secret_key,
             algorithms=[settings.jwt_algorithm]
         )
-        return payload
     except JWTError as e:
         # Token inválido, expirado o firma incorrecta
         print(f"Error decodificando JWT: {e}")
         return None
 
+    # El TTL de la entrada termina con el token (sin "exp" no se memoriza)
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        verified_tokens.set(token, dict(payload), ttl_seconds=remaining)
+    return payload
+
 
 # ============================================================
 # API Keys para Devices ESP32
 # ============================================================
 
+# device_eui -> API key esperada (bytes), solo de keys ya verificadas.
+# La key se deriva del EUI y del salt, así que una entrada no vence mientras
+# el salt no cambie (cambiarlo requiere reiniciar la app).
+verified_device_keys = TTLCache(max_size=settings.device_key_cache_max_size, ttl_seconds=math.inf)
+
 def generate_device_api_key(device_eui: str) -> str:
     """
     Genera una API Key única para un device ESP32.
@@ -231,11 +264,25 @@ def validate_device_api_key(device_eui: str, provided_api_key: str) -> bool:
 
     Notas:
         - Usa constant-time comparison para evitar timing attacks
+        - No consulta la DB: la key se deriva del device_eui
+        - Las keys válidas se memorizan por EUI (verified_device_keys): cada
+          medición de un device ya autenticado es una sola comparación
     """
-    expected_api_key = generate_device_api_key(device_eui)
+    if not provided_api_key:
+        return False
+    provided = provided_api_key.encode("utf-8")
+
+    expected = verified_device_keys.get(device_eui)
+    if expected is not MISSING:
+        return hmac.compare_digest(expected, provided)
+
+    expected = generate_device_api_key(device_eui).encode("utf-8")
+    if not hmac.compare_digest(expected, provided):
+        # Las keys rechazadas no entran al cache (EUIs arbitrarios no lo llenan)
+        return False
 
-    # Comparación en tiempo constante (seguridad contra timing attacks)
-    return hmac_compare(expected_api_key, provided_api_key)
+    verified_device_keys.set(device_eui, expected)
+    return True
 
 
 def hmac_compare(a: str, b: str) -> bool:
@@ -252,15 +299,9 @@ def hmac_compare(a: str, b: str) -> bool:
     Notas:
         - NUNCA usar `a == b` para comparar secretos
         - Esta función toma el mismo tiempo sin importar dónde esté la diferencia
+        - Usa hmac.compare_digest (en C); acepta strings no ASCII
     """
-    if len(a) != len(b):
-        return False
-
-    result = 0
-    for x, y in zip(a, b):
-        result |= ord(x) ^ ord(y)
-
-    return result == 0
+    return hmac.compare_digest(a.encode("utf-8"), b.encode("utf-8"))
 
 
 # ============================================================
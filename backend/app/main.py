@@ -14,8 +14,21 @@ from sqlalchemy.exc import SQLAlchemyError
 import time
 import logging
 
+from app.core.concurrency import run_db
 from app.core.config import settings
-from app.core.database import check_db_connection
+from app.core.database import check_async_db_connection, check_db_connection, dispose_async_engine
+from app.core.security import verified_device_keys, verified_tokens
+from app.services.alert_engine import alert_consumer, alert_engine
+from app.services.device_registry import device_registry
+from app.services.last_seen import last_seen_tracker
+from app.services.notifications import notification_dispatcher
+from app.services.offline_monitor import offline_monitor
+from app.services.partitioning import partition_maintainer
+from app.services.password_hasher import password_hasher
+from app.services.retention import retention_job
+from app.services.rollups import rollup_job
+from app.services.user_registry import user_registry
+from app.services.write_buffer import write_buffer
 
 # Configurar logging
 logging.basicConfig(
@@ -49,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permitir todos los métodos (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Permitir todos los headers
+    expose_headers=["X-Next-Cursor"],  # Legible desde el frontend (paginacion)
 )
 
 
@@ -159,7 +173,7 @@ async def startup_event():
     logger.info("=" * 60)
 
     # Verificar conexión a base de datos
-    if check_db_connection():
+    if await run_db(check_db_connection):
         logger.info("✓ Conexión a PostgreSQL exitosa")
     else:
         logger.error("✗ No se pudo conectar a PostgreSQL")
@@ -167,6 +181,47 @@ async def startup_event():
         if settings.environment == "production":
             raise Exception("Fallo crítico: No hay conexión a base de datos")
 
+    # Pool async de los endpoints (DB_MODE=async): abrir una conexion ya en el arranque
+    if settings.db_mode == "async":
+        if await check_async_db_connection():
+            logger.info("✓ Endpoints de API con AsyncSession (asyncpg)")
+        else:
+            logger.error("✗ No se pudo conectar a PostgreSQL con asyncpg")
+
+    # Particiones de sensor_readings del periodo actual y siguientes
+    partition_maintainer.start()
+
+    # Arrancar el writer de group commits si la ingesta es diferida
+    if settings.ingest_mode == "buffered":
+        write_buffer.start()
+        logger.info("✓ Ingesta en modo buffered (group commit)")
+
+    # Volcado periodico de devices.last_seen_at
+    last_seen_tracker.start()
+
+    # Mantenimiento incremental de los rollups 1m/1h/1d
+    if settings.rollups_enabled:
+        rollup_job.start()
+
+    # Politicas de retencion de readings y rollups
+    if settings.retention_enabled:
+        retention_job.start()
+
+    # Evaluacion de reglas de alerta sobre las mediciones nuevas
+    if settings.alerts_enabled:
+        alert_consumer.start()
+        offline_monitor.start()
+
+    # Envio de notificaciones de las alertas disparadas
+    if settings.notifications_enabled:
+        notification_dispatcher.start()
+
+    # Escuchar invalidaciones de cache de otros workers (solo con Redis)
+    if settings.cache_redis_enabled:
+        device_registry.bus.start()
+        user_registry.bus.start()
+        logger.info("✓ Invalidacion de caches via Redis pub/sub")
+
     logger.info(f"✓ Servidor escuchando en http://0.0.0.0:8000")
     logger.info(f"✓ Documentación disponible en http://localhost:8000{settings.api_v1_prefix}/docs")
 
@@ -179,6 +234,24 @@ async def shutdown_event():
     Limpia recursos y cierra conexiones.
     """
     logger.info("Cerrando aplicación...")
+
+    # Drenar readings encolados antes de cerrar (no perder datos en un deploy)
+    if write_buffer.is_running:
+        write_buffer.stop(timeout=settings.ingest_shutdown_timeout_sec)
+
+    # Despues del write buffer: su ultimo flush tambien registra last_seen
+    last_seen_tracker.stop()
+    alert_consumer.stop()
+    offline_monitor.stop()
+    notification_dispatcher.stop()
+    rollup_job.stop()
+    retention_job.stop()
+    partition_maintainer.stop()
+    device_registry.bus.stop()
+    user_registry.bus.stop()
+    password_hasher.shutdown()
+    await dispose_async_engine()
+
     # Aquí podríamos cerrar conexiones a Redis, pools de threads, etc.
     logger.info("✓ Aplicación cerrada correctamente")
 
@@ -200,15 +273,38 @@ async def health_check():
     Returns:
         dict: Estado del servidor y servicios
     """
-    db_status = "healthy" if check_db_connection() else "unhealthy"
+    # Fuera del event loop: con la DB lenta el resto de los requests sigue atendiendose
+    db_status = "healthy" if await run_db(check_db_connection) else "unhealthy"
 
     return {
         "status": "online",
         "environment": settings.environment,
         "version": settings.version,
+        "database_mode": settings.db_mode,
         "services": {
             "database": db_status,
             "redis": "pending"  # TODO: Implementar check de Redis
+        },
+        "ingestion": {
+            "mode": settings.ingest_mode,
+            "buffer": write_buffer.stats(),
+            "last_seen": last_seen_tracker.stats()
+        },
+        "partitions": partition_maintainer.stats(),
+        "rollups": rollup_job.stats(),
+        "retention": retention_job.stats(),
+        "alerts": {
+            **alert_engine.stats(),
+            "consumer": alert_consumer.stats(),
+            "offline": offline_monitor.stats()
+        },
+        "notifications": notification_dispatcher.stats(),
+        "password_hasher": password_hasher.stats(),
+        "caches": {
+            "devices": device_registry.cache.stats(),
+            "users": user_registry.cache.stats(),
+            "tokens": verified_tokens.stats(),
+            "device_keys": verified_device_keys.stats()
         }
     }
 
@@ -235,23 +331,36 @@ async def root():
 # Registrar Routers (API v1)
 # ============================================================
 
-from app.api.v1 import auth, devices, readings
+from app.api.v1 import auth, devices, readings, retention
+from app.api.v1.aio import auth as aio_auth, devices as aio_devices, readings as aio_readings
+
+# Con DB_MODE=async: mismas rutas y schemas, con AsyncSession en lugar de Session
+if settings.db_mode == "async":
+    auth_router, devices_router, readings_router = aio_auth.router, aio_devices.router, aio_readings.router
+else:
+    auth_router, devices_router, readings_router = auth.router, devices.router, readings.router
 
 # Auth endpoints (login, logout, me)
 app.include_router(
-    auth.router,
+    auth_router,
     prefix=settings.api_v1_prefix
 )
 
 # Device endpoints (CRUD + schema)
 app.include_router(
-    devices.router,
+    devices_router,
     prefix=settings.api_v1_prefix
 )
 
 # Sensor readings endpoints (POST desde ESP32, GET con filtros)
 app.include_router(
-    readings.router,
+    readings_router,
+    prefix=settings.api_v1_prefix
+)
+
+# Politicas de retencion (CRUD + dry-run)
+app.include_router(
+    retention.router,
     prefix=settings.api_v1_prefix
 )
 
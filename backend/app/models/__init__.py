@@ -7,6 +7,9 @@ Jerarquia de modelos:
     LocationGroup (1:N) Location (1:N) Asset (1:N) Device (1:N) SensorReading
     User (para autenticacion y permisos)
     AlertRule + AlertHistory (sistema de alertas)
+    ReadingRollup + RollupWatermark (agregados precalculados de readings)
+    RetentionPolicy (retencion de readings y rollups)
+    ReadingCursor (progreso de los consumidores de readings)
 """
 
 from app.models.location import LocationGroup, Location
@@ -15,6 +18,9 @@ from app.models.device import Device
 from app.models.sensor_reading import SensorReading
 from app.models.user import User
 from app.models.alert import AlertRule, AlertHistory
+from app.models.rollup import ReadingRollup, RollupWatermark
+from app.models.retention import RetentionPolicy
+from app.models.reading_cursor import ReadingCursor
 
 __all__ = [
     "LocationGroup",
@@ -25,4 +31,8 @@ __all__ = [
     "User",
     "AlertRule",
     "AlertHistory",
+    "ReadingRollup",
+    "RollupWatermark",
+    "RetentionPolicy",
+    "ReadingCursor",
 ]
@@ -6,7 +6,7 @@ AlertHistory: Log histórico de alertas disparadas
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, Boolean, DateTime, ForeignKey, Index, CheckConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, Boolean, DateTime, ForeignKey, Index, CheckConstraint, or_, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -30,12 +30,12 @@ class AlertRule(Base):
     __tablename__ = "alert_rules"
 
     # Columnas
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     location_id = Column(Integer, ForeignKey("locations.id", ondelete="CASCADE"),
-                        nullable=True, index=True,
+                        nullable=True,
                         comment="ID de location específica (NULL = regla global)")
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"),
-                      nullable=True, index=True,
+                      nullable=True,
                       comment="ID de device específico (NULL = aplica a todos los devices de la location)")
     name = Column(String(128), nullable=False,
                   comment="Nombre descriptivo de la regla")
@@ -51,7 +51,7 @@ class AlertRule(Base):
                           comment="Valor máximo para THRESHOLD_RANGE")
     time_window_minutes = Column(Integer, nullable=True,
                                  comment="Ventana de tiempo para RATE_OF_CHANGE y DEVICE_OFFLINE")
-    enabled = Column(Boolean, nullable=False, default=True, index=True,
+    enabled = Column(Boolean, nullable=False, default=True,
                     comment="Permite desactivar reglas sin eliminarlas")
     cooldown_minutes = Column(Integer, nullable=False, default=30,
                              comment="Tiempo mínimo entre alertas consecutivas (evita spam)")
@@ -67,7 +67,7 @@ class AlertRule(Base):
     device = relationship("Device", back_populates="alert_rules")
     alert_history = relationship("AlertHistory", back_populates="alert_rule",
                                 cascade="all, delete-orphan",
-                                lazy="selectin")
+                                lazy="raise", passive_deletes=True)
 
     # Índices y constraints
     __table_args__ = (
@@ -118,8 +118,9 @@ class AlertHistory(Base):
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"),
                       nullable=False, index=True,
                       comment="ID del device que causó la alerta")
-    sensor_reading_id = Column(BigInteger, ForeignKey("sensor_readings.id", ondelete="SET NULL"),
-                              nullable=True, index=True,
+    # Referencia sin FK: sensor_readings esta particionada (PK id + timestamp) y
+    # la retencion puede borrar el reading; el historial de alertas se conserva
+    sensor_reading_id = Column(BigInteger, nullable=True, index=True,
                               comment="ID del reading que disparó (NULL si DEVICE_OFFLINE)")
     triggered_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True,
                          comment="Momento en que se disparó la alerta")
@@ -129,6 +130,10 @@ class AlertHistory(Base):
                     comment="Mensaje generado describiendo la alerta")
     notification_sent = Column(JSONB, nullable=True,
                               comment='Resultado de notificaciones: {"email": "success", "telegram": "failed"}')
+    notification_attempts = Column(Integer, nullable=False, default=0, server_default=text("0"),
+                                  comment="Intentos de notificación (batches del dispatcher que la tomaron)")
+    notification_next_attempt_at = Column(DateTime, nullable=True,
+                                         comment="Fin del lease mientras se envía, o próximo reintento si algún canal falló")
     acknowledged_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"),
                             nullable=True, index=True,
                             comment="ID del usuario que reconoció/vio la alerta")
@@ -138,7 +143,8 @@ class AlertHistory(Base):
     # Relaciones
     alert_rule = relationship("AlertRule", back_populates="alert_history")
     device = relationship("Device", back_populates="alert_history")
-    sensor_reading = relationship("SensorReading", back_populates="alert_history")
+    sensor_reading = relationship("SensorReading", back_populates="alert_history",
+                                  primaryjoin="foreign(AlertHistory.sensor_reading_id) == SensorReading.id")
     acknowledged_by_user = relationship("User", back_populates="acknowledged_alerts",
                                        foreign_keys=[acknowledged_by])
 
@@ -148,6 +154,9 @@ class AlertHistory(Base):
         Index("idx_alert_history_device", "device_id"),
         Index("idx_alert_history_triggered", "triggered_at", postgresql_using="btree"),
         Index("idx_alert_history_ack_by", "acknowledged_by"),
+        # Alertas pendientes de notificar o con reintento programado (el dispatcher las toma en orden de id)
+        Index("idx_alert_history_pending", "id",
+              postgresql_where=or_(notification_sent.is_(None), notification_next_attempt_at.isnot(None))),
     )
 
     def __repr__(self):
@@ -44,9 +44,11 @@ class Asset(Base):
 
     # Relaciones
     location = relationship("Location", back_populates="assets")
+    # lazy="select" (no raise): la FK de devices es ON DELETE SET NULL, asi que
+    # el cascade del ORM necesita cargar los devices para eliminarlos
     devices = relationship("Device", back_populates="asset",
                           cascade="all, delete-orphan",
-                          lazy="selectin")
+                          lazy="select")
 
     # Índices compuestos
     __table_args__ = (
@@ -25,11 +25,11 @@ class Device(Base):
     __tablename__ = "devices"
 
     # Columnas
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     asset_id = Column(Integer, ForeignKey("assets.id", ondelete="SET NULL"),
-                     nullable=True, index=True,
+                     nullable=True,
                      comment="ID del asset al que está asignado actualmente (NULL si no asignado)")
-    device_eui = Column(String(64), nullable=False, unique=True, index=True,
+    device_eui = Column(String(64), nullable=False, unique=True,
                        comment="ID único del device (MAC address o custom)")
     name = Column(String(128), nullable=False,
                   comment="Nombre amigable del device")
@@ -37,7 +37,7 @@ class Device(Base):
                    comment="Estado: active, inactive, maintenance, error")
     firmware_version = Column(String(20), nullable=True,
                              comment="Versión del firmware (para OTA updates)")
-    last_seen_at = Column(DateTime, nullable=True, index=True,
+    last_seen_at = Column(DateTime, nullable=True,
                          comment="Última comunicación exitosa con el backend")
     config = Column(JSONB, nullable=True,
                    comment="Configuración del device (sampling_interval_sec, wifi_ssid, etc.)")
@@ -47,22 +47,27 @@ class Device(Base):
                        comment="Fecha de creación del registro")
 
     # Relaciones
+    # Las colecciones crecen sin limite (historial de meses), por eso nunca se
+    # cargan implicitamente: lazy="raise" obliga a pedirlas con
+    # options(selectinload(...)) o a consultarlas con una query paginada.
+    # passive_deletes delega el borrado en cascada al ON DELETE CASCADE de la DB.
     asset = relationship("Asset", back_populates="devices")
     sensor_readings = relationship("SensorReading", back_populates="device",
                                   cascade="all, delete-orphan",
-                                  lazy="selectin")
+                                  lazy="raise", passive_deletes=True)
     alert_rules = relationship("AlertRule", back_populates="device",
                               cascade="all, delete-orphan",
-                              lazy="selectin")
+                              lazy="raise", passive_deletes=True)
     alert_history = relationship("AlertHistory", back_populates="device",
                                 cascade="all, delete-orphan",
-                                lazy="selectin")
+                                lazy="raise", passive_deletes=True)
 
     # Índices y constraints
+    # device_eui ya tiene el indice de su UNIQUE. last_seen_at no se indexa a
+    # proposito: se actualiza en cada flush del write-behind y sin indice
+    # el UPDATE puede ser HOT (no toca ningun indice).
     __table_args__ = (
-        Index("idx_devices_eui", "device_eui"),
         Index("idx_devices_asset", "asset_id"),
-        Index("idx_devices_last_seen", "last_seen_at"),
         CheckConstraint(
             "status IN ('active', 'inactive', 'maintenance', 'error')",
             name="check_device_status"
@@ -81,6 +86,8 @@ class Device(Base):
         Determina si el device está online basándose en last_seen_at.
 
         Retorna True si la última comunicación fue hace menos de 10 minutos.
+        Con el umbral de las reglas DEVICE_OFFLINE y el last_seen_at del
+        tracker write-behind: app.services.offline_monitor.online_status().
         """
         if not self.last_seen_at:
             return False
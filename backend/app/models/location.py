@@ -30,10 +30,10 @@ class LocationGroup(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
                        comment="Fecha de creación del registro")
 
-    # Relaciones
+    # Relaciones (carga bajo demanda; usar selectinload() si se necesitan)
     locations = relationship("Location", back_populates="location_group",
                             cascade="all, delete-orphan",
-                            lazy="selectin")
+                            lazy="select")
 
     def __repr__(self):
         return f"<LocationGroup(id={self.id}, name='{self.name}')>"
@@ -68,10 +68,10 @@ class Location(Base):
     location_group = relationship("LocationGroup", back_populates="locations")
     assets = relationship("Asset", back_populates="location",
                          cascade="all, delete-orphan",
-                         lazy="selectin")
+                         lazy="select")
     alert_rules = relationship("AlertRule", back_populates="location",
                               cascade="all, delete-orphan",
-                              lazy="selectin")
+                              lazy="raise", passive_deletes=True)
 
     # Índices compuestos
     __table_args__ = (
@@ -0,0 +1,61 @@
+"""
+Modelo de ReadingCursor (progreso de los consumidores de sensor_readings).
+
+sensor_readings es insert-only: en lugar de marcar cada medicion como
+procesada (un UPDATE por fila que reescribe la tupla y sus indices), cada
+consumidor guarda hasta que id proceso. Un consumidor se divide en shards
+(device_id % shards) para que varios workers avancen en paralelo sin
+procesar dos veces la misma medicion.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, CheckConstraint
+from app.core.database import Base
+
+
+class ReadingCursor(Base):
+    """
+    High-water mark de un shard de un consumidor.
+
+    last_reading_id: todas las mediciones del shard con id <= este valor ya
+    fueron procesadas.
+
+    pending_reading_id / pending_snapshot: candidato a proximo cursor y
+    snapshot de transacciones del momento en que se tomo (mismo esquema que
+    RollupWatermark). Solo se procesa hasta el candidato cuando terminaron
+    las transacciones de ese snapshot; asi un INSERT lento con un id menor
+    nunca queda salteado.
+
+    Un worker toma un shard con SELECT ... FOR UPDATE SKIP LOCKED y lo
+    mantiene bloqueado mientras procesa: el avance del cursor y los efectos
+    del procesamiento se confirman en la misma transaccion.
+    """
+
+    __tablename__ = "reading_cursors"
+
+    # Columnas
+    consumer = Column(String(64), primary_key=True,
+                      comment="Nombre del consumidor (ej: alerts)")
+    shard = Column(Integer, primary_key=True,
+                   comment="Shard: procesa los devices con device_id % shards = shard")
+    shards = Column(Integer, nullable=False,
+                    comment="Cantidad de shards del consumidor")
+    last_reading_id = Column(BigInteger, nullable=False, default=0,
+                             comment="Ultimo sensor_readings.id procesado por el shard")
+    pending_reading_id = Column(BigInteger, nullable=True,
+                                comment="Candidato a proximo cursor")
+    pending_snapshot = Column(Text, nullable=True,
+                              comment="pg_current_snapshot() al tomar el candidato")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Ultimo avance o intento del shard")
+
+    # Índices y constraints
+    __table_args__ = (
+        CheckConstraint("shard >= 0 AND shard < shards", name="check_cursor_shard_range"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<ReadingCursor(consumer='{self.consumer}', shard={self.shard}/{self.shards}, "
+            f"last_reading_id={self.last_reading_id})>"
+        )
@@ -0,0 +1,81 @@
+"""
+Modelo de RetentionPolicy (Politicas de retencion de datos).
+
+Define cuanto tiempo se guardan las mediciones crudas y cada resolucion de
+rollup, por alcance:
+
+    location_group + asset_type  >  location_group  >  asset_type  >  global
+
+Para cada device aplica la politica mas especifica que coincide. Un valor
+NULL en una columna de dias significa "conservar para siempre".
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, CheckConstraint, func
+from app.core.database import Base
+
+
+class RetentionPolicy(Base):
+    """
+    Politica de retencion para un alcance (grupo de ubicaciones y/o tipo de asset).
+
+    Ejemplo: crudos 30 dias, rollups 1m por 1 anio, rollups 1d para siempre
+        RetentionPolicy(name="default", raw_days=30, rollup_1m_days=365, rollup_1h_days=None, rollup_1d_days=None)
+    """
+
+    __tablename__ = "retention_policies"
+
+    # Columnas
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(128), nullable=False,
+                  comment="Nombre descriptivo de la politica")
+    location_group_id = Column(Integer, ForeignKey("location_groups.id", ondelete="CASCADE"),
+                               nullable=True,
+                               comment="Alcance: grupo de ubicaciones (NULL = todos)")
+    asset_type = Column(String(64), nullable=True,
+                        comment="Alcance: tipo de asset (NULL = todos)")
+    raw_days = Column(Integer, nullable=True,
+                      comment="Dias de mediciones crudas (NULL = para siempre)")
+    rollup_1m_days = Column(Integer, nullable=True,
+                            comment="Dias de rollups de 1 minuto (NULL = para siempre)")
+    rollup_1h_days = Column(Integer, nullable=True,
+                            comment="Dias de rollups de 1 hora (NULL = para siempre)")
+    rollup_1d_days = Column(Integer, nullable=True,
+                            comment="Dias de rollups de 1 dia (NULL = para siempre)")
+    enabled = Column(Boolean, nullable=False, default=True,
+                     comment="Si la politica se aplica")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Fecha de creacion")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        comment="Ultima modificacion")
+
+    # Índices y constraints
+    __table_args__ = (
+        # Una sola politica por alcance (NULL cuenta como "todos")
+        Index(
+            "uq_retention_policies_scope",
+            func.coalesce(location_group_id, 0),
+            func.coalesce(asset_type, ""),
+            unique=True,
+        ),
+        CheckConstraint(
+            "(raw_days IS NULL OR raw_days > 0) AND (rollup_1m_days IS NULL OR rollup_1m_days > 0) "
+            "AND (rollup_1h_days IS NULL OR rollup_1h_days > 0) AND (rollup_1d_days IS NULL OR rollup_1d_days > 0)",
+            name="check_retention_days_positive"
+        ),
+    )
+
+    @property
+    def specificity(self) -> int:
+        """Prioridad del alcance: 3 = grupo + tipo, 2 = grupo, 1 = tipo, 0 = global."""
+        return (2 if self.location_group_id is not None else 0) + (1 if self.asset_type is not None else 0)
+
+    def matches(self, location_group_id, asset_type) -> bool:
+        """True si la politica aplica a un device con ese grupo y tipo de asset."""
+        return (
+            (self.location_group_id is None or self.location_group_id == location_group_id)
+            and (self.asset_type is None or self.asset_type == asset_type)
+        )
+
+    def __repr__(self):
+        return f"<RetentionPolicy(id={self.id}, name='{self.name}', raw_days={self.raw_days})>"
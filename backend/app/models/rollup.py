@@ -0,0 +1,90 @@
+"""
+Modelos de Rollups (agregados precalculados de sensor_readings).
+
+ReadingRollup guarda, por device, variable, resolucion y bucket, las sumas
+necesarias para reconstruir avg/min/max/stddev de cualquier bucket mas
+grande sin leer las mediciones crudas:
+
+    avg    = sum / count
+    stddev = sqrt((sum_sq - sum^2 / count) / (count - 1))
+
+RollupWatermark registra hasta que sensor_readings.id ya fue incorporado
+a los rollups (high-water mark del job incremental).
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, Integer, String, Float, DateTime, Text, ForeignKey, Index, CheckConstraint
+from app.core.database import Base
+
+
+class ReadingRollup(Base):
+    """
+    Agregado de una variable numerica de un device en un bucket de tiempo.
+
+    Resoluciones: 1m, 1h, 1d (buckets alineados a la medianoche UTC).
+    """
+
+    __tablename__ = "reading_rollups"
+
+    # Columnas (la PK compuesta permite el upsert incremental)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), primary_key=True,
+                       comment="ID del device")
+    variable = Column(String(64), primary_key=True,
+                      comment="Key del data_payload (temp_c, humidity_pct, etc.)")
+    resolution = Column(String(4), primary_key=True,
+                        comment="Resolucion del bucket: 1m, 1h, 1d")
+    bucket_start = Column(DateTime, primary_key=True,
+                          comment="Inicio del bucket (UTC)")
+    count = Column(BigInteger, nullable=False,
+                   comment="Cantidad de mediciones numericas en el bucket")
+    sum = Column(Float, nullable=False,
+                 comment="Suma de los valores")
+    min = Column(Float, nullable=False,
+                 comment="Valor minimo")
+    max = Column(Float, nullable=False,
+                 comment="Valor maximo")
+    sum_sq = Column(Float, nullable=False,
+                    comment="Suma de los cuadrados (para stddev)")
+
+    # Índices y constraints
+    __table_args__ = (
+        # Lectura tipica: una resolucion, un rango de tiempo, varios devices/variables
+        Index("idx_rollups_resolution_time", "resolution", "bucket_start"),
+        CheckConstraint("resolution IN ('1m', '1h', '1d')", name="check_rollup_resolution"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<ReadingRollup(device_id={self.device_id}, variable='{self.variable}', "
+            f"resolution='{self.resolution}', bucket_start='{self.bucket_start}')>"
+        )
+
+
+class RollupWatermark(Base):
+    """
+    High-water mark del job de rollups.
+
+    last_reading_id: todas las mediciones con id <= este valor ya estan en
+    reading_rollups.
+
+    pending_reading_id / pending_snapshot: candidato a proximo watermark y
+    snapshot de transacciones del momento en que se tomo. Solo se procesa
+    cuando todas las transacciones de ese snapshot terminaron; asi una
+    transaccion lenta con un id menor nunca queda salteada.
+    """
+
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(64), primary_key=True,
+                  comment="Nombre del job (ej: sensor_readings)")
+    last_reading_id = Column(BigInteger, nullable=False, default=0,
+                             comment="Ultimo sensor_readings.id incorporado a los rollups")
+    pending_reading_id = Column(BigInteger, nullable=True,
+                                comment="Candidato a proximo watermark")
+    pending_snapshot = Column(Text, nullable=True,
+                              comment="pg_current_snapshot() al tomar el candidato")
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow,
+                        comment="Ultima ejecucion del job")
+
+    def __repr__(self):
+        return f"<RollupWatermark(name='{self.name}', last_reading_id={self.last_reading_id})>"
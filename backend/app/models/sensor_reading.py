@@ -3,10 +3,14 @@ Modelo de SensorReading (Mediciones de sensores).
 
 TABLA CRÍTICA del sistema. Almacena todas las mediciones en formato JSONB
 para máxima flexibilidad y escalabilidad.
+
+La tabla esta particionada por rango de timestamp (PARTITION BY RANGE):
+las particiones (mensuales por defecto) las crea app/services/partitioning.py
+y una particion DEFAULT recibe lo que no cae en ninguna otra.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, BigInteger, Integer, Float, Boolean, DateTime, ForeignKey, Index, CheckConstraint
+from sqlalchemy import DDL, Column, BigInteger, Integer, Float, DateTime, ForeignKey, Index, CheckConstraint, event
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -25,37 +29,49 @@ class SensorReading(Base):
 
     IMPORTANTE: Esta tabla crecerá a millones de registros. Los índices están
     optimizados para las queries más comunes (device_id + timestamp).
+
+    PARTICIONADO: la PK es (id, timestamp) porque toda constraint unica de
+    una tabla particionada debe incluir la clave de particion. `id` sigue
+    siendo unico en la practica (sale de una secuencia). Las queries que
+    filtran por timestamp solo leen las particiones del rango (pruning).
+
+    INSERT-ONLY: las mediciones no se actualizan. Los consumidores (alertas)
+    registran hasta que id procesaron en reading_cursors
+    (app/services/reading_consumer.py) en lugar de marcar cada fila.
     """
 
     __tablename__ = "sensor_readings"
 
     # Columnas
-    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True,
+    id = Column(BigInteger, primary_key=True, autoincrement=True,
                 comment="ID autoincremental (BIGINT para millones de registros)")
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"),
-                      nullable=False, index=True,
+                      nullable=False,
                       comment="ID del device que generó esta lectura")
     data_payload = Column(JSONB, nullable=False,
                          comment="Datos de la medición en formato JSON flexible")
     quality_score = Column(Float, nullable=True,
                           comment="Score de calidad de la lectura (0.0-1.0): 1.0=perfecto, 0.0=inválido")
-    processed = Column(Boolean, nullable=False, default=False, index=True,
-                      comment="Indica si ya fue procesado por el sistema de alertas")
-    timestamp = Column(DateTime, nullable=False, default=datetime.utcnow, index=True,
-                      comment="Momento de la medición (UTC)")
+    timestamp = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow,
+                      comment="Momento de la medición (UTC, clave de particion)")
 
     # Relaciones
     device = relationship("Device", back_populates="sensor_readings")
+    # Sin FK en la DB (no se puede referenciar solo `id` de una tabla particionada)
     alert_history = relationship("AlertHistory", back_populates="sensor_reading",
-                                cascade="all, delete-orphan",
-                                lazy="selectin")
+                                primaryjoin="SensorReading.id == foreign(AlertHistory.sensor_reading_id)",
+                                lazy="raise", passive_deletes=True)
 
     # Índices y constraints
+    # Cada índice se paga en cada INSERT: no hay índices sueltos sobre id
+    # (lo cubre la PK) ni sobre device_id (lo cubre idx_readings_device_time).
     __table_args__ = (
         # Índice compuesto para la query más común: filtrar por device y ordenar por timestamp
         Index("idx_readings_device_time", "device_id", "timestamp", postgresql_using="btree"),
-        # Índice para encontrar readings no procesados por el job de alertas
-        Index("idx_readings_processed", "processed"),
+        # Btree (timestamp, id) para rangos de tiempo sin filtro de device y las
+        # paginas de GET /readings sin device_id (ORDER BY timestamp DESC, id DESC
+        # LIMIT n), que salen ordenadas del indice sin sort
+        Index("idx_readings_time_id", "timestamp", "id", postgresql_using="btree"),
         # Índice GIN para búsquedas dentro del JSONB
         Index("idx_readings_payload", "data_payload", postgresql_using="gin"),
         # Constraint de calidad
@@ -63,6 +79,7 @@ class SensorReading(Base):
             "quality_score IS NULL OR (quality_score >= 0 AND quality_score <= 1)",
             name="check_quality_score_range"
         ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
     def __repr__(self):
@@ -83,3 +100,12 @@ class SensorReading(Base):
         if self.quality_score is None:
             return True  # Asumimos válido si no fue evaluado
         return self.quality_score >= 0.7
+
+
+# Particion DEFAULT: create_all() crea la tabla padre sin particiones y sin
+# esta los INSERT fallarian hasta que corra ensure_partitions()
+event.listen(
+    SensorReading.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS sensor_readings_default PARTITION OF sensor_readings DEFAULT"),
+)
@@ -28,12 +28,12 @@ class User(Base):
     __tablename__ = "users"
 
     # Columnas
-    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    email = Column(String(255), nullable=False, unique=True, index=True,
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    email = Column(String(255), nullable=False, unique=True,
                   comment="Email único del usuario (usado para login)")
     password_hash = Column(String(255), nullable=False,
                           comment="Hash bcrypt de la contraseña (NUNCA plaintext)")
-    role = Column(String(32), nullable=False, index=True,
+    role = Column(String(32), nullable=False,
                   comment="Rol del usuario: super_admin, service_admin, technician, guest")
     allowed_location_ids = Column(ARRAY(Integer), nullable=True,
                                   comment="Array de IDs de locations que puede ver (NULL=todas si super_admin)")
@@ -41,7 +41,7 @@ class User(Base):
                        comment="Nombre del usuario")
     last_name = Column(String(64), nullable=False,
                       comment="Apellido del usuario")
-    is_active = Column(Boolean, nullable=False, default=True, index=True,
+    is_active = Column(Boolean, nullable=False, default=True,
                       comment="Permite desactivar usuarios sin eliminarlos")
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow,
                        comment="Fecha de creación del usuario")
@@ -51,11 +51,10 @@ class User(Base):
     # Relaciones
     acknowledged_alerts = relationship("AlertHistory", back_populates="acknowledged_by_user",
                                       foreign_keys="AlertHistory.acknowledged_by",
-                                      lazy="selectin")
+                                      lazy="raise", passive_deletes=True)
 
-    # Índices y constraints
+    # Índices y constraints (email ya tiene el indice de su UNIQUE)
     __table_args__ = (
-        Index("idx_users_email", "email"),
         Index("idx_users_role", "role"),
         Index("idx_users_active", "is_active"),
         CheckConstraint(
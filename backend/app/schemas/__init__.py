@@ -35,6 +35,26 @@ from app.schemas.sensor_reading import (
     SensorReadingBase,
     SensorReadingCreate,
     SensorReading,
+    SensorReadingBatchCreate,
+    SensorReadingBatchItemResult,
+    SensorReadingBatchResponse,
+)
+
+from app.schemas.timeseries import (
+    SeriesPoint,
+    DeviceSeries,
+    AggregateBucket,
+    AggregateSeries,
+    AggregateResponse,
+)
+
+from app.schemas.retention import (
+    RetentionPolicyBase,
+    RetentionPolicyCreate,
+    RetentionPolicyUpdate,
+    RetentionPolicy,
+    RetentionAction,
+    RetentionReport,
 )
 
 from app.schemas.user import (
@@ -86,6 +106,22 @@ __all__ = [
     "SensorReadingBase",
     "SensorReadingCreate",
     "SensorReading",
+    "SensorReadingBatchCreate",
+    "SensorReadingBatchItemResult",
+    "SensorReadingBatchResponse",
+    # Timeseries schemas
+    "SeriesPoint",
+    "DeviceSeries",
+    "AggregateBucket",
+    "AggregateSeries",
+    "AggregateResponse",
+    # Retention schemas
+    "RetentionPolicyBase",
+    "RetentionPolicyCreate",
+    "RetentionPolicyUpdate",
+    "RetentionPolicy",
+    "RetentionAction",
+    "RetentionReport",
     # User schemas
     "UserBase",
     "UserCreate",
@@ -0,0 +1,71 @@
+"""
+Schemas Pydantic para politicas de retencion y reportes de limpieza.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict
+
+
+# ============================================
+# RetentionPolicy Schemas
+# ============================================
+
+class RetentionPolicyBase(BaseModel):
+    """Schema base para RetentionPolicy (campos comunes). Dias en None = para siempre."""
+    name: str = Field(..., max_length=128, description="Nombre descriptivo")
+    location_group_id: Optional[int] = Field(None, description="Alcance: grupo de ubicaciones (None = todos)")
+    asset_type: Optional[str] = Field(None, max_length=64, description="Alcance: tipo de asset (None = todos)")
+    raw_days: Optional[int] = Field(None, gt=0, description="Dias de mediciones crudas")
+    rollup_1m_days: Optional[int] = Field(None, gt=0, description="Dias de rollups de 1 minuto")
+    rollup_1h_days: Optional[int] = Field(None, gt=0, description="Dias de rollups de 1 hora")
+    rollup_1d_days: Optional[int] = Field(None, gt=0, description="Dias de rollups de 1 dia")
+    enabled: bool = True
+
+
+class RetentionPolicyCreate(RetentionPolicyBase):
+    """Schema para crear una RetentionPolicy."""
+    pass
+
+
+class RetentionPolicyUpdate(BaseModel):
+    """Schema para actualizar una RetentionPolicy (todos los campos opcionales)."""
+    name: Optional[str] = Field(None, max_length=128)
+    raw_days: Optional[int] = Field(None, gt=0)
+    rollup_1m_days: Optional[int] = Field(None, gt=0)
+    rollup_1h_days: Optional[int] = Field(None, gt=0)
+    rollup_1d_days: Optional[int] = Field(None, gt=0)
+    enabled: Optional[bool] = None
+
+
+class RetentionPolicy(RetentionPolicyBase):
+    """Schema para respuesta de RetentionPolicy (incluye campos de DB)."""
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# ============================================
+# Reporte de Retencion
+# ============================================
+
+class RetentionAction(BaseModel):
+    """Una accion de limpieza (planificada o ejecutada)."""
+    kind: str = Field(..., description="drop_partition | delete_readings | delete_rollups")
+    target: str = Field(..., description="Particion o tabla afectada (ej: reading_rollups:1m)")
+    policy_id: Optional[int] = Field(None, description="Politica que la origina (None en drops de particion)")
+    cutoff: datetime = Field(..., description="Se elimina lo anterior a esta fecha (UTC)")
+    devices: int = Field(..., description="Devices alcanzados")
+    rows: int = Field(..., description="Filas eliminadas (o a eliminar en dry-run)")
+    bytes: int = Field(..., description="Espacio estimado liberado, incluyendo indices")
+
+
+class RetentionReport(BaseModel):
+    """Resultado de aplicar (o simular) las politicas de retencion."""
+    dry_run: bool
+    generated_at: datetime
+    actions: List[RetentionAction]
+    total_rows: int
+    total_bytes: int
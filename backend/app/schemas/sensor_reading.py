@@ -3,7 +3,7 @@ Schemas Pydantic para SensorReading (TABLA CRITICA).
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 
@@ -52,7 +52,42 @@ class SensorReadingCreate(BaseModel):
 class SensorReading(SensorReadingBase):
     """Schema para respuesta de SensorReading (incluye campos de DB)."""
     id: int
-    processed: bool = False
     timestamp: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# ============================================
+# Batch Ingestion Schemas (gateways / buffers)
+# ============================================
+
+class SensorReadingBatchCreate(BaseModel):
+    """
+    Schema para crear multiples SensorReadings en un solo request.
+
+    Usado por gateways que acumulan mediciones de uno o varios devices
+    y las envian juntas al endpoint POST /readings/batch.
+    """
+    readings: List[SensorReadingCreate] = Field(
+        ...,
+        min_length=1,
+        max_length=5000,
+        description="Mediciones a insertar (pueden ser de distintos devices)"
+    )
+
+
+class SensorReadingBatchItemResult(BaseModel):
+    """Resultado individual de cada medicion enviada en un batch."""
+    index: int = Field(..., description="Posicion de la medicion dentro del batch")
+    device_eui: str = Field(..., description="EUI del device de la medicion")
+    status: str = Field(..., description="Estado: created, device_not_found, unauthorized")
+    reading_id: Optional[int] = Field(None, description="ID del reading creado (si aplica)")
+    detail: Optional[str] = Field(None, description="Detalle del error (si aplica)")
+
+
+class SensorReadingBatchResponse(BaseModel):
+    """Schema para respuesta de POST /readings/batch."""
+    received: int = Field(..., description="Cantidad de mediciones recibidas")
+    created: int = Field(..., description="Cantidad de mediciones insertadas")
+    failed: int = Field(..., description="Cantidad de mediciones rechazadas")
+    results: List[SensorReadingBatchItemResult] = Field(..., description="Resultado por medicion")
@@ -0,0 +1,63 @@
+"""
+Schemas Pydantic para series temporales (graficos).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class SeriesPoint(BaseModel):
+    """
+    Punto de una serie downsampleada.
+
+    En modo "lttb" es un punto real de la serie (solo timestamp y value).
+    En modo "minmax" representa un bucket: value es el promedio y
+    min/max/count resumen las mediciones del bucket.
+    """
+    timestamp: datetime = Field(..., description="Timestamp del punto (inicio del bucket en modo minmax)")
+    value: float = Field(..., description="Valor (promedio del bucket en modo minmax)")
+    min: Optional[float] = Field(None, description="Minimo del bucket (solo minmax)")
+    max: Optional[float] = Field(None, description="Maximo del bucket (solo minmax)")
+    count: Optional[int] = Field(None, description="Mediciones en el bucket (solo minmax)")
+
+
+class DeviceSeries(BaseModel):
+    """Serie temporal de una variable de un device, lista para graficar."""
+    device_id: int
+    variable: str = Field(..., description="Key del data_payload: temp_c, humidity_pct, etc.")
+    mode: str = Field(..., description="Algoritmo de downsampling: lttb | minmax")
+    date_from: datetime = Field(..., serialization_alias="from")
+    date_to: datetime = Field(..., serialization_alias="to")
+    points: int = Field(..., description="Cantidad maxima de puntos solicitada")
+    raw_count: int = Field(..., description="Mediciones numericas en el rango (antes de downsamplear)")
+    data: List[SeriesPoint]
+
+
+# ============================================
+# Agregaciones por Bucket de Tiempo
+# ============================================
+
+class AggregateBucket(BaseModel):
+    """Estadisticas de una variable en un bucket de tiempo."""
+    bucket_start: datetime = Field(..., description="Inicio del bucket (UTC)")
+    avg: float
+    min: float
+    max: float
+    stddev: Optional[float] = Field(None, description="Desvio estandar muestral (None si count == 1)")
+    count: int
+
+
+class AggregateSeries(BaseModel):
+    """Buckets de una variable de un device."""
+    device_id: int
+    variable: str
+    buckets: List[AggregateBucket]
+
+
+class AggregateResponse(BaseModel):
+    """Respuesta de GET /readings/aggregate."""
+    bucket: str = Field(..., description="Tamano del bucket: 1m, 5m, 15m, 30m, 1h, 6h, 12h, 1d")
+    date_from: datetime = Field(..., serialization_alias="from")
+    date_to: datetime = Field(..., serialization_alias="to")
+    series: List[AggregateSeries]
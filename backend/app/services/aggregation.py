@@ -0,0 +1,112 @@
+"""
+Servicio de agregaciones por bucket de tiempo sobre variables JSONB.
+
+Todo el calculo (bucketing, avg/min/max/stddev/count) lo hace PostgreSQL
+con date_bin() + GROUP BY; a Python solo llega una fila por
+(device, variable, bucket), nunca las mediciones crudas.
+
+Varias variables se resuelven en la misma query expandiendo la lista con
+unnest(): cada reading se evalua una vez por variable pedida.
+
+Cuando el bucket es multiplo de un rollup (1m/1h/1d) el interior del rango
+se lee de reading_rollups y solo los bordes y las mediciones aun no
+procesadas por el job se leen crudas (ver app/services/rollups.py).
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import Session
+
+from app.schemas.timeseries import AggregateBucket, AggregateSeries
+from app.services.rollups import BUCKET_ORIGIN, choose_resolution, combined_stats, rollup_partials
+
+
+# Tamanos de bucket soportados
+BUCKET_SIZES: Dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "30m": timedelta(minutes=30),
+    "1h": timedelta(hours=1),
+    "6h": timedelta(hours=6),
+    "12h": timedelta(hours=12),
+    "1d": timedelta(days=1),
+}
+
+# Limite de filas de respuesta (devices x variables x buckets)
+MAX_AGGREGATE_BUCKETS = 20000
+
+
+def count_buckets(bucket: str, date_from: datetime, date_to: datetime) -> int:
+    """Cantidad de buckets que cubren [date_from, date_to)."""
+    size = BUCKET_SIZES[bucket]
+    return int((date_to - date_from) / size) + 1
+
+
+def aggregate_readings(
+    db: Session,
+    device_ids: Sequence[int],
+    variables: Sequence[str],
+    bucket: str,
+    date_from: datetime,
+    date_to: datetime,
+) -> List[AggregateSeries]:
+    """
+    Agrega variables numericas de data_payload por bucket de tiempo.
+
+    Solo se consideran valores JSON numericos (jsonb_typeof = 'number');
+    strings, nulls o variables ausentes se ignoran sin error.
+
+    Args:
+        db: Sesion de base de datos
+        device_ids: Devices a incluir
+        variables: Keys de data_payload (temp_c, humidity_pct...)
+        bucket: Tamano del bucket (ver BUCKET_SIZES)
+        date_from: Inicio del rango (UTC naive, inclusivo)
+        date_to: Fin del rango (UTC naive, exclusivo)
+
+    Returns:
+        List[AggregateSeries]: Una serie por (device, variable) pedido, en ese
+        orden, con buckets ordenados por tiempo (vacia si no hay datos)
+
+    Example:
+        ```python
+        series = aggregate_readings(db, [1, 2], ["temp_c"], "1h", now - timedelta(days=7), now)
+        ```
+    """
+    device_ids = list(dict.fromkeys(device_ids))
+    variables = list(dict.fromkeys(variables))
+
+    size = BUCKET_SIZES[bucket]
+    partials = rollup_partials(
+        db, device_ids, variables, date_from, date_to, choose_resolution(size)
+    )
+
+    # Origen de date_bin: los buckets quedan alineados a la medianoche UTC
+    bucket_start = func.date_bin(literal(size), partials.c.ts, literal(BUCKET_ORIGIN)).label("bucket_start")
+
+    stmt = (
+        select(partials.c.device_id, partials.c.variable, bucket_start, *combined_stats(partials))
+        .group_by(partials.c.device_id, partials.c.variable, bucket_start)
+        .order_by(partials.c.device_id, partials.c.variable, bucket_start)
+    )
+
+    grouped: Dict[Tuple[int, str], List[AggregateBucket]] = defaultdict(list)
+    for device_id, variable, start, avg, minimum, maximum, stddev, count in db.execute(stmt):
+        grouped[(device_id, variable)].append(AggregateBucket(
+            bucket_start=start,
+            avg=avg,
+            min=minimum,
+            max=maximum,
+            stddev=stddev,
+            count=count,
+        ))
+
+    return [
+        AggregateSeries(device_id=device_id, variable=variable, buckets=grouped.get((device_id, variable), []))
+        for device_id in device_ids
+        for variable in variables
+    ]
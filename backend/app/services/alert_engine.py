@@ -0,0 +1,372 @@
+"""
+Motor de evaluacion de reglas de alerta sobre las mediciones ingeridas.
+
+Corre como consumidor "alerts" de sensor_readings (reading_consumer): cada
+batch de mediciones nuevas se evalua contra las reglas aplicables a su
+device (indice de alert_rules), se aplica el cooldown de cada regla y los
+disparos se insertan en alert_history con un solo INSERT multi-fila, en la
+misma transaccion que avanza el cursor (ni duplicados ni perdidas si el
+worker se cae a mitad de batch).
+
+RATE_OF_CHANGE compara cada medicion con la mas antigua de su ventana
+(time_window_minutes) del mismo device, usando los buffers en memoria de
+alert_windows: se evalua medicion por medicion y en orden, sin queries
+salvo al reconstruir un buffer.
+
+Los batches grandes (backlog del consumidor, reproceso de historial) se
+evaluan vectorizados: las variables del payload se pivotean a arrays de
+NumPy y cada regla es una comparacion sobre el array completo. Los
+batches chicos se evaluan medicion por medicion. Ambos caminos producen
+los mismos disparos.
+
+Cada batch tambien renueva los deadlines de DEVICE_OFFLINE
+(offline_monitor), que disparan por ausencia de mediciones.
+
+El cooldown y el INSERT de los disparos estan en alert_history.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.sensor_reading import SensorReading
+from app.services.alert_history import AlertCandidate, CooldownTracker, insert_alerts
+from app.services.alert_rules import CompiledRule, DeviceRules, RuleIndex, RuleIndexCache, rule_index_cache
+from app.services.alert_windows import WindowBuffer, WindowStore, epoch_seconds
+from app.services.offline_monitor import OfflineMonitor, offline_monitor
+from app.services.reading_consumer import ReadingConsumer, current_batch
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# Chequeos por Medicion
+# ============================================================
+
+def numeric_value(raw: Any) -> Optional[float]:
+    """Valor numerico finito de una variable del payload (None si no lo es)."""
+    if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+        return None
+    value = float(raw)
+    return value if math.isfinite(value) else None
+
+
+def _check_above(rule: CompiledRule, raw: Any, value: Optional[float]) -> Optional[str]:
+    if value is not None and rule.threshold_value is not None and value > rule.threshold_value:
+        return f"{rule.name}: {rule.variable_key} = {value:g} supera {rule.threshold_value:g}"
+    return None
+
+
+def _check_below(rule: CompiledRule, raw: Any, value: Optional[float]) -> Optional[str]:
+    if value is not None and rule.threshold_value is not None and value < rule.threshold_value:
+        return f"{rule.name}: {rule.variable_key} = {value:g} por debajo de {rule.threshold_value:g}"
+    return None
+
+
+def _check_range(rule: CompiledRule, raw: Any, value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    if (rule.threshold_min is not None and value < rule.threshold_min) or \
+            (rule.threshold_max is not None and value > rule.threshold_max):
+        low = "-inf" if rule.threshold_min is None else f"{rule.threshold_min:g}"
+        high = "inf" if rule.threshold_max is None else f"{rule.threshold_max:g}"
+        return f"{rule.name}: {rule.variable_key} = {value:g} fuera del rango [{low}, {high}]"
+    return None
+
+
+def _check_sensor_fault(rule: CompiledRule, raw: Any, value: Optional[float]) -> Optional[str]:
+    # Variable ausente, null o no numerica (ej: el firmware manda null si el sensor no responde)
+    if value is None:
+        return f"{rule.name}: {rule.variable_key} sin valor valido ({raw!r})"
+    return None
+
+
+# check_type -> funcion(rule, valor crudo, valor numerico) -> mensaje si dispara
+CHECKS: Dict[str, Callable[[CompiledRule, Any, Optional[float]], Optional[str]]] = {
+    "THRESHOLD_ABOVE": _check_above,
+    "THRESHOLD_BELOW": _check_below,
+    "THRESHOLD_RANGE": _check_range,
+    "SENSOR_FAULT": _check_sensor_fault,
+}
+
+
+def evaluate_reading(rules: DeviceRules, reading: SensorReading) -> List[AlertCandidate]:
+    """Evalua una medicion contra las reglas de su device (sin cooldown)."""
+    payload = reading.data_payload or {}
+    candidates = []
+    for variable, variable_rules in rules.items():
+        raw = payload.get(variable)
+        value = numeric_value(raw)
+        for rule in variable_rules:
+            message = CHECKS[rule.check_type](rule, raw, value)
+            if message is not None:
+                candidates.append(AlertCandidate(
+                    rule.id, reading.device_id, reading.id, reading.timestamp, value, message
+                ))
+    return candidates
+
+
+# ============================================================
+# Evaluacion Vectorizada
+# ============================================================
+
+# Tipos exactos (bool es subclase de int y no cuenta como numero)
+_NUMBER_TYPES = (float, int)
+
+
+def pivot_payloads(payloads: Sequence[dict], variables: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Columnas float64 por variable (NaN si falta o no es numerica).
+
+    Example:
+        ```python
+        pivot_payloads([{"temp_c": 4.0}, {"temp_c": None}], ["temp_c"])
+        # {"temp_c": array([4., nan])}
+        ```
+    """
+    n = len(payloads)
+    columns = {}
+    for variable in variables:
+        column = np.fromiter(
+            (raw if type(raw) in _NUMBER_TYPES else np.nan for raw in (payload.get(variable) for payload in payloads)),
+            np.float64,
+            n,
+        )
+        column[np.isinf(column)] = np.nan  # Mismo criterio que numeric_value()
+        columns[variable] = column
+    return columns
+
+
+def _mask_above(rule: CompiledRule, values: np.ndarray) -> Optional[np.ndarray]:
+    return None if rule.threshold_value is None else values > rule.threshold_value
+
+
+def _mask_below(rule: CompiledRule, values: np.ndarray) -> Optional[np.ndarray]:
+    return None if rule.threshold_value is None else values < rule.threshold_value
+
+
+def _mask_range(rule: CompiledRule, values: np.ndarray) -> Optional[np.ndarray]:
+    if rule.threshold_min is None and rule.threshold_max is None:
+        return None
+    mask = np.zeros(len(values), dtype=bool)
+    if rule.threshold_min is not None:
+        mask |= values < rule.threshold_min
+    if rule.threshold_max is not None:
+        mask |= values > rule.threshold_max
+    return mask
+
+
+def _mask_sensor_fault(rule: CompiledRule, values: np.ndarray) -> Optional[np.ndarray]:
+    return np.isnan(values)
+
+
+# check_type -> funcion(rule, columna) -> mascara de disparos (NaN nunca compara True)
+VECTOR_CHECKS: Dict[str, Callable[[CompiledRule, np.ndarray], Optional[np.ndarray]]] = {
+    "THRESHOLD_ABOVE": _mask_above,
+    "THRESHOLD_BELOW": _mask_below,
+    "THRESHOLD_RANGE": _mask_range,
+    "SENSOR_FAULT": _mask_sensor_fault,
+}
+
+
+def evaluate_batch(index: RuleIndex, readings: Sequence[SensorReading]) -> List[AlertCandidate]:
+    """
+    Evalua un batch con operaciones de arrays (sin cooldown).
+
+    Equivale a evaluate_reading() sobre cada medicion; solo los disparos
+    (pocos) vuelven a Python para armar el mensaje.
+    """
+    if not readings:
+        return []
+
+    # Devices del batch por regla. Los devices con las mismas reglas
+    # comparten el dict del indice: se recorre cada set de reglas una vez
+    device_ids = np.fromiter((reading.device_id for reading in readings), np.int64, len(readings))
+    batch_devices = np.unique(device_ids)
+    rule_sets: Dict[int, Tuple[DeviceRules, List[int]]] = {}
+    for device_id in batch_devices.tolist():
+        device_rules = index.for_device(device_id)
+        rule_sets.setdefault(id(device_rules), (device_rules, []))[1].append(device_id)
+
+    rule_devices: Dict[int, List[int]] = defaultdict(list)
+    rules: Dict[int, CompiledRule] = {}
+    for device_rules, devices in rule_sets.values():
+        for variable_rules in device_rules.values():
+            for rule in variable_rules:
+                rules[rule.id] = rule
+                rule_devices[rule.id].extend(devices)
+    if not rules:
+        return []
+
+    payloads = [reading.data_payload or {} for reading in readings]
+    columns = pivot_payloads(payloads, {rule.variable_key for rule in rules.values()})
+
+    candidates = []
+    for rule_id, rule in rules.items():
+        values = columns[rule.variable_key]
+        mask = VECTOR_CHECKS[rule.check_type](rule, values)
+        if mask is None:
+            continue
+        if len(rule_devices[rule_id]) < len(batch_devices):
+            mask &= np.isin(device_ids, rule_devices[rule_id])
+
+        for position in np.flatnonzero(mask).tolist():
+            reading = readings[position]
+            raw = payloads[position].get(rule.variable_key)
+            value = numeric_value(raw)
+            candidates.append(AlertCandidate(
+                rule.id, reading.device_id, reading.id, reading.timestamp, value,
+                CHECKS[rule.check_type](rule, raw, value)
+            ))
+    return candidates
+
+
+# ============================================================
+# Reglas con Ventana de Tiempo
+# ============================================================
+
+def _check_rate_of_change(rule: CompiledRule, buffer: WindowBuffer, now: float, value: float) -> Optional[str]:
+    if rule.threshold_value is None or not rule.time_window_minutes:
+        return None
+    first = buffer.first_since(now - rule.time_window_minutes * 60)
+    if first is None:
+        return None
+    since, baseline = first
+    change = value - baseline
+    if abs(change) > rule.threshold_value:
+        return (
+            f"{rule.name}: {rule.variable_key} cambio {change:+g} en {(now - since) / 60:.0f} min "
+            f"(limite {rule.threshold_value:g} en {rule.time_window_minutes} min)"
+        )
+    return None
+
+
+def evaluate_windows(
+    db: Session,
+    store: WindowStore,
+    index: RuleIndex,
+    readings: Sequence[SensorReading],
+) -> List[AlertCandidate]:
+    """
+    Evalua las reglas con ventana (sin cooldown) y agrega las mediciones a los buffers.
+
+    Las mediciones deben llegar en orden de id; una medicion con timestamp
+    anterior a la ultima del buffer (llego tarde) no se evalua ni se agrega.
+    """
+    if not index.windowed_by_device and not index.windowed_global:
+        return []
+    store.begin_batch(db, current_batch(db))
+
+    candidates = []
+    for reading in readings:
+        rules = index.windowed_for_device(reading.device_id)
+        if not rules:
+            continue
+        payload = reading.data_payload or {}
+        now = epoch_seconds(reading.timestamp)
+        for variable, variable_rules in rules.items():
+            value = numeric_value(payload.get(variable))
+            window = max(rule.time_window_minutes or 0 for rule in variable_rules) * 60
+            if value is None or not window:
+                continue
+            buffer = store.get(db, reading.device_id, variable, reading.timestamp, window)
+            if buffer.last_time is not None and now < buffer.last_time:
+                continue
+
+            for rule in variable_rules:
+                message = _check_rate_of_change(rule, buffer, now, value)
+                if message is not None:
+                    candidates.append(AlertCandidate(
+                        rule.id, reading.device_id, reading.id, reading.timestamp, value, message
+                    ))
+            buffer.append(now, value)
+    return candidates
+
+
+# ============================================================
+# Motor
+# ============================================================
+
+class AlertEngine:
+    """
+    Evalua batches de mediciones y registra las alertas disparadas.
+
+    Example:
+        ```python
+        alert_engine.process(db, readings)  # Inserta en alert_history, no hace commit
+        ```
+    """
+
+    def __init__(
+        self,
+        index_cache: RuleIndexCache = rule_index_cache,
+        vectorized_min_batch: Optional[int] = None,
+        offline_monitor: Optional[OfflineMonitor] = None,
+    ):
+        self.index_cache = index_cache
+        self.offline_monitor = offline_monitor
+        self.vectorized_min_batch = vectorized_min_batch or settings.alert_vectorized_min_batch
+        self.windows = WindowStore()
+        self.cooldowns = CooldownTracker()
+        self.evaluated = 0
+        self.fired = 0
+
+    def evaluate(self, index: RuleIndex, readings: Sequence[SensorReading]) -> List[AlertCandidate]:
+        """Disparos de un batch antes del cooldown."""
+        if len(readings) >= self.vectorized_min_batch:
+            return evaluate_batch(index, readings)
+
+        candidates = []
+        for reading in readings:
+            rules = index.for_device(reading.device_id)
+            if rules:
+                candidates.extend(evaluate_reading(rules, reading))
+        return candidates
+
+    def process(self, db: Session, readings: Sequence[SensorReading]) -> List[AlertCandidate]:
+        """
+        Handler del consumidor: evalua, aplica cooldown e inserta. No hace commit.
+
+        Returns:
+            List[AlertCandidate]: Alertas registradas
+        """
+        index = self.index_cache.get(db)
+        self.evaluated += len(readings)
+        if self.offline_monitor is not None:
+            self.offline_monitor.touch(index, readings)
+        if not index.rules:
+            return []
+
+        candidates = self.evaluate(index, readings) + evaluate_windows(db, self.windows, index, readings)
+        if not candidates:
+            return []
+
+        fired = self.cooldowns.apply(db, candidates, index.rules)
+        insert_alerts(db, fired)
+        if fired:
+            self.fired += len(fired)
+            logger.info(f"{len(fired)} alertas disparadas ({len(readings)} mediciones evaluadas)")
+        return fired
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        return {
+            "enabled": settings.alerts_enabled,
+            "evaluated": self.evaluated,
+            "fired": self.fired,
+            "windows": self.windows.stats(),
+            "cooldowns": self.cooldowns.stats(),
+        }
+
+
+# ============================================================
+# Instancias Globales
+# ============================================================
+alert_engine = AlertEngine(offline_monitor=offline_monitor)
+alert_consumer = ReadingConsumer("alerts", alert_engine.process, workers=settings.alert_workers)
@@ -0,0 +1,325 @@
+"""
+Registro de alertas disparadas en alert_history.
+
+Lo usan el motor por medicion (alert_engine) y el detector de devices
+offline (offline_monitor): ambos generan AlertCandidate, aplican el
+cooldown de cada regla y registran los disparos con un INSERT multi-fila.
+
+El cooldown (AlertRule.cooldown_minutes) se mide sobre triggered_at.
+record_alerts() lo verifica contra alert_history con una query agregada
+por batch; el motor, que dispara en cada batch del consumidor, usa en su
+lugar un CooldownTracker: el ultimo disparo por (regla, device) en un LRU
+en memoria, cargado al arrancar con una sola query agregada y actualizado
+con cada disparo. Con CACHE_REDIS_ENABLED=true los disparos ademas se
+reclaman en Redis (SET NX con el cooldown como TTL), asi dos procesos no
+disparan la misma regla dentro del cooldown.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.models.alert import AlertHistory
+from app.services.alert_rules import CompiledRule
+from app.services.reading_consumer import BatchContinuity, ReadingBatch, current_batch
+
+
+logger = logging.getLogger(__name__)
+
+# Clave del cooldown: (alert_rule_id, device_id)
+CooldownKey = Tuple[int, int]
+
+
+class AlertCandidate(NamedTuple):
+    """Disparo de una regla (fila de alert_history sin id)."""
+    alert_rule_id: int
+    device_id: int
+    sensor_reading_id: Optional[int]
+    triggered_at: datetime
+    value_observed: Optional[float]
+    message: str
+
+
+def last_triggered(db: Session, pairs: Sequence[CooldownKey]) -> Dict[CooldownKey, datetime]:
+    """Ultimo triggered_at de cada (regla, device), en una sola query."""
+    if not pairs:
+        return {}
+    rows = db.execute(
+        select(AlertHistory.alert_rule_id, AlertHistory.device_id, func.max(AlertHistory.triggered_at))
+        .where(tuple_(AlertHistory.alert_rule_id, AlertHistory.device_id).in_(list(pairs)))
+        .group_by(AlertHistory.alert_rule_id, AlertHistory.device_id)
+    ).all()
+    return {(rule_id, device_id): triggered_at for rule_id, device_id, triggered_at in rows}
+
+
+def apply_cooldown(
+    candidates: Sequence[AlertCandidate],
+    rules: Dict[int, CompiledRule],
+    last: Dict[CooldownKey, datetime],
+) -> List[AlertCandidate]:
+    """
+    Descarta los disparos dentro del cooldown de su regla.
+
+    `last` se actualiza con los disparos aceptados (sirve para el batch siguiente).
+    """
+    fired = []
+    for candidate in sorted(candidates, key=lambda c: c.triggered_at):
+        key = (candidate.alert_rule_id, candidate.device_id)
+        previous = last.get(key)
+        cooldown = timedelta(minutes=rules[candidate.alert_rule_id].cooldown_minutes)
+        if previous is None or candidate.triggered_at >= previous + cooldown:
+            fired.append(candidate)
+            last[key] = candidate.triggered_at
+    return fired
+
+
+def record_alerts(
+    db: Session,
+    candidates: Sequence[AlertCandidate],
+    rules: Dict[int, CompiledRule],
+    last: Optional[Dict[CooldownKey, datetime]] = None,
+) -> List[AlertCandidate]:
+    """
+    Aplica el cooldown e inserta los disparos en alert_history. No hace commit.
+
+    Args:
+        last: Resultado de last_triggered() si el caller ya lo consulto
+
+    Returns:
+        List[AlertCandidate]: Alertas registradas
+    """
+    if not candidates:
+        return []
+
+    if last is None:
+        last = last_triggered(db, sorted({(c.alert_rule_id, c.device_id) for c in candidates}))
+    fired = apply_cooldown(candidates, rules, last)
+    insert_alerts(db, fired)
+    return fired
+
+
+def insert_alerts(db: Session, fired: Sequence[AlertCandidate]) -> None:
+    """INSERT multi-fila de los disparos en alert_history. No hace commit."""
+    if fired:
+        db.execute(insert(AlertHistory), [candidate._asdict() for candidate in fired])
+
+
+# ============================================================
+# Cooldown en Memoria
+# ============================================================
+
+class CooldownTracker:
+    """
+    Ultimo triggered_at por (regla, device) en un LRU acotado.
+
+    Un par ausente del LRU no disparo dentro del cooldown, salvo que:
+    - el LRU haya descartado un par con el cooldown vigente (se consulta
+      alert_history para los pares ausentes hasta que ese cooldown vence)
+    - el batch no continue el anterior del shard (reintento tras un
+      rollback, o el shard lo consumio otro proceso): los pares del shard
+      se recargan de alert_history con una query agregada
+
+    Los pares de un device los evalua siempre el mismo shard, asi que dos
+    workers del proceso nunca deciden sobre el mismo par a la vez.
+
+    Example:
+        ```python
+        fired = tracker.apply(db, candidates, index.rules)
+        insert_alerts(db, fired)
+        ```
+    """
+
+    REDIS_PREFIX = "alerts:cooldown:"
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        use_redis: Optional[bool] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.max_size = max_size or settings.alert_cooldown_cache_size
+        self.use_redis = settings.cache_redis_enabled if use_redis is None else use_redis
+        self.clock = clock
+
+        # (regla, device) -> (triggered_at, fin del cooldown)
+        self._last: "OrderedDict[CooldownKey, Tuple[datetime, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._continuity = BatchContinuity()
+        self._horizon: Optional[int] = None
+        self._incomplete_until = datetime.min
+
+        self.hits = 0
+        self.lookups = 0
+        self.seeds = 0
+        self.evicted = 0
+
+    # ============================================================
+    # Carga desde alert_history
+    # ============================================================
+
+    def seed(self, db: Session, rules: Dict[int, CompiledRule], batch: Optional[ReadingBatch] = None) -> int:
+        """
+        Carga los disparos dentro del cooldown mas largo con una query agregada.
+
+        Args:
+            batch: Si se indica, solo recarga los devices de su shard
+
+        Returns:
+            int: Pares cargados
+        """
+        horizon = max((rule.cooldown_minutes for rule in rules.values()), default=0)
+        rows = []
+        if horizon > 0:
+            query = (
+                select(AlertHistory.alert_rule_id, AlertHistory.device_id, func.max(AlertHistory.triggered_at))
+                .where(AlertHistory.triggered_at >= self.clock() - timedelta(minutes=horizon))
+                .group_by(AlertHistory.alert_rule_id, AlertHistory.device_id)
+            )
+            if batch is not None and batch.shards > 1:
+                query = query.where(AlertHistory.device_id % batch.shards == batch.shard)
+            rows = db.execute(query).all()
+
+        with self._lock:
+            if batch is None:
+                self._last.clear()
+                self._incomplete_until = datetime.min
+                self._horizon = horizon
+            else:
+                for key in [key for key in self._last if key[1] % batch.shards == batch.shard]:
+                    del self._last[key]
+            for rule_id, device_id, triggered_at in rows:
+                if rule_id in rules:
+                    self._store((rule_id, device_id), triggered_at, rules[rule_id])
+            self.seeds += 1
+        return len(rows)
+
+    def _store(self, key: CooldownKey, triggered_at: datetime, rule: CompiledRule) -> None:
+        """Guarda un disparo y descarta los pares menos usados (requiere el lock)."""
+        self._last[key] = (triggered_at, triggered_at + timedelta(minutes=rule.cooldown_minutes))
+        self._last.move_to_end(key)
+        while len(self._last) > self.max_size:
+            _, (_, until) = self._last.popitem(last=False)
+            self.evicted += 1
+            self._incomplete_until = max(self._incomplete_until, until)
+
+    # ============================================================
+    # Cooldown
+    # ============================================================
+
+    def apply(
+        self,
+        db: Session,
+        candidates: Sequence[AlertCandidate],
+        rules: Dict[int, CompiledRule],
+    ) -> List[AlertCandidate]:
+        """
+        Descarta los disparos dentro del cooldown y registra los aceptados.
+
+        No inserta en alert_history (ver insert_alerts()).
+
+        Returns:
+            List[AlertCandidate]: Disparos aceptados
+        """
+        if not candidates:
+            return []
+
+        horizon = max((rule.cooldown_minutes for rule in rules.values()), default=0)
+        seeded = self._horizon is None or horizon > self._horizon
+        if seeded:
+            self.seed(db, rules)
+        batch = current_batch(db)
+        if batch is not None and not self._continuity.check(db, batch) and not seeded:
+            self.seed(db, rules, batch)
+
+        last: Dict[CooldownKey, datetime] = {}
+        missing = []
+        with self._lock:
+            incomplete = self._incomplete_until > self.clock()
+            for key in sorted({(c.alert_rule_id, c.device_id) for c in candidates}):
+                entry = self._last.get(key)
+                if entry is not None:
+                    last[key] = entry[0]
+                    self.hits += 1
+                elif incomplete:
+                    missing.append(key)
+        if missing:
+            last.update(last_triggered(db, missing))
+            self.lookups += len(missing)
+
+        fired = apply_cooldown(candidates, rules, last)
+        if self.use_redis and fired:
+            fired = self._claim(fired, rules)
+
+        with self._lock:
+            for candidate in fired:
+                key = (candidate.alert_rule_id, candidate.device_id)
+                self._store(key, last[key], rules[candidate.alert_rule_id])
+        return fired
+
+    def _claim(self, fired: List[AlertCandidate], rules: Dict[int, CompiledRule]) -> List[AlertCandidate]:
+        """
+        Reclama cada disparo en Redis (SET NX, TTL = cooldown).
+
+        Si la clave ya existe otro proceso disparo dentro del cooldown, salvo
+        que guarde el mismo triggered_at (reintento del mismo batch) o haya
+        vencido entre las dos llamadas. Si Redis falla se mantiene la decision
+        local.
+        """
+        claims = []
+        seen: Set[CooldownKey] = set()
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for candidate in fired:
+                key = (candidate.alert_rule_id, candidate.device_id)
+                ttl_ms = rules[candidate.alert_rule_id].cooldown_minutes * 60_000
+                if ttl_ms <= 0:
+                    continue
+                # Solo el primer disparo del par en el batch compite por la clave
+                pipe.set(
+                    f"{self.REDIS_PREFIX}{key[0]}:{key[1]}", candidate.triggered_at.isoformat(),
+                    px=ttl_ms, nx=key not in seen
+                )
+                claims.append((candidate, key not in seen))
+                seen.add(key)
+            results = pipe.execute()
+
+            lost = [candidate for (candidate, nx), ok in zip(claims, results) if nx and not ok]
+            if not lost:
+                return fired
+            owners = get_redis().mget([f"{self.REDIS_PREFIX}{c.alert_rule_id}:{c.device_id}" for c in lost])
+        except Exception as e:
+            logger.warning(f"No se pudo reclamar el cooldown en Redis: {e}")
+            return fired
+
+        rejected = {
+            (c.alert_rule_id, c.device_id)
+            for c, owner in zip(lost, owners)
+            if owner is not None and owner.decode() != c.triggered_at.isoformat()
+        }
+        return [c for c in fired if (c.alert_rule_id, c.device_id) not in rejected]
+
+    def clear(self) -> None:
+        """Descarta el estado (se vuelve a cargar en el proximo apply)."""
+        with self._lock:
+            self._last.clear()
+            self._horizon = None
+            self._incomplete_until = datetime.min
+        self._continuity.clear()
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        with self._lock:
+            return {
+                "size": len(self._last),
+                "hits": self.hits,
+                "lookups": self.lookups,
+                "seeds": self.seeds,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,255 @@
+"""
+Indice de reglas de alerta por (device_id, variable_key).
+
+Una AlertRule aplica a:
+- un device (device_id)
+- todos los devices de una location (location_id, device_id NULL), via
+  Location -> Asset -> Device
+- todos los devices (location_id y device_id NULL, regla global)
+
+El indice expande esos alcances una sola vez al construirse: para cada
+device queda un dict variable_key -> reglas aplicables, asi evaluar una
+medicion cuesta O(reglas de ese device) y no O(todas las reglas). Las
+reglas con ventana de tiempo (WINDOW_CHECKS) y las DEVICE_OFFLINE quedan
+en mapas aparte: las primeras se evaluan con estado y en orden, las
+segundas no dependen de una medicion sino de su ausencia.
+
+El indice se reconstruye cada ALERT_RULES_REFRESH_SEC (altas, bajas y
+cambios de reglas o de la jerarquia) o al llamar invalidate().
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert import AlertRule
+from app.models.asset import Asset
+from app.models.device import Device
+
+
+# Chequeos que se evaluan con cada medicion (DEVICE_OFFLINE depende del
+# tiempo sin mediciones y ANOMALY_ML no tiene modelo todavia)
+READING_CHECKS = frozenset({
+    "THRESHOLD_ABOVE",
+    "THRESHOLD_BELOW",
+    "THRESHOLD_RANGE",
+    "SENSOR_FAULT",
+})
+
+# Chequeos por medicion que ademas miran las mediciones anteriores del
+# device dentro de time_window_minutes (alert_windows)
+WINDOW_CHECKS = frozenset({
+    "RATE_OF_CHANGE",
+})
+
+# Chequeos por ausencia de mediciones (offline_monitor)
+OFFLINE_CHECKS = frozenset({
+    "DEVICE_OFFLINE",
+})
+
+
+class CompiledRule(NamedTuple):
+    """Datos de una AlertRule necesarios para evaluarla (sin objeto ORM)."""
+    id: int
+    name: str
+    check_type: str
+    variable_key: str
+    threshold_value: Optional[float]
+    threshold_min: Optional[float]
+    threshold_max: Optional[float]
+    time_window_minutes: Optional[int]
+    cooldown_minutes: int
+
+
+# Reglas de un device agrupadas por variable
+DeviceRules = Dict[str, Tuple[CompiledRule, ...]]
+
+_RULE_COLUMNS = (
+    AlertRule.id,
+    AlertRule.name,
+    AlertRule.check_type,
+    AlertRule.variable_key,
+    AlertRule.threshold_value,
+    AlertRule.threshold_min,
+    AlertRule.threshold_max,
+    AlertRule.time_window_minutes,
+    AlertRule.cooldown_minutes,
+)
+
+
+def _group_by_variable(rules: List[CompiledRule]) -> DeviceRules:
+    grouped: Dict[str, List[CompiledRule]] = defaultdict(list)
+    for rule in rules:
+        grouped[rule.variable_key].append(rule)
+    return {variable: tuple(items) for variable, items in grouped.items()}
+
+
+class RuleIndex:
+    """
+    Reglas habilitadas expandidas por device.
+
+    Example:
+        ```python
+        index = RuleIndex.load(db)
+        for variable, rules in index.for_device(reading.device_id).items():
+            ...
+        ```
+    """
+
+    def __init__(
+        self,
+        rules: List[CompiledRule],
+        by_device: Dict[int, DeviceRules],
+        global_rules: DeviceRules,
+        windowed_by_device: Optional[Dict[int, DeviceRules]] = None,
+        windowed_global: Optional[DeviceRules] = None,
+        offline_by_device: Optional[Dict[int, Tuple[CompiledRule, ...]]] = None,
+        offline_global: Tuple[CompiledRule, ...] = (),
+        known_devices: Optional[Set[int]] = None,
+    ):
+        self.rules = {rule.id: rule for rule in rules}
+        self.by_device = by_device
+        self.global_rules = global_rules
+        self.windowed_by_device = windowed_by_device or {}
+        self.windowed_global = windowed_global or {}
+        self.offline_by_device = offline_by_device or {}
+        self.offline_global = offline_global
+        # Devices existentes al construir el indice (los demas reciben las reglas globales)
+        self.known_devices = known_devices or set()
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        check_types: frozenset = READING_CHECKS | WINDOW_CHECKS | OFFLINE_CHECKS,
+    ) -> "RuleIndex":
+        """Construye el indice con dos queries (reglas y jerarquia de devices)."""
+        rows = db.execute(
+            select(*_RULE_COLUMNS, AlertRule.location_id, AlertRule.device_id)
+            .where(AlertRule.enabled.is_(True), AlertRule.check_type.in_(check_types))
+            .order_by(AlertRule.id)
+        ).all()
+
+        rules: List[CompiledRule] = []
+        global_rules: List[CompiledRule] = []
+        by_location: Dict[int, List[CompiledRule]] = defaultdict(list)
+        by_device: Dict[int, List[CompiledRule]] = defaultdict(list)
+        for row in rows:
+            rule = CompiledRule(*row[:len(_RULE_COLUMNS)])
+            rules.append(rule)
+            if row.device_id is not None:
+                by_device[row.device_id].append(rule)
+            elif row.location_id is not None:
+                by_location[row.location_id].append(rule)
+            else:
+                global_rules.append(rule)
+
+        # Los devices con las mismas reglas (ej: toda una location) comparten el dict
+        expanded: Dict[int, DeviceRules] = {}
+        windowed: Dict[int, DeviceRules] = {}
+        offline: Dict[int, Tuple[CompiledRule, ...]] = {}
+        known: Set[int] = set()
+        shared: Dict[Tuple[int, ...], Any] = {}
+
+        def share(applicable: List[CompiledRule], build: Callable) -> Any:
+            key = tuple(rule.id for rule in applicable)
+            if key not in shared:
+                shared[key] = build(applicable)
+            return shared[key]
+
+        if rows:
+            devices = db.execute(
+                select(Device.id, Asset.location_id).outerjoin(Asset, Device.asset_id == Asset.id)
+            ).all()
+            for device_id, location_id in devices:
+                known.add(device_id)
+                applicable = global_rules + by_location.get(location_id, []) + by_device.get(device_id, [])
+                stateless, stateful, absence = _split_by_kind(applicable)
+                if stateless:
+                    expanded[device_id] = share(stateless, _group_by_variable)
+                if stateful:
+                    windowed[device_id] = share(stateful, _group_by_variable)
+                if absence:
+                    offline[device_id] = share(absence, tuple)
+
+        stateless, stateful, absence = _split_by_kind(global_rules)
+        return cls(
+            rules,
+            expanded,
+            _group_by_variable(stateless),
+            windowed,
+            _group_by_variable(stateful),
+            offline,
+            tuple(absence),
+            known,
+        )
+
+    def for_device(self, device_id: int) -> DeviceRules:
+        """
+        Reglas del device por variable.
+
+        Un device creado despues de construir el indice recibe solo las
+        reglas globales hasta la proxima reconstruccion.
+        """
+        if device_id in self.known_devices:
+            return self.by_device.get(device_id, {})
+        return self.global_rules
+
+    def windowed_for_device(self, device_id: int) -> DeviceRules:
+        """Reglas con ventana de tiempo (WINDOW_CHECKS) del device por variable."""
+        if device_id in self.known_devices:
+            return self.windowed_by_device.get(device_id, {})
+        return self.windowed_global
+
+    def offline_for_device(self, device_id: int) -> Tuple[CompiledRule, ...]:
+        """Reglas DEVICE_OFFLINE del device."""
+        if device_id in self.known_devices:
+            return self.offline_by_device.get(device_id, ())
+        return self.offline_global
+
+
+def _split_by_kind(rules: List[CompiledRule]) -> Tuple[List[CompiledRule], List[CompiledRule], List[CompiledRule]]:
+    """Separa reglas por medicion, con ventana y por ausencia de mediciones."""
+    stateless, stateful, absence = [], [], []
+    for rule in rules:
+        if rule.check_type in WINDOW_CHECKS:
+            stateful.append(rule)
+        elif rule.check_type in OFFLINE_CHECKS:
+            absence.append(rule)
+        else:
+            stateless.append(rule)
+    return stateless, stateful, absence
+
+
+class RuleIndexCache:
+    """Indice compartido entre threads, reconstruido cada `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._index: Optional[RuleIndex] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> RuleIndex:
+        """Indice vigente (lo reconstruye si vencio o fue invalidado)."""
+        with self._lock:
+            if self._index is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._index = RuleIndex.load(db)
+                self._loaded_at = time.monotonic()
+            return self._index
+
+    def invalidate(self) -> None:
+        """Fuerza la reconstruccion en el proximo get()."""
+        with self._lock:
+            self._index = None
+
+
+# ============================================================
+# Instancia Global
+# ============================================================
+rule_index_cache = RuleIndexCache(ttl_seconds=settings.alert_rules_refresh_sec)
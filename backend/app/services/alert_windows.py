@@ -0,0 +1,169 @@
+"""
+Ventanas de tiempo en memoria para reglas de alerta con historia.
+
+RATE_OF_CHANGE compara cada medicion con las de los ultimos
+time_window_minutes del mismo device. En vez de consultar la DB por cada
+medicion, el motor mantiene por (device, variable) un WindowBuffer: los
+pares (timestamp, valor) dentro de la ventana en dos array('d'), con un
+indice de inicio que avanza al vencer muestras. Agregar y descartar es
+O(1) amortizado; buscar la primera muestra de una ventana es una
+busqueda binaria sobre el array (sin copias).
+
+Los buffers se construyen bajo demanda: la primera medicion de un
+(device, variable) desde el arranque carga la ventana anterior con una
+query sobre idx_readings_device_time.
+
+Si el shard de un device lo proceso otro proceso entre dos batches (o el
+batch es un reintento), los buffers de ese shard quedarian incompletos o
+con mediciones de mas: WindowStore lo detecta con BatchContinuity y
+descarta los buffers del shard (se reconstruyen solos).
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.sensor_reading import SensorReading
+from app.services.reading_consumer import BatchContinuity, ReadingBatch
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# Muestras vencidas a partir de las cuales se compacta el buffer
+_COMPACT_MIN = 64
+
+
+def epoch_seconds(timestamp: datetime) -> float:
+    """Timestamp naive UTC (formato de la DB) a segundos desde epoch."""
+    return (timestamp - EPOCH).total_seconds()
+
+
+class WindowBuffer:
+    """
+    Muestras (timestamp, valor) de un device y variable dentro de `window` segundos.
+
+    Los timestamps se agregan en orden no decreciente.
+    """
+
+    __slots__ = ("window", "times", "values", "start")
+
+    def __init__(self, window: float):
+        self.window = window
+        self.times = array("d")
+        self.values = array("d")
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.times) - self.start
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return self.times[-1] if len(self) else None
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Agrega una muestra y descarta las que quedaron fuera de la ventana."""
+        self.times.append(timestamp)
+        self.values.append(value)
+        self.start = bisect_left(self.times, timestamp - self.window, self.start)
+
+        # Compactar cuando la mitad del array son muestras vencidas
+        if self.start >= _COMPACT_MIN and self.start * 2 >= len(self.times):
+            del self.times[:self.start]
+            del self.values[:self.start]
+            self.start = 0
+
+    def first_since(self, cutoff: float) -> Optional[Tuple[float, float]]:
+        """Primera muestra (timestamp, valor) con timestamp >= cutoff."""
+        position = bisect_left(self.times, cutoff, self.start)
+        if position == len(self.times):
+            return None
+        return self.times[position], self.values[position]
+
+
+class WindowStore:
+    """
+    Buffers por (device_id, variable_key), compartidos por los workers del proceso.
+
+    Los shards del consumidor separan devices entre workers, asi que dos
+    threads nunca escriben el mismo buffer; el lock protege el diccionario.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[Tuple[int, str], WindowBuffer] = {}
+        self._continuity = BatchContinuity()
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def begin_batch(self, db: Session, batch: Optional[ReadingBatch]) -> None:
+        """
+        Descarta los buffers del shard si el batch no continua el ultimo
+        procesado en este proceso (ver BatchContinuity). Sin batch
+        (evaluacion directa, fuera del consumidor) no verifica.
+        """
+        if batch is None or self._continuity.check(db, batch):
+            return
+        with self._lock:
+            for device_id, variable in list(self._buffers):
+                if device_id % batch.shards == batch.shard:
+                    del self._buffers[(device_id, variable)]
+
+    def get(
+        self,
+        db: Session,
+        device_id: int,
+        variable: str,
+        timestamp: datetime,
+        window: float,
+    ) -> WindowBuffer:
+        """
+        Buffer de (device, variable) con al menos `window` segundos antes de `timestamp`.
+
+        Si no existe (o cubre una ventana menor) lo construye desde la DB con
+        las mediciones anteriores a `timestamp`.
+        """
+        key = (device_id, variable)
+        buffer = self._buffers.get(key)
+        if buffer is not None and buffer.window >= window:
+            return buffer
+
+        buffer = WindowBuffer(window)
+        rows = db.execute(
+            select(
+                func.extract("epoch", SensorReading.timestamp),
+                cast(SensorReading.data_payload[variable].astext, Float),
+            )
+            .where(
+                SensorReading.device_id == device_id,
+                SensorReading.timestamp >= timestamp - timedelta(seconds=window),
+                SensorReading.timestamp < timestamp,
+                func.jsonb_typeof(SensorReading.data_payload[variable]) == "number",
+            )
+            .order_by(SensorReading.timestamp)
+        ).all()
+        for sample_time, value in rows:
+            buffer.append(float(sample_time), value)
+
+        with self._lock:
+            self._buffers[key] = buffer
+            self.rebuilds += 1
+        return buffer
+
+    def clear(self) -> None:
+        """Descarta todos los buffers."""
+        with self._lock:
+            self._buffers.clear()
+        self._continuity.clear()
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        with self._lock:
+            return {
+                "buffers": len(self._buffers),
+                "samples": sum(len(buffer) for buffer in self._buffers.values()),
+                "rebuilds": self.rebuilds,
+            }
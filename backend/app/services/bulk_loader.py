@@ -0,0 +1,230 @@
+"""
+Carga masiva de SensorReadings con PostgreSQL COPY FROM STDIN.
+
+COPY es el camino mas rapido para insertar millones de filas: evita el
+parseo de un INSERT por fila y el overhead del ORM. Los rows se serializan
+a CSV (data_payload como JSON) y se envian en streaming a psycopg2
+copy_expert, sin armar el archivo completo en memoria.
+
+Usado por:
+- Ingesta en background (write buffer) que no necesita los IDs generados
+- scripts/import_readings.py (historial del sistema legacy PHP/MySQL)
+- scripts/seed.py (historial sintetico para desarrollo)
+"""
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.timeseries import to_utc_naive
+
+
+# Columnas que se cargan con COPY (el resto usa el default de la tabla)
+COPY_COLUMNS = ("device_id", "data_payload", "quality_score", "timestamp")
+
+COPY_SQL = (
+    f"COPY sensor_readings ({', '.join(COPY_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# Row listo para COPY: (device_id, data_payload, quality_score, timestamp)
+ReadingRow = Tuple[int, Dict[str, Any], Optional[float], datetime]
+
+
+# ============================================================
+# Serializacion y Streaming
+# ============================================================
+
+def _encode_rows(rows: Iterable[ReadingRow], chunk_size: int) -> Iterator[bytes]:
+    """
+    Serializa rows a CSV en chunks de bytes.
+
+    - data_payload se serializa con json.dumps (el csv module se encarga
+      de escapar comillas y comas)
+    - None se escribe como campo vacio sin comillas (NULL en COPY csv)
+    - timestamp se escribe como UTC naive: COPY a una columna sin zona
+      horaria descarta el offset en vez de convertirlo (el INSERT si convierte)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    pending = 0
+
+    for device_id, data_payload, quality_score, timestamp in rows:
+        writer.writerow((
+            device_id,
+            json.dumps(data_payload, separators=(",", ":"), ensure_ascii=False),
+            quality_score,
+            to_utc_naive(timestamp).isoformat(),
+        ))
+        pending += 1
+
+        if pending >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _IteratorStream(io.RawIOBase):
+    """File-like de solo lectura sobre un iterador de chunks (para copy_expert)."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._pending) < size:
+            try:
+                self._pending += next(self._chunks)
+            except StopIteration:
+                break
+
+        if size < 0:
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def copy_readings(db: Session, rows: Iterable[ReadingRow], chunk_size: int = 5000) -> int:
+    """
+    Inserta readings con COPY FROM STDIN dentro de la transaccion de la sesion.
+
+    NO hace commit: el llamador decide el limite de la transaccion.
+
+    Args:
+        db: Sesion de base de datos (conexion psycopg2)
+        rows: Iterable de (device_id, data_payload, quality_score, timestamp)
+        chunk_size: Rows serializados por chunk enviado al servidor
+
+    Returns:
+        int: Cantidad de rows insertados
+
+    Example:
+        ```python
+        rows = [(device.id, {"temp_c": 25.5}, 1.0, datetime.utcnow())]
+        copy_readings(db, rows)
+        db.commit()
+        ```
+    """
+    raw_connection = db.connection().connection
+    cursor = raw_connection.cursor()
+    try:
+        cursor.copy_expert(COPY_SQL, _IteratorStream(_encode_rows(rows, chunk_size)))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+# ============================================================
+# Lectura de Historial Legacy (PHP/MySQL)
+# ============================================================
+
+def parse_legacy_timestamp(value: str) -> datetime:
+    """
+    Parsea timestamps exportados por MySQL o ISO 8601.
+
+    Acepta "2024-05-01 13:45:00", "2024-05-01T13:45:00Z" o epoch en segundos.
+    Los timestamps con zona horaria se convierten a UTC naive (como se
+    almacenan en sensor_readings); los naive se asumen UTC.
+    """
+    value = value.strip()
+
+    if value.replace(".", "", 1).isdigit():
+        return datetime.fromtimestamp(float(value), tz=timezone.utc).replace(tzinfo=None)
+
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+
+    return to_utc_naive(datetime.fromisoformat(value))
+
+
+def _coerce_value(value: Any) -> Any:
+    """Convierte strings numericos del CSV legacy a int/float."""
+    if not isinstance(value, str):
+        return value
+
+    text_value = value.strip()
+    try:
+        return int(text_value)
+    except ValueError:
+        pass
+    try:
+        return float(text_value)
+    except ValueError:
+        return text_value
+
+
+def iter_legacy_records(
+    lines: Iterable[str],
+    file_format: str,
+    eui_field: str = "device_eui",
+    timestamp_field: str = "timestamp",
+    payload_field: str = "data_payload",
+) -> Iterator[Tuple[str, Dict[str, Any], datetime]]:
+    """
+    Lee registros historicos en formato CSV o NDJSON.
+
+    Cada registro debe tener el EUI del device y el timestamp. Las variables
+    de la medicion pueden venir en una columna JSON (payload_field) o como
+    columnas sueltas (formato "ancho" tipico de exports de MySQL):
+
+        device_eui,timestamp,temp_c,humidity_pct
+        ESP32_LAB_001,2024-05-01 13:45:00,4.5,61.2
+
+    Args:
+        lines: Lineas del archivo (ej: un file object abierto en modo texto)
+        file_format: "csv" o "ndjson"
+        eui_field: Nombre del campo con el EUI
+        timestamp_field: Nombre del campo con el timestamp
+        payload_field: Nombre del campo con el payload JSON (si existe)
+
+    Yields:
+        Tuple[str, dict, datetime]: (device_eui, data_payload, timestamp)
+    """
+    if file_format == "csv":
+        records: Iterable[Dict[str, Any]] = csv.DictReader(lines)
+    elif file_format == "ndjson":
+        records = (json.loads(line) for line in lines if line.strip())
+    else:
+        raise ValueError(f"Formato no soportado: {file_format}")
+
+    for record in records:
+        device_eui = str(record.pop(eui_field)).strip()
+        timestamp = parse_legacy_timestamp(str(record.pop(timestamp_field)))
+
+        payload = record.pop(payload_field, None)
+        if isinstance(payload, str):
+            payload = json.loads(payload) if payload.strip() else None
+
+        if payload is None:
+            # Formato ancho: el resto de las columnas son variables
+            payload = {
+                key: _coerce_value(value)
+                for key, value in record.items()
+                if key and value not in (None, "")
+            }
+
+        yield device_eui, payload, timestamp
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Agrupa un iterable en listas de hasta `size` elementos."""
+    chunk: List[Any] = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,114 @@
+"""
+Registro de devices en memoria (cache EUI -> datos minimos del device).
+
+La ingesta solo necesita resolver device_eui -> device_id (y a futuro
+status/asset/config). Cachear esos datos evita una query a `devices`
+por cada medicion: en el hot path no se toca la base de datos.
+
+Invalidacion:
+- create_device, update_device y delete_device invalidan el EUI afectado
+- Con CACHE_REDIS_ENABLED=true la invalidacion llega a todos los workers
+- El TTL (DEVICE_CACHE_TTL_SEC) acota cambios hechos por fuera de la API
+"""
+
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, InvalidationBus, TTLCache
+from app.core.config import settings
+from app.models.device import Device
+
+
+class DeviceInfo(NamedTuple):
+    """Datos del device necesarios en el hot path de ingesta."""
+    id: int
+    device_eui: str
+    status: str
+    asset_id: Optional[int]
+    config: Optional[Dict[str, Any]]
+
+
+# Columnas que se leen de la tabla (sin cargar el objeto ORM ni relaciones)
+_DEVICE_INFO_COLUMNS = (Device.id, Device.device_eui, Device.status, Device.asset_id, Device.config)
+
+
+class DeviceRegistry:
+    """
+    Cache de devices por EUI con invalidacion explicita.
+
+    Example:
+        ```python
+        info = device_registry.get(db, "ESP32_LAB_001")
+        if info is None:
+            raise HTTPException(404)
+
+        device_registry.invalidate("ESP32_LAB_001")  # Despues de modificar el device
+        ```
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.bus = InvalidationBus(
+            "cache:devices",
+            on_invalidate=self.cache.invalidate,
+            on_reset=self.cache.clear,
+        )
+
+    @classmethod
+    def from_settings(cls) -> "DeviceRegistry":
+        """Crea el registro con la configuracion de DEVICE_CACHE_*."""
+        return cls(max_size=settings.device_cache_max_size, ttl_seconds=settings.device_cache_ttl_sec)
+
+    def get(self, db: Session, device_eui: str) -> Optional[DeviceInfo]:
+        """
+        Retorna los datos del device o None si no existe.
+
+        Args:
+            db: Sesion de base de datos (solo se usa si no esta en cache)
+            device_eui: EUI del device
+        """
+        return self.get_many(db, [device_eui]).get(device_eui)
+
+    def get_many(self, db: Session, device_euis: Iterable[str]) -> Dict[str, DeviceInfo]:
+        """
+        Resuelve varios EUIs; los que no estan en cache se buscan en una sola query.
+
+        Returns:
+            Dict[str, DeviceInfo]: Solo los devices existentes
+        """
+        found: Dict[str, DeviceInfo] = {}
+        missing = set()
+
+        for device_eui in set(device_euis):
+            info = self.cache.get(device_eui)
+            if info is MISSING:
+                missing.add(device_eui)
+            else:
+                found[device_eui] = info
+
+        if missing:
+            rows = db.execute(select(*_DEVICE_INFO_COLUMNS).where(Device.device_eui.in_(missing)))
+            for row in rows:
+                info = DeviceInfo(*row)
+                self.cache.set(info.device_eui, info)
+                found[info.device_eui] = info
+
+        return found
+
+    def invalidate(self, *device_euis: Optional[str]) -> None:
+        """Descarta EUIs del cache en todos los workers (ignora None)."""
+        for device_eui in device_euis:
+            if device_eui:
+                self.bus.publish(device_eui)
+
+    def clear(self) -> None:
+        """Vacia el cache local."""
+        self.cache.clear()
+
+
+# ============================================================
+# Instancia Global del Registro
+# ============================================================
+device_registry = DeviceRegistry.from_settings()
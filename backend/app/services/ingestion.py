@@ -0,0 +1,180 @@
+"""
+Servicio de ingesta de SensorReadings.
+
+Concentra la escritura de mediciones para que los distintos caminos de
+ingesta (endpoint individual, endpoint batch, procesos en background)
+compartan la misma logica optimizada:
+
+- Resolucion de device_eui via el registro en memoria (una query solo
+  para los EUIs que no estan en cache)
+- INSERT multi-fila en sensor_readings (o COPY si no se necesitan los IDs)
+- last_seen_at via el tracker write-behind (sin UPDATE por batch)
+- Un solo COMMIT por batch
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.sensor_reading import SensorReading
+from app.schemas.sensor_reading import SensorReadingCreate, SensorReadingBatchItemResult
+from app.services.bulk_loader import copy_readings
+from app.services.device_registry import device_registry
+from app.services.last_seen import last_seen_tracker
+
+
+# Estados posibles de cada medicion de un batch
+STATUS_CREATED = "created"
+STATUS_DEVICE_NOT_FOUND = "device_not_found"
+STATUS_UNAUTHORIZED = "unauthorized"
+
+
+def calculate_quality_score(data_payload: dict) -> float:
+    """
+    Calcula un score de calidad basico para el reading.
+
+    En produccion, esto seria mas sofisticado:
+    - Detectar valores fuera de rango fisico
+    - Detectar cambios bruscos sospechosos
+    - Verificar timestamp valido
+    - etc.
+
+    Args:
+        data_payload: Datos del sensor
+
+    Returns:
+        float: Score entre 0.0 y 1.0
+    """
+    score = 1.0
+
+    # Verificar que haya al menos una variable
+    if not data_payload or len(data_payload) == 0:
+        return 0.0
+
+    # Detectar valores de error (-999)
+    for key, value in data_payload.items():
+        if isinstance(value, (int, float)):
+            if value == -999 or value == -999.0:
+                score -= 0.3
+
+    # Asegurar que el score este entre 0 y 1
+    return max(0.0, min(1.0, score))
+
+
+def resolve_device_ids(db: Session, device_euis: Iterable[str]) -> Dict[str, int]:
+    """
+    Resuelve varios device_eui a sus IDs.
+
+    Usa el registro de devices en memoria; los EUIs que no estan en cache
+    se buscan con una sola query de columnas (sin cargar el objeto Device
+    completo ni sus relaciones).
+
+    Args:
+        db: Sesion de base de datos
+        device_euis: EUIs a resolver (pueden venir repetidos)
+
+    Returns:
+        Dict[str, int]: Mapa device_eui -> device_id (solo los existentes)
+    """
+    devices = device_registry.get_many(db, device_euis)
+    return {eui: info.id for eui, info in devices.items()}
+
+
+def ingest_readings(
+    db: Session,
+    readings: Sequence[SensorReadingCreate],
+    return_ids: bool = True,
+    authorize: Optional[Callable[[str], bool]] = None,
+) -> List[SensorReadingBatchItemResult]:
+    """
+    Inserta un batch de mediciones (de uno o varios devices) en una transaccion.
+
+    Args:
+        db: Sesion de base de datos
+        readings: Mediciones validadas por Pydantic
+        return_ids: Si es False se usa COPY FROM STDIN (mas rapido para
+            batches grandes) y los resultados no incluyen reading_id
+        authorize: Chequeo de API Key por device_eui; las mediciones que no
+            lo pasan se informan como "unauthorized" sin buscar el device
+
+    Returns:
+        List[SensorReadingBatchItemResult]: Resultado por medicion, en el
+        mismo orden en que fueron recibidas
+
+    Example:
+        ```python
+        results = ingest_readings(db, batch.readings)
+        created = [r for r in results if r.status == STATUS_CREATED]
+        ```
+    """
+    rejected = set()
+    if authorize is not None:
+        rejected = {eui for eui in {r.device_eui for r in readings} if not authorize(eui)}
+
+    device_ids = resolve_device_ids(db, (r.device_eui for r in readings if r.device_eui not in rejected))
+    now = datetime.utcnow()
+
+    results: List[SensorReadingBatchItemResult] = []
+    rows = []
+    row_positions = []
+
+    for index, reading_data in enumerate(readings):
+        if reading_data.device_eui in rejected:
+            results.append(SensorReadingBatchItemResult(
+                index=index,
+                device_eui=reading_data.device_eui,
+                status=STATUS_UNAUTHORIZED,
+                detail="API Key invalida para este device"
+            ))
+            continue
+
+        device_id = device_ids.get(reading_data.device_eui)
+
+        if device_id is None:
+            results.append(SensorReadingBatchItemResult(
+                index=index,
+                device_eui=reading_data.device_eui,
+                status=STATUS_DEVICE_NOT_FOUND,
+                detail=f"Device con EUI '{reading_data.device_eui}' no encontrado"
+            ))
+            continue
+
+        results.append(SensorReadingBatchItemResult(
+            index=index,
+            device_eui=reading_data.device_eui,
+            status=STATUS_CREATED
+        ))
+        row_positions.append(index)
+        rows.append({
+            "device_id": device_id,
+            "data_payload": reading_data.data_payload,
+            "quality_score": calculate_quality_score(reading_data.data_payload),
+            "timestamp": reading_data.timestamp or now,
+        })
+
+    if not rows:
+        return results
+
+    if return_ids:
+        # INSERT multi-fila con RETURNING (los IDs vuelven en el orden de los rows)
+        reading_ids = db.execute(
+            insert(SensorReading).returning(SensorReading.id, sort_by_parameter_order=True),
+            rows
+        ).scalars().all()
+
+        for position, reading_id in zip(row_positions, reading_ids):
+            results[position].reading_id = reading_id
+    else:
+        copy_readings(db, (
+            (row["device_id"], row["data_payload"], row["quality_score"], row["timestamp"])
+            for row in rows
+        ))
+
+    # last_seen_at de todos los devices del batch (write-behind o un solo UPDATE)
+    last_seen_tracker.record(db, {row["device_id"] for row in rows}, now)
+
+    db.commit()
+
+    return results
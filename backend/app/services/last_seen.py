@@ -0,0 +1,284 @@
+"""
+Write-behind de devices.last_seen_at.
+
+Actualizar `devices.last_seen_at` en cada medicion genera una fila "caliente"
+por device: cada UPDATE crea una nueva version de la fila (MVCC), y los
+indices sobre last_seen_at se inflan con entradas muertas.
+
+Con LAST_SEEN_WRITE_BEHIND=true (default) la ingesta solo registra el ultimo
+timestamp por device en memoria (y en Redis si CACHE_REDIS_ENABLED=true), y
+un thread lo vuelca a `devices` con un unico UPDATE masivo cada
+LAST_SEEN_FLUSH_INTERVAL_SEC segundos.
+
+Las lecturas (`offline_monitor.online_status`, GET /devices) consultan el tracker, asi que
+siguen viendo el valor fresco aunque todavia no este en la tabla.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import DateTime, Integer, column, or_, update, values
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.cache import get_redis
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.device import Device
+
+
+logger = logging.getLogger(__name__)
+
+# Sorted set de Redis: member=device_id, score=epoch del ultimo contacto
+REDIS_KEY = "devices:last_seen"
+
+
+class LastSeenTracker:
+    """
+    Ultimo contacto por device, en memoria, con flush periodico a la DB.
+
+    Example:
+        ```python
+        last_seen_tracker.record(db, {device.id}, datetime.utcnow())
+        seen_at = last_seen_tracker.get(device.id)
+
+        last_seen_tracker.start()  # Flush cada N segundos en background
+        last_seen_tracker.stop()   # Flush final al cerrar
+        ```
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        flush_interval_sec: float,
+        use_redis: bool = False,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        """
+        Args:
+            enabled: Si es False, record() actualiza la tabla directamente
+            flush_interval_sec: Intervalo entre UPDATEs masivos
+            use_redis: Compartir los valores entre workers via Redis
+            session_factory: Factory de sesiones para el flush en background
+        """
+        self.enabled = enabled
+        self.flush_interval = flush_interval_sec
+        self.use_redis = use_redis
+        self.session_factory = session_factory
+
+        self._lock = threading.Lock()
+        self._latest: Dict[int, datetime] = {}   # Ultimo valor conocido (lecturas)
+        self._pending: Dict[int, datetime] = {}  # Pendiente de volcar a la DB
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    @classmethod
+    def from_settings(cls) -> "LastSeenTracker":
+        """Crea el tracker con la configuracion de LAST_SEEN_*."""
+        return cls(
+            enabled=settings.last_seen_write_behind,
+            flush_interval_sec=settings.last_seen_flush_interval_sec,
+            use_redis=settings.cache_redis_enabled,
+        )
+
+    # ============================================================
+    # Registro (hot path de ingesta)
+    # ============================================================
+
+    def record(self, db: Session, device_ids: Iterable[int], seen_at: datetime) -> None:
+        """
+        Registra que los devices se comunicaron en `seen_at`.
+
+        Con write-behind deshabilitado ejecuta el UPDATE en la sesion recibida
+        (el caller hace el commit junto con los readings).
+        """
+        device_ids = set(device_ids)
+        if not device_ids:
+            return
+
+        if not self.enabled:
+            db.execute(
+                update(Device)
+                .where(Device.id.in_(device_ids))
+                .values(last_seen_at=seen_at)
+            )
+            return
+
+        with self._lock:
+            for device_id in device_ids:
+                current = self._latest.get(device_id)
+                if current is None or current < seen_at:
+                    self._latest[device_id] = seen_at
+                    self._pending[device_id] = seen_at
+
+        if self.use_redis:
+            try:
+                score = _to_epoch(seen_at)
+                get_redis().zadd(REDIS_KEY, {str(device_id): score for device_id in device_ids}, gt=True)
+            except Exception as e:
+                logger.warning(f"No se pudo registrar last_seen en Redis: {e}")
+
+    # ============================================================
+    # Lectura
+    # ============================================================
+
+    def get(self, device_id: int) -> Optional[datetime]:
+        """Ultimo contacto conocido por el tracker (None si no hay registro)."""
+        return self.get_many([device_id]).get(device_id)
+
+    def get_many(self, device_ids: Iterable[int]) -> Dict[int, datetime]:
+        """Ultimo contacto de varios devices (local + Redis en un pipeline)."""
+        device_ids = list(device_ids)
+        if not self.enabled or not device_ids:
+            return {}
+
+        with self._lock:
+            found = {i: self._latest[i] for i in device_ids if i in self._latest}
+
+        if self.use_redis:
+            try:
+                pipe = get_redis().pipeline()
+                for device_id in device_ids:
+                    pipe.zscore(REDIS_KEY, str(device_id))
+                for device_id, score in zip(device_ids, pipe.execute()):
+                    if score is not None:
+                        remote = datetime.utcfromtimestamp(score)
+                        if device_id not in found or found[device_id] < remote:
+                            found[device_id] = remote
+            except Exception as e:
+                logger.warning(f"No se pudo leer last_seen de Redis: {e}")
+
+        return found
+
+    def apply(self, devices: Iterable[Device]) -> None:
+        """
+        Superpone el valor fresco sobre `device.last_seen_at` de objetos cargados.
+
+        Usa set_committed_value para no marcar el objeto como modificado
+        (no genera un UPDATE al hacer commit de la sesion).
+        """
+        devices = list(devices)
+        latest = self.get_many(device.id for device in devices)
+
+        for device in devices:
+            seen_at = latest.get(device.id)
+            if seen_at is not None and (device.last_seen_at is None or device.last_seen_at < seen_at):
+                set_committed_value(device, "last_seen_at", seen_at)
+
+    # ============================================================
+    # Flush a la DB
+    # ============================================================
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Vuelca los valores pendientes a `devices` con un unico UPDATE ... FROM (VALUES ...).
+
+        Solo avanza last_seen_at (nunca lo retrocede), por lo que varios
+        workers pueden hacer flush en paralelo sin pisarse.
+
+        Args:
+            db: Sesion a usar (default: una sesion nueva del session_factory)
+
+        Returns:
+            int: Cantidad de devices actualizados
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        session = db or self.session_factory()
+        try:
+            seen = values(
+                column("device_id", Integer),
+                column("seen_at", DateTime),
+                name="seen",
+            ).data(list(pending.items()))
+
+            session.execute(
+                update(Device)
+                .where(Device.id == seen.c.device_id)
+                .where(or_(Device.last_seen_at.is_(None), Device.last_seen_at < seen.c.seen_at))
+                .values(last_seen_at=seen.c.seen_at)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            # Re-encolar lo que no se pudo escribir (sin pisar valores mas nuevos)
+            with self._lock:
+                for device_id, seen_at in pending.items():
+                    current = self._pending.get(device_id)
+                    if current is None or current < seen_at:
+                        self._pending[device_id] = seen_at
+            raise
+        finally:
+            if db is None:
+                session.close()
+
+        self.flushes += 1
+        self.rows_flushed += len(pending)
+        return len(pending)
+
+    def start(self) -> None:
+        """Arranca el thread de flush periodico (no hace nada si esta deshabilitado)."""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="last-seen-flusher", daemon=True)
+        self._thread.start()
+        logger.info(f"Write-behind de last_seen_at iniciado (flush cada {self.flush_interval}s)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el thread y hace un flush final."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+        if self.enabled:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error en el flush final de last_seen_at: {e}")
+
+    def clear(self) -> None:
+        """Descarta el estado en memoria (sin escribir)."""
+        with self._lock:
+            self._latest.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        """Metricas del tracker para /health."""
+        return {
+            "write_behind": self.enabled,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+        }
+
+    def _run(self) -> None:
+        """Loop del thread: flush cada flush_interval segundos."""
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error al volcar last_seen_at: {e}")
+
+
+def _to_epoch(value: datetime) -> float:
+    """Convierte un datetime UTC naive a epoch."""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+# ============================================================
+# Instancia Global del Tracker
+# ============================================================
+last_seen_tracker = LastSeenTracker.from_settings()
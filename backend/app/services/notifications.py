@@ -0,0 +1,550 @@
+"""
+Envio de notificaciones de alertas (email, Telegram, webhook).
+
+El motor de alertas y el monitor offline registran los disparos en
+alert_history con notification_sent NULL (pendiente). Un thread en
+background (NotificationDispatcher) los toma por batches con FOR UPDATE
+SKIP LOCKED, los envia desde un event loop propio y guarda el resultado
+por canal en notification_sent: {"email": "success", "telegram": "failed"}.
+Ni la ingesta ni el motor esperan un envio.
+
+- Webhook y Telegram usan un httpx.AsyncClient por canal, con pool de
+  conexiones keep-alive que vive mientras corre el dispatcher.
+- Email usa una conexion SMTP persistente (smtplib en un thread propio);
+  si el servidor la cerro por inactividad se reconecta al enviar.
+- Cada canal tiene un limite de envios concurrentes.
+- Los errores transitorios (red, 429, 5xx, SMTP 4xx) se reintentan con
+  backoff exponencial y jitter; los demas fallan en el primer intento.
+- Las alertas del batch con el mismo destino se agrupan: un email, un
+  mensaje de Telegram (partido en chunks de 4096 caracteres) y un POST por
+  webhook_url con la lista de alertas.
+
+Ninguna transaccion queda abierta durante los envios. Tomar un batch es
+una transaccion corta que corre notification_next_attempt_at al
+vencimiento de un lease (NOTIFICATION_LEASE_SEC) y suma un intento; el
+resultado se guarda en una segunda transaccion. Si el proceso muere en el
+medio, las filas vuelven a estar pendientes cuando vence el lease (entrega
+at-least-once).
+
+Una alerta con algun canal "failed" sigue pendiente: se reintenta con
+backoff exponencial (NOTIFICATION_RETRY_INTERVAL_SEC) y solo por los
+canales que fallaron, hasta NOTIFICATION_MAX_ATTEMPTS intentos o hasta que
+es mas vieja que NOTIFICATION_MAX_AGE_MINUTES. Las alertas que ya eran
+viejas en el primer intento (por ejemplo al reprocesar historial) se
+marcan "expired" sin enviarse.
+"""
+
+import asyncio
+import logging
+import random
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.alert import AlertHistory, AlertRule
+from app.models.device import Device
+
+
+logger = logging.getLogger(__name__)
+
+# Resultado por canal en alert_history.notification_sent
+SUCCESS = "success"
+FAILED = "failed"
+DISABLED = "disabled"  # Canal sin configurar (o regla sin webhook_url)
+EXPIRED = "expired"
+
+# Largo maximo de un mensaje de Telegram (sendMessage)
+TELEGRAM_MAX_LENGTH = 4096
+
+
+class PendingNotification(NamedTuple):
+    """Alerta de alert_history pendiente de notificar, con los datos de su regla y device."""
+    id: int
+    alert_rule_id: int
+    rule_name: str
+    device_id: int
+    device_name: str
+    device_eui: str
+    triggered_at: datetime
+    value_observed: Optional[float]
+    message: str
+    channels: Tuple[str, ...]
+    webhook_url: Optional[str]
+    sent: Optional[Dict[str, str]] = None  # Resultado de los intentos anteriores
+    attempts: int = 1  # Incluye el intento en curso
+
+    def as_payload(self) -> dict:
+        """Representacion JSON para webhooks."""
+        return {
+            "id": self.id,
+            "alert_rule_id": self.alert_rule_id,
+            "rule_name": self.rule_name,
+            "device_id": self.device_id,
+            "device_eui": self.device_eui,
+            "device_name": self.device_name,
+            "triggered_at": self.triggered_at.isoformat(),
+            "value_observed": self.value_observed,
+            "message": self.message,
+        }
+
+    def as_text(self) -> str:
+        """Una linea por alerta para email y Telegram."""
+        return f"[{self.triggered_at:%Y-%m-%d %H:%M:%S} UTC] {self.device_name} ({self.device_eui}): {self.message}"
+
+
+class RetryableError(Exception):
+    """Error transitorio de un envio (se reintenta)."""
+
+
+# ============================================================
+# Alertas Pendientes
+# ============================================================
+
+def pending_filter(now: datetime):
+    """
+    Alertas a tomar: sin notificar o con un reintento programado, y sin lease vigente.
+
+    La primera condicion es la del indice parcial idx_alert_history_pending.
+    """
+    next_attempt_at = AlertHistory.notification_next_attempt_at
+    return and_(
+        or_(AlertHistory.notification_sent.is_(None), next_attempt_at.isnot(None)),
+        or_(next_attempt_at.is_(None), next_attempt_at <= now),
+    )
+
+
+def claim_pending(db: Session, limit: int, now: datetime) -> List[PendingNotification]:
+    """
+    Toma hasta `limit` alertas pendientes y les asigna un lease. No hace commit.
+
+    SKIP LOCKED: otros procesos toman las siguientes en vez de esperar. Al
+    hacer commit las filas dejan de estar bloqueadas pero ningun proceso las
+    vuelve a tomar hasta que vence el lease (notification_next_attempt_at).
+    """
+    rows = db.execute(
+        select(
+            AlertHistory.id,
+            AlertHistory.alert_rule_id,
+            AlertRule.name,
+            AlertHistory.device_id,
+            Device.name,
+            Device.device_eui,
+            AlertHistory.triggered_at,
+            AlertHistory.value_observed,
+            AlertHistory.message,
+            AlertRule.notification_channels,
+            AlertRule.webhook_url,
+            AlertHistory.notification_sent,
+            AlertHistory.notification_attempts,
+        )
+        .join(AlertRule, AlertRule.id == AlertHistory.alert_rule_id)
+        .join(Device, Device.id == AlertHistory.device_id)
+        .where(pending_filter(now))
+        .order_by(AlertHistory.id)
+        .limit(limit)
+        .with_for_update(of=AlertHistory, skip_locked=True)
+    ).all()
+    if rows:
+        db.execute(
+            update(AlertHistory)
+            .where(AlertHistory.id.in_([row[0] for row in rows]))
+            .values(
+                notification_next_attempt_at=now + timedelta(seconds=settings.notification_lease_sec),
+                notification_attempts=AlertHistory.notification_attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    return [
+        PendingNotification(*row[:9], tuple(dict.fromkeys(row[9] or ())), row[10], row[11], row[12] + 1)
+        for row in rows
+    ]
+
+
+def record_results(
+    db: Session,
+    results: Dict[int, Dict[str, str]],
+    retry_at: Dict[int, datetime],
+) -> None:
+    """
+    Guarda el resultado por canal de cada alerta y libera su lease. No hace commit.
+
+    Las alertas en `retry_at` quedan pendientes hasta ese momento; el resto
+    quedan cerradas (notification_next_attempt_at NULL).
+    """
+    if results:
+        db.execute(
+            update(AlertHistory),
+            [
+                {"id": alert_id, "notification_sent": sent, "notification_next_attempt_at": retry_at.get(alert_id)}
+                for alert_id, sent in results.items()
+            ],
+        )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Espera antes del proximo intento de una alerta con canales fallidos (backoff exponencial)."""
+    return timedelta(seconds=settings.notification_retry_interval_sec * 2 ** (attempts - 1))
+
+
+# ============================================================
+# SMTP
+# ============================================================
+
+class SMTPConnection:
+    """
+    Conexion SMTP persistente. No es thread-safe: se usa desde un unico thread.
+
+    La conexion se abre en el primer envio y se reutiliza; si el servidor
+    la cerro, el envio reconecta una vez.
+    """
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+        self.connections = 0
+
+    def send(self, message: EmailMessage) -> None:
+        for attempt in range(2):
+            smtp = self._connect()
+            try:
+                smtp.send_message(message)
+                return
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                if attempt:
+                    raise
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            port = settings.smtp_port or 25
+            timeout = settings.notification_http_timeout_sec
+            if port == 465:
+                smtp = smtplib.SMTP_SSL(settings.smtp_host, port, timeout=timeout)
+            else:
+                smtp = smtplib.SMTP(settings.smtp_host, port, timeout=timeout)
+                if settings.smtp_starttls:
+                    smtp.starttls()
+            if settings.smtp_user:
+                smtp.login(settings.smtp_user, settings.smtp_password or "")
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+# ============================================================
+# Dispatcher
+# ============================================================
+
+class NotificationDispatcher:
+    """
+    Envia las notificaciones pendientes de alert_history.
+
+    Los clientes HTTP, los semaforos y la conexion SMTP pertenecen al event
+    loop del dispatcher: dispatch_once() y close() se llaman siempre desde
+    el mismo thread (el del dispatcher, o el del test).
+
+    Example:
+        ```python
+        notification_dispatcher.start()  # Thread en background
+        notification_dispatcher.dispatch_once(db)  # Un batch (dos commits)
+        ```
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.session_factory = session_factory
+        self.clock = clock
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._smtp = SMTPConnection()
+        self._smtp_executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.last_error: Optional[str] = None
+
+    # ============================================================
+    # Batch
+    # ============================================================
+
+    def dispatch_once(self, db: Session) -> int:
+        """
+        Toma un batch de alertas pendientes, las envia y registra el resultado.
+
+        Hace commit al tomar el batch (antes de enviar) y al registrar el
+        resultado: la sesion no tiene una transaccion abierta durante los envios.
+
+        Returns:
+            int: Alertas procesadas
+        """
+        pending = claim_pending(db, settings.notification_batch_size, self.clock())
+        db.commit()
+        if not pending:
+            return 0
+
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        results = self._loop.run_until_complete(self.deliver(pending))
+
+        now = self.clock()
+        expired_before = now - timedelta(minutes=settings.notification_max_age_minutes)
+        retry_at = {
+            notification.id: now + retry_delay(notification.attempts)
+            for notification in pending
+            if FAILED in results[notification.id].values()
+            and notification.attempts < settings.notification_max_attempts
+            and notification.triggered_at >= expired_before
+        }
+        record_results(db, results, retry_at)
+        db.commit()
+        return len(pending)
+
+    async def deliver(self, pending: Sequence[PendingNotification]) -> Dict[int, Dict[str, str]]:
+        """
+        Envia un batch agrupando por (canal, destino). Retorna el resultado por alerta y canal.
+
+        En un reintento solo se envian los canales que fallaron; un canal que
+        sigue fallando cuando la alerta ya es vieja queda "failed".
+        """
+        results: Dict[int, Dict[str, str]] = {notification.id: dict(notification.sent or {}) for notification in pending}
+        expired_before = self.clock() - timedelta(minutes=settings.notification_max_age_minutes)
+
+        groups: Dict[Tuple[str, str], List[PendingNotification]] = {}
+        for notification in pending:
+            for channel in notification.channels:
+                previous = results[notification.id].get(channel)
+                if previous not in (None, FAILED):
+                    continue
+                destination = self._destination(channel, notification)
+                if destination is None:
+                    results[notification.id][channel] = DISABLED
+                elif notification.triggered_at < expired_before:
+                    results[notification.id][channel] = previous or EXPIRED
+                else:
+                    groups.setdefault((channel, destination), []).append(notification)
+
+        keys = list(groups)
+        outcomes = await asyncio.gather(*(self._send_group(channel, destination, groups[(channel, destination)])
+                                          for channel, destination in keys))
+        for (channel, destination), ok in zip(keys, outcomes):
+            for notification in groups[(channel, destination)]:
+                results[notification.id][channel] = SUCCESS if ok else FAILED
+            if ok:
+                self.sent += len(groups[(channel, destination)])
+            else:
+                self.failed += len(groups[(channel, destination)])
+        return results
+
+    def _destination(self, channel: str, notification: PendingNotification) -> Optional[str]:
+        """Destino del canal, o None si no esta configurado."""
+        if channel == "webhook":
+            return notification.webhook_url or None
+        if channel == "telegram":
+            if settings.telegram_enabled and settings.telegram_bot_token and settings.telegram_chat_id:
+                return settings.telegram_chat_id
+            return None
+        if channel == "email":
+            if settings.smtp_enabled and settings.smtp_host and settings.smtp_alert_recipients:
+                return settings.smtp_alert_recipients
+            return None
+        return None
+
+    async def _send_group(self, channel: str, destination: str, group: List[PendingNotification]) -> bool:
+        """Envia las alertas de un destino (con limite de concurrencia y reintentos)."""
+        if channel == "webhook":
+            payload = {"alerts": [notification.as_payload() for notification in group]}
+            return await self._with_retries(channel, lambda: self._post("webhook", destination, payload))
+        if channel == "telegram":
+            url = f"{settings.telegram_api_url}/bot{settings.telegram_bot_token}/sendMessage"
+            for chunk in _chunks([notification.as_text() for notification in group], TELEGRAM_MAX_LENGTH):
+                payload = {"chat_id": destination, "text": chunk}
+                if not await self._with_retries(channel, lambda: self._post("telegram", url, payload)):
+                    return False
+            return True
+        return await self._with_retries(channel, lambda: self._send_email(destination, group))
+
+    async def _with_retries(self, channel: str, send: Callable[[], Awaitable[None]]) -> bool:
+        """Ejecuta `send` dentro del semaforo del canal; reintenta los errores transitorios."""
+        semaphore = self._semaphores.get(channel)
+        if semaphore is None:
+            semaphore = self._semaphores[channel] = asyncio.Semaphore(_concurrency(channel))
+
+        for attempt in range(settings.notification_max_retries + 1):
+            try:
+                async with semaphore:
+                    await send()
+                return True
+            except (
+                RetryableError, httpx.TransportError, smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                ConnectionError, TimeoutError,
+            ) as e:
+                error = e
+                if attempt == settings.notification_max_retries:
+                    break
+                self.retries += 1
+                # Backoff exponencial con jitter completo: los reintentos no se sincronizan
+                await asyncio.sleep(random.uniform(0, settings.notification_retry_backoff_sec * 2 ** attempt))
+            except Exception as e:
+                error = e
+                break
+
+        self.last_error = f"{channel}: {error}"
+        logger.warning(f"No se pudo enviar la notificacion por {channel}: {error}")
+        return False
+
+    # ============================================================
+    # Canales
+    # ============================================================
+
+    async def _post(self, channel: str, url: str, payload: dict) -> None:
+        """POST JSON con el cliente del canal. 429 y 5xx son transitorios."""
+        client = self._clients.get(channel)
+        if client is None:
+            limit = _concurrency(channel)
+            client = self._clients[channel] = httpx.AsyncClient(
+                timeout=settings.notification_http_timeout_sec,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+            )
+        response = await client.post(url, json=payload)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+
+    async def _send_email(self, recipients: str, group: List[PendingNotification]) -> None:
+        """Un email por batch con todas las alertas (conexion SMTP persistente)."""
+        message = EmailMessage()
+        message["From"] = formataddr((settings.smtp_from_name or "", settings.smtp_from_email or settings.smtp_user or ""))
+        message["To"] = recipients
+        if len(group) == 1:
+            message["Subject"] = f"[Alerta] {group[0].rule_name} - {group[0].device_name}"
+        else:
+            message["Subject"] = f"[Alerta] {len(group)} alertas"
+        message.set_content("\n".join(notification.as_text() for notification in group))
+
+        if self._smtp_executor is None:
+            self._smtp_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._smtp_executor, self._smtp.send, message)
+        except smtplib.SMTPResponseException as e:
+            if 400 <= e.smtp_code < 500:
+                raise RetryableError(f"SMTP {e.smtp_code}") from e
+            raise
+
+    # ============================================================
+    # Thread en Background
+    # ============================================================
+
+    def start(self) -> None:
+        """Arranca el thread (no hace nada si ya corre)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+        logger.info("Dispatcher de notificaciones iniciado")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Detiene el thread (el batch en curso termina de enviarse)."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """Cierra los clientes HTTP, la conexion SMTP y el event loop."""
+        if self._loop is not None:
+            for client in self._clients.values():
+                self._loop.run_until_complete(client.aclose())
+            self._loop.close()
+            self._loop = None
+        self._clients = {}
+        self._semaphores = {}
+        if self._smtp_executor is not None:
+            self._smtp_executor.submit(self._smtp.close).result()
+            self._smtp_executor.shutdown()
+            self._smtp_executor = None
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        return {
+            "enabled": settings.notifications_enabled,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "last_error": self.last_error,
+        }
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                processed = 0
+                db = self.session_factory()
+                try:
+                    processed = self.dispatch_once(db)
+                except Exception as e:
+                    db.rollback()
+                    self.last_error = str(e)
+                    logger.error(f"Error en el dispatcher de notificaciones: {e}")
+                finally:
+                    db.close()
+
+                # Batch completo: puede haber mas pendientes
+                if processed < settings.notification_batch_size:
+                    self._stopping.wait(settings.notification_poll_interval_sec)
+        finally:
+            self.close()
+
+
+def _concurrency(channel: str) -> int:
+    """Envios simultaneos por canal (email: una conexion SMTP)."""
+    if channel == "webhook":
+        return settings.notification_webhook_concurrency
+    if channel == "telegram":
+        return settings.notification_telegram_concurrency
+    return 1
+
+
+def _chunks(lines: List[str], max_length: int) -> List[str]:
+    """Agrupa lineas en textos de hasta `max_length` caracteres (corta lineas mas largas)."""
+    chunks: List[str] = []
+    current = ""
+    for line in lines:
+        line = line[:max_length]
+        if current and len(current) + 1 + len(line) > max_length:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ============================================================
+# Instancia Global
+# ============================================================
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,366 @@
+"""
+Deteccion de devices offline (reglas DEVICE_OFFLINE) por deadlines.
+
+En vez de recorrer devices.last_seen_at contra cada regla en cada tick
+(O(devices x reglas)), el monitor mantiene un deadline por (device,
+regla): ultimo contacto + time_window_minutes. Los deadlines estan en un
+min-heap y un thread duerme exactamente hasta el mas proximo.
+
+- Cada medicion que procesa el motor de alertas actualiza el deadline en
+  un dict, en O(1), sin tocar el heap.
+- Al vencer la entrada del heap, si el dict tiene un deadline posterior
+  (el device reporto) se reprograma; si no, el device esta offline.
+- Antes de disparar se confirma el ultimo contacto real (tracker de
+  last_seen y devices.last_seen_at, con la fila bloqueada): otro proceso
+  pudo haber recibido mediciones del device.
+- Cada episodio offline dispara una vez; el deadline se vuelve a armar
+  con la proxima medicion del device.
+
+Al arrancar (y cuando cambian las reglas DEVICE_OFFLINE) los deadlines
+se cargan de devices.last_seen_at con una sola query; los devices que
+nunca reportaron no se vigilan.
+
+El monitor tambien define si un device esta online (online_status): la
+ventana mas corta de las reglas DEVICE_OFFLINE del device, o
+DEVICE_OFFLINE_THRESHOLD_MINUTES si no tiene, contra su last_seen_at mas
+reciente (tabla o tracker write-behind).
+"""
+
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.services.alert_history import AlertCandidate, last_triggered, record_alerts
+from app.services.alert_rules import CompiledRule, RuleIndex, RuleIndexCache, rule_index_cache
+from app.services.last_seen import last_seen_tracker
+
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Clave de un deadline: (device_id, rule_id)
+DeadlineKey = Tuple[int, int]
+
+
+def _to_epoch(value: datetime) -> float:
+    return (value - EPOCH).total_seconds()
+
+
+def _from_epoch(value: float) -> datetime:
+    return EPOCH + timedelta(seconds=value)
+
+
+def _window(rule: CompiledRule) -> Optional[float]:
+    return rule.time_window_minutes * 60 if rule.time_window_minutes else None
+
+
+class OfflineMonitor:
+    """
+    Min-heap de deadlines por (device, regla DEVICE_OFFLINE).
+
+    Invariante: cada clave de `_deadlines` tiene exactamente una entrada
+    en el heap, con un deadline menor o igual al del dict.
+
+    Example:
+        ```python
+        offline_monitor.touch(index, readings)  # Desde el motor de alertas
+        offline_monitor.start()                 # Thread que dispara al vencer
+        ```
+    """
+
+    def __init__(
+        self,
+        index_cache: RuleIndexCache = rule_index_cache,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.index_cache = index_cache
+        self.session_factory = session_factory
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, int]] = []
+        self._deadlines: Dict[DeadlineKey, float] = {}
+        self._seen: Dict[int, float] = {}
+        self._index: Optional[RuleIndex] = None
+        self._signature: Optional[tuple] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.fired = 0
+        self.rescheduled = 0
+        self.last_error: Optional[str] = None
+
+    # ============================================================
+    # Deadlines
+    # ============================================================
+
+    def touch(self, index: RuleIndex, readings: Sequence[SensorReading]) -> None:
+        """Registra el contacto de los devices de un batch (ultimo timestamp por device)."""
+        latest: Dict[int, datetime] = {}
+        for reading in readings:
+            current = latest.get(reading.device_id)
+            if current is None or reading.timestamp > current:
+                latest[reading.device_id] = reading.timestamp
+        self._index = index
+
+        with self._cond:
+            earliest = self._heap[0][0] if self._heap else None
+            for device_id, seen_at in latest.items():
+                rules = index.offline_for_device(device_id)
+                if not rules:
+                    continue
+                seen = _to_epoch(seen_at)
+                if seen <= self._seen.get(device_id, float("-inf")):
+                    continue
+                self._seen[device_id] = seen
+                for rule in rules:
+                    window = _window(rule)
+                    if window is not None:
+                        self._arm((device_id, rule.id), seen + window)
+            if self._heap and (earliest is None or self._heap[0][0] < earliest):
+                self._cond.notify()
+
+    def _arm(self, key: DeadlineKey, deadline: float) -> None:
+        """Actualiza el deadline de una clave (requiere el lock)."""
+        if key in self._deadlines:
+            # Ya tiene entrada en el heap: se reprograma al vencer
+            self._deadlines[key] = max(self._deadlines[key], deadline)
+        else:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key[0], key[1]))
+
+    def seed(self, db: Session, index: RuleIndex) -> int:
+        """
+        Carga los deadlines desde devices.last_seen_at (arranque o cambio de reglas).
+
+        Returns:
+            int: Deadlines armados
+        """
+        rows = db.execute(select(Device.id, Device.last_seen_at).where(Device.last_seen_at.is_not(None))).all()
+        seen_at = {device_id: last_seen for device_id, last_seen in rows}
+        for device_id, tracked in last_seen_tracker.get_many(seen_at).items():
+            seen_at[device_id] = max(seen_at[device_id], tracked)
+
+        with self._cond:
+            self._index = index
+            self._deadlines = {}
+            for device_id, last_seen in seen_at.items():
+                seen = max(_to_epoch(last_seen), self._seen.get(device_id, float("-inf")))
+                self._seen[device_id] = seen
+                for rule in index.offline_for_device(device_id):
+                    window = _window(rule)
+                    if window is not None:
+                        self._deadlines[(device_id, rule.id)] = seen + window
+            self._heap = [(deadline, device_id, rule_id) for (device_id, rule_id), deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+            return len(self._heap)
+
+    def pop_expired(self, now: datetime) -> List[Tuple[float, int, int]]:
+        """Saca del heap las claves vencidas (las reprogramadas vuelven al heap)."""
+        expired = []
+        limit = _to_epoch(now)
+        with self._cond:
+            while self._heap and self._heap[0][0] <= limit:
+                deadline, device_id, rule_id = heapq.heappop(self._heap)
+                current = self._deadlines.get((device_id, rule_id))
+                if current is None:
+                    continue
+                if current > deadline:
+                    heapq.heappush(self._heap, (current, device_id, rule_id))
+                    self.rescheduled += 1
+                    continue
+                del self._deadlines[(device_id, rule_id)]
+                expired.append((deadline, device_id, rule_id))
+        return expired
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Deadline mas proximo del heap (puede estar reprogramado)."""
+        with self._cond:
+            return _from_epoch(self._heap[0][0]) if self._heap else None
+
+    # ============================================================
+    # Disparo
+    # ============================================================
+
+    def check(self, db: Session) -> List[AlertCandidate]:
+        """
+        Dispara las reglas de los deadlines vencidos. Hace commit.
+
+        Returns:
+            List[AlertCandidate]: Alertas registradas
+        """
+        index = self.index_cache.get(db)
+        signature = tuple(sorted(
+            (rule.id, rule.time_window_minutes) for rule in index.rules.values() if rule.check_type == "DEVICE_OFFLINE"
+        ))
+        if signature != self._signature:
+            armed = self.seed(db, index)
+            self._signature = signature
+            logger.info(f"Monitor offline: {armed} deadlines cargados ({len(signature)} reglas)")
+        self._index = index
+
+        now = self.clock()
+        expired = self.pop_expired(now)
+        if not expired:
+            return []
+
+        # Confirmar el ultimo contacto: bloquear las filas serializa con otros procesos
+        device_ids = sorted({device_id for _, device_id, _ in expired})
+        seen_at = dict(db.execute(
+            select(Device.id, Device.last_seen_at).where(Device.id.in_(device_ids)).with_for_update()
+        ).all())
+        for device_id, tracked in last_seen_tracker.get_many(device_ids).items():
+            if seen_at.get(device_id) is None or seen_at[device_id] < tracked:
+                seen_at[device_id] = tracked
+
+        candidates = []
+        with self._cond:
+            for deadline, device_id, rule_id in expired:
+                rule = index.rules.get(rule_id)
+                if device_id not in seen_at or rule is None or rule not in index.offline_for_device(device_id):
+                    continue  # Device eliminado o regla deshabilitada / fuera de alcance
+                last_seen = self._seen.get(device_id, float("-inf"))
+                if seen_at[device_id] is not None:
+                    last_seen = max(last_seen, _to_epoch(seen_at[device_id]))
+                    self._seen[device_id] = last_seen
+                real_deadline = last_seen + _window(rule)
+                if real_deadline > _to_epoch(now):
+                    self._arm((device_id, rule_id), real_deadline)
+                    self.rescheduled += 1
+                    continue
+                minutes = (_to_epoch(now) - last_seen) / 60
+                candidates.append(AlertCandidate(
+                    rule_id, device_id, None, _from_epoch(real_deadline), round(minutes, 1),
+                    f"{rule.name}: sin datos desde {_from_epoch(last_seen):%Y-%m-%d %H:%M:%S} UTC "
+                    f"({minutes:.0f} min, limite {rule.time_window_minutes} min)"
+                ))
+
+        # triggered_at es el deadline del episodio: si ya esta registrado (otro
+        # proceso, o un reinicio) no se repite aunque la regla no tenga cooldown
+        last = last_triggered(db, sorted({(c.alert_rule_id, c.device_id) for c in candidates}))
+        candidates = [
+            c for c in candidates
+            if (c.alert_rule_id, c.device_id) not in last or last[(c.alert_rule_id, c.device_id)] < c.triggered_at
+        ]
+        fired = record_alerts(db, candidates, index.rules, last)
+        db.commit()
+        self.fired += len(fired)
+        if fired:
+            logger.info(f"{len(fired)} devices offline")
+        return fired
+
+    # ============================================================
+    # Umbral Offline
+    # ============================================================
+
+    def threshold(self, device_id: int) -> timedelta:
+        """Tiempo sin contacto a partir del cual el device esta offline."""
+        index = self._index
+        windows = [
+            rule.time_window_minutes
+            for rule in (index.offline_for_device(device_id) if index is not None else ())
+            if rule.time_window_minutes
+        ]
+        return timedelta(minutes=min(windows, default=settings.device_offline_threshold_minutes))
+
+    # ============================================================
+    # Thread en Background
+    # ============================================================
+
+    def start(self) -> None:
+        """Arranca el thread (no hace nada si ya corre)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="offline-monitor", daemon=True)
+        self._thread.start()
+        logger.info("Monitor de devices offline iniciado")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el thread."""
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def clear(self) -> None:
+        """Descarta los deadlines y el indice (se recargan en el proximo check)."""
+        with self._cond:
+            self._heap = []
+            self._deadlines = {}
+            self._seen = {}
+            self._index = None
+            self._signature = None
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        with self._cond:
+            return {
+                "deadlines": len(self._deadlines),
+                "fired": self.fired,
+                "rescheduled": self.rescheduled,
+                "last_error": self.last_error,
+            }
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            db = self.session_factory()
+            try:
+                self.check(db)
+                self.last_error = None
+            except Exception as e:
+                db.rollback()
+                self.last_error = str(e)
+                logger.error(f"Error en el monitor offline: {e}")
+            finally:
+                db.close()
+
+            # Dormir hasta el deadline mas proximo (o hasta revisar las reglas)
+            with self._cond:
+                timeout = settings.alert_rules_refresh_sec
+                if self._heap:
+                    timeout = min(timeout, max(0.0, self._heap[0][0] - _to_epoch(self.clock())))
+                if not self._stopping.is_set():
+                    self._cond.wait(timeout)
+
+
+# ============================================================
+# Instancia Global
+# ============================================================
+offline_monitor = OfflineMonitor()
+
+
+# ============================================================
+# Estado Online
+# ============================================================
+
+def online_status(device: Device, now: Optional[datetime] = None) -> bool:
+    """
+    Indica si el device tuvo contacto dentro de su umbral offline.
+
+    Usa el last_seen_at mas reciente entre la tabla y el tracker
+    write-behind (que puede no estar volcado todavia).
+    """
+    last_seen_at = device.last_seen_at
+    tracked = last_seen_tracker.get(device.id) if device.id is not None else None
+    if tracked is not None and (last_seen_at is None or tracked > last_seen_at):
+        last_seen_at = tracked
+
+    if not last_seen_at:
+        return False
+
+    return last_seen_at > (now or datetime.utcnow()) - offline_monitor.threshold(device.id)
@@ -0,0 +1,464 @@
+"""
+Particionado por rango de tiempo de sensor_readings.
+
+La tabla padre esta declarada con PARTITION BY RANGE (timestamp). Este
+servicio mantiene creadas la particion del periodo actual y las
+READINGS_PARTITIONS_AHEAD siguientes (day | week | month segun
+READINGS_PARTITION_INTERVAL), asi la ingesta nunca cae en la particion
+DEFAULT salvo por timestamps fuera de rango (relojes mal configurados).
+
+Si la DEFAULT ya tiene filas del rango de una particion nueva, se mueven
+en la misma transaccion en que se adjunta la particion.
+
+Las particiones se nombran por su inicio: sensor_readings_p20251001.
+"""
+
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "sensor_readings"
+DEFAULT_PARTITION = "sensor_readings_default"
+
+# Serializa la creacion de particiones entre workers
+PARTITION_LOCK_KEY = "sensor_readings_partitions"
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+class PartitionInfo(NamedTuple):
+    """Particion de sensor_readings. lower/upper None = MINVALUE/MAXVALUE."""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    is_default: bool
+
+
+# ============================================================
+# Periodos
+# ============================================================
+
+def period_start(value: datetime, interval: str) -> datetime:
+    """Inicio del periodo (dia, semana ISO o mes) que contiene `value`."""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "day":
+        return day
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    """Inicio del periodo siguiente a `start`."""
+    if interval == "day":
+        return start + timedelta(days=1)
+    if interval == "week":
+        return start + timedelta(weeks=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(start: datetime) -> str:
+    """Nombre de la particion que empieza en `start`."""
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def _uncovered(
+    lower: datetime,
+    upper: datetime,
+    ranges: List[Tuple[Optional[datetime], Optional[datetime]]],
+) -> List[Tuple[datetime, datetime]]:
+    """Sub-rangos de [lower, upper) que no cubre ninguna particion existente."""
+    gaps = [(lower, upper)]
+    for low, high in ranges:
+        low = low or datetime.min
+        high = high or datetime.max
+        remaining = []
+        for start, end in gaps:
+            if high <= start or low >= end:
+                remaining.append((start, end))
+                continue
+            if start < low:
+                remaining.append((start, low))
+            if high < end:
+                remaining.append((high, end))
+        gaps = remaining
+    return gaps
+
+
+# ============================================================
+# Catalogo
+# ============================================================
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def is_partitioned(db: Session) -> bool:
+    """True si sensor_readings ya es una tabla particionada."""
+    relkind = db.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": PARENT_TABLE},
+    ).scalar()
+    return relkind == "p"
+
+
+def list_partitions(db: Session) -> List[PartitionInfo]:
+    """Particiones de sensor_readings ordenadas por rango (DEFAULT al final)."""
+    rows = db.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+    """), {"table": PARENT_TABLE}).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            partitions.append(PartitionInfo(name, None, None, True))
+        else:
+            partitions.append(PartitionInfo(name, _parse_bound(match.group(1)), _parse_bound(match.group(2)), False))
+
+    partitions.sort(key=lambda p: (p.is_default, p.lower or datetime.min))
+    return partitions
+
+
+# ============================================================
+# Creacion de Particiones
+# ============================================================
+
+def create_partition(db: Session, lower: datetime, upper: datetime, has_default: bool = True) -> str:
+    """
+    Crea y adjunta la particion [lower, upper). No hace commit.
+
+    Las filas de ese rango que hayan caido en la DEFAULT se mueven a la
+    particion nueva antes de adjuntarla (si no, ATTACH fallaria).
+
+    Returns:
+        str: Nombre de la particion creada
+    """
+    name = partition_name(lower)
+    bounds = {"lower": lower, "upper": upper}
+
+    if not has_default:
+        db.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        return name
+
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE timestamp >= :lower AND timestamp < :upper
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    db.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+    return name
+
+
+def drop_partition(db: Session, name: str) -> None:
+    """
+    Desadjunta y elimina una particion (libera el espacio al instante,
+    sin DELETE ni VACUUM). No hace commit.
+    """
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"DROP TABLE {name}"))
+
+
+def ensure_partitions(
+    db: Session,
+    now: Optional[datetime] = None,
+    interval: Optional[str] = None,
+    ahead: Optional[int] = None,
+) -> List[str]:
+    """
+    Crea las particiones faltantes del periodo actual y los `ahead` siguientes.
+
+    Idempotente y seguro con varios workers (advisory lock). Los huecos se
+    calculan contra las particiones existentes, asi convive con rangos de
+    otro intervalo (ej: la particion legacy de la migracion). Hace commit.
+
+    Returns:
+        List[str]: Nombres de las particiones creadas (vacia si no hacia falta
+        o si sensor_readings todavia no esta particionada)
+
+    Example:
+        ```python
+        ensure_partitions(db)  # Mes actual + 3 siguientes
+        ```
+    """
+    interval = interval or settings.readings_partition_interval
+    ahead = settings.readings_partitions_ahead if ahead is None else ahead
+    now = now or datetime.utcnow()
+
+    if not is_partitioned(db):
+        db.rollback()
+        return []
+
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARTITION_LOCK_KEY})
+
+    partitions = list_partitions(db)
+    has_default = any(p.is_default for p in partitions)
+    ranges = [(p.lower, p.upper) for p in partitions if not p.is_default]
+
+    first = period_start(now, interval)
+    last = first
+    for _ in range(ahead + 1):
+        last = next_period(last, interval)
+
+    created = []
+    for lower, upper in _uncovered(first, last, ranges):
+        # Un hueco puede abarcar varios periodos: una particion por periodo
+        start = lower
+        while start < upper:
+            end = min(next_period(period_start(start, interval), interval), upper)
+            created.append(create_partition(db, start, end, has_default))
+            start = end
+
+    db.commit()
+    if created:
+        logger.info(f"Particiones creadas: {', '.join(created)}")
+    return created
+
+
+# ============================================================
+# Conversion de una Tabla sin Particionar
+# ============================================================
+
+LEGACY_TABLE = "sensor_readings_legacy"
+LEGACY_UNIQUE_INDEX = "sensor_readings_legacy_id_ts"
+LEGACY_RANGE_CHECK = "sensor_readings_legacy_range"
+
+
+def legacy_upper_bound(conn: Connection, interval: Optional[str] = None) -> datetime:
+    """
+    Limite superior de la particion legacy.
+
+    Es el inicio del segundo periodo posterior al actual (o al timestamp mas
+    nuevo de la tabla): deja al menos un periodo completo de margen entre la
+    preparacion y el swap para las mediciones que siguen llegando.
+    """
+    interval = interval or settings.readings_partition_interval
+    newest = conn.execute(text(f"SELECT max(timestamp) FROM {PARENT_TABLE}")).scalar()
+    reference = max(newest or datetime.min, datetime.utcnow())
+    return next_period(next_period(period_start(reference, interval), interval), interval)
+
+
+def prepare_legacy_table(conn: Connection, upper: datetime, concurrently: bool = True) -> None:
+    """
+    Prepara sensor_readings (sin particionar) para adjuntarla como particion.
+
+    - Indice unico (id, timestamp): sera la PK de la particion.
+    - CHECK (timestamp < upper) NOT VALID + VALIDATE: ATTACH PARTITION lo
+      usa para no escanear la tabla con el lock tomado.
+
+    Con concurrently=True no bloquea escrituras (CREATE INDEX CONCURRENTLY y
+    VALIDATE CONSTRAINT toman locks compatibles con INSERT); requiere una
+    conexion en AUTOCOMMIT. Idempotente.
+    """
+    concurrent = "CONCURRENTLY " if concurrently else ""
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX {concurrent}IF NOT EXISTS {LEGACY_UNIQUE_INDEX} "
+        f"ON {PARENT_TABLE} (id, timestamp)"
+    ))
+
+    exists = conn.execute(
+        text("SELECT 1 FROM pg_constraint WHERE conname = :name AND conrelid = to_regclass(:table)"),
+        {"name": LEGACY_RANGE_CHECK, "table": PARENT_TABLE},
+    ).scalar()
+    if not exists:
+        conn.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {LEGACY_RANGE_CHECK} "
+            f"CHECK (timestamp < '{upper.isoformat()}') NOT VALID"
+        ))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} VALIDATE CONSTRAINT {LEGACY_RANGE_CHECK}"))
+
+
+def swap_to_partitioned(conn: Connection, upper: datetime) -> None:
+    """
+    Reemplaza sensor_readings por una tabla particionada con la tabla
+    original adjunta como particion [MINVALUE, upper). No hace commit.
+
+    La tabla padre copia columnas, defaults (misma secuencia de ids),
+    CHECKs, comentarios e indices de la original, asi que sirve para
+    cualquier version del esquema. Requiere prepare_legacy_table() antes;
+    todo lo que hace con el lock exclusivo es cambio de catalogo.
+    """
+    index_defs = conn.execute(text(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table AND indexname NOT IN (:pkey, :unique)"
+    ), {"table": PARENT_TABLE, "pkey": f"{PARENT_TABLE}_pkey", "unique": LEGACY_UNIQUE_INDEX}).all()
+
+    conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+
+    # alert_history no puede referenciar solo `id` de una tabla particionada
+    conn.execute(text("ALTER TABLE alert_history DROP CONSTRAINT IF EXISTS alert_history_sensor_reading_id_fkey"))
+
+    # Liberar nombres: tabla, PK e indices pasan a la particion legacy
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+    for name, _ in index_defs:
+        conn.execute(text(f"ALTER INDEX {name} RENAME TO {name[:56]}_legacy"))
+    conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {PARENT_TABLE}_pkey"))
+    conn.execute(text(
+        f"ALTER TABLE {LEGACY_TABLE} ADD CONSTRAINT {LEGACY_TABLE}_pkey PRIMARY KEY USING INDEX {LEGACY_UNIQUE_INDEX}"
+    ))
+
+    # Tabla padre particionada con la misma forma
+    conn.execute(text(
+        f"CREATE TABLE {PARENT_TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS) "
+        f"PARTITION BY RANGE (timestamp)"
+    ))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DROP CONSTRAINT IF EXISTS {LEGACY_RANGE_CHECK}"))
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} ADD PRIMARY KEY (id, timestamp)"))
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ADD CONSTRAINT {PARENT_TABLE}_device_id_fkey "
+        f"FOREIGN KEY (device_id) REFERENCES devices (id) ON DELETE CASCADE"
+    ))
+    conn.execute(text(f"ALTER SEQUENCE {PARENT_TABLE}_id_seq OWNED BY {PARENT_TABLE}.id"))
+    for _, indexdef in index_defs:
+        conn.execute(text(indexdef))
+
+    # Adjuntar: el CHECK validado evita el escaneo y los indices se reutilizan
+    conn.execute(text(
+        f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {LEGACY_TABLE} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')"
+    ))
+    conn.execute(text(f"ALTER TABLE {LEGACY_TABLE} DROP CONSTRAINT {LEGACY_RANGE_CHECK}"))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+
+
+# ============================================================
+# Indices
+# ============================================================
+
+def create_index_online(conn: Connection, name: str, definition: str) -> None:
+    """
+    Crea un indice sobre sensor_readings sin bloquear INSERTs.
+
+    Una tabla particionada no admite CREATE INDEX CONCURRENTLY: se crea el
+    indice padre ON ONLY (solo catalogo, queda invalido), el de cada
+    particion con CONCURRENTLY y se adjuntan; al adjuntar el ultimo el padre
+    pasa a valido. Las particiones que se creen despues lo heredan.
+
+    Requiere una conexion en AUTOCOMMIT. Idempotente.
+
+    Example:
+        ```python
+        create_index_online(conn, "idx_readings_time_id", "(timestamp, id)")
+        ```
+    """
+    if not is_partitioned(conn):
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {PARENT_TABLE} {definition}"))
+        return
+
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {PARENT_TABLE} {definition}"))
+
+    # Particiones que ya tienen el indice (corrida anterior o creadas despues)
+    attached = set(conn.execute(text("""
+        SELECT ix.indrelid::regclass::text
+        FROM pg_inherits inh
+        JOIN pg_index ix ON ix.indexrelid = inh.inhrelid
+        WHERE inh.inhparent = to_regclass(:name)
+    """), {"name": name}).scalars())
+
+    for partition in list_partitions(conn):
+        if partition.name in attached:
+            continue
+        child = f"{partition.name}_{name}"[:63]
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} ON {partition.name} {definition}"))
+        conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {child}"))
+
+
+# ============================================================
+# Mantenimiento en Background
+# ============================================================
+
+class PartitionMaintainer:
+    """Thread que ejecuta ensure_partitions() periodicamente."""
+
+    def __init__(self, interval_sec: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.interval = interval_sec
+        self.session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.created = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> List[str]:
+        """Crea las particiones faltantes."""
+        db = self.session_factory()
+        try:
+            created = ensure_partitions(db)
+        finally:
+            db.close()
+        self.created += len(created)
+        return created
+
+    def start(self) -> None:
+        """
+        Ejecuta una pasada sincronica y arranca el thread.
+
+        La primera pasada bloquea el startup: la app empieza a recibir
+        mediciones con la particion del periodo actual ya creada.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._run_safely()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-maintainer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        return {
+            "interval": settings.readings_partition_interval,
+            "created": self.created,
+            "last_error": self.last_error,
+        }
+
+    def _run_safely(self) -> None:
+        try:
+            self.run_once()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error creando particiones de {PARENT_TABLE}: {e}")
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self._run_safely()
+
+
+# ============================================================
+# Instancia Global
+# ============================================================
+partition_maintainer = PartitionMaintainer(interval_sec=settings.partition_maintenance_interval_sec)
@@ -0,0 +1,166 @@
+"""
+Pool dedicado para bcrypt (verificacion y hashing de passwords).
+
+Verificar una password con bcrypt cost 12 son ~250 ms de CPU. Ejecutado
+en el thread del request, un pico de logins (cambio de turno) ocupaba los
+threads de FastAPI que tambien atienden la ingesta de los ESP32.
+
+Aca bcrypt corre en un ThreadPoolExecutor propio de PASSWORD_HASH_WORKERS
+threads (bcrypt libera el GIL mientras calcula, asi que los threads corren
+en paralelo). El login espera con `await`, sin ocupar un thread: un pico
+de logins solo hace cola en este pool. Si la cola supera
+PASSWORD_HASH_MAX_PENDING el login responde 503 en vez de acumular
+requests que igual vencerian por timeout.
+
+verify_and_update() ademas retorna un hash nuevo cuando el guardado usa
+otro cost que BCRYPT_ROUNDS, para rehashear de forma transparente.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.security import pwd_context
+
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Hay demasiadas verificaciones en cola (backpressure)."""
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool acotado con metricas de cola.
+
+    Example:
+        ```python
+        valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+        if valid and new_hash:
+            user.password_hash = new_hash  # Cost distinto de BCRYPT_ROUNDS
+        ```
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Metricas
+        self.pending = 0  # En cola + ejecutandose
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "PasswordHasher":
+        """Crea el pool con la configuracion de PASSWORD_HASH_*."""
+        return cls(workers=settings.password_hash_workers, max_pending=settings.password_hash_max_pending)
+
+    # ============================================================
+    # API async (endpoints)
+    # ============================================================
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica la password y, si el hash usa otro cost, retorna el hash nuevo.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (valida, hash nuevo o None)
+
+        Raises:
+            PasswordHasherBusy: Si la cola esta llena
+        """
+        valid, new_hash = await self._submit(pwd_context.verify_and_update, password, password_hash)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return valid, new_hash
+
+    async def hash(self, password: str) -> str:
+        """
+        Genera el hash bcrypt de una password con BCRYPT_ROUNDS.
+
+        Raises:
+            PasswordHasherBusy: Si la cola esta llena
+        """
+        return await self._submit(pwd_context.hash, password)
+
+    # ============================================================
+    # Ciclo de vida y metricas
+    # ============================================================
+
+    def shutdown(self) -> None:
+        """Termina los threads del pool (se recrea si se vuelve a usar)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Metricas del pool para monitoreo."""
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "peak_pending": self.peak_pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "wait_ms_avg": round(self._wait_total / completed * 1000, 1),
+                "wait_ms_max": round(self._wait_max * 1000, 1),
+                "run_ms_avg": round(self._run_total / completed * 1000, 1),
+            }
+
+    # ============================================================
+    # Internos
+    # ============================================================
+
+    async def _submit(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(
+                    f"Hay {self.pending} verificaciones de password en cola (maximo {self.max_pending})"
+                )
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            executor = self._executor
+
+        enqueued = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, self._timed, enqueued, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _timed(self, enqueued: float, func: Callable[..., T], *args) -> T:
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.completed += 1
+                self._wait_total += started - enqueued
+                self._wait_max = max(self._wait_max, started - enqueued)
+                self._run_total += finished - started
+
+
+# ============================================================
+# Instancia Global del Pool
+# ============================================================
+password_hasher = PasswordHasher.from_settings()
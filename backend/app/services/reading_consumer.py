@@ -0,0 +1,335 @@
+"""
+Consumo de sensor_readings por cursor de id (sin marcar filas).
+
+sensor_readings es insert-only. Un consumidor (por ejemplo las alertas)
+no hace UPDATE de cada medicion procesada: guarda en reading_cursors el
+ultimo id procesado, por shard (device_id % shards). Cada worker toma un
+shard libre con FOR UPDATE SKIP LOCKED, procesa un batch y avanza el
+cursor en la misma transaccion, asi que:
+
+- varios workers (threads o procesos) consumen en paralelo sin procesar
+  dos veces la misma medicion
+- las mediciones de un device siempre las procesa el mismo shard, en
+  orden de id
+- si el handler falla se hace rollback y el batch se reintenta
+
+Los ids salen de una secuencia pero se confirman fuera de orden: un
+INSERT lento puede commitear un id menor que otro ya visible. Por eso el
+cursor solo avanza hasta un candidato (max(id) + snapshot de transacciones)
+cuando todas las transacciones de ese snapshot terminaron (mismo esquema
+que el watermark de rollups).
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Text, cast, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.reading_cursor import ReadingCursor
+from app.models.sensor_reading import SensorReading
+
+
+logger = logging.getLogger(__name__)
+
+# handler(db, readings): procesa un batch (ordenado por id); no hace commit
+ReadingHandler = Callable[[Session, List[SensorReading]], None]
+
+
+class ReadingBatch(NamedTuple):
+    """Posicion del batch en curso: el shard avanza de from_id a to_id al commitear."""
+    consumer: str
+    shard: int
+    shards: int
+    from_id: int
+    to_id: int
+
+
+def current_batch(db: Session) -> Optional[ReadingBatch]:
+    """Batch que se esta procesando en la sesion (None fuera de un handler)."""
+    return db.info.get("reading_batch")
+
+
+class BatchContinuity:
+    """
+    Detecta huecos entre los batches de un shard que procesa este proceso.
+
+    Para handlers con estado en memoria: si el batch no continua el ultimo
+    que vio este proceso (arranque, reintento tras un rollback, o el shard
+    lo consumio otro proceso en el medio) el estado del shard puede estar
+    incompleto. Los avances del cursor sin mediciones del shard no cortan
+    la continuidad.
+
+    Example:
+        ```python
+        batch = current_batch(db)
+        if batch is not None and not continuity.check(db, batch):
+            forget_shard(batch.shards, batch.shard)
+        ```
+    """
+
+    def __init__(self):
+        self._synced: Dict[Tuple[str, int, int], int] = {}
+        self._lock = threading.Lock()
+
+    def check(self, db: Session, batch: ReadingBatch) -> bool:
+        """True si el batch continua el anterior del shard. Registra el batch."""
+        key = (batch.consumer, batch.shards, batch.shard)
+        with self._lock:
+            synced = self._synced.get(key)
+            self._synced[key] = batch.to_id
+
+        if synced == batch.from_id:
+            return True
+        if synced is None or synced > batch.from_id:
+            return False
+
+        query = select(SensorReading.id).where(SensorReading.id > synced, SensorReading.id <= batch.from_id)
+        if batch.shards > 1:
+            query = query.where(SensorReading.device_id % batch.shards == batch.shard)
+        return not db.execute(select(query.exists())).scalar()
+
+    def clear(self) -> None:
+        """Olvida los batches vistos (el proximo de cada shard no es continuo)."""
+        with self._lock:
+            self._synced.clear()
+
+
+# ============================================================
+# Candidatos de High-Water Mark
+# ============================================================
+
+def take_candidate(db: Session) -> Tuple[int, str]:
+    """max(id) actual y el snapshot de transacciones (misma sentencia)."""
+    max_id, snapshot = db.execute(
+        select(
+            func.coalesce(func.max(SensorReading.id), 0),
+            cast(func.pg_current_snapshot(), Text),
+        )
+    ).one()
+    return max_id, snapshot
+
+
+def candidate_settled(db: Session, snapshot: str) -> bool:
+    """True si terminaron todas las transacciones en curso al tomar el snapshot."""
+    return bool(db.execute(
+        text("SELECT pg_snapshot_xmax(CAST(:snapshot AS pg_snapshot)) <= pg_snapshot_xmin(pg_current_snapshot())"),
+        {"snapshot": snapshot},
+    ).scalar())
+
+
+# ============================================================
+# Cursores
+# ============================================================
+
+def ensure_cursors(db: Session, consumer: str, shards: int) -> None:
+    """
+    Crea los cursores de los shards del consumidor. No hace commit.
+
+    Si la cantidad de shards cambio, todos arrancan desde el cursor mas
+    atrasado: ninguna medicion se saltea (algunas pueden reprocesarse).
+    """
+    existing = db.execute(
+        select(ReadingCursor.shards, ReadingCursor.last_reading_id).where(ReadingCursor.consumer == consumer)
+    ).all()
+    if len(existing) == shards and all(row.shards == shards for row in existing):
+        return
+
+    start = min((row.last_reading_id for row in existing), default=0)
+    if existing:
+        logger.warning(f"Consumidor {consumer}: {len(existing)} -> {shards} shards, reinicia desde id {start}")
+    db.execute(delete(ReadingCursor).where(ReadingCursor.consumer == consumer))
+    db.execute(
+        pg_insert(ReadingCursor)
+        .values([
+            {"consumer": consumer, "shard": shard, "shards": shards, "last_reading_id": start,
+             "updated_at": datetime.utcnow()}
+            for shard in range(shards)
+        ])
+        .on_conflict_do_nothing(index_elements=["consumer", "shard"])
+    )
+
+
+def consume_readings(
+    db: Session,
+    consumer: str,
+    handler: ReadingHandler,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Procesa el proximo batch de un shard libre del consumidor. Hace commit.
+
+    Toma, entre los shards que ningun otro worker tiene bloqueados, el que
+    hace mas tiempo no se visita. Requiere ensure_cursors() antes.
+
+    Returns:
+        int: Mediciones procesadas (0 si el shard no tenia trabajo listo)
+
+    Example:
+        ```python
+        def handler(db, readings):
+            for reading in readings:
+                evaluate(db, reading)
+
+        consume_readings(db, "alerts", handler)
+        ```
+    """
+    batch_size = batch_size or settings.reading_consumer_batch_size
+
+    cursor = db.execute(
+        select(ReadingCursor)
+        .where(ReadingCursor.consumer == consumer)
+        .order_by(ReadingCursor.updated_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if cursor is None:
+        db.rollback()
+        return 0
+
+    processed = 0
+    pending = cursor.pending_reading_id
+
+    if pending is None or pending <= cursor.last_reading_id:
+        cursor.pending_reading_id, cursor.pending_snapshot = take_candidate(db)
+    elif candidate_settled(db, cursor.pending_snapshot):
+        query = select(SensorReading).where(
+            SensorReading.id > cursor.last_reading_id,
+            SensorReading.id <= pending,
+        )
+        if cursor.shards > 1:
+            query = query.where(SensorReading.device_id % cursor.shards == cursor.shard)
+        readings = db.execute(query.order_by(SensorReading.id).limit(batch_size)).scalars().all()
+
+        processed = len(readings)
+        # Batch completo: puede haber mas hasta el candidato
+        next_id = readings[-1].id if processed == batch_size else pending
+
+        if readings:
+            # Los handlers con estado en memoria usan la posicion para detectar huecos
+            db.info["reading_batch"] = ReadingBatch(consumer, cursor.shard, cursor.shards, cursor.last_reading_id, next_id)
+            try:
+                handler(db, readings)
+            finally:
+                db.info.pop("reading_batch", None)
+
+        cursor.last_reading_id = next_id
+        if cursor.last_reading_id == pending:
+            cursor.pending_reading_id, cursor.pending_snapshot = take_candidate(db)
+
+    cursor.updated_at = datetime.utcnow()
+    db.commit()
+    return processed
+
+
+def consumer_lag(db: Session, consumer: str) -> int:
+    """Ids de sensor_readings por encima del cursor mas atrasado del consumidor."""
+    return db.execute(
+        select(
+            func.coalesce(select(func.max(SensorReading.id)).scalar_subquery(), 0)
+            - func.coalesce(func.min(ReadingCursor.last_reading_id), 0)
+        ).where(ReadingCursor.consumer == consumer)
+    ).scalar()
+
+
+# ============================================================
+# Workers en Background
+# ============================================================
+
+class ReadingConsumer:
+    """
+    Threads que ejecutan consume_readings() para un consumidor.
+
+    Se pueden levantar en varios procesos a la vez: cada batch se procesa
+    en un solo worker gracias al lock de la fila del shard.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: ReadingHandler,
+        shards: Optional[int] = None,
+        workers: int = 1,
+        poll_interval_sec: Optional[float] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.name = name
+        self.handler = handler
+        self.shards = shards or settings.reading_consumer_shards
+        self.workers = workers
+        self.poll_interval = poll_interval_sec or settings.reading_consumer_poll_interval_sec
+        self.session_factory = session_factory
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self.processed = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        """Procesa todo el trabajo listo. Retorna mediciones procesadas."""
+        total = 0
+        idle = 0
+        db = self.session_factory()
+        try:
+            # Cada shard puede necesitar dos visitas (tomar el candidato y
+            # procesarlo): se corta tras dos rondas completas sin avance
+            while idle < 2 * self.shards and not self._stopping.is_set():
+                processed = consume_readings(db, self.name, self.handler)
+                total += processed
+                idle = 0 if processed else idle + 1
+        finally:
+            db.close()
+        self.processed += total
+        return total
+
+    def start(self) -> None:
+        """Crea los cursores y arranca los threads (no hace nada si ya corren)."""
+        if any(thread.is_alive() for thread in self._threads):
+            return
+
+        db = self.session_factory()
+        try:
+            ensure_cursors(db, self.name, self.shards)
+            db.commit()
+        finally:
+            db.close()
+
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"consumer-{self.name}-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Consumidor {self.name} iniciado ({self.workers} workers, {self.shards} shards)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene los threads (el batch en curso termina su commit)."""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        return {
+            "workers": self.workers,
+            "shards": self.shards,
+            "processed": self.processed,
+            "last_error": self.last_error,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error en el consumidor {self.name}: {e}")
+            self._stopping.wait(self.poll_interval)
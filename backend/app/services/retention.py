@@ -0,0 +1,352 @@
+"""
+Motor de politicas de retencion de readings y rollups.
+
+Para cada device se resuelve la politica mas especifica (ver
+app/models/retention.py) y se planifican tres tipos de acciones:
+
+- drop_partition: particiones de sensor_readings cuyo rango completo es
+  mas viejo que la retencion cruda MAS LARGA de todos los devices. Es la
+  forma barata: libera el espacio al instante, sin DELETE ni VACUUM.
+- delete_readings: el resto de las mediciones crudas vencidas, por
+  politica, con DELETEs en batches (un commit por batch).
+- delete_rollups: buckets de reading_rollups vencidos por resolucion.
+
+Las mediciones crudas solo se borran si el job de rollups ya las
+incorporo (id <= watermark), asi nunca se pierde un dato sin agregar.
+
+En dry-run se reportan filas y bytes que se liberarian (bytes estimados
+con el tamano promedio por fila de la tabla, indices incluidos).
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.asset import Asset
+from app.models.device import Device
+from app.models.location import Location
+from app.models.retention import RetentionPolicy
+from app.models.rollup import ReadingRollup
+from app.models.sensor_reading import SensorReading
+from app.schemas.retention import RetentionAction, RetentionReport
+from app.services.partitioning import drop_partition, is_partitioned, list_partitions
+from app.services.rollups import get_watermark
+
+
+logger = logging.getLogger(__name__)
+
+# Columna de dias de la politica para cada resolucion de rollup
+ROLLUP_RETENTION_COLUMNS: Dict[str, str] = {
+    "1m": "rollup_1m_days",
+    "1h": "rollup_1h_days",
+    "1d": "rollup_1d_days",
+}
+
+
+class PlannedAction(NamedTuple):
+    """Accion de limpieza con el filtro necesario para ejecutarla."""
+    kind: str
+    target: str
+    policy_id: Optional[int]
+    cutoff: datetime
+    device_ids: Tuple[int, ...]
+    rows: int
+    bytes: int
+    where: tuple = ()
+
+
+# ============================================================
+# Resolucion de Politicas
+# ============================================================
+
+def resolve_device_policies(db: Session, policies: Sequence[RetentionPolicy]) -> Dict[int, Optional[RetentionPolicy]]:
+    """
+    Politica aplicable a cada device (None si ninguna coincide).
+
+    Una sola query para todos los devices (grupo y tipo de asset via joins).
+    """
+    ordered = sorted(policies, key=lambda p: p.specificity, reverse=True)
+    rows = db.execute(
+        select(Device.id, Location.location_group_id, Asset.type)
+        .select_from(Device)
+        .outerjoin(Asset, Device.asset_id == Asset.id)
+        .outerjoin(Location, Asset.location_id == Location.id)
+    ).all()
+
+    assignments: Dict[int, Optional[RetentionPolicy]] = {}
+    for device_id, location_group_id, asset_type in rows:
+        assignments[device_id] = next(
+            (policy for policy in ordered if policy.matches(location_group_id, asset_type)),
+            None,
+        )
+    return assignments
+
+
+def _group_by_days(
+    assignments: Dict[int, Optional[RetentionPolicy]],
+    column: str,
+) -> List[Tuple[RetentionPolicy, Tuple[int, ...]]]:
+    """(politica, devices) para las politicas con `column` definido."""
+    groups: Dict[int, List[int]] = defaultdict(list)
+    by_id: Dict[int, RetentionPolicy] = {}
+    for device_id, policy in assignments.items():
+        if policy is not None and getattr(policy, column) is not None:
+            groups[policy.id].append(device_id)
+            by_id[policy.id] = policy
+    return [(by_id[policy_id], tuple(sorted(device_ids))) for policy_id, device_ids in groups.items()]
+
+
+# ============================================================
+# Estadisticas de Tamano
+# ============================================================
+
+def _relation_stats(db: Session, relation: str) -> Tuple[int, int]:
+    """(filas, bytes) de una tabla o arbol de particiones, indices incluidos."""
+    rows, size = db.execute(text("""
+        SELECT coalesce(sum(greatest(c.reltuples, 0)), 0), coalesce(sum(pg_total_relation_size(t.relid)), 0)
+        FROM pg_partition_tree(to_regclass(:relation)) t
+        JOIN pg_class c ON c.oid = t.relid
+        WHERE t.isleaf
+    """), {"relation": relation}).one()
+
+    # Tabla nunca analizada: reltuples no sirve, contar
+    if rows == 0 and size > 0:
+        rows = db.execute(text(f"SELECT count(*) FROM {relation}")).scalar()
+    return int(rows), int(size)
+
+
+def _bytes_per_row(db: Session, relation: str) -> float:
+    rows, size = _relation_stats(db, relation)
+    return size / rows if rows else 0.0
+
+
+# ============================================================
+# Planificacion
+# ============================================================
+
+def plan_retention(db: Session, now: Optional[datetime] = None) -> List[PlannedAction]:
+    """
+    Calcula las acciones de limpieza pendientes sin modificar nada.
+
+    Returns:
+        List[PlannedAction]: Drops de particion primero, luego DELETEs
+    """
+    now = now or datetime.utcnow()
+    policies = db.execute(select(RetentionPolicy).where(RetentionPolicy.enabled.is_(True))).scalars().all()
+    if not policies:
+        return []
+
+    assignments = resolve_device_policies(db, policies)
+    all_devices = tuple(sorted(assignments))
+    watermark = get_watermark(db) if settings.rollups_enabled else None
+    actions: List[PlannedAction] = []
+
+    # 1. Particiones completas: solo si TODOS los devices tienen retencion cruda
+    dropped_upper = None
+    if assignments and all(p is not None and p.raw_days is not None for p in assignments.values()):
+        partition_cutoff = now - timedelta(days=max(p.raw_days for p in assignments.values()))
+        partitions = list_partitions(db) if is_partitioned(db) else []
+        for partition in partitions:
+            if partition.is_default or partition.upper is None or partition.upper > partition_cutoff:
+                continue
+            if watermark is not None:
+                max_id = db.execute(text(f"SELECT max(id) FROM {partition.name}")).scalar()
+                if max_id is not None and max_id > watermark:
+                    continue  # Rollups pendientes
+            rows, size = _relation_stats(db, partition.name)
+            actions.append(PlannedAction("drop_partition", partition.name, None, partition.upper, all_devices, rows, size))
+            dropped_upper = max(dropped_upper or partition.upper, partition.upper)
+
+    # 2. Mediciones crudas vencidas fuera de las particiones a eliminar
+    raw_groups = _group_by_days(assignments, "raw_days")
+    if raw_groups:
+        row_bytes = _bytes_per_row(db, SensorReading.__tablename__)
+        for policy, device_ids in raw_groups:
+            cutoff = now - timedelta(days=policy.raw_days)
+            where = [SensorReading.device_id.in_(device_ids), SensorReading.timestamp < cutoff]
+            if dropped_upper is not None:
+                where.append(SensorReading.timestamp >= dropped_upper)
+            if watermark is not None:
+                where.append(SensorReading.id <= watermark)
+
+            rows = db.execute(select(func.count()).select_from(SensorReading).where(*where)).scalar()
+            if rows:
+                actions.append(PlannedAction(
+                    "delete_readings", SensorReading.__tablename__, policy.id, cutoff,
+                    device_ids, rows, int(rows * row_bytes), tuple(where),
+                ))
+
+    # 3. Rollups vencidos por resolucion
+    rollup_bytes = None
+    for resolution, column in ROLLUP_RETENTION_COLUMNS.items():
+        for policy, device_ids in _group_by_days(assignments, column):
+            cutoff = now - timedelta(days=getattr(policy, column))
+            where = (
+                ReadingRollup.resolution == resolution,
+                ReadingRollup.device_id.in_(device_ids),
+                ReadingRollup.bucket_start < cutoff,
+            )
+            rows = db.execute(select(func.count()).select_from(ReadingRollup).where(*where)).scalar()
+            if rows:
+                if rollup_bytes is None:
+                    rollup_bytes = _bytes_per_row(db, ReadingRollup.__tablename__)
+                actions.append(PlannedAction(
+                    "delete_rollups", f"{ReadingRollup.__tablename__}:{resolution}", policy.id, cutoff,
+                    device_ids, rows, int(rows * rollup_bytes), where,
+                ))
+
+    return actions
+
+
+# ============================================================
+# Ejecucion
+# ============================================================
+
+def _delete_in_batches(db: Session, model, key_columns, where, batch_size: int) -> int:
+    """DELETE por batches de `batch_size` filas (por clave primaria), commit por batch."""
+    total = 0
+    while True:
+        keys = select(*key_columns).where(*where).limit(batch_size)
+        result = db.execute(
+            delete(model).where(tuple_(*key_columns).in_(keys)),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+
+
+def apply_retention(
+    db: Session,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> RetentionReport:
+    """
+    Aplica (o simula, con dry_run) las politicas de retencion.
+
+    Example:
+        ```python
+        report = apply_retention(db, dry_run=True)
+        print(report.total_rows, report.total_bytes)
+        ```
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.retention_batch_size
+    actions = plan_retention(db, now)
+    db.rollback()
+
+    if not dry_run:
+        executed = []
+        for action in actions:
+            if action.kind == "drop_partition":
+                drop_partition(db, action.target)
+                db.commit()
+                rows = action.rows
+            elif action.kind == "delete_readings":
+                rows = _delete_in_batches(
+                    db, SensorReading, (SensorReading.id, SensorReading.timestamp), action.where, batch_size
+                )
+            else:
+                rows = _delete_in_batches(
+                    db, ReadingRollup,
+                    (ReadingRollup.device_id, ReadingRollup.variable, ReadingRollup.resolution, ReadingRollup.bucket_start),
+                    action.where, batch_size,
+                )
+            logger.info(f"Retencion: {action.kind} {action.target} ({rows} filas)")
+            executed.append(action._replace(rows=rows))
+        actions = executed
+
+    return RetentionReport(
+        dry_run=dry_run,
+        generated_at=now,
+        actions=[
+            RetentionAction(
+                kind=action.kind,
+                target=action.target,
+                policy_id=action.policy_id,
+                cutoff=action.cutoff,
+                devices=len(action.device_ids),
+                rows=action.rows,
+                bytes=action.bytes,
+            )
+            for action in actions
+        ],
+        total_rows=sum(action.rows for action in actions),
+        total_bytes=sum(action.bytes for action in actions),
+    )
+
+
+# ============================================================
+# Job en Background
+# ============================================================
+
+class RetentionJob:
+    """Thread que ejecuta apply_retention() periodicamente."""
+
+    def __init__(self, interval_sec: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.interval = interval_sec
+        self.session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.runs = 0
+        self.rows_deleted = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> RetentionReport:
+        """Aplica las politicas una vez."""
+        db = self.session_factory()
+        try:
+            report = apply_retention(db)
+        finally:
+            db.close()
+        self.runs += 1
+        self.rows_deleted += report.total_rows
+        return report
+
+    def start(self) -> None:
+        """Arranca el thread (la primera ejecucion es despues de un intervalo)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-job", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Metricas para /health."""
+        return {
+            "enabled": settings.retention_enabled,
+            "runs": self.runs,
+            "rows_deleted": self.rows_deleted,
+            "last_error": self.last_error,
+        }
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error aplicando politicas de retencion: {e}")
+
+
+# ============================================================
+# Instancia Global del Job
+# ============================================================
+retention_job = RetentionJob(interval_sec=settings.retention_interval_sec)
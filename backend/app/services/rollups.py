@@ -0,0 +1,408 @@
+"""
+Rollups incrementales de sensor_readings (1m / 1h / 1d).
+
+Mantenimiento (job periodico):
+    Procesa solo las mediciones nuevas usando un high-water mark sobre
+    sensor_readings.id (tabla rollup_watermarks). Cada variable numerica de
+    data_payload se agrega por device y bucket, y se combina con lo existente
+    con INSERT ... ON CONFLICT DO UPDATE (count/sum/sum_sq se suman,
+    min/max se comparan). Las mediciones que llegan tarde (timestamp viejo)
+    caen en su bucket correcto porque se seleccionan por id, no por tiempo.
+
+    Los ids se asignan al insertar pero las transacciones commitean en otro
+    orden: el candidato a watermark (max(id)) se guarda junto con
+    pg_current_snapshot() y solo se procesa cuando todas las transacciones
+    que estaban en curso en ese momento terminaron.
+
+Lectura (rollup_partials):
+    Para un rango y una resolucion pedida se usa el rollup mas grueso que la
+    satisface. Los buckets de rollup completamente dentro del rango se leen
+    de reading_rollups; los bordes del rango y las mediciones posteriores al
+    watermark se leen crudas. Ambas partes devuelven las mismas columnas
+    (count, sum, min, max, sum_sq) y se agregan juntas, asi el resultado es
+    identico al calculado sobre los datos crudos y siempre esta al dia.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Sequence
+
+from sqlalchemy import BigInteger, Float, Text, cast, column, func, literal, or_, select, true, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TEXT, array, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.rollup import ReadingRollup, RollupWatermark
+from app.models.sensor_reading import SensorReading
+from app.services.reading_consumer import candidate_settled, take_candidate
+
+
+logger = logging.getLogger(__name__)
+
+# Resoluciones mantenidas, de la mas fina a la mas gruesa
+ROLLUP_RESOLUTIONS: Dict[str, timedelta] = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+# Origen de los buckets (alineados a la medianoche UTC, igual que date_bin en aggregation)
+BUCKET_ORIGIN = datetime(2000, 1, 1)
+
+WATERMARK_NAME = "sensor_readings"
+
+# Largo maximo de variable guardable en reading_rollups.variable
+MAX_VARIABLE_LENGTH = 64
+
+
+# ============================================================
+# Seleccion de Resolucion
+# ============================================================
+
+def choose_resolution(bucket_size: timedelta, aligned: bool = True) -> Optional[str]:
+    """
+    Elige el rollup mas grueso que satisface el bucket pedido.
+
+    Args:
+        bucket_size: Tamano del bucket de salida
+        aligned: Si los buckets de salida estan alineados al origen (date_bin).
+            En ese caso el rollup debe dividir exactamente al bucket; si no
+            (ej: series con ancho = rango / points) alcanza con que sea menor.
+
+    Returns:
+        Optional[str]: "1m", "1h", "1d" o None si ninguno sirve (usar crudos)
+    """
+    if not settings.rollups_enabled:
+        return None
+
+    chosen = None
+    for resolution, size in ROLLUP_RESOLUTIONS.items():
+        if aligned and bucket_size % size == timedelta(0):
+            chosen = resolution
+        elif not aligned and size <= bucket_size:
+            chosen = resolution
+    return chosen
+
+
+def _floor_to(value: datetime, size: timedelta) -> datetime:
+    """Trunca `value` al inicio de su bucket de tamano `size`."""
+    return value - (value - BUCKET_ORIGIN) % size
+
+
+def _ceil_to(value: datetime, size: timedelta) -> datetime:
+    """Redondea `value` hacia arriba al inicio de bucket siguiente."""
+    floored = _floor_to(value, size)
+    return floored if floored == value else floored + size
+
+
+# ============================================================
+# Lectura: rollups + crudos
+# ============================================================
+
+def get_watermark(db: Session) -> int:
+    """Ultimo sensor_readings.id incorporado a los rollups (0 si nunca corrio)."""
+    value = db.execute(
+        select(RollupWatermark.last_reading_id).where(RollupWatermark.name == WATERMARK_NAME)
+    ).scalar()
+    return value or 0
+
+
+def _requested_variables(variables: Sequence[str]):
+    """Tabla derivada unnest(ARRAY[...]) AS v(key) con las variables pedidas."""
+    return func.unnest(cast(array(list(variables)), ARRAY(TEXT))).table_valued("key").render_derived(name="v")
+
+
+def rollup_partials(
+    db: Session,
+    device_ids: Sequence[int],
+    variables: Sequence[str],
+    date_from: datetime,
+    date_to: datetime,
+    resolution: Optional[str],
+):
+    """
+    Subquery de estadisticas parciales para [date_from, date_to).
+
+    Columnas: device_id, variable, ts, count, sum, min, max, sum_sq.
+    `ts` es el inicio del bucket de rollup o el timestamp de la medicion
+    cruda; el caller agrupa por el bucket de salida que corresponda a `ts`.
+
+    Args:
+        resolution: Rollup a usar (ver choose_resolution). None = solo crudos.
+    """
+    requested = _requested_variables(variables)
+    value = cast(SensorReading.data_payload.op("->>")(requested.c.key), Float)
+
+    raw_filter = [
+        SensorReading.device_id.in_(device_ids),
+        SensorReading.timestamp >= date_from,
+        SensorReading.timestamp < date_to,
+        func.jsonb_typeof(SensorReading.data_payload.op("->")(requested.c.key)) == "number",
+    ]
+
+    # Variables mas largas que la columna no se guardan en rollups
+    if any(len(variable) > MAX_VARIABLE_LENGTH for variable in variables):
+        resolution = None
+
+    parts = []
+    if resolution is not None:
+        size = ROLLUP_RESOLUTIONS[resolution]
+        covered_from = _ceil_to(date_from, size)
+        covered_to = _floor_to(date_to, size)
+
+        if covered_from < covered_to:
+            watermark = get_watermark(db)
+
+            parts.append(
+                select(
+                    ReadingRollup.device_id,
+                    ReadingRollup.variable,
+                    ReadingRollup.bucket_start.label("ts"),
+                    ReadingRollup.count,
+                    ReadingRollup.sum,
+                    ReadingRollup.min,
+                    ReadingRollup.max,
+                    ReadingRollup.sum_sq,
+                ).where(
+                    ReadingRollup.resolution == resolution,
+                    ReadingRollup.device_id.in_(device_ids),
+                    ReadingRollup.variable.in_(list(variables)),
+                    ReadingRollup.bucket_start >= covered_from,
+                    ReadingRollup.bucket_start < covered_to,
+                )
+            )
+
+            # Crudos: bordes del rango + mediciones que el job aun no proceso
+            raw_filter.append(or_(
+                SensorReading.id > watermark,
+                SensorReading.timestamp < covered_from,
+                SensorReading.timestamp >= covered_to,
+            ))
+
+    parts.append(
+        select(
+            SensorReading.device_id,
+            requested.c.key.label("variable"),
+            SensorReading.timestamp.label("ts"),
+            literal(1).label("count"),
+            value.label("sum"),
+            value.label("min"),
+            value.label("max"),
+            (value * value).label("sum_sq"),
+        )
+        .select_from(SensorReading)
+        .join(requested, true())
+        .where(*raw_filter)
+    )
+
+    if len(parts) == 1:
+        return parts[0].subquery("partials")
+    return union_all(*parts).subquery("partials")
+
+
+def combined_stats(partials):
+    """
+    Expresiones de agregacion final sobre rollup_partials().
+
+    Returns:
+        tuple: (avg, min, max, stddev, count)
+    """
+    count = cast(func.sum(partials.c.count), BigInteger)
+    n = cast(count, Float)
+    total = func.sum(partials.c.sum)
+    variance = (func.sum(partials.c.sum_sq) - total * total / n) / func.nullif(n - 1, 0)
+    return (
+        (total / n).label("avg"),
+        func.min(partials.c.min).label("min"),
+        func.max(partials.c.max).label("max"),
+        # greatest(..., 0) absorbe errores de redondeo con varianza ~0
+        func.sqrt(func.greatest(variance, 0.0)).label("stddev"),
+        count.label("count"),
+    )
+
+
+# ============================================================
+# Mantenimiento Incremental
+# ============================================================
+
+def rollup_id_range(db: Session, after_id: int, upto_id: int) -> None:
+    """
+    Incorpora a reading_rollups las mediciones con after_id < id <= upto_id.
+
+    Un INSERT ... SELECT ... ON CONFLICT por resolucion; no hace commit.
+    """
+    entries = func.jsonb_each(SensorReading.data_payload).table_valued(
+        column("key", Text), column("value", JSONB)
+    ).render_derived(name="e")
+    value = cast(entries.c.value, Float)
+
+    for resolution, size in ROLLUP_RESOLUTIONS.items():
+        bucket = func.date_bin(literal(size), SensorReading.timestamp, literal(BUCKET_ORIGIN))
+
+        delta = (
+            select(
+                SensorReading.device_id,
+                entries.c.key,
+                literal(resolution),
+                bucket,
+                func.count(),
+                func.sum(value),
+                func.min(value),
+                func.max(value),
+                func.sum(value * value),
+            )
+            .select_from(SensorReading)
+            .join(entries, true())
+            .where(
+                SensorReading.id > after_id,
+                SensorReading.id <= upto_id,
+                func.jsonb_typeof(entries.c.value) == "number",
+                func.length(entries.c.key) <= MAX_VARIABLE_LENGTH,
+            )
+            .group_by(SensorReading.device_id, entries.c.key, bucket)
+        )
+
+        stmt = pg_insert(ReadingRollup).from_select(
+            ["device_id", "variable", "resolution", "bucket_start", "count", "sum", "min", "max", "sum_sq"],
+            delta,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device_id", "variable", "resolution", "bucket_start"],
+            set_={
+                "count": ReadingRollup.count + stmt.excluded["count"],
+                "sum": ReadingRollup.sum + stmt.excluded["sum"],
+                "min": func.least(ReadingRollup.min, stmt.excluded["min"]),
+                "max": func.greatest(ReadingRollup.max, stmt.excluded["max"]),
+                "sum_sq": ReadingRollup.sum_sq + stmt.excluded["sum_sq"],
+            },
+        )
+        db.execute(stmt)
+
+
+def refresh_rollups(db: Session, batch_size: Optional[int] = None) -> int:
+    """
+    Avanza el watermark procesando a lo sumo `batch_size` ids. Hace commit.
+
+    Si otro worker esta ejecutando el job (fila de watermark bloqueada)
+    retorna 0 sin esperar.
+
+    Returns:
+        int: Cantidad de ids incorporados (0 si no habia trabajo listo)
+
+    Example:
+        ```python
+        refresh_rollups(db)  # Toma el candidato (max(id) actual)
+        refresh_rollups(db)  # Lo procesa si sus transacciones ya terminaron
+        ```
+    """
+    batch_size = batch_size or settings.rollup_batch_size
+
+    db.execute(
+        pg_insert(RollupWatermark)
+        .values(name=WATERMARK_NAME, last_reading_id=0, updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    watermark = db.execute(
+        select(RollupWatermark)
+        .where(RollupWatermark.name == WATERMARK_NAME)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+
+    if watermark is None:
+        db.rollback()
+        return 0
+
+    advanced = 0
+    pending = watermark.pending_reading_id
+
+    if pending is None or pending <= watermark.last_reading_id:
+        watermark.pending_reading_id, watermark.pending_snapshot = take_candidate(db)
+    elif candidate_settled(db, watermark.pending_snapshot):
+        after_id = watermark.last_reading_id
+        upto_id = min(pending, after_id + batch_size)
+
+        rollup_id_range(db, after_id, upto_id)
+        watermark.last_reading_id = upto_id
+        advanced = upto_id - after_id
+
+        if upto_id == pending:
+            watermark.pending_reading_id, watermark.pending_snapshot = take_candidate(db)
+
+    watermark.updated_at = datetime.utcnow()
+    db.commit()
+    return advanced
+
+
+# ============================================================
+# Job en Background
+# ============================================================
+
+class RollupJob:
+    """
+    Thread que ejecuta refresh_rollups() periodicamente.
+
+    Con varios workers, solo uno procesa a la vez (FOR UPDATE SKIP LOCKED
+    sobre la fila de watermark); el resto saltea la ejecucion.
+    """
+
+    def __init__(self, interval_sec: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.interval = interval_sec
+        self.session_factory = session_factory
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self.runs = 0
+        self.last_error: Optional[str] = None
+
+    def run_once(self) -> int:
+        """Procesa todo el trabajo listo (varios batches). Retorna ids incorporados."""
+        total = 0
+        idle = 0
+        db = self.session_factory()
+        try:
+            # Una llamada sin avance puede solo haber tomado el candidato:
+            # se corta recien en la segunda consecutiva
+            while idle < 2 and not self._stopping.is_set():
+                advanced = refresh_rollups(db)
+                total += advanced
+                idle = 0 if advanced else idle + 1
+        finally:
+            db.close()
+        self.runs += 1
+        return total
+
+    def start(self) -> None:
+        """Arranca el thread (no hace nada si ya esta corriendo)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="rollup-job", daemon=True)
+        self._thread.start()
+        logger.info(f"Job de rollups iniciado (cada {self.interval}s)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Detiene el thread (el batch en curso termina su commit)."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Metricas del job para /health."""
+        return {"enabled": settings.rollups_enabled, "runs": self.runs, "last_error": self.last_error}
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error en el job de rollups: {e}")
+
+
+# ============================================================
+# Instancia Global del Job
+# ============================================================
+rollup_job = RollupJob(interval_sec=settings.rollup_refresh_interval_sec)
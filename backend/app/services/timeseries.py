@@ -0,0 +1,157 @@
+"""
+Servicio de series temporales downsampleadas para graficos.
+
+Dos modos, ambos con tamano de respuesta acotado por `points`
+(sin importar cuantas mediciones haya en el rango):
+
+- lttb: trae solo (timestamp, valor) de la variable pedida y aplica
+  Largest-Triangle-Three-Buckets en NumPy. Conserva la forma visual
+  (picos incluidos) con puntos reales de la serie.
+- minmax: agrega en PostgreSQL por buckets de tiempo de igual ancho
+  (promedio, minimo, maximo y cantidad). No transfiere las mediciones
+  crudas, recomendado para rangos muy largos. Usa los rollups (1m/1h/1d)
+  mas gruesos que entren en el ancho del bucket.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import Float, and_, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.sensor_reading import SensorReading
+from app.schemas.timeseries import SeriesPoint
+from app.services.rollups import choose_resolution, combined_stats, rollup_partials
+from app.utils.downsampling import lttb_indices
+
+
+SERIES_MODES = ("lttb", "minmax")
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Convierte un datetime con zona horaria a UTC naive (formato de la DB)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _numeric_value(variable: str):
+    """Expresion SQL del valor numerico de `variable` en data_payload."""
+    return cast(SensorReading.data_payload[variable].astext, Float)
+
+
+def _series_filter(device_id: int, variable: str, date_from: datetime, date_to: datetime):
+    """Filtro comun: device, rango [from, to) y solo valores JSON numericos."""
+    return and_(
+        SensorReading.device_id == device_id,
+        SensorReading.timestamp >= date_from,
+        SensorReading.timestamp < date_to,
+        # Descarta strings, nulls y valores ausentes (evita errores de cast)
+        func.jsonb_typeof(SensorReading.data_payload[variable]) == "number",
+    )
+
+
+def lttb_series(
+    db: Session,
+    device_id: int,
+    variable: str,
+    date_from: datetime,
+    date_to: datetime,
+    points: int,
+) -> Tuple[List[SeriesPoint], int]:
+    """
+    Serie downsampleada con LTTB.
+
+    Returns:
+        Tuple[List[SeriesPoint], int]: Puntos elegidos y cantidad de mediciones crudas
+    """
+    rows = db.execute(
+        select(func.extract("epoch", SensorReading.timestamp), _numeric_value(variable))
+        .where(_series_filter(device_id, variable, date_from, date_to))
+        .order_by(SensorReading.timestamp)
+    ).all()
+
+    if not rows:
+        return [], 0
+
+    data = np.array(rows, dtype=np.float64)
+    x, y = data[:, 0], data[:, 1]
+    indices = lttb_indices(x, y, points)
+
+    series = [
+        SeriesPoint(timestamp=datetime.utcfromtimestamp(x[i]), value=float(y[i]))
+        for i in indices
+    ]
+    return series, len(rows)
+
+
+def minmax_series(
+    db: Session,
+    device_id: int,
+    variable: str,
+    date_from: datetime,
+    date_to: datetime,
+    points: int,
+) -> Tuple[List[SeriesPoint], int]:
+    """
+    Serie agregada en PostgreSQL por buckets de igual ancho.
+
+    Con rollups, cada fila de rollup cae entera en el bucket de su inicio
+    (el rollup elegido nunca es mas ancho que el bucket de salida, asi que
+    a lo sumo se corre un bucket de rollup en los limites).
+
+    Returns:
+        Tuple[List[SeriesPoint], int]: Un punto por bucket con datos y cantidad de mediciones crudas
+    """
+    width = (date_to - date_from).total_seconds() / points
+    partials = rollup_partials(
+        db, [device_id], [variable], date_from, date_to,
+        choose_resolution(timedelta(seconds=width), aligned=False),
+    )
+    bucket = func.floor(
+        func.extract("epoch", partials.c.ts - date_from) / width
+    ).label("bucket")
+
+    rows = db.execute(
+        select(bucket, *combined_stats(partials))
+        .group_by(bucket)
+        .order_by(bucket)
+    ).all()
+
+    start = (date_from - datetime(1970, 1, 1)).total_seconds()
+    series = [
+        SeriesPoint(
+            timestamp=datetime.utcfromtimestamp(start + int(bucket_index) * width),
+            value=float(avg),
+            min=float(minimum),
+            max=float(maximum),
+            count=count,
+        )
+        for bucket_index, avg, minimum, maximum, _stddev, count in rows
+    ]
+    return series, sum(point.count for point in series)
+
+
+def device_series(
+    db: Session,
+    device_id: int,
+    variable: str,
+    date_from: datetime,
+    date_to: datetime,
+    points: int,
+    mode: str = "lttb",
+) -> Tuple[List[SeriesPoint], int]:
+    """
+    Serie de `variable` del device en [date_from, date_to) con a lo sumo `points` puntos.
+
+    Las fechas deben ser UTC naive (como se guardan en sensor_readings).
+
+    Example:
+        ```python
+        data, raw_count = device_series(db, 1, "temp_c", now - timedelta(days=30), now, 500)
+        ```
+    """
+    if mode == "minmax":
+        return minmax_series(db, device_id, variable, date_from, date_to, points)
+    return lttb_series(db, device_id, variable, date_from, date_to, points)
@@ -0,0 +1,123 @@
+"""
+Cache de usuarios autenticados (user_id -> columnas del usuario).
+
+get_current_user resolvia el usuario del token con una query a `users`
+en cada request autenticado (incluida cada pagina de GET /readings del
+dashboard). El registro guarda las columnas del usuario (sin
+password_hash) por un TTL corto y arma el User en la sesion del request
+sin consultar la DB.
+
+Invalidacion:
+- Cualquier UPDATE o DELETE de un User hecho con el ORM invalida su
+  entrada al commitear la transaccion (rol, is_active,
+  allowed_location_ids, etc.)
+- Con CACHE_REDIS_ENABLED=true la invalidacion llega a todos los workers
+- El TTL (USER_CACHE_TTL_SEC) acota cambios hechos por fuera del ORM
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import MISSING, InvalidationBus, TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+# Columnas cacheadas: el hash de la password no se guarda (solo lo usa el login)
+_USER_COLUMNS = tuple(column for column in User.__table__.columns if column.key != "password_hash")
+
+
+class UserRegistry:
+    """
+    Cache de usuarios por id con invalidacion explicita.
+
+    Example:
+        ```python
+        user = user_registry.get(db, payload["user_id"])  # User de la sesion, o None
+        user_registry.invalidate(user.id)                 # Despues de modificar el usuario
+        ```
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.bus = InvalidationBus(
+            "cache:users",
+            on_invalidate=lambda key: self.cache.invalidate(int(key)),
+            on_reset=self.cache.clear,
+        )
+
+    @classmethod
+    def from_settings(cls) -> "UserRegistry":
+        """Crea el registro con la configuracion de USER_CACHE_*."""
+        return cls(max_size=settings.user_cache_max_size, ttl_seconds=settings.user_cache_ttl_sec)
+
+    def get(self, db: Session, user_id: int) -> Optional[User]:
+        """
+        Retorna el usuario asociado a la sesion, o None si no existe.
+
+        Si no esta en cache lo busca en la DB. Si esta, arma el User y lo
+        agrega a la sesion como persistente sin emitir SQL (password_hash
+        se carga bajo demanda si se accede).
+        """
+        existing = db.identity_map.get(Session.identity_key(User, user_id))
+        if existing is not None:
+            return existing
+
+        columns: Optional[Dict[str, Any]] = self.cache.get(user_id)
+        if columns is MISSING:
+            row = db.execute(select(*_USER_COLUMNS).where(User.id == user_id)).first()
+            if row is None:
+                return None
+            columns = dict(row._mapping)
+            self.cache.set(user_id, columns)
+
+        # Copia de las listas (allowed_location_ids): el User del request no
+        # debe compartir valores mutables con la entrada del cache
+        user = User(**{key: list(value) if isinstance(value, list) else value for key, value in columns.items()})
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Descarta usuarios del cache en todos los workers."""
+        for user_id in user_ids:
+            self.bus.publish(str(user_id))
+
+    def clear(self) -> None:
+        """Vacia el cache local."""
+        self.cache.clear()
+
+
+# ============================================================
+# Instancia Global del Registro
+# ============================================================
+user_registry = UserRegistry.from_settings()
+
+
+# ============================================================
+# Invalidacion Automatica
+# ============================================================
+# Los ids modificados se acumulan en la sesion y se invalidan al commitear:
+# invalidar en el flush dejaria que otro request cachee el valor anterior
+# mientras la transaccion sigue abierta.
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _track_user_change(mapper, connection, target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    changed = session.info.pop("changed_user_ids", None)
+    if changed:
+        user_registry.invalidate(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
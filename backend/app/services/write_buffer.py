@@ -0,0 +1,357 @@
+"""
+Buffer de escritura en memoria para ingesta de readings (group commit).
+
+En modo INGEST_MODE=buffered, POST /readings solo valida el payload y lo
+encola. Un thread writer vacia la cola en group commits: cada N readings o
+cada T milisegundos (lo que ocurra primero), usando el mismo camino de
+escritura que el endpoint batch (ingest_readings, via COPY).
+
+Ventajas:
+- El request no ocupa una conexion del pool durante toda una transaccion
+- Cientos de readings comparten un solo INSERT multi-fila y un solo COMMIT
+
+Trade-offs:
+- Los readings encolados se pierden si el proceso muere abruptamente
+- Los devices inexistentes se descartan al hacer flush (se loguea)
+
+Los clientes ya recibieron 202, asi que un error de la DB no descarta el
+batch: los errores transitorios (caida, failover, pool agotado) se
+reintentan con backoff exponencial y, si persisten, el batch vuelve al
+frente de la cola (la cola se llena y POST /readings responde 503). Ante
+otros errores el batch se divide a la mitad hasta aislar las filas que
+fallan; solo esas se descartan.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, List, Optional
+
+from sqlalchemy import exc, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.schemas.sensor_reading import SensorReadingCreate
+from app.services.ingestion import STATUS_CREATED, ingest_readings
+
+
+logger = logging.getLogger(__name__)
+
+# Marcador que se encola en stop() para despertar al writer
+_STOP = object()
+
+# Espera maxima entre reintentos de un batch
+MAX_RETRY_DELAY_SEC = 5.0
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True si el error es de conexion/disponibilidad de la DB (no del batch)."""
+    if isinstance(error, (exc.OperationalError, exc.InterfaceError, exc.TimeoutError)):
+        return True
+    return isinstance(error, exc.DBAPIError) and error.connection_invalidated
+
+
+class WriteBufferUnavailable(Exception):
+    """La cola esta llena o el writer no acepta readings (backpressure)."""
+
+
+class ReadingWriteBuffer:
+    """
+    Cola acotada de readings + thread writer con group commit.
+
+    Example:
+        ```python
+        buffer = ReadingWriteBuffer(max_size=10000, flush_max_rows=500, flush_interval_ms=200)
+        buffer.start()
+        buffer.submit(reading_data)  # Lanza WriteBufferUnavailable si esta llena
+        ...
+        buffer.stop(timeout=10)  # Drena la cola antes de cerrar
+        ```
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        flush_max_rows: int,
+        flush_interval_ms: int,
+        durability: str = "full",
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_func: Optional[Callable[[List[SensorReadingCreate]], int]] = None,
+        flush_max_retries: int = 5,
+        flush_retry_base_ms: int = 100,
+    ):
+        """
+        Args:
+            max_size: Cantidad maxima de readings en cola
+            flush_max_rows: Readings por group commit
+            flush_interval_ms: Tiempo maximo que un reading espera en cola
+            durability: "full" o "relaxed" (synchronous_commit=off)
+            session_factory: Factory de sesiones para el writer
+            flush_func: Reemplaza la escritura a DB (util para tests).
+                Recibe el batch y retorna la cantidad de readings escritos.
+            flush_max_retries: Reintentos de un batch ante errores transitorios
+            flush_retry_base_ms: Espera antes del primer reintento (se duplica
+                en cada uno, hasta MAX_RETRY_DELAY_SEC)
+        """
+        self.max_size = max_size
+        self.flush_max_rows = flush_max_rows
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.durability = durability
+        self.session_factory = session_factory
+        self.flush_func = flush_func or self._write_batch
+        self.flush_max_retries = flush_max_retries
+        self.flush_retry_base = flush_retry_base_ms / 1000.0
+
+        self._queue: "queue.Queue[SensorReadingCreate]" = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._accepting = False
+        # Batches que fallaron por errores transitorios: se escriben antes que la cola
+        self._retry_batches: Deque[List[SensorReadingCreate]] = deque()
+
+        # Metricas basicas (expuestas en /health)
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.dropped_rows = 0
+        self.rejected_rows = 0
+        self.retried_flushes = 0
+        self.requeued_batches = 0
+
+    @classmethod
+    def from_settings(cls) -> "ReadingWriteBuffer":
+        """Crea el buffer con la configuracion de INGEST_*."""
+        return cls(
+            max_size=settings.ingest_buffer_max_size,
+            flush_max_rows=settings.ingest_flush_max_rows,
+            flush_interval_ms=settings.ingest_flush_interval_ms,
+            durability=settings.ingest_durability,
+            flush_max_retries=settings.ingest_flush_max_retries,
+            flush_retry_base_ms=settings.ingest_flush_retry_base_ms,
+        )
+
+    # ------------------------------------------------------------
+    # API publica
+    # ------------------------------------------------------------
+
+    @property
+    def is_running(self) -> bool:
+        """True si el thread writer esta vivo."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def queued(self) -> int:
+        """Cantidad aproximada de readings en cola (incluye los batches a reintentar)."""
+        return self._queue.qsize() + sum(len(batch) for batch in list(self._retry_batches))
+
+    def start(self) -> None:
+        """Arranca el thread writer (idempotente)."""
+        if self.is_running:
+            return
+
+        self._stopping.clear()
+        self._accepting = True
+        self._thread = threading.Thread(target=self._run, name="reading-write-buffer", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Write buffer iniciado (max_size={self.max_size}, "
+            f"flush={self.flush_max_rows} rows / {self.flush_interval * 1000:.0f} ms, "
+            f"durability={self.durability})"
+        )
+
+    def submit(self, reading_data: SensorReadingCreate) -> None:
+        """
+        Encola un reading para escritura diferida.
+
+        Si el reading no trae timestamp se fija ahora, para que el momento
+        de la medicion no dependa de cuando se haga el flush.
+
+        Raises:
+            WriteBufferUnavailable: Si la cola esta llena o el buffer esta cerrando
+        """
+        if not self._accepting:
+            self.rejected_rows += 1
+            raise WriteBufferUnavailable("El buffer de ingesta no esta aceptando readings")
+
+        if reading_data.timestamp is None:
+            reading_data = reading_data.model_copy(update={"timestamp": datetime.utcnow()})
+
+        try:
+            self._queue.put_nowait(reading_data)
+        except queue.Full:
+            self.rejected_rows += 1
+            raise WriteBufferUnavailable("Buffer de ingesta lleno")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Deja de aceptar readings y drena la cola antes de terminar.
+
+        Args:
+            timeout: Segundos maximos a esperar el drenado
+        """
+        self._accepting = False
+        self._stopping.set()
+
+        # Despertar al writer si esta esperando readings
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            pass
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(
+                    f"Write buffer no termino de drenar en {timeout}s "
+                    f"({self.queued} readings pendientes)"
+                )
+            else:
+                logger.info(f"✓ Write buffer drenado ({self.flushed_rows} readings escritos)")
+
+    def stats(self) -> dict:
+        """Metricas del buffer para monitoreo."""
+        return {
+            "running": self.is_running,
+            "queued": self.queued,
+            "max_size": self.max_size,
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "dropped_rows": self.dropped_rows,
+            "rejected_rows": self.rejected_rows,
+            "retried_flushes": self.retried_flushes,
+            "requeued_batches": self.requeued_batches,
+        }
+
+    # ------------------------------------------------------------
+    # Thread writer
+    # ------------------------------------------------------------
+
+    def _run(self) -> None:
+        """Loop del writer: junta batches y los escribe hasta que se pida stop."""
+        while not self._stopping.is_set():
+            batch = self._retry_batches.popleft() if self._retry_batches else self._collect_batch()
+            if batch:
+                self._flush(batch)
+
+        # Drenado final: batches pendientes de reintento y todo lo que haya quedado en cola
+        while self._retry_batches:
+            self._flush(self._retry_batches.popleft())
+
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                continue
+            batch.append(item)
+            if len(batch) >= self.flush_max_rows:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+    def _collect_batch(self) -> List[SensorReadingCreate]:
+        """Espera el primer reading y junta hasta flush_max_rows o flush_interval."""
+        batch: List[SensorReadingCreate] = []
+        deadline = None
+
+        while len(batch) < self.flush_max_rows:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if item is _STOP:
+                break
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+
+        return batch
+
+    def _flush(self, batch: List[SensorReadingCreate]) -> None:
+        """
+        Escribe un batch y actualiza metricas. Nunca propaga excepciones.
+
+        - Error transitorio: reintentos con backoff; si se agotan, el batch
+          vuelve al frente de la cola (al drenar en stop() se descarta)
+        - Otro error: se divide el batch para aislar las filas invalidas
+        """
+        try:
+            written = self._write_with_retries(batch)
+        except Exception as e:
+            if is_transient_error(e) and not self._stopping.is_set():
+                self._retry_batches.append(batch)
+                self.requeued_batches += 1
+                logger.warning(f"Batch de {len(batch)} readings devuelto a la cola tras {self.flush_max_retries} reintentos: {e}")
+                return
+
+            if len(batch) > 1 and not is_transient_error(e):
+                middle = len(batch) // 2
+                self._flush(batch[:middle])
+                self._flush(batch[middle:])
+                return
+
+            self.dropped_rows += len(batch)
+            logger.error(f"Error escribiendo batch de {len(batch)} readings, descartado: {e}")
+            return
+
+        self.flushed_rows += written
+        self.flushed_batches += 1
+        if written < len(batch):
+            self.dropped_rows += len(batch) - written
+
+    def _write_with_retries(self, batch: List[SensorReadingCreate]) -> int:
+        """Llama a flush_func reintentando los errores transitorios con backoff exponencial."""
+        attempt = 0
+        while True:
+            try:
+                return self.flush_func(batch)
+            except Exception as e:
+                if not is_transient_error(e) or attempt >= self.flush_max_retries:
+                    raise
+                delay = min(self.flush_retry_base * 2 ** attempt, MAX_RETRY_DELAY_SEC)
+                attempt += 1
+                self.retried_flushes += 1
+                logger.warning(f"Error transitorio escribiendo {len(batch)} readings (reintento {attempt} en {delay:.2f}s): {e}")
+                time.sleep(delay)
+
+    def _write_batch(self, batch: List[SensorReadingCreate]) -> int:
+        """Escribe un batch en una transaccion (group commit)."""
+        db = self.session_factory()
+        try:
+            if self.durability == "relaxed":
+                # Solo afecta a esta transaccion: el COMMIT no espera el flush del WAL
+                db.execute(text("SET LOCAL synchronous_commit TO OFF"))
+
+            # Nadie espera los IDs: se usa COPY en lugar de INSERT
+            results = ingest_readings(db, batch, return_ids=False)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        created = sum(1 for result in results if result.status == STATUS_CREATED)
+        if created < len(batch):
+            logger.warning(f"{len(batch) - created} readings descartados (device no encontrado)")
+
+        return created
+
+
+# ============================================================
+# Instancia Global del Buffer
+# ============================================================
+# Solo se arranca en el startup si INGEST_MODE=buffered
+write_buffer = ReadingWriteBuffer.from_settings()
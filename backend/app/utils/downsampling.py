@@ -0,0 +1,68 @@
+"""
+Algoritmos de downsampling de series temporales (NumPy).
+
+LTTB (Largest-Triangle-Three-Buckets, Steinarsson 2013) elige, en cada
+bucket, el punto que forma el triangulo de mayor area con el punto elegido
+en el bucket anterior y el promedio del bucket siguiente. Conserva picos y
+la forma visual de la serie con una cantidad fija de puntos.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Retorna los indices de los puntos elegidos por LTTB.
+
+    El primer y el ultimo punto siempre se conservan. El loop es por bucket
+    (`threshold` iteraciones); dentro de cada bucket el calculo de areas es
+    vectorizado.
+
+    Args:
+        x: Eje X ordenado ascendente (ej: epoch en segundos)
+        y: Valores
+        threshold: Cantidad de puntos a retornar (>= 3)
+
+    Returns:
+        np.ndarray: Indices ordenados (len == min(threshold, len(x)))
+
+    Example:
+        ```python
+        idx = lttb_indices(timestamps, values, 500)
+        chart_x, chart_y = timestamps[idx], values[idx]
+        ```
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        raise ValueError("threshold debe ser >= 3")
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Limites de los buckets intermedios (el primer y ultimo punto van solos)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Promedio del bucket siguiente (o el ultimo punto)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Area (x2) de los triangulos (a, candidato, promedio siguiente)
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
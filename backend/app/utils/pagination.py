@@ -0,0 +1,48 @@
+"""
+Paginacion por cursor (keyset pagination).
+
+En lugar de OFFSET (que obliga a PostgreSQL a leer y descartar todas las
+filas anteriores), el cliente envia el cursor de la ultima fila recibida y
+la siguiente pagina se obtiene con `WHERE (timestamp, id) < (:ts, :id)`,
+que se resuelve con un range scan del indice sin importar la profundidad.
+
+El cursor es opaco para el cliente: base64url de "timestamp|id".
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no es valido (manipulado o de otra version)."""
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    Genera el cursor opaco para la fila (timestamp, id).
+
+    Example:
+        ```python
+        cursor = encode_cursor(reading.timestamp, reading.id)
+        ```
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por encode_cursor().
+
+    Raises:
+        InvalidCursor: Si el cursor no tiene el formato esperado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError, binascii.Error) as e:
+        raise InvalidCursor("Cursor de paginacion invalido") from e
@@ -0,0 +1,68 @@
+"""
+Script de Aplicacion de Politicas de Retencion.
+
+Ejecuta el mismo proceso que el job diario (drops de particiones vencidas
+y DELETEs por batches de readings y rollups). Con --dry-run solo muestra
+que se eliminaria, con filas y bytes estimados.
+
+Uso:
+    python scripts/apply_retention.py --dry-run
+    python scripts/apply_retention.py
+    python scripts/apply_retention.py --batch-size 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.retention import apply_retention
+
+
+def format_bytes(size: int) -> str:
+    """Tamano legible (KB, MB, GB)."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica las politicas de retencion")
+    parser.add_argument("--dry-run", action="store_true", help="Solo reportar, no eliminar")
+    parser.add_argument("--batch-size", type=int, default=None, help="Filas por DELETE")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Politicas de retencion" + (" (dry-run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    db = SessionLocal()
+    start = time.monotonic()
+    try:
+        report = apply_retention(db, dry_run=args.dry_run, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    if not report.actions:
+        print("\n✓ Nada para eliminar")
+    for action in report.actions:
+        print(
+            f"\n- {action.kind} {action.target}"
+            f"\n   antes de {action.cutoff:%Y-%m-%d %H:%M} | {action.devices} devices"
+            f" | {action.rows} filas | {format_bytes(action.bytes)}"
+        )
+
+    print("\n" + "=" * 60)
+    verb = "se liberarian" if args.dry_run else "liberados"
+    print(f"✓ Total: {report.total_rows} filas, ~{format_bytes(report.total_bytes)} {verb} ({time.monotonic() - start:.1f}s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
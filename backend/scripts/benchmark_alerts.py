@@ -0,0 +1,128 @@
+"""
+Benchmark de Evaluacion de Reglas de Alerta.
+
+Compara la evaluacion medicion por medicion (evaluate_reading) con la
+vectorizada con NumPy (evaluate_batch) sobre el mismo set de mediciones
+y reglas globales (cada medicion se evalua contra todas las reglas).
+
+No usa la base de datos: las mediciones y el indice de reglas se arman
+en memoria, asi se mide solo el costo de evaluar. Verifica ademas que
+ambos caminos produzcan los mismos disparos.
+
+Uso:
+    python scripts/benchmark_alerts.py
+    python scripts/benchmark_alerts.py --readings 100000 --rules 100 --batch-size 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, NamedTuple
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.alert_engine import evaluate_batch, evaluate_reading
+from app.services.alert_rules import CompiledRule, RuleIndex
+
+
+VARIABLES = ("temp_c", "humidity_pct", "voltage_v", "pressure_hpa", "co2_ppm")
+
+
+class BenchReading(NamedTuple):
+    """Atributos de SensorReading que usa el motor (sin ORM)."""
+    id: int
+    device_id: int
+    timestamp: datetime
+    data_payload: dict
+
+
+def build_readings(count: int, devices: int) -> List[BenchReading]:
+    start = datetime.utcnow() - timedelta(days=30)
+    readings = []
+    for i in range(count):
+        payload = {variable: round(random.gauss(50, 15), 2) for variable in VARIABLES}
+        if random.random() < 0.001:
+            payload["temp_c"] = None  # Sensor sin respuesta
+        readings.append(BenchReading(i + 1, random.randint(1, devices), start + timedelta(seconds=i), payload))
+    return readings
+
+
+def build_index(count: int) -> RuleIndex:
+    check_types = ("THRESHOLD_ABOVE", "THRESHOLD_BELOW", "THRESHOLD_RANGE", "SENSOR_FAULT")
+    rules = []
+    for rule_id in range(1, count + 1):
+        check_type = check_types[rule_id % len(check_types)]
+        rules.append(CompiledRule(
+            id=rule_id,
+            name=f"Regla {rule_id}",
+            check_type=check_type,
+            variable_key=VARIABLES[rule_id % len(VARIABLES)],
+            threshold_value=random.uniform(85, 100) if check_type == "THRESHOLD_ABOVE" else random.uniform(0, 15),
+            threshold_min=random.uniform(0, 10),
+            threshold_max=random.uniform(90, 100),
+            time_window_minutes=None,
+            cooldown_minutes=30,
+        ))
+
+    grouped = defaultdict(list)
+    for rule in rules:
+        grouped[rule.variable_key].append(rule)
+    return RuleIndex(rules, {}, {variable: tuple(items) for variable, items in grouped.items()})
+
+
+def run_scalar(index: RuleIndex, readings: List[BenchReading]) -> list:
+    candidates = []
+    for reading in readings:
+        candidates.extend(evaluate_reading(index.for_device(reading.device_id), reading))
+    return candidates
+
+
+def run_vectorized(index: RuleIndex, readings: List[BenchReading], batch_size: int) -> list:
+    candidates = []
+    for offset in range(0, len(readings), batch_size):
+        candidates.extend(evaluate_batch(index, readings[offset:offset + batch_size]))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de evaluacion de reglas (escalar vs NumPy)")
+    parser.add_argument("--readings", type=int, default=1_000_000, help="Mediciones a evaluar")
+    parser.add_argument("--rules", type=int, default=100, help="Reglas globales")
+    parser.add_argument("--devices", type=int, default=500, help="Devices distintos")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Tamano de batch del camino vectorizado")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"Generando {args.readings} mediciones y {args.rules} reglas...")
+    readings = build_readings(args.readings, args.devices)
+    index = build_index(args.rules)
+
+    began = time.perf_counter()
+    scalar = run_scalar(index, readings)
+    scalar_sec = time.perf_counter() - began
+
+    began = time.perf_counter()
+    vectorized = run_vectorized(index, readings, args.batch_size)
+    vectorized_sec = time.perf_counter() - began
+
+    key = lambda c: (c.sensor_reading_id, c.alert_rule_id)
+    if sorted(map(key, scalar)) != sorted(map(key, vectorized)):
+        print("ERROR: los caminos escalar y vectorizado difieren")
+        sys.exit(1)
+
+    evaluations = args.readings * args.rules
+    print(f"\n{'camino':<12} {'segundos':>10} {'mediciones/s':>14} {'evaluaciones/s':>16}")
+    for name, seconds in (("escalar", scalar_sec), ("vectorizado", vectorized_sec)):
+        print(f"{name:<12} {seconds:>10.2f} {args.readings / seconds:>14,.0f} {evaluations / seconds:>16,.0f}")
+    print(f"\nDisparos: {len(scalar)} (identicos en ambos caminos)")
+    print(f"Speedup: {scalar_sec / vectorized_sec:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
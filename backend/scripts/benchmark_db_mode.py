@@ -0,0 +1,199 @@
+"""
+Benchmark de Ingesta: DB_MODE=sync vs DB_MODE=async.
+
+Levanta la API con uvicorn una vez por modo y simula N devices
+concurrentes (1000 por defecto), cada uno enviando POST /readings en
+loop cerrado (la siguiente medicion apenas responde la anterior) durante
+la duracion indicada. Reporta requests/s, errores y latencias p50/p99.
+
+Los devices de prueba (BENCH_0000, BENCH_0001...) se crean sin asset al
+empezar y se eliminan al terminar junto con sus readings (ON DELETE
+CASCADE). Usa la base de datos configurada en .env.
+
+El cliente corre en un solo proceso con httpx; para que no sea el cuello
+de botella conviene correrlo en otra maquina que el servidor o con
+--workers > 1 en el servidor.
+
+Uso:
+    python scripts/benchmark_db_mode.py
+    python scripts/benchmark_db_mode.py --devices 1000 --duration 30 --workers 2
+    python scripts/benchmark_db_mode.py --modes async --devices 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import engine
+from app.models.device import Device
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EUI_PREFIX = "BENCH_"
+
+
+class ModeResult(NamedTuple):
+    mode: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies_ms: List[float]
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+# ============================================================
+# Devices de Prueba
+# ============================================================
+
+def create_devices(count: int) -> List[str]:
+    euis = [f"{EUI_PREFIX}{i:04d}" for i in range(count)]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Device).on_conflict_do_nothing(index_elements=[Device.device_eui]),
+            [{"device_eui": eui, "name": eui, "status": "active"} for eui in euis],
+        )
+    return euis
+
+
+def delete_devices() -> None:
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM devices WHERE device_eui LIKE :prefix"), {"prefix": f"{EUI_PREFIX}%"})
+
+
+# ============================================================
+# Servidor y Carga
+# ============================================================
+
+def start_server(mode: str, port: int, workers: int) -> subprocess.Popen:
+    with socket.socket() as probe:
+        if probe.connect_ex(("127.0.0.1", port)) == 0:
+            raise RuntimeError(f"El puerto {port} ya esta en uso (usar --port)")
+
+    env = {**os.environ, "DB_MODE": mode, "INGEST_MODE": "sync", "LOG_LEVEL": "WARNING"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondio en {timeout:.0f}s")
+
+
+async def simulate_device(client: httpx.AsyncClient, eui: str, stop_at: float, latencies: list, errors: list) -> None:
+    """Un device: envia mediciones en loop cerrado hasta stop_at."""
+    while time.monotonic() < stop_at:
+        payload = {
+            "device_eui": eui,
+            "data_payload": {"temp_c": round(random.uniform(-20, 8), 2), "humidity_pct": round(random.uniform(30, 90), 1)},
+        }
+        began = time.perf_counter()
+        try:
+            response = await client.post("/api/v1/readings", json=payload)
+            ok = response.status_code == 201
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies.append((time.perf_counter() - began) * 1000)
+        else:
+            errors.append(eui)
+
+
+async def run_load(base_url: str, euis: List[str], duration: float, warmup: float) -> ModeResult:
+    limits = httpx.Limits(max_connections=len(euis), max_keepalive_connections=len(euis))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        # Calentamiento: pools de conexiones, caches de devices, JIT de queries
+        await asyncio.gather(*(simulate_device(client, eui, time.monotonic() + warmup, [], []) for eui in euis))
+
+        latencies: List[float] = []
+        errors: list = []
+        began = time.monotonic()
+        await asyncio.gather(*(simulate_device(client, eui, began + duration, latencies, errors) for eui in euis))
+        seconds = time.monotonic() - began
+
+    return ModeResult("", len(latencies), len(errors), seconds, latencies)
+
+
+def benchmark_mode(mode: str, args, euis: List[str]) -> ModeResult:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(mode, args.port, args.workers)
+    try:
+        asyncio.run(wait_until_ready(base_url))
+        result = asyncio.run(run_load(base_url, euis, args.duration, args.warmup))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+    return result._replace(mode=mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta con DB_MODE=sync vs DB_MODE=async")
+    parser.add_argument("--modes", default="sync,async", help="Modos a comparar, separados por coma")
+    parser.add_argument("--devices", type=int, default=1000, help="Devices concurrentes simulados")
+    parser.add_argument("--duration", type=float, default=30.0, help="Segundos de medicion por modo")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Segundos de calentamiento por modo")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    print(f"Creando {args.devices} devices de prueba...")
+    euis = create_devices(args.devices)
+
+    results = []
+    try:
+        for mode in modes:
+            print(f"DB_MODE={mode}: {args.devices} devices durante {args.duration:.0f}s...")
+            results.append(benchmark_mode(mode, args, euis))
+    finally:
+        delete_devices()
+
+    print(f"\n{'modo':<8} {'requests':>10} {'errores':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for r in results:
+        print(
+            f"{r.mode:<8} {r.requests:>10,} {r.errors:>8,} {r.throughput:>10,.0f} "
+            f"{r.percentile(0.50):>9.1f} {r.percentile(0.99):>9.1f}"
+        )
+    if len(results) == 2 and all(r.latencies_ms for r in results):
+        base, other = results
+        print(f"\n{other.mode} vs {base.mode}: {other.throughput / base.throughput:.2f}x req/s, "
+              f"p99 {other.percentile(0.99) / base.percentile(0.99):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Microbenchmark de la autenticacion de devices (X-API-Key) por medicion.
+
+Mide el costo de CPU de validar la API key de una medicion:
+
+- antes: SHA-256 del EUI + salt y comparacion caracter por caracter en
+  Python (hmac_compare original) en cada request
+- sin cache: primera medicion de un device (SHA-256 + hmac.compare_digest)
+- con cache: device ya verificado (lookup en verified_device_keys +
+  hmac.compare_digest)
+- key invalida: rechazo de una key incorrecta para un device en cache
+
+Ninguna variante consulta la DB; la dependencia anterior
+(get_device_from_api_key) ademas hacia un SELECT de devices por request.
+No necesita base de datos ni servidor.
+
+Uso:
+    python scripts/benchmark_device_auth.py
+    python scripts/benchmark_device_auth.py --iterations 500000 --devices 5000
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import timeit
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.security import generate_device_api_key, validate_device_api_key, verified_device_keys
+
+
+def legacy_validate(device_eui: str, provided_api_key: str) -> bool:
+    """Validacion anterior: SHA-256 por request y comparacion en Python."""
+    expected = hashlib.sha256(f"{device_eui}{settings.device_api_key_salt}".encode("utf-8")).hexdigest()
+    if len(expected) != len(provided_api_key):
+        return False
+    result = 0
+    for x, y in zip(expected, provided_api_key):
+        result |= ord(x) ^ ord(y)
+    return result == 0
+
+
+def measure(label: str, func, iterations: int, repeat: int) -> float:
+    best = min(timeit.repeat(func, number=iterations, repeat=repeat)) / iterations
+    print(f"{label:<36} {best * 1e6:>10.2f}")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de la validacion de X-API-Key por medicion")
+    parser.add_argument("--iterations", type=int, default=200000, help="Validaciones por medicion")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--devices", type=int, default=1000, help="Devices distintos (se rotan)")
+    args = parser.parse_args()
+
+    euis = [f"ESP32_BENCH_{i:05d}" for i in range(args.devices)]
+    keys = [generate_device_api_key(eui) for eui in euis]
+    pairs = list(zip(euis, keys))
+
+    def rotating(validate):
+        position = [0]
+
+        def run():
+            eui, key = pairs[position[0] % len(pairs)]
+            position[0] += 1
+            return validate(eui, key)
+        return run
+
+    def uncached(eui: str, key: str) -> bool:
+        verified_device_keys.invalidate(eui)
+        return validate_device_api_key(eui, key)
+
+    def invalid(eui: str, key: str) -> bool:
+        return validate_device_api_key(eui, key[::-1])
+
+    print(f"{args.devices} devices, {args.iterations:,} validaciones x {args.repeat}\n")
+    print(f"{'variante':<36} {'us/medicion':>10}")
+
+    before = measure("antes (sha256 + hmac_compare Python)", rotating(legacy_validate), args.iterations, args.repeat)
+    measure("sin cache (sha256 + compare_digest)", rotating(uncached), args.iterations, args.repeat)
+    for eui, key in pairs:
+        validate_device_api_key(eui, key)
+    cached = measure("con cache (device ya verificado)", rotating(validate_device_api_key), args.iterations, args.repeat)
+    measure("key invalida (device en cache)", rotating(invalid), args.iterations, args.repeat)
+
+    print(f"\ncon cache vs antes: {before / cached:.1f}x mas rapido")
+
+
+if __name__ == "__main__":
+    main()
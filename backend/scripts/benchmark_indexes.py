@@ -0,0 +1,208 @@
+"""
+Benchmark de Indices de sensor_readings.
+
+Compara el set de indices que dejaba la migracion inicial (ix_* e idx_*
+duplicados, btree sobre timestamp) con el actual (btree (timestamp, id)) y
+con el actual mas un BRIN sobre timestamp, para ver si el BRIN aporta:
+
+- throughput de INSERT (filas/s, en batches como la ingesta)
+- tamano de cada indice
+- tiempo de una consulta por rango de timestamp sin filtro de device
+- tiempo de una pagina de GET /readings sin device_id (keyset a mitad de
+  la tabla, ORDER BY timestamp DESC, id DESC LIMIT 100)
+
+Usa una tabla por variante con las columnas de sensor_readings en el schema temporal
+bench_indexes (no toca datos reales) y lo elimina al terminar.
+
+Uso:
+    python scripts/benchmark_indexes.py
+    python scripts/benchmark_indexes.py --rows 500000 --batch-size 1000 --devices 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import MetaData, Table, text
+
+from app.core.database import engine
+
+
+SCHEMA = "bench_indexes"
+COLUMNS = """
+    id BIGSERIAL,
+    device_id INTEGER NOT NULL,
+    data_payload JSONB NOT NULL,
+    quality_score DOUBLE PRECISION,
+    processed BOOLEAN NOT NULL DEFAULT false,
+    timestamp TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, timestamp)
+"""
+
+# Indices ademas de la PK, por variante ({s} = schema, {t} = tabla)
+VARIANTS = {
+    "antes": [
+        "CREATE INDEX {t}_device_time ON {s}.{t} (device_id, timestamp)",
+        "CREATE INDEX {t}_payload ON {s}.{t} USING gin (data_payload)",
+        "CREATE INDEX {t}_processed ON {s}.{t} (processed)",
+        "CREATE INDEX {t}_ix_id ON {s}.{t} (id)",
+        "CREATE INDEX {t}_ix_device_id ON {s}.{t} (device_id)",
+        "CREATE INDEX {t}_ix_processed ON {s}.{t} (processed)",
+        "CREATE INDEX {t}_ix_timestamp ON {s}.{t} (timestamp)",
+    ],
+    "despues": [
+        "CREATE INDEX {t}_device_time ON {s}.{t} (device_id, timestamp)",
+        "CREATE INDEX {t}_payload ON {s}.{t} USING gin (data_payload)",
+        "CREATE INDEX {t}_time_id ON {s}.{t} (timestamp, id)",
+    ],
+    "con_brin": [
+        "CREATE INDEX {t}_device_time ON {s}.{t} (device_id, timestamp)",
+        "CREATE INDEX {t}_payload ON {s}.{t} USING gin (data_payload)",
+        "CREATE INDEX {t}_time_id ON {s}.{t} (timestamp, id)",
+        "CREATE INDEX {t}_timestamp_brin ON {s}.{t} USING brin (timestamp)",
+    ],
+}
+
+START = datetime(2026, 1, 1)
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def make_batch(offset: int, count: int, devices: int, step: timedelta) -> list:
+    """Mediciones en orden de llegada (timestamp creciente, devices intercalados)."""
+    return [
+        {
+            "device_id": 1 + (i % devices),
+            "data_payload": {"temp_c": round(random.uniform(-20, 8), 2), "humidity_pct": round(random.uniform(30, 90), 1)},
+            "quality_score": 1.0,
+            "processed": False,
+            "timestamp": START + step * i,
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+def run_variant(name: str, index_ddl: list, rows: int, batch_size: int, devices: int) -> dict:
+    """Crea la tabla de la variante, inserta `rows` filas y mide."""
+    table_name = f"readings_{name}"
+    qualified = f"{SCHEMA}.{table_name}"
+    step = timedelta(seconds=60 / devices)  # 1 medicion por minuto por device
+
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE {qualified} ({COLUMNS})"))
+        for ddl in index_ddl:
+            conn.execute(text(ddl.format(s=SCHEMA, t=table_name)))
+        table = Table(table_name, MetaData(), schema=SCHEMA, autoload_with=conn)
+
+    elapsed = 0.0
+    for offset in range(0, rows, batch_size):
+        batch = make_batch(offset, min(batch_size, rows - offset), devices, step)
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch)
+        elapsed += time.perf_counter() - started
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {qualified}"))
+
+        indexes = conn.execute(text("""
+            SELECT c.relname, pg_relation_size(c.oid)
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = to_regclass(:table)
+            ORDER BY c.relname
+        """), {"table": qualified}).all()
+
+        # Ultimo 1% del rango, todos los devices
+        upper = START + step * rows
+        lower = upper - (upper - START) / 100
+        timings = []
+        for _ in range(5):
+            plan = conn.execute(
+                text(f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT count(*) FROM {qualified} WHERE timestamp >= :lower AND timestamp < :upper"),
+                {"lower": lower, "upper": upper},
+            ).scalar()
+            timings.append(plan[0]["Execution Time"])
+
+        # Pagina de GET /readings sin device_id, con el cursor a mitad de la tabla
+        cursor_ts, cursor_id = conn.execute(
+            text(f"SELECT timestamp, id FROM {qualified} ORDER BY timestamp, id OFFSET :middle LIMIT 1"),
+            {"middle": rows // 2},
+        ).one()
+        page_timings = []
+        for _ in range(5):
+            plan = conn.execute(
+                text(
+                    f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT * FROM {qualified} "
+                    "WHERE timestamp <= :ts AND (timestamp, id) < (:ts, :id) "
+                    "ORDER BY timestamp DESC, id DESC LIMIT 100"
+                ),
+                {"ts": cursor_ts, "id": cursor_id},
+            ).scalar()
+            page_timings.append(plan[0]["Execution Time"])
+
+    return {
+        "rows_per_sec": rows / elapsed,
+        "indexes": [(index_name.replace(f"{table_name}_", ""), size) for index_name, size in indexes],
+        "index_bytes": sum(size for _, size in indexes),
+        "range_ms": statistics.median(timings),
+        "page_ms": statistics.median(page_timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de indices de sensor_readings")
+    parser.add_argument("--rows", type=int, default=200000, help="Filas a insertar por variante (default: 200000)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Filas por INSERT (default: 500)")
+    parser.add_argument("--devices", type=int, default=200, help="Devices simulados (default: 200)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Benchmark de indices: {args.rows} filas, batches de {args.batch_size}, {args.devices} devices")
+    print("=" * 60)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    results = {}
+    try:
+        for name, index_ddl in VARIANTS.items():
+            print(f"\n{name}: insertando...")
+            random.seed(42)
+            results[name] = result = run_variant(name, index_ddl, args.rows, args.batch_size, args.devices)
+            for index_name, size in result["indexes"]:
+                print(f"   {index_name:<20} {format_bytes(size):>10}")
+            print(f"   ✓ {result['rows_per_sec']:,.0f} filas/s, indices {format_bytes(result['index_bytes'])}, "
+                  f"rango 1%: {result['range_ms']:.1f} ms, pagina: {result['page_ms']:.2f} ms")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    before, after = results["antes"], results["despues"]
+    print("\n" + "=" * 60)
+    print(f"INSERT:  {before['rows_per_sec']:,.0f} -> {after['rows_per_sec']:,.0f} filas/s "
+          f"({after['rows_per_sec'] / before['rows_per_sec']:.2f}x)")
+    print(f"Indices: {format_bytes(before['index_bytes'])} -> {format_bytes(after['index_bytes'])}")
+    print(f"Rango:   {before['range_ms']:.1f} -> {after['range_ms']:.1f} ms")
+    print(f"Pagina:  {before['page_ms']:.2f} -> {after['page_ms']:.2f} ms")
+    brin = results["con_brin"]
+    print(f"+ BRIN:  {brin['rows_per_sec']:,.0f} filas/s, rango {brin['range_ms']:.1f} ms, "
+          f"pagina {brin['page_ms']:.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Script de Importacion de Historial de Readings.
+
+Importa mediciones historicas del sistema legacy (PHP/MySQL) usando
+PostgreSQL COPY FROM STDIN, mucho mas rapido que INSERTs via ORM.
+
+Formatos soportados (se detecta por extension o con --format):
+- CSV con columna JSON:  device_eui,timestamp,data_payload
+- CSV "ancho":           device_eui,timestamp,temp_c,humidity_pct,...
+- NDJSON (una medicion por linea):
+    {"device_eui": "ESP32_LAB_001", "timestamp": "2024-05-01 13:45:00", "data_payload": {...}}
+
+Uso:
+    python scripts/import_readings.py export_2024.csv
+    python scripts/import_readings.py datos/*.ndjson --chunk-size 20000
+    python scripts/import_readings.py legacy.csv --eui-field mac --timestamp-field fecha
+    python scripts/import_readings.py legacy.csv --dry-run
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.bulk_loader import chunked, copy_readings, iter_legacy_records
+from app.services.ingestion import calculate_quality_score, resolve_device_ids
+
+
+def detect_format(path: str) -> str:
+    """Detecta el formato del archivo por su extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    return "csv"
+
+
+def import_file(db, path: str, args, device_ids: dict, unknown_euis: Counter) -> int:
+    """
+    Importa un archivo en chunks (un commit por chunk).
+
+    Returns:
+        int: Cantidad de readings importados
+    """
+    file_format = args.format or detect_format(path)
+    imported = 0
+
+    with open(path, "r", encoding=args.encoding, newline="") as source:
+        records = iter_legacy_records(
+            source,
+            file_format,
+            eui_field=args.eui_field,
+            timestamp_field=args.timestamp_field,
+            payload_field=args.payload_field,
+        )
+
+        for chunk in chunked(records, args.chunk_size):
+            # Resolver solo los EUIs que aun no conocemos (una query por chunk)
+            new_euis = {eui for eui, _, _ in chunk if eui not in device_ids and eui not in unknown_euis}
+            if new_euis:
+                device_ids.update(resolve_device_ids(db, new_euis))
+
+            rows = []
+            for device_eui, payload, timestamp in chunk:
+                device_id = device_ids.get(device_eui)
+                if device_id is None:
+                    unknown_euis[device_eui] += 1
+                    continue
+                rows.append((device_id, payload, calculate_quality_score(payload), timestamp))
+
+            if args.dry_run:
+                imported += len(rows)
+                continue
+
+            imported += copy_readings(db, rows)
+            db.commit()
+            print(f"   ... {imported} readings importados")
+
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importador de historial de readings (COPY)")
+    parser.add_argument("files", nargs="+", help="Archivos CSV o NDJSON a importar")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Forzar formato (default: por extension)")
+    parser.add_argument("--eui-field", default="device_eui", help="Campo con el EUI del device")
+    parser.add_argument("--timestamp-field", default="timestamp", help="Campo con el timestamp (UTC)")
+    parser.add_argument("--payload-field", default="data_payload", help="Campo con el payload JSON (si existe)")
+    parser.add_argument("--encoding", default="utf-8", help="Encoding de los archivos (ej: latin-1)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Readings por COPY/commit")
+    parser.add_argument("--dry-run", action="store_true", help="Solo validar, no escribir en la DB")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Importando historial de readings...")
+    print("=" * 60)
+
+    db = SessionLocal()
+    device_ids: dict = {}
+    unknown_euis: Counter = Counter()
+    total = 0
+    start = time.monotonic()
+
+    try:
+        for path in args.files:
+            print(f"\n📄 {path}")
+            imported = import_file(db, path, args, device_ids, unknown_euis)
+            total += imported
+            print(f"   ✓ {imported} readings {'validados' if args.dry_run else 'importados'}")
+    except Exception as e:
+        print(f"\n✗ Error durante la importacion: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.monotonic() - start
+    print("\n" + "=" * 60)
+    print(f"✓ Total: {total} readings en {elapsed:.1f}s ({total / max(elapsed, 0.001):.0f} rows/s)")
+
+    if unknown_euis:
+        print(f"⚠ {sum(unknown_euis.values())} readings descartados de devices inexistentes:")
+        for device_eui, count in unknown_euis.most_common(20):
+            print(f"   - {device_eui}: {count}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
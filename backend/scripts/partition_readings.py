@@ -0,0 +1,107 @@
+"""
+Script de Particionado Online de sensor_readings.
+
+Convierte una tabla sensor_readings sin particionar en una tabla
+particionada por timestamp sin frenar la ingesta ni copiar datos:
+
+1. CREATE UNIQUE INDEX CONCURRENTLY (id, timestamp) y un CHECK
+   (timestamp < limite) NOT VALID + VALIDATE. Puede tardar en tablas
+   grandes pero no bloquea INSERTs.
+2. Swap en una transaccion corta con lock_timeout (solo catalogo): la
+   tabla original pasa a ser la particion sensor_readings_legacy
+   [MINVALUE, limite) y se crea la tabla padre particionada. Si no se
+   consigue el lock se reintenta.
+3. Se crean las particiones desde el limite en adelante.
+
+Despues correr `alembic upgrade head`: la migracion 9a4f3c2e8d51 detecta
+que la tabla ya esta particionada y no hace nada.
+
+Uso:
+    python scripts/partition_readings.py
+    python scripts/partition_readings.py --dry-run
+    python scripts/partition_readings.py --lock-timeout 2s --retries 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import SessionLocal, engine
+from app.services.partitioning import (
+    ensure_partitions,
+    is_partitioned,
+    legacy_upper_bound,
+    prepare_legacy_table,
+    swap_to_partitioned,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiona sensor_readings sin downtime")
+    parser.add_argument("--lock-timeout", default="3s", help="lock_timeout del swap (default: 3s)")
+    parser.add_argument("--retries", type=int, default=10, help="Reintentos si no se consigue el lock")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar el plan")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Particionando sensor_readings...")
+    print("=" * 60)
+
+    with engine.connect() as conn:
+        if is_partitioned(conn):
+            print("✓ sensor_readings ya esta particionada, nada que hacer")
+            return
+        upper = legacy_upper_bound(conn)
+        conn.rollback()
+
+    print(f"\nParticion legacy: [MINVALUE, {upper.isoformat()})")
+    if args.dry_run:
+        print("(dry-run: no se modifico nada)")
+        return
+
+    # 1. Preparacion sin bloquear escrituras
+    print("\n1. Indice unico (id, timestamp) y CHECK de rango (CONCURRENTLY)...")
+    start = time.monotonic()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        prepare_legacy_table(conn, upper, concurrently=True)
+    print(f"   ✓ {time.monotonic() - start:.1f}s")
+
+    # 2. Swap de catalogo con lock corto
+    print("\n2. Swap a tabla particionada...")
+    for attempt in range(1, args.retries + 1):
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = '{args.lock_timeout}'"))
+                swap_to_partitioned(conn, upper)
+            print("   ✓ sensor_readings particionada")
+            break
+        except OperationalError as e:
+            print(f"   ⚠ Intento {attempt}/{args.retries}: no se obtuvo el lock ({e.orig})")
+            time.sleep(1)
+    else:
+        print("\n✗ No se pudo completar el swap; la tabla quedo sin cambios")
+        sys.exit(1)
+
+    # 3. Particiones desde el limite de la legacy en adelante
+    print("\n3. Creando particiones...")
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, now=upper)
+    finally:
+        db.close()
+    print(f"   ✓ {len(created)} particiones: {', '.join(created)}")
+
+    print("\n" + "=" * 60)
+    print("✓ Listo. Correr `alembic upgrade head` para registrar la migracion.")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
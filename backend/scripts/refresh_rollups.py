@@ -0,0 +1,62 @@
+"""
+Script de Actualizacion de Rollups.
+
+Incorpora a reading_rollups (1m / 1h / 1d) todas las mediciones que el job
+en background todavia no proceso. Util despues de una importacion masiva
+(scripts/import_readings.py) o para correr el job desde cron con
+ROLLUPS_ENABLED=false en la API.
+
+Uso:
+    python scripts/refresh_rollups.py
+    python scripts/refresh_rollups.py --batch-size 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raiz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.rollups import get_watermark, refresh_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Actualiza los rollups de sensor_readings")
+    parser.add_argument("--batch-size", type=int, default=None, help="ids de sensor_readings por transaccion")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Actualizando rollups...")
+    print("=" * 60)
+
+    db = SessionLocal()
+    total = 0
+    idle = 0
+    start = time.monotonic()
+
+    try:
+        # Dos llamadas seguidas sin avance = al dia (la primera puede solo tomar el candidato)
+        while idle < 2:
+            advanced = refresh_rollups(db, args.batch_size)
+            total += advanced
+            idle = 0 if advanced else idle + 1
+            if advanced:
+                print(f"   ✓ watermark en id {get_watermark(db)}")
+    except Exception as e:
+        print(f"\n✗ Error actualizando rollups: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.monotonic() - start
+    print("\n" + "=" * 60)
+    print(f"✓ {total} ids incorporados en {elapsed:.1f}s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
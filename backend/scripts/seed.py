@@ -7,10 +7,19 @@ Crea datos iniciales para desarrollo y testing:
 - Location de ejemplo
 - Asset de ejemplo
 - Device de ejemplo
+- Historial sintetico de readings (opcional, via COPY)
+
+Uso:
+    python scripts/seed.py
+    python scripts/seed.py --history-days 30   # + 30 dias de readings cada 5 min
 """
 
+import argparse
+import math
+import random
 import sys
 import os
+from datetime import datetime, timedelta
 
 # Agregar el directorio raiz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,11 +30,38 @@ from app.models.user import User
 from app.models.location import LocationGroup, Location
 from app.models.asset import Asset
 from app.models.device import Device
+from app.services.bulk_loader import copy_readings
+
 
+def generate_history(device_id: int, days: int, interval_minutes: int = 5):
+    """
+    Genera readings sinteticos (ciclo diario de temperatura + ruido).
 
-def seed_database():
+    Yields:
+        Tuple: (device_id, data_payload, quality_score, timestamp) listo para COPY
+    """
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+    total = days * 24 * 60 // interval_minutes
+
+    for i in range(total):
+        timestamp = start + timedelta(minutes=i * interval_minutes)
+        hour = timestamp.hour + timestamp.minute / 60
+        payload = {
+            "temp_c": round(4.0 + 1.5 * math.sin(hour / 24 * 2 * math.pi) + random.gauss(0, 0.2), 2),
+            "humidity_pct": round(60 + random.gauss(0, 2), 1),
+            "battery_mv": 3900 - i * 300 // max(total, 1),
+            "rssi_dbm": random.randint(-75, -55),
+        }
+        yield device_id, payload, 1.0, timestamp
+
+
+def seed_database(history_days: int = 0):
     """
     Crea datos iniciales en la base de datos.
+
+    Args:
+        history_days: Dias de historial sintetico a generar para el device de ejemplo
     """
     print("=" * 60)
     print("Iniciando seed de base de datos...")
@@ -132,6 +168,7 @@ def seed_database():
 
         if existing_device:
             print("   ⚠ Device ya existe, saltando...")
+            device = existing_device
         else:
             device = Device(
                 asset_id=asset.id,
@@ -155,6 +192,13 @@ def seed_database():
             print(f"   ✓ Device creado (ID: {device.id})")
             print(f"     EUI: {device.device_eui}")
 
+        # ===== 6. Historial de readings (opcional) =====
+        if history_days > 0:
+            print(f"\n7. Generando {history_days} dias de readings (COPY)...")
+            inserted = copy_readings(db, generate_history(device.id, history_days))
+            db.commit()
+            print(f"   ✓ {inserted} readings insertados")
+
         print("\n" + "=" * 60)
         print("✓ Seed completado exitosamente!")
         print("=" * 60)
@@ -174,4 +218,9 @@ def seed_database():
 
 
 if __name__ == "__main__":
-    seed_database()
+    parser = argparse.ArgumentParser(description="Seed de base de datos")
+    parser.add_argument("--history-days", type=int, default=0,
+                        help="Dias de readings sinteticos para el device de ejemplo (default: 0)")
+    args = parser.parse_args()
+
+    seed_database(history_days=args.history_days)
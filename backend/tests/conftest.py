@@ -5,19 +5,31 @@ Este archivo define fixtures reutilizables para todos los tests.
 """
 
 import pytest
-from typing import Generator
+from datetime import datetime, timedelta
+from typing import Callable, Generator, List, Sequence, Union
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
+from app.api import deps
 from app.core.database import Base, get_db
-from app.core.security import hash_password
+from app.core.security import hash_password, verified_device_keys, verified_tokens
 from app.main import app
 from app.models.user import User
 from app.models.location import LocationGroup, Location
 from app.models.asset import Asset
 from app.models.device import Device
+from app.models.alert import AlertRule
+from app.models.sensor_reading import SensorReading
+from app.services.alert_engine import AlertEngine, alert_engine as global_alert_engine
+from app.services.alert_history import CooldownTracker
+from app.services.alert_rules import RuleIndexCache
+from app.services.alert_rules import rule_index_cache
+from app.services.device_registry import device_registry
+from app.services.last_seen import last_seen_tracker
+from app.services.offline_monitor import offline_monitor
+from app.services.user_registry import user_registry
 
 
 # Database de prueba (PostgreSQL)
@@ -37,6 +49,33 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_caches() -> Generator[None, None, None]:
+    """
+    Vacia los caches en memoria entre tests.
+
+    Cada test recrea las tablas, asi que los IDs cacheados de un test
+    anterior apuntarian a filas que ya no existen.
+    """
+    device_registry.clear()
+    last_seen_tracker.clear()
+    rule_index_cache.invalidate()
+    global_alert_engine.cooldowns.clear()
+    offline_monitor.clear()
+    user_registry.clear()
+    verified_tokens.clear()
+    verified_device_keys.clear()
+    yield
+    device_registry.clear()
+    last_seen_tracker.clear()
+    rule_index_cache.invalidate()
+    global_alert_engine.cooldowns.clear()
+    offline_monitor.clear()
+    user_registry.clear()
+    verified_tokens.clear()
+    verified_device_keys.clear()
+
+
 @pytest.fixture(scope="function")
 def db_session() -> Generator[Session, None, None]:
     """
@@ -56,6 +95,25 @@ def db_session() -> Generator[Session, None, None]:
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def query_counter() -> Generator[list, None, None]:
+    """
+    Fixture que registra las sentencias SQL ejecutadas durante el test.
+
+    Uso: `query_counter.clear()` antes del request y `len(query_counter)` despues.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="function")
 def client(db_session: Session) -> Generator[TestClient, None, None]:
     """
@@ -70,6 +128,8 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # Los routers usan app.api.deps.get_db
+    app.dependency_overrides[deps.get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -217,3 +277,82 @@ def auth_headers_technician(client: TestClient, technician_user: User) -> dict:
     assert response.status_code == 200
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+# ============================================================
+# Fixtures del Motor de Alertas
+# ============================================================
+
+@pytest.fixture(scope="function")
+def alert_rule_factory(db_session: Session) -> Callable[..., AlertRule]:
+    """
+    Fixture que retorna una funcion para crear reglas de alerta.
+
+    Por defecto la regla es THRESHOLD_ABOVE temp_c > 8.0, sin cooldown ni
+    canales; cualquier columna se pisa por keyword:
+    `alert_rule_factory(check_type="DEVICE_OFFLINE", time_window_minutes=10)`.
+    """
+    def create(**kwargs) -> AlertRule:
+        values = {
+            "name": "Regla test",
+            "check_type": "THRESHOLD_ABOVE",
+            "variable_key": "temp_c",
+            "threshold_value": 8.0,
+            "cooldown_minutes": 0,
+            "notification_channels": [],
+        }
+        values.update(kwargs)
+        rule = AlertRule(**values)
+        db_session.add(rule)
+        db_session.commit()
+        return rule
+
+    return create
+
+
+@pytest.fixture(scope="function")
+def readings_factory(db_session: Session) -> Callable[..., List[SensorReading]]:
+    """
+    Fixture que retorna una funcion para crear mediciones de un device.
+
+    Una medicion por minuto desde `start` (default: ahora). Cada valor es un
+    data_payload o un numero (se guarda como {"temp_c": valor}):
+    `readings_factory(device, [4.0, {"temp_c": 9.5}], start)`.
+    """
+    def create(
+        device: Device,
+        values: Sequence[Union[dict, float]],
+        start: datetime = None,
+    ) -> List[SensorReading]:
+        start = start or datetime.utcnow()
+        readings = [
+            SensorReading(
+                device_id=device.id,
+                data_payload=value if isinstance(value, dict) else {"temp_c": value},
+                timestamp=start + timedelta(minutes=i),
+            )
+            for i, value in enumerate(values)
+        ]
+        db_session.add_all(readings)
+        db_session.commit()
+        return readings
+
+    return create
+
+
+@pytest.fixture(scope="function")
+def alert_engine(request) -> AlertEngine:
+    """
+    Fixture que provee un AlertEngine con cache de reglas y cooldowns propios (sin Redis).
+
+    Se parametriza con indirect=True y un dict de opciones
+    (vectorized_min_batch, cooldown_max_size):
+    `@pytest.mark.parametrize("alert_engine", [{"cooldown_max_size": 1}], indirect=True)`.
+    """
+    options = getattr(request, "param", {})
+    engine = AlertEngine(
+        index_cache=RuleIndexCache(ttl_seconds=60),
+        vectorized_min_batch=options.get("vectorized_min_batch"),
+    )
+    engine.cooldowns = CooldownTracker(max_size=options.get("cooldown_max_size"), use_redis=False)
+    return engine
@@ -0,0 +1,154 @@
+"""
+Tests para GET /readings/aggregate (agregaciones por bucket en PostgreSQL).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+
+
+START = datetime(2025, 10, 1)
+
+
+@pytest.fixture
+def two_devices_readings(db_session: Session, device: Device, asset) -> list:
+    """Dos devices con una medicion cada 10 minutos durante 3 horas."""
+    device2 = Device(asset_id=asset.id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+    db_session.add(device2)
+    db_session.commit()
+
+    readings = []
+    for i in range(18):
+        timestamp = START + timedelta(minutes=10 * i)
+        readings.append(SensorReading(
+            device_id=device.id,
+            data_payload={"temp_c": float(i), "humidity_pct": 50 + i},
+            timestamp=timestamp
+        ))
+        readings.append(SensorReading(
+            device_id=device2.id,
+            data_payload={"temp_c": 100.0, "humidity_pct": "sensor_error"},
+            timestamp=timestamp
+        ))
+    db_session.add_all(readings)
+    db_session.commit()
+    return [device, device2]
+
+
+class TestAggregateReadings:
+    """Tests para GET /api/v1/readings/aggregate"""
+
+    def test_aggregate_hourly_multiple_devices_and_variables(
+        self,
+        client: TestClient,
+        two_devices_readings: list,
+        auth_headers_admin: dict
+    ):
+        """Test de buckets de 1h para 2 devices x 2 variables en una llamada."""
+        device1, device2 = two_devices_readings
+        response = client.get(
+            "/api/v1/readings/aggregate",
+            params={
+                "device_id": [device1.id, device2.id],
+                "variable": ["temp_c", "humidity_pct"],
+                "bucket": "1h",
+                "from": "2025-10-01T00:00:00",
+                "to": "2025-10-01T03:00:00",
+            },
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["bucket"] == "1h"
+        assert [(s["device_id"], s["variable"]) for s in data["series"]] == [
+            (device1.id, "temp_c"),
+            (device1.id, "humidity_pct"),
+            (device2.id, "temp_c"),
+            (device2.id, "humidity_pct"),
+        ]
+
+        temp1 = data["series"][0]["buckets"]
+        assert len(temp1) == 3
+        first = temp1[0]
+        assert first["bucket_start"] == "2025-10-01T00:00:00"
+        assert first["count"] == 6
+        assert first["min"] == 0.0
+        assert first["max"] == 5.0
+        assert first["avg"] == pytest.approx(2.5)
+        assert first["stddev"] == pytest.approx(1.8708, rel=1e-3)
+
+        # Valores no numericos se ignoran (serie vacia, sin error de cast)
+        assert data["series"][3]["buckets"] == []
+
+    def test_aggregate_daily_bucket(
+        self,
+        client: TestClient,
+        two_devices_readings: list,
+        auth_headers_admin: dict
+    ):
+        """Test de bucket diario alineado a medianoche UTC."""
+        device1 = two_devices_readings[0]
+        response = client.get(
+            "/api/v1/readings/aggregate",
+            params={
+                "device_id": device1.id,
+                "variable": "humidity_pct",
+                "bucket": "1d",
+                "from": "2025-09-30T12:00:00",
+                "to": "2025-10-02T00:00:00",
+            },
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        buckets = response.json()["series"][0]["buckets"]
+        assert len(buckets) == 1
+        assert buckets[0]["bucket_start"] == "2025-10-01T00:00:00"
+        assert buckets[0]["count"] == 18
+
+    def test_aggregate_invalid_bucket(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de bucket no soportado (400)."""
+        response = client.get(
+            f"/api/v1/readings/aggregate?device_id={device.id}&variable=temp_c&bucket=7m",
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 400
+
+    def test_aggregate_too_many_buckets(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de rango demasiado grande para el bucket pedido (400)."""
+        response = client.get(
+            "/api/v1/readings/aggregate",
+            params={
+                "device_id": device.id,
+                "variable": "temp_c",
+                "bucket": "1m",
+                "from": "2025-01-01T00:00:00",
+                "to": "2025-12-31T00:00:00",
+            },
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 400
+
+    def test_aggregate_requires_auth(self, client: TestClient):
+        """Test de que el endpoint requiere autenticacion."""
+        response = client.get("/api/v1/readings/aggregate?device_id=1&variable=temp_c")
+
+        assert response.status_code == 403
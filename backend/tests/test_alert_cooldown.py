@@ -0,0 +1,101 @@
+"""
+Tests para el cooldown en memoria del motor de alertas.
+"""
+
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.alert import AlertHistory
+from app.models.device import Device
+from app.services.alert_engine import AlertEngine
+from app.services.reading_consumer import consume_readings, ensure_cursors
+
+
+def _history_queries(queries: List[str]) -> List[str]:
+    return [q for q in queries if "FROM alert_history" in q]
+
+
+class TestCooldownTracker:
+    """Tests de CooldownTracker en AlertEngine.process()."""
+
+    def test_seeds_once_without_queries_per_batch(
+        self, db_session: Session, device: Device, query_counter: list,
+        alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que tras la carga inicial los batches no consultan alert_history."""
+        rule = alert_rule_factory(cooldown_minutes=5)
+        start = datetime.utcnow()
+        db_session.add(AlertHistory(
+            alert_rule_id=rule.id, device_id=device.id, triggered_at=start - timedelta(minutes=2), message="previa"
+        ))
+        db_session.commit()
+
+        query_counter.clear()
+        # Reinicio: el disparo previo (hace 2 minutos) sigue en cooldown hasta el minuto 3
+        fired = alert_engine.process(db_session, readings_factory(device, [10.0] * 2, start))
+        assert fired == []
+        later = readings_factory(device, [10.0] * 3, start + timedelta(minutes=2))
+        fired = alert_engine.process(db_session, later)
+        db_session.commit()
+
+        assert [c.sensor_reading_id for c in fired] == [later[1].id]
+        assert len(_history_queries(query_counter)) == 1
+        assert alert_engine.cooldowns.stats()["seeds"] == 1
+
+    @pytest.mark.parametrize("alert_engine", [{"cooldown_max_size": 1}], indirect=True)
+    def test_eviction_falls_back_to_alert_history(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que un par descartado del LRU con cooldown vigente se consulta en la DB."""
+        alert_rule_factory(cooldown_minutes=30)
+        alert_rule_factory(cooldown_minutes=30, threshold_value=9.0)
+        start = datetime.utcnow()
+
+        assert len(alert_engine.process(db_session, readings_factory(device, [10.0], start))) == 2
+        db_session.commit()
+        assert alert_engine.cooldowns.stats()["evicted"] == 1
+
+        fired = alert_engine.process(db_session, readings_factory(device, [10.0], start + timedelta(minutes=1)))
+
+        assert fired == []
+        assert alert_engine.cooldowns.stats()["lookups"] == 1
+
+    def test_retried_batch_reloads_shard(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que los disparos de un batch con rollback no bloquean el reintento."""
+        rule = alert_rule_factory(cooldown_minutes=30)
+        ensure_cursors(db_session, "alerts-test", shards=1)
+        db_session.commit()
+        readings_factory(device, [10.0], datetime.utcnow())
+        consume_readings(db_session, "alerts-test", alert_engine.process)  # Toma el candidato del cursor
+
+        def failing_handler(db, readings):
+            alert_engine.process(db, readings)
+            raise RuntimeError("fallo despues de evaluar")
+
+        with pytest.raises(RuntimeError):
+            consume_readings(db_session, "alerts-test", failing_handler)
+        db_session.rollback()
+        assert db_session.query(AlertHistory).count() == 0
+
+        consume_readings(db_session, "alerts-test", alert_engine.process)
+
+        history = db_session.query(AlertHistory).all()
+        assert [(h.alert_rule_id, h.device_id) for h in history] == [(rule.id, device.id)]
+
+    def test_rules_without_cooldown_skip_seed_query(
+        self, db_session: Session, device: Device, query_counter: list,
+        alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que sin cooldown en ninguna regla no se consulta alert_history."""
+        alert_rule_factory(cooldown_minutes=0)
+
+        query_counter.clear()
+        fired = alert_engine.process(db_session, readings_factory(device, [10.0] * 3, datetime.utcnow()))
+
+        assert len(fired) == 3
+        assert _history_queries(query_counter) == []
@@ -0,0 +1,216 @@
+"""
+Tests para el motor de evaluacion de reglas de alerta.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.alert import AlertHistory
+from app.models.asset import Asset
+from app.models.device import Device
+from app.models.location import Location
+from app.services.alert_engine import AlertEngine, evaluate_batch, evaluate_reading
+from app.services.alert_rules import RuleIndex
+from app.services.reading_consumer import consume_readings, ensure_cursors
+
+
+class TestRuleIndex:
+    """Tests del indice de reglas por device."""
+
+    def test_expands_global_location_and_device_scopes(
+        self,
+        db_session: Session,
+        device: Device,
+        location: Location,
+        alert_rule_factory
+    ):
+        """Test de que cada device recibe solo las reglas de su alcance."""
+        other_location = Location(location_group_id=location.location_group_id, name="Otra sucursal")
+        db_session.add(other_location)
+        db_session.commit()
+        other_asset = Asset(location_id=other_location.id, name="Heladera_Otra", type="refrigerator")
+        db_session.add(other_asset)
+        db_session.commit()
+        other_device = Device(asset_id=other_asset.id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+        db_session.add(other_device)
+        db_session.commit()
+
+        global_rule = alert_rule_factory(name="Global")
+        location_rule = alert_rule_factory(name="Location", location_id=location.id, variable_key="humidity_pct")
+        device_rule = alert_rule_factory(name="Device", device_id=other_device.id)
+        alert_rule_factory(name="Deshabilitada", enabled=False)
+        offline_rule = alert_rule_factory(name="Offline", check_type="DEVICE_OFFLINE", time_window_minutes=10)
+
+        index = RuleIndex.load(db_session)
+
+        rules = index.for_device(device.id)
+        assert [r.id for r in rules["temp_c"]] == [global_rule.id]
+        assert [r.id for r in rules["humidity_pct"]] == [location_rule.id]
+
+        rules = index.for_device(other_device.id)
+        assert [r.id for r in rules["temp_c"]] == [global_rule.id, device_rule.id]
+        assert "humidity_pct" not in rules
+
+        # Device desconocido: solo reglas globales
+        assert list(index.for_device(999999)) == ["temp_c"]
+        assert set(index.rules) == {global_rule.id, location_rule.id, device_rule.id, offline_rule.id}
+        assert [r.id for r in index.offline_for_device(device.id)] == [offline_rule.id]
+
+        # Devices con las mismas reglas comparten el dict
+        third_device = Device(asset_id=device.asset_id, device_eui="ESP32_TEST_003", name="ESP32 Test 003")
+        db_session.add(third_device)
+        db_session.commit()
+        index = RuleIndex.load(db_session)
+        assert index.for_device(third_device.id) is index.for_device(device.id)
+
+
+class TestAlertEngine:
+    """Tests de AlertEngine.process()."""
+
+    def test_threshold_checks_fire(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de umbral superior, inferior y rango."""
+        above = alert_rule_factory(device_id=device.id, threshold_value=8.0)
+        below = alert_rule_factory(device_id=device.id, check_type="THRESHOLD_BELOW", threshold_value=0.0)
+        in_range = alert_rule_factory(
+            device_id=device.id, check_type="THRESHOLD_RANGE", variable_key="humidity_pct",
+            threshold_value=None, threshold_min=40.0, threshold_max=60.0
+        )
+        readings = readings_factory(device, [
+            {"temp_c": 4.0, "humidity_pct": 50.0},   # Nada
+            {"temp_c": 9.5, "humidity_pct": 65.0},   # above + range
+            {"temp_c": -1.0, "humidity_pct": 30.0},  # below + range
+        ])
+
+        fired = alert_engine.process(db_session, readings)
+
+        assert sorted((c.alert_rule_id, c.sensor_reading_id) for c in fired) == sorted([
+            (above.id, readings[1].id),
+            (in_range.id, readings[1].id),
+            (below.id, readings[2].id),
+            (in_range.id, readings[2].id),
+        ])
+        assert all(c.message.startswith("Regla test:") for c in fired)
+
+    def test_sensor_fault_on_missing_or_invalid_value(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de SENSOR_FAULT con variable ausente, null o no numerica."""
+        rule = alert_rule_factory(check_type="SENSOR_FAULT", threshold_value=None)
+        readings = readings_factory(device, [
+            {"temp_c": 4.0},
+            {"humidity_pct": 50.0},
+            {"temp_c": None},
+            {"temp_c": "error"},
+            {"temp_c": True},
+        ])
+
+        fired = alert_engine.process(db_session, readings)
+
+        assert [c.sensor_reading_id for c in fired] == [r.id for r in readings[1:]]
+        assert all(c.alert_rule_id == rule.id and c.value_observed is None for c in fired)
+
+    def test_cooldown_within_and_across_batches(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que el cooldown se respeta dentro del batch y contra alert_history."""
+        alert_rule_factory(cooldown_minutes=5)
+        start = datetime.utcnow()
+
+        # Minutos 0..5: dispara en 0 y en 5
+        first = readings_factory(device, [{"temp_c": 10.0}] * 6, start=start)
+        fired = alert_engine.process(db_session, first)
+        db_session.commit()
+        assert [c.sensor_reading_id for c in fired] == [first[0].id, first[5].id]
+
+        # Minutos 6..10: el ultimo disparo fue en 5, vuelve a disparar en 10
+        second = readings_factory(device, [{"temp_c": 10.0}] * 5, start=start + timedelta(minutes=6))
+        fired = alert_engine.process(db_session, second)
+        db_session.commit()
+        assert [c.sensor_reading_id for c in fired] == [second[4].id]
+
+    def test_inserts_alert_history(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que los disparos quedan en alert_history con la medicion de origen."""
+        rule = alert_rule_factory()
+        readings = readings_factory(device, [{"temp_c": 12.5}])
+
+        alert_engine.process(db_session, readings)
+        db_session.commit()
+
+        history = db_session.execute(select(AlertHistory)).scalars().all()
+        assert len(history) == 1
+        assert history[0].alert_rule_id == rule.id
+        assert history[0].device_id == device.id
+        assert history[0].sensor_reading_id == readings[0].id
+        assert history[0].value_observed == 12.5
+        assert history[0].triggered_at == readings[0].timestamp
+
+    def test_consumes_through_reading_cursor(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test del motor como handler de consume_readings()."""
+        alert_rule_factory()
+        ensure_cursors(db_session, "alerts-test", shards=1)
+        db_session.commit()
+        readings_factory(device, [{"temp_c": 3.0}, {"temp_c": 11.0}])
+
+        for _ in range(3):
+            consume_readings(db_session, "alerts-test", alert_engine.process)
+
+        assert alert_engine.evaluated == 2
+        assert alert_engine.fired == 1
+        assert db_session.query(AlertHistory).count() == 1
+
+
+class TestVectorizedEvaluation:
+    """Tests de evaluate_batch() (NumPy) contra el camino escalar."""
+
+    def test_matches_scalar_path(
+        self, db_session: Session, device: Device, location: Location, alert_rule_factory, readings_factory
+    ):
+        """Test de que ambos caminos producen los mismos disparos y mensajes."""
+        other = Device(asset_id=device.asset_id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+        db_session.add(other)
+        db_session.commit()
+        alert_rule_factory(threshold_value=8.0)
+        alert_rule_factory(device_id=other.id, check_type="THRESHOLD_BELOW", threshold_value=2.0)
+        alert_rule_factory(
+            location_id=location.id, check_type="THRESHOLD_RANGE", variable_key="humidity_pct",
+            threshold_value=None, threshold_min=40.0, threshold_max=None
+        )
+        alert_rule_factory(check_type="SENSOR_FAULT", threshold_value=None)
+        payloads = [
+            {"temp_c": 9.0, "humidity_pct": 30.0},
+            {"temp_c": 1.0, "humidity_pct": 50.0},
+            {"temp_c": None},
+            {"temp_c": True, "humidity_pct": "n/a"},
+            {"temp_c": 8},
+            {},
+        ]
+        readings = readings_factory(device, payloads) + readings_factory(other, payloads)
+        index = RuleIndex.load(db_session)
+
+        scalar = [c for r in readings for c in evaluate_reading(index.for_device(r.device_id), r)]
+        vectorized = evaluate_batch(index, readings)
+
+        assert len(scalar) > 0
+        assert sorted(scalar) == sorted(vectorized)
+
+    @pytest.mark.parametrize("alert_engine", [{"vectorized_min_batch": 10}], indirect=True)
+    def test_engine_uses_vectorized_path_for_large_batches(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que process() con batch grande registra los mismos disparos."""
+        rule = alert_rule_factory(threshold_value=8.0)
+        readings = readings_factory(device, [{"temp_c": float(i % 12)} for i in range(24)])
+
+        fired = alert_engine.process(db_session, readings)
+
+        assert [c.sensor_reading_id for c in fired] == [r.id for r in readings if r.data_payload["temp_c"] > 8.0]
+        assert all(c.alert_rule_id == rule.id for c in fired)
@@ -0,0 +1,139 @@
+"""
+Tests para las ventanas en memoria de las reglas RATE_OF_CHANGE.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.services.alert_engine import AlertEngine
+from app.services.alert_windows import WindowBuffer, WindowStore
+from app.services.reading_consumer import ReadingBatch
+
+
+class TestWindowBuffer:
+    """Tests de WindowBuffer."""
+
+    def test_evicts_samples_outside_window(self):
+        """Test de que solo quedan las muestras dentro de la ventana."""
+        buffer = WindowBuffer(window=60)
+        for second in range(0, 300, 10):
+            buffer.append(float(second), float(second))
+
+        assert len(buffer) == 7  # 230..290
+        assert buffer.first_since(0) == (230.0, 230.0)
+        assert buffer.first_since(255) == (260.0, 260.0)
+        assert buffer.first_since(300) is None
+
+    def test_compaction_keeps_order(self):
+        """Test de que compactar el array no altera las muestras vigentes."""
+        buffer = WindowBuffer(window=10)
+        for second in range(1000):
+            buffer.append(float(second), float(second) * 2)
+
+        assert len(buffer.times) < 200
+        assert list(buffer.times[buffer.start:]) == [float(s) for s in range(989, 1000)]  # Borde inclusivo
+        assert buffer.first_since(995) == (995.0, 1990.0)
+
+
+class TestRateOfChange:
+    """Tests de RATE_OF_CHANGE en AlertEngine.process()."""
+
+    def test_fires_on_change_within_window(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que dispara si el cambio contra la ventana supera el umbral."""
+        rule = alert_rule_factory(check_type="RATE_OF_CHANGE", threshold_value=5.0, time_window_minutes=10)
+        start = datetime.utcnow() - timedelta(hours=1)
+        readings = readings_factory(device, [4.0, 5.0, 6.0, 10.0], start)
+
+        fired = alert_engine.process(db_session, readings)
+
+        assert [(c.alert_rule_id, c.sensor_reading_id) for c in fired] == [(rule.id, readings[3].id)]
+        assert "+6" in fired[0].message
+
+    def test_slow_drift_does_not_fire(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que un cambio mas lento que la ventana no dispara."""
+        alert_rule_factory(check_type="RATE_OF_CHANGE", threshold_value=5.0, time_window_minutes=3)
+        start = datetime.utcnow() - timedelta(hours=1)
+        readings = readings_factory(device, [float(i) for i in range(20)], start)
+
+        assert alert_engine.process(db_session, readings) == []
+
+    def test_rebuilds_window_from_db_once(
+        self, db_session: Session, device: Device, query_counter: list,
+        alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que tras un reinicio la ventana se carga de la DB una sola vez."""
+        alert_rule_factory(check_type="RATE_OF_CHANGE", threshold_value=5.0, time_window_minutes=10)
+        start = datetime.utcnow() - timedelta(hours=1)
+        history = readings_factory(device, [4.0, 4.5], start)
+        new = readings_factory(device, [5.0, 9.5, 10.0], start + timedelta(minutes=len(history)))
+        # alert_engine es un proceso recien arrancado: ya proceso `history` antes de reiniciar
+        alert_engine.index_cache.get(db_session)
+
+        query_counter.clear()
+        fired = alert_engine.process(db_session, new)
+
+        assert [c.sensor_reading_id for c in fired] == [new[1].id, new[2].id]
+        assert alert_engine.windows.rebuilds == 1
+        window_queries = [q for q in query_counter if "jsonb_typeof" in q]
+        assert len(window_queries) == 1
+
+    def test_out_of_order_reading_is_skipped(
+        self, db_session: Session, device: Device, alert_rule_factory, readings_factory, alert_engine: AlertEngine
+    ):
+        """Test de que una medicion que llega tarde no se compara ni entra al buffer."""
+        alert_rule_factory(check_type="RATE_OF_CHANGE", threshold_value=5.0, time_window_minutes=10)
+        start = datetime.utcnow() - timedelta(hours=1)
+        assert alert_engine.process(db_session, readings_factory(device, [4.0, 5.0], start)) == []
+
+        late = readings_factory(device, [20.0], start - timedelta(minutes=1))
+        assert alert_engine.process(db_session, late) == []
+        assert alert_engine.windows.stats()["samples"] == 2
+
+
+class TestWindowStoreContinuity:
+    """Tests de la deteccion de huecos entre batches del consumidor."""
+
+    def _store_with_buffer(self, db_session: Session, device: Device, to_id: int = 0) -> WindowStore:
+        store = WindowStore()
+        store.begin_batch(db_session, ReadingBatch("alerts", 0, 1, 0, to_id))
+        store.get(db_session, device.id, "temp_c", datetime.utcnow(), 600)
+        return store
+
+    def test_contiguous_batches_keep_buffers(self, db_session: Session, device: Device):
+        """Test de que un batch que continua el anterior conserva los buffers."""
+        store = self._store_with_buffer(db_session, device, to_id=100)
+
+        store.begin_batch(db_session, ReadingBatch("alerts", 0, 1, 100, 200))
+
+        assert store.stats()["buffers"] == 1
+
+    def test_gap_with_shard_readings_drops_buffers(self, db_session: Session, device: Device, readings_factory):
+        """Test de que si otro proceso consumio mediciones del shard se descartan los buffers."""
+        store = self._store_with_buffer(db_session, device)
+        reading = readings_factory(device, [1.0], datetime.utcnow())[0]
+
+        store.begin_batch(db_session, ReadingBatch("alerts", 0, 1, reading.id, reading.id + 10))
+
+        assert store.stats()["buffers"] == 0
+
+    def test_gap_without_shard_readings_keeps_buffers(self, db_session: Session, device: Device):
+        """Test de que un avance del cursor sin mediciones del shard no descarta nada."""
+        store = self._store_with_buffer(db_session, device)
+
+        store.begin_batch(db_session, ReadingBatch("alerts", 0, 1, 50, 100))
+
+        assert store.stats()["buffers"] == 1
+
+    def test_retried_batch_drops_buffers(self, db_session: Session, device: Device):
+        """Test de que reintentar un batch (rollback) descarta los buffers."""
+        store = self._store_with_buffer(db_session, device, to_id=100)
+
+        store.begin_batch(db_session, ReadingBatch("alerts", 0, 1, 0, 100))
+
+        assert store.stats()["buffers"] == 0
@@ -0,0 +1,236 @@
+"""
+Tests de los endpoints con AsyncSession (DB_MODE=async).
+
+Se monta una app con los routers de app.api.v1.aio y un engine asyncpg
+propio (NullPool: las conexiones de asyncpg quedan atadas al event loop de
+cada test) sobre la misma base de datos de prueba.
+"""
+
+from datetime import datetime, timedelta
+from typing import AsyncGenerator
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.api.v1 import auth, devices, readings
+from app.api.v1.aio import auth as aio_auth, devices as aio_devices, readings as aio_readings
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.security import create_access_token, generate_device_api_key
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.models.user import User
+from app.services.last_seen import last_seen_tracker
+from tests.conftest import SQLALCHEMY_TEST_DATABASE_URL
+
+
+ASYNC_ROUTERS = (aio_auth.router, aio_devices.router, aio_readings.router)
+
+
+@pytest_asyncio.fixture
+async def async_client(db_session: Session) -> AsyncGenerator[httpx.AsyncClient, None]:
+    engine = create_async_engine(
+        SQLALCHEMY_TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+        poolclass=NullPool,
+        connect_args={"server_settings": {"timezone": "UTC"}},
+    )
+    factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db() -> AsyncGenerator[AsyncSession, None]:
+        async with factory() as db:
+            yield db
+
+    app = FastAPI()
+    for router in ASYNC_ROUTERS:
+        app.include_router(router, prefix=settings.api_v1_prefix)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        yield client
+
+    await engine.dispose()
+
+
+@pytest.fixture
+def admin_headers(super_admin_user: User) -> dict:
+    token = create_access_token(data={"sub": super_admin_user.email, "user_id": super_admin_user.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _routes(router) -> set:
+    return {(route.path, method) for route in router.routes for method in route.methods}
+
+
+class TestAsyncRouters:
+    """Tests de que las variantes async exponen la misma API."""
+
+    @pytest.mark.parametrize("sync_module,async_module", [
+        (auth, aio_auth), (devices, aio_devices), (readings, aio_readings),
+    ])
+    def test_same_routes_as_sync(self, sync_module, async_module):
+        """Test de que cada router async tiene las mismas rutas y metodos que el sincronico."""
+        assert _routes(async_module.router) == _routes(sync_module.router)
+
+    def test_openapi_descriptions_are_mirrored(self):
+        """Test de que los endpoints async documentan lo mismo que los sincronicos."""
+        assert aio_readings.create_reading.__doc__ == readings.create_reading.__doc__
+
+
+class TestAsyncReadings:
+    """Tests de ingesta y consulta de readings con AsyncSession."""
+
+    @pytest.mark.asyncio
+    async def test_create_reading(self, async_client, db_session: Session, device: Device):
+        """Test de que POST /readings persiste el reading y registra last_seen."""
+        response = await async_client.post("/api/v1/readings", json={
+            "device_eui": "ESP32_TEST_001",
+            "data_payload": {"temp_c": 4.5, "humidity_pct": 60.0},
+        })
+
+        assert response.status_code == 201
+        body = response.json()
+        assert body["device_id"] == device.id
+        assert body["data_payload"]["temp_c"] == 4.5
+
+        db_session.expire_all()
+        assert db_session.query(SensorReading).filter(SensorReading.id == body["id"]).count() == 1
+        assert last_seen_tracker.get(device.id) is not None
+
+    @pytest.mark.asyncio
+    async def test_create_reading_unknown_device(self, async_client, db_session: Session):
+        """Test de que un EUI inexistente responde 404."""
+        response = await async_client.post("/api/v1/readings", json={
+            "device_eui": "NO_EXISTE", "data_payload": {"temp_c": 4.5},
+        })
+
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_batch_reports_each_item(self, async_client, device: Device):
+        """Test de que el batch crea los readings validos e informa los devices inexistentes."""
+        response = await async_client.post("/api/v1/readings/batch", json={"readings": [
+            {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 3.0}},
+            {"device_eui": "NO_EXISTE", "data_payload": {"temp_c": 3.0}},
+        ]})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["created"], body["failed"]) == (1, 1)
+        assert body["results"][0]["reading_id"] is not None
+        assert body["results"][1]["status"] == "device_not_found"
+
+    @pytest.mark.asyncio
+    async def test_api_key_required(self, async_client, device: Device, monkeypatch):
+        """Test de que con DEVICE_API_KEY_REQUIRED=true se valida X-API-Key en reading y batch."""
+        monkeypatch.setattr(settings, "device_api_key_required", True)
+        reading = {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 3.0}}
+        headers = {"X-API-Key": generate_device_api_key("ESP32_TEST_001")}
+
+        assert (await async_client.post("/api/v1/readings", json=reading)).status_code == 401
+        assert (await async_client.post("/api/v1/readings", json=reading, headers=headers)).status_code == 201
+
+        response = await async_client.post("/api/v1/readings/batch", headers=headers, json={"readings": [
+            reading, {"device_eui": "NO_EXISTE", "data_payload": {"temp_c": 3.0}},
+        ]})
+        assert [r["status"] for r in response.json()["results"]] == ["created", "unauthorized"]
+
+    @pytest.mark.asyncio
+    async def test_list_readings_paginates_with_cursor(
+        self, async_client, db_session: Session, device: Device, admin_headers: dict
+    ):
+        """Test de que la paginacion por cursor recorre todos los readings sin repetir."""
+        now = datetime.utcnow()
+        db_session.add_all([
+            SensorReading(device_id=device.id, data_payload={"temp_c": i}, timestamp=now - timedelta(minutes=i))
+            for i in range(5)
+        ])
+        db_session.commit()
+
+        first = await async_client.get("/api/v1/readings?limit=3", headers=admin_headers)
+        cursor = first.headers["X-Next-Cursor"]
+        second = await async_client.get(f"/api/v1/readings?limit=3&cursor={cursor}", headers=admin_headers)
+
+        values = [r["data_payload"]["temp_c"] for r in first.json() + second.json()]
+        assert values == [0, 1, 2, 3, 4]
+        assert "X-Next-Cursor" not in second.headers
+
+    @pytest.mark.asyncio
+    async def test_aggregate(self, async_client, db_session: Session, device: Device, admin_headers: dict):
+        """Test de que /readings/aggregate funciona con la AsyncSession (run_sync)."""
+        now = datetime.utcnow().replace(second=0, microsecond=0)
+        db_session.add_all([
+            SensorReading(device_id=device.id, data_payload={"temp_c": value}, timestamp=now - timedelta(minutes=5))
+            for value in (2.0, 4.0)
+        ])
+        db_session.commit()
+
+        response = await async_client.get(
+            f"/api/v1/readings/aggregate?device_id={device.id}&variable=temp_c&bucket=1h",
+            headers=admin_headers,
+        )
+
+        assert response.status_code == 200
+        buckets = response.json()["series"][0]["buckets"]
+        assert sum(b["count"] for b in buckets) == 2
+
+
+class TestAsyncDevicesAndAuth:
+    """Tests de devices y autenticacion con AsyncSession."""
+
+    @pytest.mark.asyncio
+    async def test_device_crud(self, async_client, asset, admin_headers: dict):
+        """Test de que un admin puede crear, actualizar y eliminar un device."""
+        created = await async_client.post("/api/v1/devices", headers=admin_headers, json={
+            "device_eui": "ESP32_ASYNC_001", "name": "Async 001", "asset_id": asset.id,
+        })
+        assert created.status_code == 201
+        device_id = created.json()["id"]
+
+        duplicated = await async_client.post("/api/v1/devices", headers=admin_headers, json={
+            "device_eui": "ESP32_ASYNC_001", "name": "Async 001",
+        })
+        assert duplicated.status_code == 400
+
+        updated = await async_client.patch(f"/api/v1/devices/{device_id}", headers=admin_headers, json={"name": "Renombrado"})
+        assert updated.json()["name"] == "Renombrado"
+
+        assert (await async_client.delete(f"/api/v1/devices/{device_id}", headers=admin_headers)).status_code == 204
+        assert (await async_client.get(f"/api/v1/devices/{device_id}", headers=admin_headers)).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_login_and_me(self, async_client, super_admin_user: User):
+        """Test de que el login async emite un token valido para /auth/me."""
+        response = await async_client.post("/api/v1/auth/login", json={"email": "admin@test.com", "password": "admin123"})
+        assert response.status_code == 200
+
+        token = response.json()["access_token"]
+        me = await async_client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert me.status_code == 200
+        assert me.json()["email"] == "admin@test.com"
+        assert me.json()["last_login_at"] is not None
+
+    @pytest.mark.asyncio
+    async def test_login_wrong_password(self, async_client, super_admin_user: User):
+        """Test de que una password incorrecta responde 401."""
+        response = await async_client.post("/api/v1/auth/login", json={"email": "admin@test.com", "password": "mal"})
+
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_non_admin_cannot_create_device(self, async_client, technician_user: User):
+        """Test de que require_admin_async rechaza a un technician."""
+        token = create_access_token(data={"sub": technician_user.email, "user_id": technician_user.id})
+
+        response = await async_client.post(
+            "/api/v1/devices",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"device_eui": "ESP32_ASYNC_002", "name": "Async 002"},
+        )
+
+        assert response.status_code == 403
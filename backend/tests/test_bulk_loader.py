@@ -0,0 +1,120 @@
+"""
+Tests para la carga masiva de readings con COPY FROM STDIN.
+"""
+
+import io
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.schemas.sensor_reading import SensorReadingCreate
+from app.services.bulk_loader import copy_readings, iter_legacy_records, parse_legacy_timestamp
+from app.services.ingestion import STATUS_CREATED, ingest_readings
+
+
+class TestCopyReadings:
+    """Tests de copy_readings contra PostgreSQL."""
+
+    def test_copy_inserts_rows(self, db_session: Session, device: Device):
+        """Test de que COPY inserta todos los rows en streaming."""
+        now = datetime.utcnow()
+        rows = (
+            (device.id, {"temp_c": 20.0 + i}, 1.0, now - timedelta(minutes=i))
+            for i in range(1000)
+        )
+
+        inserted = copy_readings(db_session, rows, chunk_size=128)
+        db_session.commit()
+
+        assert inserted == 1000
+        assert db_session.query(SensorReading).filter(SensorReading.device_id == device.id).count() == 1000
+
+    def test_copy_serializes_jsonb_payload(self, db_session: Session, device: Device):
+        """Test de que payloads con comillas, comas, unicode y anidados llegan intactos."""
+        payload = {
+            "temp_c": -999,
+            "label": 'Heladera "A", estante 2',
+            "ubicacion": "Laboratorio Químico",
+            "nested": {"values": [1, 2.5, None], "ok": True},
+        }
+
+        copy_readings(db_session, [(device.id, payload, None, datetime.utcnow())])
+        db_session.commit()
+
+        reading = db_session.query(SensorReading).filter(SensorReading.device_id == device.id).one()
+        assert reading.data_payload == payload
+        assert reading.quality_score is None
+
+    def test_copy_converts_offset_to_utc_like_insert(self, db_session: Session, device: Device):
+        """Test de que un timestamp con offset no UTC se guarda igual por COPY que por INSERT."""
+        sent = datetime(2024, 5, 1, 18, 30, tzinfo=timezone(timedelta(hours=3)))
+        reading = SensorReadingCreate(device_eui="ESP32_TEST_001", data_payload={"temp_c": 4.0}, timestamp=sent)
+
+        ingest_readings(db_session, [reading], return_ids=True)
+        ingest_readings(db_session, [reading], return_ids=False)
+
+        stored = [r.timestamp for r in db_session.query(SensorReading).filter(SensorReading.device_id == device.id)]
+        assert stored == [datetime(2024, 5, 1, 15, 30)] * 2
+
+    def test_ingest_readings_without_ids_uses_copy(self, db_session: Session, device: Device):
+        """Test de ingest_readings con return_ids=False (camino COPY)."""
+        readings = [
+            SensorReadingCreate(device_eui="ESP32_TEST_001", data_payload={"temp_c": 21.0}),
+            SensorReadingCreate(device_eui="ESP32_NONEXISTENT", data_payload={"temp_c": 22.0}),
+        ]
+
+        results = ingest_readings(db_session, readings, return_ids=False)
+
+        assert [r.status for r in results] == [STATUS_CREATED, "device_not_found"]
+        assert results[0].reading_id is None
+        assert db_session.query(SensorReading).count() == 1
+
+
+class TestLegacyRecords:
+    """Tests del parser de historial legacy (CSV / NDJSON)."""
+
+    def test_parse_wide_csv(self):
+        """Test de CSV con una columna por variable (export tipico de MySQL)."""
+        source = io.StringIO(
+            "device_eui,timestamp,temp_c,humidity_pct,estado\n"
+            "ESP32_LAB_001,2024-05-01 13:45:00,4.5,61,ok\n"
+            "ESP32_LAB_001,2024-05-01 13:50:00,,62,ok\n"
+        )
+
+        records = list(iter_legacy_records(source, "csv"))
+
+        assert records[0] == (
+            "ESP32_LAB_001",
+            {"temp_c": 4.5, "humidity_pct": 61, "estado": "ok"},
+            datetime(2024, 5, 1, 13, 45),
+        )
+        # Valores vacios se omiten del payload
+        assert "temp_c" not in records[1][1]
+
+    def test_parse_csv_with_json_payload(self):
+        """Test de CSV con el payload como columna JSON."""
+        source = io.StringIO(
+            'device_eui,timestamp,data_payload\n'
+            'ESP32_LAB_001,2024-05-01T13:45:00Z,"{""temp_c"": 4.5}"\n'
+        )
+
+        records = list(iter_legacy_records(source, "csv"))
+
+        assert records == [("ESP32_LAB_001", {"temp_c": 4.5}, datetime(2024, 5, 1, 13, 45))]
+
+    def test_parse_ndjson_custom_fields(self):
+        """Test de NDJSON con nombres de campos del sistema legacy."""
+        source = io.StringIO(
+            '{"mac": "ESP32_LAB_001", "fecha": "2024-05-01 10:45:00-03:00", "temp_c": 4.5}\n'
+            "\n"
+        )
+
+        records = list(iter_legacy_records(source, "ndjson", eui_field="mac", timestamp_field="fecha"))
+
+        assert records == [("ESP32_LAB_001", {"temp_c": 4.5}, datetime(2024, 5, 1, 13, 45))]
+
+    def test_parse_epoch_timestamp(self):
+        """Test de timestamps en epoch (segundos, UTC)."""
+        assert parse_legacy_timestamp("0") == datetime(1970, 1, 1)
@@ -0,0 +1,110 @@
+"""
+Tests de que el trabajo de DB de codigo async no bloquea el event loop.
+
+Se usan requests ASGI directos (httpx.AsyncClient) en el mismo event loop
+del test: si una dependencia bloqueara el loop, el request concurrente
+tendria que esperarla.
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.concurrency import run_db
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import User
+from app.services.user_registry import user_registry
+
+
+DB_STALL_SEC = 1.0
+
+
+def _stuck_in_db() -> None:
+    """Query que tarda DB_STALL_SEC en PostgreSQL (conexion propia del engine de la app)."""
+    with database.engine.connect() as connection:
+        connection.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": DB_STALL_SEC})
+
+
+async def _elapsed(request) -> float:
+    started = time.perf_counter()
+    response = await request
+    assert response.status_code == 200
+    return time.perf_counter() - started
+
+
+class TestEventLoopNotBlocked:
+    """Tests de requests concurrentes mientras otro espera a la DB."""
+
+    @pytest.mark.asyncio
+    async def test_health_check_db_query_runs_off_loop(self, monkeypatch):
+        """Test de que /health con la DB lenta no frena a los demas requests."""
+        def slow_check() -> bool:
+            _stuck_in_db()
+            return True
+
+        monkeypatch.setattr("app.main.check_db_connection", slow_check)
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            slow = asyncio.create_task(client.get("/api/v1/health"))
+            await asyncio.sleep(0.1)
+
+            assert await _elapsed(client.get("/")) < DB_STALL_SEC / 2
+            assert not slow.done()
+            assert (await slow).json()["services"]["database"] == "healthy"
+
+    @pytest.mark.asyncio
+    async def test_get_current_user_query_runs_off_loop(
+        self, db_session: Session, super_admin_user: User, monkeypatch
+    ):
+        """Test de que la busqueda del usuario autenticado no bloquea el event loop."""
+        original_get = user_registry.get
+
+        def slow_get(db, user_id):
+            _stuck_in_db()
+            return original_get(db, user_id)
+
+        monkeypatch.setattr(user_registry, "get", slow_get)
+        token = create_access_token(data={"sub": super_admin_user.email, "user_id": super_admin_user.id})
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            slow = asyncio.create_task(client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"}))
+            await asyncio.sleep(0.1)
+
+            assert await _elapsed(client.get("/")) < DB_STALL_SEC / 2
+            assert (await slow).json()["email"] == "admin@test.com"
+
+
+class TestRunDb:
+    """Tests de run_db()."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_threads(self, monkeypatch):
+        """Test de que no corren mas funciones a la vez que DB_THREAD_LIMIT."""
+        monkeypatch.setattr("app.core.config.settings.db_thread_limit", 2)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def work() -> None:
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+        await asyncio.gather(*(run_db(work) for _ in range(6)))
+
+        assert max(peak) == 2
+
+    @pytest.mark.asyncio
+    async def test_passes_arguments(self):
+        """Test de que se pasan argumentos posicionales y por nombre."""
+        assert await run_db(lambda a, b=0: a + b, 2, b=3) == 5
@@ -0,0 +1,162 @@
+"""
+Tests de la autenticacion de devices con X-API-Key en la ingesta.
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_device_from_api_key
+from app.core.security import generate_device_api_key, validate_device_api_key, verified_device_keys
+from app.models.device import Device
+
+
+READING = {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+
+
+def _key_headers(device_eui: str = "ESP32_TEST_001") -> dict:
+    return {"X-API-Key": generate_device_api_key(device_eui)}
+
+
+@pytest.fixture
+def api_key_required(monkeypatch) -> None:
+    monkeypatch.setattr("app.core.config.settings.device_api_key_required", True)
+
+
+class TestValidateDeviceApiKey:
+    """Tests de validate_device_api_key()."""
+
+    def test_valid_key_is_cached(self):
+        """Test de que una key valida se verifica una vez y despues sale del cache."""
+        key = generate_device_api_key("ESP32_TEST_001")
+
+        assert validate_device_api_key("ESP32_TEST_001", key)
+        hits = verified_device_keys.hits
+        assert validate_device_api_key("ESP32_TEST_001", key)
+
+        assert verified_device_keys.hits == hits + 1
+
+    def test_invalid_keys_are_rejected_and_not_cached(self):
+        """Test de que las keys incorrectas, vacias o no ASCII se rechazan sin cachear."""
+        other_device_key = generate_device_api_key("ESP32_OTRO")
+
+        assert not validate_device_api_key("ESP32_TEST_001", other_device_key)
+        assert not validate_device_api_key("ESP32_TEST_001", "")
+        assert not validate_device_api_key("ESP32_TEST_001", "clave-ñandú")
+        assert len(verified_device_keys) == 0
+
+    def test_cached_device_still_rejects_wrong_key(self):
+        """Test de que con la key en cache una key distinta sigue siendo invalida."""
+        assert validate_device_api_key("ESP32_TEST_001", generate_device_api_key("ESP32_TEST_001"))
+
+        assert not validate_device_api_key("ESP32_TEST_001", generate_device_api_key("ESP32_OTRO"))
+
+
+class TestCreateReadingAuth:
+    """Tests de X-API-Key en POST /readings."""
+
+    def test_missing_key_returns_401(self, client: TestClient, device: Device, api_key_required):
+        """Test de que sin header la medicion se rechaza."""
+        response = client.post("/api/v1/readings", json=READING)
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "X-API-Key header requerido"
+
+    def test_key_of_other_device_returns_401(self, client: TestClient, device: Device, api_key_required):
+        """Test de que la key de otro device no autentica la medicion."""
+        response = client.post("/api/v1/readings", json=READING, headers=_key_headers("ESP32_OTRO"))
+
+        assert response.status_code == 401
+        assert response.json()["detail"] == "API Key invalida"
+
+    def test_valid_key_adds_no_queries(
+        self,
+        client: TestClient,
+        device: Device,
+        api_key_required,
+        query_counter: list
+    ):
+        """Test de que una medicion autenticada no hace queries extra (solo el INSERT y su commit)."""
+        assert client.post("/api/v1/readings", json=READING, headers=_key_headers()).status_code == 201
+
+        query_counter.clear()
+        response = client.post("/api/v1/readings", json=READING, headers=_key_headers())
+
+        assert response.status_code == 201
+        assert [q for q in query_counter if "FROM devices" in q] == []
+
+    def test_key_not_required_by_default(self, client: TestClient, device: Device):
+        """Test de que con DEVICE_API_KEY_REQUIRED=false se aceptan mediciones sin key."""
+        assert client.post("/api/v1/readings", json=READING).status_code == 201
+
+    def test_buffered_mode_rejects_before_enqueue(
+        self,
+        client: TestClient,
+        device: Device,
+        api_key_required,
+        monkeypatch
+    ):
+        """Test de que con INGEST_MODE=buffered una key invalida no llega al buffer."""
+        monkeypatch.setattr("app.core.config.settings.ingest_mode", "buffered")
+        submitted = []
+        monkeypatch.setattr("app.api.v1.readings.write_buffer.submit", submitted.append)
+
+        response = client.post("/api/v1/readings", json=READING, headers={"X-API-Key": "invalida"})
+
+        assert response.status_code == 401
+        assert submitted == []
+
+
+class TestBatchAuth:
+    """Tests de X-API-Key en POST /readings/batch."""
+
+    def test_missing_key_returns_401(self, client: TestClient, device: Device, api_key_required):
+        """Test de que un batch sin header se rechaza completo."""
+        response = client.post("/api/v1/readings/batch", json={"readings": [READING]})
+
+        assert response.status_code == 401
+
+    def test_other_devices_are_unauthorized_per_item(
+        self,
+        client: TestClient,
+        device: Device,
+        api_key_required,
+        query_counter: list
+    ):
+        """Test de que las mediciones de otros devices se informan como unauthorized sin buscarlos."""
+        response = client.post(
+            "/api/v1/readings/batch",
+            json={"readings": [READING, {"device_eui": "ESP32_OTRO", "data_payload": {"temp_c": 3.0}}, READING]},
+            headers=_key_headers(),
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert [r["status"] for r in data["results"]] == ["created", "unauthorized", "created"]
+        assert not any("ESP32_OTRO" in q for q in query_counter)
+
+
+class TestGetDeviceFromApiKey:
+    """Tests de la dependencia get_device_from_api_key()."""
+
+    @pytest.mark.asyncio
+    async def test_resolves_device_with_valid_key(self, db_session: Session, device: Device):
+        """Test de que con X-Device-EUI y su key se resuelve el device."""
+        key = generate_device_api_key("ESP32_TEST_001")
+
+        authenticated = await get_device_from_api_key(x_device_eui="ESP32_TEST_001", x_api_key=key, db=db_session)
+
+        assert authenticated.id == device.id
+
+    @pytest.mark.asyncio
+    async def test_rejects_key_prefix_lookup(self, db_session: Session, device: Device):
+        """Test de que un header con el EUI como prefijo (sin la key correcta) no autentica."""
+        with pytest.raises(HTTPException) as exc_info:
+            await get_device_from_api_key(
+                x_device_eui="ESP32_TEST_001", x_api_key="ESP32_TEST_001_cualquiera", db=db_session
+            )
+
+        assert exc_info.value.status_code == 401
@@ -0,0 +1,137 @@
+"""
+Tests para el cache de devices por EUI (device_registry).
+"""
+
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, TTLCache
+from app.models.asset import Asset
+from app.models.device import Device
+from app.services.device_registry import device_registry
+
+
+def device_selects(statements: list) -> list:
+    """Filtra los SELECT a la tabla devices."""
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM devices" in s]
+
+
+class TestTTLCache:
+    """Tests del cache LRU con TTL."""
+
+    def test_get_returns_missing_after_ttl(self):
+        """Test de que las entradas expiran."""
+        cache = TTLCache(max_size=10, ttl_seconds=0.05)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+        assert cache.get("a") is MISSING
+
+    def test_evicts_least_recently_used(self):
+        """Test de que al superar max_size se descarta la entrada menos usada."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+
+
+class TestDeviceRegistry:
+    """Tests del registro de devices."""
+
+    def test_get_caches_device_info(self, db_session: Session, device: Device, query_counter: list):
+        """Test de que la segunda resolucion no consulta la DB."""
+        query_counter.clear()
+        first = device_registry.get(db_session, "ESP32_TEST_001")
+        second = device_registry.get(db_session, "ESP32_TEST_001")
+
+        assert first == second
+        assert first.id == device.id
+        assert first.status == "active"
+        assert first.asset_id == device.asset_id
+        assert first.config == {"sampling_interval_sec": 300}
+        assert len(device_selects(query_counter)) == 1
+
+    def test_get_unknown_device_returns_none(self, db_session: Session):
+        """Test de EUI inexistente."""
+        assert device_registry.get(db_session, "ESP32_NONEXISTENT") is None
+
+    def test_create_reading_hot_path_skips_device_query(
+        self,
+        client: TestClient,
+        device: Device,
+        query_counter: list
+    ):
+        """Test de que con el device en cache, POST /readings no hace SELECT a devices."""
+        reading_data = {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+        client.post("/api/v1/readings", json=reading_data)
+
+        query_counter.clear()
+        response = client.post("/api/v1/readings", json=reading_data)
+
+        assert response.status_code == 201
+        assert device_selects(query_counter) == []
+
+    def test_update_device_invalidates_eui(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que cambiar el EUI invalida la entrada anterior."""
+        reading_data = {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+        assert client.post("/api/v1/readings", json=reading_data).status_code == 201
+
+        response = client.patch(
+            f"/api/v1/devices/{device.id}",
+            json={"device_eui": "ESP32_TEST_RENAMED"},
+            headers=auth_headers_admin
+        )
+        assert response.status_code == 200
+
+        assert client.post("/api/v1/readings", json=reading_data).status_code == 404
+        renamed = {"device_eui": "ESP32_TEST_RENAMED", "data_payload": {"temp_c": 4.5}}
+        assert client.post("/api/v1/readings", json=renamed).status_code == 201
+
+    def test_delete_device_invalidates_eui(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que un device eliminado deja de aceptar readings."""
+        reading_data = {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+        assert client.post("/api/v1/readings", json=reading_data).status_code == 201
+
+        response = client.delete(f"/api/v1/devices/{device.id}", headers=auth_headers_admin)
+        assert response.status_code == 204
+
+        assert client.post("/api/v1/readings", json=reading_data).status_code == 404
+
+    def test_create_device_invalidates_eui(
+        self,
+        client: TestClient,
+        db_session: Session,
+        asset: Asset,
+        auth_headers_admin: dict
+    ):
+        """Test de que un device creado via API se resuelve de inmediato."""
+        assert device_registry.get(db_session, "ESP32_NEW_001") is None
+
+        response = client.post(
+            "/api/v1/devices",
+            json={"asset_id": asset.id, "device_eui": "ESP32_NEW_001", "name": "ESP32 Nuevo"},
+            headers=auth_headers_admin
+        )
+        assert response.status_code == 201
+
+        info = device_registry.get(db_session, "ESP32_NEW_001")
+        assert info is not None
+        assert info.id == response.json()["id"]
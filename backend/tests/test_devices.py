@@ -0,0 +1,166 @@
+"""
+Tests para endpoints de devices, con foco en la cantidad de queries.
+
+Las relaciones grandes de Device (sensor_readings, alert_history,
+alert_rules) son lazy="raise": ningun endpoint debe cargarlas
+implicitamente ni hacer mas queries a medida que crece el historial.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+
+
+@pytest.fixture
+def device_with_history(db_session: Session, device: Device) -> Device:
+    """Device con historial de readings (para detectar cargas implicitas)."""
+    now = datetime.utcnow()
+    db_session.add_all([
+        SensorReading(
+            device_id=device.id,
+            data_payload={"temp_c": 4.0 + i * 0.01},
+            quality_score=1.0,
+            timestamp=now - timedelta(minutes=i)
+        )
+        for i in range(200)
+    ])
+    db_session.commit()
+    return device
+
+
+def touches_readings(statements: list) -> bool:
+    """Indica si alguna sentencia leyo la tabla sensor_readings."""
+    return any("FROM sensor_readings" in statement for statement in statements)
+
+
+class TestDeviceQueryCount:
+    """Regresion: cantidad acotada de queries por endpoint."""
+
+    def test_list_devices_query_count(
+        self,
+        client: TestClient,
+        device_with_history: Device,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """GET /devices: usuario + devices, sin cargar readings."""
+        query_counter.clear()
+        response = client.get("/api/v1/devices", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(query_counter) <= 2
+        assert not touches_readings(query_counter)
+
+    def test_get_device_query_count(
+        self,
+        client: TestClient,
+        device_with_history: Device,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """GET /devices/{id}: usuario + device."""
+        device_id = device_with_history.id
+        query_counter.clear()
+        response = client.get(f"/api/v1/devices/{device_id}", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(query_counter) <= 2
+        assert not touches_readings(query_counter)
+
+    def test_get_device_schema_query_count(
+        self,
+        client: TestClient,
+        device_with_history: Device,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """GET /devices/{id}/schema: usuario + device."""
+        device_id = device_with_history.id
+        query_counter.clear()
+        response = client.get(f"/api/v1/devices/{device_id}/schema", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(query_counter) <= 2
+        assert not touches_readings(query_counter)
+
+    def test_create_reading_query_count(
+        self,
+        client: TestClient,
+        device_with_history: Device,
+        query_counter: list
+    ):
+        """POST /readings: no carga el historial del device."""
+        query_counter.clear()
+        response = client.post(
+            "/api/v1/readings",
+            json={"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+        )
+
+        assert response.status_code == 201
+        # SELECT device (cache miss) + INSERT + refresh del reading (last_seen es write-behind)
+        assert len(query_counter) <= 4
+        assert sum("FROM sensor_readings" in s for s in query_counter) <= 1
+
+    def test_list_readings_query_count(
+        self,
+        client: TestClient,
+        device_with_history: Device,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """GET /readings: una query de readings, sin alert_history por reading."""
+        query_counter.clear()
+        response = client.get("/api/v1/readings?limit=100", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 100
+        assert len(query_counter) <= 2
+
+    def test_delete_device_query_count(
+        self,
+        client: TestClient,
+        db_session: Session,
+        device_with_history: Device,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """DELETE /devices/{id}: el historial se borra con ON DELETE CASCADE."""
+        device_id = device_with_history.id
+
+        query_counter.clear()
+        response = client.delete(f"/api/v1/devices/{device_id}", headers=auth_headers_admin)
+
+        assert response.status_code == 204
+        assert not touches_readings(query_counter)
+        assert db_session.query(SensorReading).filter(SensorReading.device_id == device_id).count() == 0
+
+
+class TestDeviceRelationshipLoading:
+    """Tests de la estrategia de carga de relaciones."""
+
+    def test_sensor_readings_raise_on_implicit_access(self, db_session: Session, device_with_history: Device):
+        """Acceder a device.sensor_readings sin pedirlo explicitamente falla."""
+        device = db_session.query(Device).filter(Device.id == device_with_history.id).one()
+        db_session.expire(device, ["sensor_readings"])
+
+        with pytest.raises(InvalidRequestError):
+            device.sensor_readings
+
+    def test_sensor_readings_explicit_eager_load(self, db_session: Session, device_with_history: Device):
+        """Con selectinload() la coleccion se carga de forma explicita."""
+        device_id = device_with_history.id
+        db_session.expunge_all()
+        device = (
+            db_session.query(Device)
+            .options(selectinload(Device.sensor_readings))
+            .filter(Device.id == device_id)
+            .one()
+        )
+
+        assert len(device.sensor_readings) == 200
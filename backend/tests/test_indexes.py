@@ -0,0 +1,52 @@
+"""
+Tests de los indices de las tablas con mas escrituras (sin duplicados, btree (timestamp, id)).
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class TestIndexes:
+    """Tests del set de indices creado por los modelos."""
+
+    def test_no_duplicate_indexes(self, db_session: Session):
+        """Test de que ninguna tabla tiene dos indices sobre las mismas columnas."""
+        duplicates = db_session.execute(text("""
+            SELECT indrelid::regclass::text, array_agg(indexrelid::regclass::text)
+            FROM pg_index
+            WHERE indrelid IN (
+                'sensor_readings'::regclass, 'devices'::regclass, 'users'::regclass, 'alert_rules'::regclass
+            )
+            GROUP BY indrelid, indkey::text, coalesce(indexprs::text, ''), coalesce(indpred::text, '')
+            HAVING count(*) > 1
+        """)).all()
+
+        assert duplicates == []
+
+    def test_timestamp_indexes(self, db_session: Session):
+        """Test de que timestamp solo tiene el btree (timestamp, id) para rangos y paginas."""
+        indexes = db_session.execute(text("""
+            SELECT c.relname, am.amname
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = 'sensor_readings'::regclass AND a.attname = 'timestamp'
+        """)).all()
+
+        assert indexes == [("idx_readings_time_id", "btree")]
+
+    def test_readings_page_without_device_is_not_sorted(self, db_session: Session):
+        """Test de que una pagina de GET /readings sin device_id sale ordenada del indice (sin Sort)."""
+        # La tabla de test esta vacia: sin esto el planner elige seq scan por costo
+        db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        db_session.execute(text("SET LOCAL enable_bitmapscan = off"))
+        plan = "\n".join(db_session.execute(text("""
+            EXPLAIN SELECT * FROM sensor_readings
+            WHERE timestamp <= now() AND (timestamp, id) < (now(), 1000)
+            ORDER BY timestamp DESC, id DESC
+            LIMIT 100
+        """)).scalars())
+
+        assert "Index Scan Backward" in plan
+        assert "Sort" not in plan
@@ -0,0 +1,107 @@
+"""
+Tests para el write-behind de devices.last_seen_at.
+"""
+
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.services.last_seen import LastSeenTracker, last_seen_tracker
+from app.services.offline_monitor import online_status
+
+
+class TestLastSeenTracker:
+    """Tests del tracker en memoria y su flush masivo."""
+
+    def test_create_reading_does_not_update_devices_row(
+        self,
+        client: TestClient,
+        device: Device,
+        query_counter: list
+    ):
+        """Test de que el hot path no hace UPDATE sobre devices."""
+        query_counter.clear()
+        response = client.post(
+            "/api/v1/readings",
+            json={"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}}
+        )
+
+        assert response.status_code == 201
+        assert not any(s.lstrip().upper().startswith("UPDATE DEVICES") for s in query_counter)
+        assert last_seen_tracker.get(device.id) is not None
+
+    def test_flush_updates_many_devices_in_one_statement(
+        self,
+        db_session: Session,
+        device: Device,
+        asset,
+        query_counter: list
+    ):
+        """Test de que el flush actualiza todos los devices con un solo UPDATE."""
+        device2 = Device(asset_id=asset.id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+        db_session.add(device2)
+        db_session.commit()
+
+        seen_at = datetime.utcnow()
+        last_seen_tracker.record(db_session, {device.id, device2.id}, seen_at)
+
+        query_counter.clear()
+        assert last_seen_tracker.flush(db_session) == 2
+        assert sum(s.lstrip().upper().startswith("UPDATE") for s in query_counter) == 1
+
+        db_session.refresh(device)
+        db_session.refresh(device2)
+        assert device.last_seen_at == seen_at
+        assert device2.last_seen_at == seen_at
+
+        # Sin pendientes, el flush no toca la DB
+        assert last_seen_tracker.flush(db_session) == 0
+
+    def test_flush_never_moves_last_seen_backwards(self, db_session: Session, device: Device):
+        """Test de que un valor viejo (otro worker) no pisa uno mas nuevo."""
+        newer = datetime.utcnow()
+        device.last_seen_at = newer
+        db_session.commit()
+
+        last_seen_tracker.record(db_session, {device.id}, newer - timedelta(minutes=5))
+        last_seen_tracker.flush(db_session)
+
+        db_session.refresh(device)
+        assert device.last_seen_at == newer
+
+    def test_online_status_reads_unflushed_value(self, db_session: Session, device: Device):
+        """Test de que online_status ve el valor del tracker antes del flush."""
+        assert online_status(device) is False
+
+        last_seen_tracker.record(db_session, {device.id}, datetime.utcnow())
+
+        assert device.last_seen_at is None
+        assert online_status(device) is True
+
+    def test_get_device_returns_fresh_last_seen(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que GET /devices/{id} muestra el last_seen_at del tracker."""
+        client.post("/api/v1/readings", json={"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.5}})
+
+        response = client.get(f"/api/v1/devices/{device.id}", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.json()["last_seen_at"] is not None
+
+    def test_disabled_updates_table_directly(self, db_session: Session, device: Device):
+        """Test de LAST_SEEN_WRITE_BEHIND=false: UPDATE en la sesion del caller."""
+        tracker = LastSeenTracker(enabled=False, flush_interval_sec=1)
+        seen_at = datetime.utcnow()
+
+        tracker.record(db_session, {device.id}, seen_at)
+        db_session.commit()
+
+        db_session.refresh(device)
+        assert device.last_seen_at == seen_at
+        assert tracker.get(device.id) is None
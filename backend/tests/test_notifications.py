@@ -0,0 +1,370 @@
+"""
+Tests para el dispatcher de notificaciones de alertas.
+
+Los canales se prueban contra servidores stub locales (HTTP y SMTP) en
+threads del propio test.
+"""
+
+import json
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Generator, List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.alert import AlertHistory, AlertRule
+from app.models.device import Device
+from app.services.notifications import NotificationDispatcher, claim_pending
+
+
+# ============================================================
+# Servidores Stub
+# ============================================================
+
+class StubHTTPHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append((self.path, body))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.statuses.pop(0) if server.statuses else 200
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"ok": true}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 stub\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command == "DATA":
+                self.wfile.write(b"354 end with .\r\n")
+                data = []
+                for data_line in iter(self.rfile.readline, b".\r\n"):
+                    data.append(data_line.decode())
+                self.server.messages.append("".join(data))
+                self.wfile.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+@pytest.fixture
+def http_stub() -> Generator[ThreadingHTTPServer, None, None]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHTTPHandler)
+    server.lock = threading.Lock()
+    server.requests, server.statuses = [], []
+    server.in_flight = server.max_in_flight = 0
+    server.delay = 0.0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def smtp_stub(monkeypatch) -> Generator[socketserver.ThreadingTCPServer, None, None]:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), StubSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for name, value in {
+        "smtp_enabled": True, "smtp_host": "127.0.0.1", "smtp_port": server.server_address[1],
+        "smtp_starttls": False, "smtp_user": None, "smtp_from_email": "alertas@test.com",
+        "smtp_alert_recipients": "ops@test.com",
+    }.items():
+        monkeypatch.setattr(f"app.core.config.settings.{name}", value)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dispatcher(monkeypatch) -> Generator[NotificationDispatcher, None, None]:
+    monkeypatch.setattr("app.core.config.settings.notification_retry_backoff_sec", 0.0)
+    dispatcher = NotificationDispatcher()
+    yield dispatcher
+    dispatcher.close()
+
+
+def _alerts(
+    db_session: Session,
+    device: Device,
+    channels: List[str],
+    count: int = 1,
+    webhook_url: str = None,
+    triggered_at: datetime = None,
+) -> List[AlertHistory]:
+    rule = AlertRule(
+        name="Temperatura alta",
+        check_type="THRESHOLD_ABOVE",
+        variable_key="temp_c",
+        threshold_value=8.0,
+        notification_channels=channels,
+        webhook_url=webhook_url,
+    )
+    db_session.add(rule)
+    db_session.flush()
+    alerts = [
+        AlertHistory(
+            alert_rule_id=rule.id, device_id=device.id, value_observed=10.0 + i,
+            triggered_at=triggered_at or datetime.utcnow(), message=f"temp_c {10.0 + i} > 8.0",
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(alerts)
+    db_session.commit()
+    return alerts
+
+
+def _sent(db_session: Session) -> List[dict]:
+    db_session.expire_all()
+    return [a.notification_sent for a in db_session.query(AlertHistory).order_by(AlertHistory.id)]
+
+
+def _attempts(db_session: Session) -> List[tuple]:
+    db_session.expire_all()
+    return [
+        (a.notification_attempts, a.notification_next_attempt_at)
+        for a in db_session.query(AlertHistory).order_by(AlertHistory.id)
+    ]
+
+
+@pytest.fixture
+def clock(dispatcher) -> List[datetime]:
+    """Reloj del dispatcher: el test lo adelanta con clock[0] += timedelta(...)."""
+    now = [datetime.utcnow()]
+    dispatcher.clock = lambda: now[0]
+    return now
+
+
+# ============================================================
+# Tests
+# ============================================================
+
+class TestWebhook:
+    """Tests del canal webhook."""
+
+    def test_batches_alerts_per_url(self, db_session: Session, device: Device, dispatcher, http_stub):
+        """Test de que las alertas con la misma URL se envian en un solo POST."""
+        alerts = _alerts(db_session, device, ["webhook"], count=3, webhook_url=f"{http_stub.url}/hook")
+
+        assert dispatcher.dispatch_once(db_session) == 3
+
+        assert len(http_stub.requests) == 1
+        path, body = http_stub.requests[0]
+        assert path == "/hook"
+        assert [a["id"] for a in body["alerts"]] == [a.id for a in alerts]
+        assert body["alerts"][0]["device_eui"] == "ESP32_TEST_001"
+        assert _sent(db_session) == [{"webhook": "success"}] * 3
+        assert dispatcher.dispatch_once(db_session) == 0
+
+    def test_retries_transient_errors(self, db_session: Session, device: Device, dispatcher, http_stub):
+        """Test de que un 503 se reintenta y el envio termina registrado como exitoso."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        http_stub.statuses = [503, 503]
+
+        dispatcher.dispatch_once(db_session)
+
+        assert len(http_stub.requests) == 3
+        assert dispatcher.retries == 2
+        assert _sent(db_session) == [{"webhook": "success"}]
+
+    def test_client_errors_are_not_retried(self, db_session: Session, device: Device, dispatcher, http_stub):
+        """Test de que un 4xx falla sin reintentos."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        http_stub.statuses = [404]
+
+        dispatcher.dispatch_once(db_session)
+
+        assert len(http_stub.requests) == 1
+        assert _sent(db_session) == [{"webhook": "failed"}]
+
+    def test_concurrency_limit_per_channel(
+        self, db_session: Session, device: Device, dispatcher, http_stub, monkeypatch
+    ):
+        """Test de que los envios simultaneos de un canal no superan su limite."""
+        monkeypatch.setattr("app.core.config.settings.notification_webhook_concurrency", 2)
+        http_stub.delay = 0.05
+        for i in range(6):
+            _alerts(db_session, device, ["webhook"], webhook_url=f"{http_stub.url}/hook/{i}")
+
+        dispatcher.dispatch_once(db_session)
+
+        assert len(http_stub.requests) == 6
+        assert http_stub.max_in_flight == 2
+
+
+class TestTelegram:
+    """Tests del canal Telegram."""
+
+    def test_sends_batch_to_chat(self, db_session: Session, device: Device, dispatcher, http_stub, monkeypatch):
+        """Test de que las alertas del batch van en un mensaje a sendMessage del bot."""
+        for name, value in {
+            "telegram_enabled": True, "telegram_bot_token": "TOKEN", "telegram_chat_id": "-100",
+            "telegram_api_url": http_stub.url,
+        }.items():
+            monkeypatch.setattr(f"app.core.config.settings.{name}", value)
+        _alerts(db_session, device, ["telegram"], count=2)
+
+        dispatcher.dispatch_once(db_session)
+
+        assert len(http_stub.requests) == 1
+        path, body = http_stub.requests[0]
+        assert path == "/botTOKEN/sendMessage"
+        assert body["chat_id"] == "-100"
+        assert body["text"].count("ESP32 Test 001") == 2
+        assert _sent(db_session) == [{"telegram": "success"}] * 2
+
+    def test_disabled_channel_is_recorded(self, db_session: Session, device: Device, dispatcher):
+        """Test de que un canal sin configurar queda registrado sin intentar el envio."""
+        _alerts(db_session, device, ["telegram", "webhook"])
+
+        dispatcher.dispatch_once(db_session)
+
+        assert _sent(db_session) == [{"telegram": "disabled", "webhook": "disabled"}]
+
+
+class TestEmail:
+    """Tests del canal email."""
+
+    def test_reuses_smtp_connection(self, db_session: Session, device: Device, dispatcher, smtp_stub):
+        """Test de que batches sucesivos usan la misma conexion SMTP."""
+        _alerts(db_session, device, ["email"], count=2)
+        dispatcher.dispatch_once(db_session)
+        _alerts(db_session, device, ["email"])
+        dispatcher.dispatch_once(db_session)
+
+        assert smtp_stub.connections == 1
+        assert len(smtp_stub.messages) == 2
+        assert "Subject: [Alerta] 2 alertas" in smtp_stub.messages[0]
+        assert _sent(db_session) == [{"email": "success"}] * 3
+
+
+class TestPending:
+    """Tests de la seleccion de alertas pendientes."""
+
+    def test_old_alerts_expire_and_rules_without_channels_are_closed(
+        self, db_session: Session, device: Device, dispatcher, http_stub
+    ):
+        """Test de que las alertas viejas no se envian y las reglas sin canales no quedan pendientes."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url,
+                triggered_at=datetime.utcnow() - timedelta(days=1))
+        _alerts(db_session, device, [])
+
+        assert dispatcher.dispatch_once(db_session) == 2
+
+        assert http_stub.requests == []
+        assert _sent(db_session) == [{"webhook": "expired"}, {}]
+
+
+class TestRetries:
+    """Tests del lease y de los reintentos de alertas con canales fallidos."""
+
+    def test_no_transaction_is_open_while_sending(
+        self, db_session: Session, device: Device, dispatcher, clock, http_stub, monkeypatch
+    ):
+        """Test de que el batch se toma con commit antes de enviar y el lease se libera al registrar."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        deliver = dispatcher.deliver
+        during_send = []
+
+        async def spy(pending):
+            during_send.append(db_session.in_transaction())
+            during_send.append(_attempts(db_session))
+            return await deliver(pending)
+
+        monkeypatch.setattr(dispatcher, "deliver", spy)
+        dispatcher.dispatch_once(db_session)
+
+        assert during_send == [False, [(1, clock[0] + timedelta(seconds=300))]]
+        assert _attempts(db_session) == [(1, None)]
+        assert _sent(db_session) == [{"webhook": "success"}]
+
+    def test_failed_channel_is_retried_later(
+        self, db_session: Session, device: Device, dispatcher, clock, http_stub, smtp_stub
+    ):
+        """Test de que un canal fallido se reintenta pasado el backoff sin reenviar los exitosos."""
+        _alerts(db_session, device, ["email", "webhook"], webhook_url=http_stub.url)
+        http_stub.statuses = [404]
+
+        assert dispatcher.dispatch_once(db_session) == 1
+        assert _sent(db_session) == [{"email": "success", "webhook": "failed"}]
+        assert _attempts(db_session) == [(1, clock[0] + timedelta(seconds=60))]
+        assert dispatcher.dispatch_once(db_session) == 0
+
+        clock[0] += timedelta(seconds=60)
+        assert dispatcher.dispatch_once(db_session) == 1
+
+        assert len(http_stub.requests) == 2
+        assert len(smtp_stub.messages) == 1
+        assert _sent(db_session) == [{"email": "success", "webhook": "success"}]
+        assert _attempts(db_session) == [(2, None)]
+
+    def test_retries_stop_after_max_attempts(
+        self, db_session: Session, device: Device, dispatcher, clock, http_stub, monkeypatch
+    ):
+        """Test de que despues de NOTIFICATION_MAX_ATTEMPTS la alerta queda "failed" y no se toma mas."""
+        monkeypatch.setattr("app.core.config.settings.notification_max_attempts", 2)
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        http_stub.statuses = [404, 404, 404]
+
+        for _ in range(3):
+            dispatcher.dispatch_once(db_session)
+            clock[0] += timedelta(minutes=5)
+
+        assert len(http_stub.requests) == 2
+        assert _sent(db_session) == [{"webhook": "failed"}]
+        assert _attempts(db_session) == [(2, None)]
+
+    def test_retries_stop_when_alert_is_too_old(
+        self, db_session: Session, device: Device, dispatcher, clock, http_stub
+    ):
+        """Test de que un canal que falla cuando la alerta ya es vieja queda "failed" (no "expired")."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        http_stub.statuses = [404]
+        dispatcher.dispatch_once(db_session)
+
+        clock[0] += timedelta(hours=2)
+        assert dispatcher.dispatch_once(db_session) == 1
+
+        assert len(http_stub.requests) == 1
+        assert _sent(db_session) == [{"webhook": "failed"}]
+        assert _attempts(db_session) == [(2, None)]
+
+    def test_expired_lease_is_claimed_again(
+        self, db_session: Session, device: Device, dispatcher, clock, http_stub
+    ):
+        """Test de que un batch tomado por un proceso que murio se vuelve a tomar al vencer el lease."""
+        _alerts(db_session, device, ["webhook"], webhook_url=http_stub.url)
+        assert len(claim_pending(db_session, 10, clock[0])) == 1
+        db_session.commit()
+
+        assert dispatcher.dispatch_once(db_session) == 0
+        clock[0] += timedelta(seconds=300)
+        assert dispatcher.dispatch_once(db_session) == 1
+
+        assert _sent(db_session) == [{"webhook": "success"}]
+        assert _attempts(db_session) == [(2, None)]
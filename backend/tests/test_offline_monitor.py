@@ -0,0 +1,165 @@
+"""
+Tests para el detector de devices offline por deadlines.
+"""
+
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.models.alert import AlertHistory
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.services.alert_engine import AlertEngine
+from app.services.alert_rules import RuleIndexCache
+from app.services.offline_monitor import OfflineMonitor, offline_monitor, online_status
+
+
+NOW = datetime(2026, 10, 17, 12, 0, 0)
+
+# Columnas de una regla DEVICE_OFFLINE para alert_rule_factory (la ventana va en time_window_minutes)
+OFFLINE_RULE = {"name": "Sin datos", "check_type": "DEVICE_OFFLINE", "variable_key": "*", "threshold_value": None}
+
+
+class FakeClock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def _monitor(clock: FakeClock) -> OfflineMonitor:
+    return OfflineMonitor(index_cache=RuleIndexCache(ttl_seconds=60), clock=clock)
+
+
+def _reading(device: Device, timestamp: datetime) -> List[SensorReading]:
+    return [SensorReading(id=1, device_id=device.id, data_payload={}, timestamp=timestamp)]
+
+
+class TestOfflineMonitor:
+    """Tests de OfflineMonitor.check()."""
+
+    def test_fires_when_deadline_expires(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que dispara al vencer el deadline y no antes."""
+        rule = alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10)
+        clock = FakeClock(NOW)
+        monitor = _monitor(clock)
+        monitor.check(db_session)
+        monitor.touch(monitor.index_cache.get(db_session), _reading(device, NOW))
+
+        clock.now = NOW + timedelta(minutes=9, seconds=59)
+        assert monitor.check(db_session) == []
+        assert monitor.next_deadline() == NOW + timedelta(minutes=10)
+
+        clock.now = NOW + timedelta(minutes=10)
+        fired = monitor.check(db_session)
+
+        assert [(c.alert_rule_id, c.device_id) for c in fired] == [(rule.id, device.id)]
+        assert fired[0].triggered_at == NOW + timedelta(minutes=10)
+        assert fired[0].sensor_reading_id is None
+        assert db_session.query(AlertHistory).count() == 1
+
+        # Un episodio dispara una sola vez
+        clock.now = NOW + timedelta(hours=1)
+        assert monitor.check(db_session) == []
+
+    def test_new_readings_push_deadline(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que cada medicion corre el deadline sin agregar entradas al heap."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10)
+        clock = FakeClock(NOW)
+        monitor = _monitor(clock)
+        monitor.check(db_session)
+        index = monitor.index_cache.get(db_session)
+
+        for minute in range(0, 30, 5):
+            monitor.touch(index, _reading(device, NOW + timedelta(minutes=minute)))
+            clock.now = NOW + timedelta(minutes=minute)
+            assert monitor.check(db_session) == []
+
+        assert monitor.stats()["deadlines"] == 1
+        assert monitor.rescheduled > 0
+
+        clock.now = NOW + timedelta(minutes=34)
+        assert monitor.check(db_session) == []
+        clock.now = NOW + timedelta(minutes=35)
+        assert len(monitor.check(db_session)) == 1
+
+    def test_seeds_from_last_seen_and_survives_restart(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que al arrancar detecta devices ya offline sin repetir la alerta."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10)
+        device.last_seen_at = NOW - timedelta(minutes=20)
+        db_session.commit()
+
+        fired = _monitor(FakeClock(NOW)).check(db_session)
+        assert len(fired) == 1
+        assert fired[0].triggered_at == NOW - timedelta(minutes=10)
+
+        # Reinicio: mismo episodio, no se vuelve a registrar
+        assert _monitor(FakeClock(NOW + timedelta(minutes=5))).check(db_session) == []
+        assert db_session.query(AlertHistory).count() == 1
+
+    def test_confirms_last_seen_before_firing(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que un contacto registrado por otro proceso reprograma en vez de disparar."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10)
+        clock = FakeClock(NOW)
+        monitor = _monitor(clock)
+        monitor.check(db_session)
+        monitor.touch(monitor.index_cache.get(db_session), _reading(device, NOW))
+
+        device.last_seen_at = NOW + timedelta(minutes=8)  # Medicion recibida en otro proceso
+        db_session.commit()
+        clock.now = NOW + timedelta(minutes=11)
+
+        assert monitor.check(db_session) == []
+        assert monitor.next_deadline() == NOW + timedelta(minutes=18)
+
+    def test_devices_without_rules_are_not_tracked(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que los devices fuera del alcance de las reglas no tienen deadline."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10, device_id=device.id)
+        other = Device(asset_id=device.asset_id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+        db_session.add(other)
+        db_session.commit()
+        monitor = _monitor(FakeClock(NOW))
+        monitor.check(db_session)
+
+        monitor.touch(monitor.index_cache.get(db_session), _reading(other, NOW))
+
+        assert monitor.stats()["deadlines"] == 0
+
+    def test_alert_engine_refreshes_deadlines(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que las mediciones que procesa el motor arman el deadline."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=10)
+        clock = FakeClock(NOW)
+        monitor = _monitor(clock)
+        engine = AlertEngine(index_cache=monitor.index_cache, offline_monitor=monitor)
+        reading = SensorReading(device_id=device.id, data_payload={"temp_c": 4.0}, timestamp=NOW)
+        db_session.add(reading)
+        db_session.commit()
+
+        engine.process(db_session, [reading])
+
+        assert monitor.next_deadline() == NOW + timedelta(minutes=10)
+
+
+class TestOnlineStatus:
+    """Tests del umbral de online_status()."""
+
+    def test_default_threshold_from_settings(self, db_session: Session, device: Device, monkeypatch):
+        """Test de que sin reglas se usa DEVICE_OFFLINE_THRESHOLD_MINUTES."""
+        monkeypatch.setattr("app.core.config.settings.device_offline_threshold_minutes", 30)
+        device.last_seen_at = datetime.utcnow() - timedelta(minutes=20)
+        db_session.commit()
+
+        assert online_status(device) is True
+
+    def test_threshold_from_offline_rule(self, db_session: Session, device: Device, alert_rule_factory):
+        """Test de que la regla DEVICE_OFFLINE del device define el umbral."""
+        alert_rule_factory(**OFFLINE_RULE, time_window_minutes=5, device_id=device.id)
+        device.last_seen_at = datetime.utcnow() - timedelta(minutes=7)
+        db_session.commit()
+        assert online_status(device) is True  # Umbral por defecto: 10 minutos
+
+        offline_monitor.check(db_session)
+
+        assert online_status(device) is False
@@ -0,0 +1,132 @@
+"""
+Tests para el particionado por rango de timestamp de sensor_readings.
+"""
+
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.services.partitioning import (
+    DEFAULT_PARTITION,
+    _uncovered,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    next_period,
+    period_start,
+)
+
+
+def _partition_of(db_session: Session, reading_id: int) -> str:
+    return db_session.execute(
+        text("SELECT tableoid::regclass::text FROM sensor_readings WHERE id = :id"), {"id": reading_id}
+    ).scalar()
+
+
+class TestPeriods:
+    """Tests del calculo de periodos."""
+
+    def test_period_start(self):
+        """Test de inicio de dia, semana (lunes) y mes."""
+        value = datetime(2025, 10, 17, 13, 45)
+        assert period_start(value, "day") == datetime(2025, 10, 17)
+        assert period_start(value, "week") == datetime(2025, 10, 13)
+        assert period_start(value, "month") == datetime(2025, 10, 1)
+
+    def test_next_period_month_wraps_year(self):
+        """Test de que diciembre pasa a enero del anio siguiente."""
+        assert next_period(datetime(2025, 12, 1), "month") == datetime(2026, 1, 1)
+
+    def test_uncovered_skips_existing_ranges(self):
+        """Test de huecos contra una particion legacy que termina a mitad de periodo."""
+        gaps = _uncovered(
+            datetime(2025, 10, 1),
+            datetime(2026, 1, 1),
+            [(None, datetime(2025, 11, 15))],
+        )
+        assert gaps == [(datetime(2025, 11, 15), datetime(2026, 1, 1))]
+
+
+class TestEnsurePartitions:
+    """Tests de creacion de particiones."""
+
+    def test_table_is_partitioned_with_default(self, db_session: Session):
+        """Test de que create_all crea la tabla particionada y la DEFAULT."""
+        assert is_partitioned(db_session)
+        assert [p.name for p in list_partitions(db_session) if p.is_default] == [DEFAULT_PARTITION]
+
+    def test_creates_current_and_ahead(self, db_session: Session):
+        """Test de que crea el periodo actual y los siguientes, idempotente."""
+        created = ensure_partitions(db_session, now=datetime(2030, 1, 15), interval="month", ahead=2)
+
+        assert created == [
+            "sensor_readings_p20300101",
+            "sensor_readings_p20300201",
+            "sensor_readings_p20300301",
+        ]
+        assert ensure_partitions(db_session, now=datetime(2030, 1, 20), interval="month", ahead=2) == []
+
+    def test_moves_rows_from_default(self, db_session: Session, device: Device):
+        """Test de que las filas que cayeron en DEFAULT pasan a la particion nueva."""
+        reading = SensorReading(device_id=device.id, data_payload={"temp_c": 1.0}, timestamp=datetime(2031, 5, 10))
+        db_session.add(reading)
+        db_session.commit()
+        reading_id = reading.id
+        assert _partition_of(db_session, reading_id) == DEFAULT_PARTITION
+
+        ensure_partitions(db_session, now=datetime(2031, 5, 1), interval="week", ahead=1)
+
+        assert _partition_of(db_session, reading_id) == "sensor_readings_p20310505"
+        assert db_session.execute(select(func.count()).select_from(SensorReading)).scalar() == 1
+
+
+class TestPartitionPruning:
+    """Tests de pruning en GET /readings."""
+
+    def test_list_readings_with_timezone_prunes_partitions(
+        self,
+        client: TestClient,
+        db_session: Session,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que un rango con zona horaria solo lee las particiones del rango."""
+        ensure_partitions(db_session, now=datetime(2030, 1, 1), interval="month", ahead=2)
+        db_session.add_all([
+            SensorReading(device_id=device.id, data_payload={"temp_c": 1.0}, timestamp=datetime(2030, month, 10))
+            for month in (1, 2, 3)
+        ])
+        db_session.commit()
+
+        executed = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if "FROM sensor_readings" in statement:
+                executed.append((statement, parameters))
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", capture)
+        try:
+            response = client.get(
+                "/api/v1/readings",
+                params={"date_from": "2030-02-01T03:00:00+03:00", "date_to": "2030-02-20T00:00:00Z"},
+                headers=auth_headers_admin
+            )
+        finally:
+            event.remove(connection, "before_cursor_execute", capture)
+
+        assert response.status_code == 200
+        assert [r["timestamp"] for r in response.json()] == ["2030-02-10T00:00:00"]
+
+        statement, parameters = executed[-1]
+        cursor = connection.connection.cursor()
+        cursor.execute("EXPLAIN " + statement, parameters)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        assert "sensor_readings_p20300201" in plan
+        assert "sensor_readings_p20300101" not in plan
+        assert "sensor_readings_p20300301" not in plan
+        assert DEFAULT_PARTITION not in plan
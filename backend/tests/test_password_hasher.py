@@ -0,0 +1,111 @@
+"""
+Tests del pool de bcrypt del login (rehash, backpressure y aislamiento).
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from anyio import to_thread
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import pwd_context
+from app.main import app
+from app.models.device import Device
+from app.models.user import User
+from app.services.password_hasher import PasswordHasher
+
+
+def _login(client: TestClient, password: str = "admin123"):
+    return client.post("/api/v1/auth/login", json={"email": "admin@test.com", "password": password})
+
+
+def _stored_hash(db_session: Session, user: User) -> str:
+    db_session.expire_all()
+    return db_session.get(User, user.id).password_hash
+
+
+@pytest.fixture
+def hasher(monkeypatch) -> PasswordHasher:
+    hasher = PasswordHasher(workers=1, max_pending=64)
+    monkeypatch.setattr("app.api.v1.auth.password_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+class TestRehash:
+    """Tests del rehash transparente al cambiar BCRYPT_ROUNDS."""
+
+    def test_login_rehashes_old_cost(self, client: TestClient, db_session: Session, super_admin_user: User, hasher):
+        """Test de que un hash con otro cost se reemplaza por uno con BCRYPT_ROUNDS."""
+        super_admin_user.password_hash = pwd_context.hash("admin123", rounds=4)
+        db_session.commit()
+
+        assert _login(client).status_code == 200
+
+        stored = _stored_hash(db_session, super_admin_user)
+        assert stored.startswith(f"$2b${pwd_context.to_dict()['bcrypt__rounds']:02d}$")
+        assert pwd_context.verify("admin123", stored)
+        assert hasher.stats()["rehashed"] == 1
+
+    def test_current_cost_is_kept(self, client: TestClient, db_session: Session, super_admin_user: User, hasher):
+        """Test de que un hash con el cost actual no se reescribe."""
+        original = super_admin_user.password_hash
+
+        assert _login(client).status_code == 200
+
+        assert _stored_hash(db_session, super_admin_user) == original
+        assert hasher.stats()["rehashed"] == 0
+
+    def test_wrong_password_does_not_rehash(self, client: TestClient, db_session: Session, super_admin_user: User, hasher):
+        """Test de que una password incorrecta responde 401 sin tocar el hash."""
+        old_hash = pwd_context.hash("admin123", rounds=4)
+        super_admin_user.password_hash = old_hash
+        db_session.commit()
+
+        assert _login(client, "incorrecta").status_code == 401
+        assert _stored_hash(db_session, super_admin_user) == old_hash
+
+
+class TestBackpressure:
+    """Tests de la cola acotada del pool."""
+
+    def test_full_queue_responds_503(self, client: TestClient, super_admin_user: User, hasher):
+        """Test de que con la cola llena el login responde 503 con Retry-After."""
+        hasher.max_pending = 0
+
+        response = _login(client)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert hasher.stats()["rejected"] == 1
+
+
+class TestIsolation:
+    """Tests de que un pico de logins no frena a los demas endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_login_burst_does_not_block_ingestion(self, super_admin_user: User, device: Device, hasher):
+        """Test de que la ingesta responde mientras hay logins en cola en el pool de bcrypt."""
+        # Pocos threads de FastAPI: si el login ocupara uno durante bcrypt, la ingesta esperaria
+        to_thread.current_default_thread_limiter().total_tokens = 2
+        credentials = {"email": "admin@test.com", "password": "admin123"}
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            logins = [asyncio.create_task(client.post("/api/v1/auth/login", json=credentials)) for _ in range(6)]
+            await asyncio.sleep(0.1)
+
+            reading = await client.post("/api/v1/readings", json={
+                "device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 4.0},
+            })
+
+            # Con un worker los logins terminan de a uno: la ingesta no espero a la cola
+            assert reading.status_code == 201
+            assert sum(login.done() for login in logins) <= 1
+            assert all(response.status_code == 200 for response in await asyncio.gather(*logins))
+
+        stats = hasher.stats()
+        assert stats["completed"] == 6
+        assert stats["peak_pending"] > 1
+        assert stats["wait_ms_max"] > 0
@@ -0,0 +1,215 @@
+"""
+Tests para el consumo de sensor_readings por cursor (sin UPDATE por medicion).
+"""
+
+import time
+from datetime import datetime
+from typing import Generator, List
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.device import Device
+from app.models.reading_cursor import ReadingCursor
+from app.models.sensor_reading import SensorReading
+from app.services.reading_consumer import ReadingConsumer, consume_readings, current_batch, ensure_cursors
+from tests.conftest import SQLALCHEMY_TEST_DATABASE_URL
+
+
+CONSUMER = "test"
+
+
+@pytest.fixture
+def other_sessions(db_session: Session) -> Generator[sessionmaker, None, None]:
+    """Sesiones con conexiones propias (la del db_session es compartida)."""
+    engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def two_devices(db_session: Session, device: Device) -> List[Device]:
+    """Dos devices con ids de distinta paridad (caen en shards distintos con 2 shards)."""
+    other = Device(asset_id=device.asset_id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+    db_session.add(other)
+    db_session.commit()
+    assert device.id % 2 != other.id % 2
+    return [device, other]
+
+
+def _add_readings(db_session: Session, devices: List[Device], per_device: int) -> None:
+    db_session.add_all([
+        SensorReading(device_id=device.id, data_payload={"temp_c": float(i)}, timestamp=datetime.utcnow())
+        for i in range(per_device)
+        for device in devices
+    ])
+    db_session.commit()
+
+
+def _drain(db: Session, handler, calls: int = 8) -> None:
+    for _ in range(calls):
+        consume_readings(db, CONSUMER, handler)
+
+
+class TestConsumeReadings:
+    """Tests de consume_readings()."""
+
+    def test_processes_each_reading_once_in_order(self, db_session: Session, two_devices: List[Device]):
+        """Test de que cada medicion se procesa una vez, en orden de id por device."""
+        ensure_cursors(db_session, CONSUMER, shards=2)
+        db_session.commit()
+        _add_readings(db_session, two_devices, per_device=5)
+        seen = []
+
+        _drain(db_session, lambda db, readings: seen.extend((r.device_id, r.id) for r in readings))
+
+        assert len(seen) == 10
+        assert len(set(seen)) == 10
+        for device in two_devices:
+            ids = [reading_id for device_id, reading_id in seen if device_id == device.id]
+            assert ids == sorted(ids)
+
+        # Nada nuevo: no se reprocesa
+        seen.clear()
+        _drain(db_session, lambda db, readings: seen.extend(readings))
+        assert seen == []
+
+    def test_waits_for_in_flight_inserts(
+        self,
+        db_session: Session,
+        device: Device,
+        other_sessions: sessionmaker
+    ):
+        """Test de que un INSERT con id menor aun sin commit no queda salteado."""
+        ensure_cursors(db_session, CONSUMER, shards=1)
+        db_session.commit()
+
+        slow = other_sessions()
+        slow_reading = SensorReading(device_id=device.id, data_payload={"temp_c": 1.0}, timestamp=datetime.utcnow())
+        slow.add(slow_reading)
+        slow.flush()
+        slow_id = slow_reading.id
+        _add_readings(db_session, [device], per_device=1)
+
+        seen = []
+        try:
+            _drain(db_session, lambda db, readings: seen.extend(r.id for r in readings))
+            assert seen == []
+
+            slow.commit()
+            _drain(db_session, lambda db, readings: seen.extend(r.id for r in readings))
+        finally:
+            slow.close()
+
+        assert seen[0] == slow_id
+        assert len(seen) == 2
+
+    def test_handler_error_keeps_cursor(self, db_session: Session, device: Device):
+        """Test de que si el handler falla el batch se reintenta."""
+        ensure_cursors(db_session, CONSUMER, shards=1)
+        db_session.commit()
+        _add_readings(db_session, [device], per_device=3)
+        consume_readings(db_session, CONSUMER, lambda db, readings: None)  # Toma el candidato
+
+        def failing(db, readings):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            consume_readings(db_session, CONSUMER, failing)
+        db_session.rollback()
+
+        seen = []
+        consume_readings(db_session, CONSUMER, lambda db, readings: seen.extend(readings))
+        assert len(seen) == 3
+
+    def test_handler_sees_batch_position(self, db_session: Session, device: Device):
+        """Test de que el handler recibe el rango de ids del batch en curso."""
+        ensure_cursors(db_session, CONSUMER, shards=1)
+        db_session.commit()
+        _add_readings(db_session, [device], per_device=3)
+        batches = []
+
+        _drain(db_session, lambda db, readings: batches.append((current_batch(db), [r.id for r in readings])))
+
+        assert len(batches) == 1
+        batch, ids = batches[0]
+        assert (batch.consumer, batch.shard, batch.shards) == (CONSUMER, 0, 1)
+        assert batch.from_id < ids[0] and batch.to_id == ids[-1]
+        assert current_batch(db_session) is None
+
+    def test_parallel_workers_take_different_shards(
+        self,
+        db_session: Session,
+        two_devices: List[Device],
+        other_sessions: sessionmaker
+    ):
+        """Test de que un shard bloqueado por un worker no lo toma otro."""
+        ensure_cursors(db_session, CONSUMER, shards=2)
+        db_session.commit()
+        _add_readings(db_session, two_devices, per_device=3)
+        _drain(db_session, lambda db, readings: pytest.fail("sin candidato no hay trabajo"), calls=2)
+
+        other = other_sessions()
+        first, second = [], []
+
+        def first_handler(db, readings):
+            first.extend(r.device_id for r in readings)
+            # Mientras este worker tiene su shard bloqueado, otro toma el restante
+            consume_readings(other, CONSUMER, lambda db, readings: second.extend(r.device_id for r in readings))
+
+        try:
+            consume_readings(db_session, CONSUMER, first_handler)
+        finally:
+            other.close()
+
+        assert len(first) == 3
+        assert len(second) == 3
+        assert set(first).isdisjoint(second)
+
+    def test_reshard_restarts_from_slowest_cursor(self, db_session: Session):
+        """Test de que al cambiar los shards no se saltea ninguna medicion."""
+        ensure_cursors(db_session, CONSUMER, shards=2)
+        db_session.commit()
+        for cursor, last_id in zip(db_session.query(ReadingCursor).order_by(ReadingCursor.shard), (10, 4)):
+            cursor.last_reading_id = last_id
+        db_session.commit()
+
+        ensure_cursors(db_session, CONSUMER, shards=3)
+        db_session.commit()
+
+        cursors = db_session.execute(select(ReadingCursor.shard, ReadingCursor.last_reading_id)).all()
+        assert sorted(cursors) == [(0, 4), (1, 4), (2, 4)]
+
+
+class TestReadingConsumer:
+    """Tests de los workers en background."""
+
+    def test_workers_consume_new_readings(
+        self,
+        db_session: Session,
+        two_devices: List[Device],
+        other_sessions: sessionmaker
+    ):
+        """Test de dos workers consumiendo en paralelo sin duplicados."""
+        seen = []
+        consumer = ReadingConsumer(
+            CONSUMER,
+            lambda db, readings: seen.extend(r.id for r in readings),
+            shards=2,
+            workers=2,
+            poll_interval_sec=0.05,
+            session_factory=other_sessions,
+        )
+        consumer.start()
+        try:
+            _add_readings(db_session, two_devices, per_device=10)
+            deadline = time.monotonic() + 10
+            while len(seen) < 20 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            consumer.stop()
+
+        assert len(seen) == 20
+        assert len(set(seen)) == 20
+        assert consumer.stats()["processed"] == 20
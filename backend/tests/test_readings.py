@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.models.device import Device
 from app.models.sensor_reading import SensorReading
+from app.services.last_seen import last_seen_tracker
 
 
 class TestCreateReading:
@@ -40,7 +41,7 @@ class TestCreateReading:
         assert data["device_id"] == device.id
         assert data["data_payload"] == reading_data["data_payload"]
         assert "quality_score" in data
-        assert data["processed"] is False
+        assert "processed" not in data
         assert "id" in data
 
     def test_create_reading_auto_timestamp(
@@ -85,7 +86,8 @@ class TestCreateReading:
         response = client.post("/api/v1/readings", json=reading_data)
         assert response.status_code == 201
 
-        # Refrescar device desde DB
+        # Volcar el write-behind de last_seen_at y refrescar device desde DB
+        last_seen_tracker.flush(db_session)
         db_session.refresh(device)
 
         # Verificar que last_seen_at se actualizo
@@ -190,6 +192,91 @@ class TestCreateReading:
         assert data["data_payload"]["custom_sensor"] == 123.45
 
 
+
+class TestCreateReadingsBatch:
+    """Tests para POST /api/v1/readings/batch (gateways con mediciones acumuladas)"""
+
+    def test_create_batch_success(
+        self,
+        client: TestClient,
+        device: Device,
+        db_session: Session
+    ):
+        """Test de insercion de un batch completo del mismo device."""
+        now = datetime.utcnow()
+        batch = {
+            "readings": [
+                {
+                    "device_eui": "ESP32_TEST_001",
+                    "data_payload": {"temp_c": 20.0 + i},
+                    "timestamp": (now - timedelta(minutes=i)).isoformat()
+                }
+                for i in range(20)
+            ]
+        }
+
+        response = client.post("/api/v1/readings/batch", json=batch)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["received"] == 20
+        assert data["created"] == 20
+        assert data["failed"] == 0
+        assert [r["index"] for r in data["results"]] == list(range(20))
+        assert all(r["status"] == "created" for r in data["results"])
+
+        # Los IDs retornados corresponden a cada medicion en orden
+        for i, result in enumerate(data["results"]):
+            reading = db_session.query(SensorReading).filter(SensorReading.id == result["reading_id"]).one()
+            assert reading.data_payload["temp_c"] == 20.0 + i
+
+        last_seen_tracker.flush(db_session)
+        db_session.refresh(device)
+        assert device.last_seen_at is not None
+
+    def test_create_batch_multiple_devices_partial_failure(
+        self,
+        client: TestClient,
+        device: Device,
+        asset,
+        db_session: Session
+    ):
+        """Test de batch con varios devices y un EUI inexistente."""
+        device2 = Device(
+            asset_id=asset.id,
+            device_eui="ESP32_TEST_002",
+            name="ESP32 Test 002",
+            status="active"
+        )
+        db_session.add(device2)
+        db_session.commit()
+
+        batch = {
+            "readings": [
+                {"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 25.0}},
+                {"device_eui": "ESP32_NONEXISTENT", "data_payload": {"temp_c": 26.0}},
+                {"device_eui": "ESP32_TEST_002", "data_payload": {"temp_c": 27.0}},
+            ]
+        }
+
+        response = client.post("/api/v1/readings/batch", json=batch)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert data["results"][1]["status"] == "device_not_found"
+        assert data["results"][1]["reading_id"] is None
+
+        assert db_session.query(SensorReading).filter(SensorReading.device_id == device.id).count() == 1
+        assert db_session.query(SensorReading).filter(SensorReading.device_id == device2.id).count() == 1
+
+    def test_create_batch_empty(self, client: TestClient):
+        """Test de que un batch vacio falla validacion."""
+        response = client.post("/api/v1/readings/batch", json={"readings": []})
+
+        assert response.status_code == 422
+
 class TestGetReadings:
     """Tests para GET /api/v1/readings"""
 
@@ -207,7 +294,6 @@ class TestGetReadings:
                 device_id=device.id,
                 data_payload={"temp_c": 20.0 + i},
                 quality_score=0.95,
-                processed=False,
                 timestamp=datetime.utcnow()
             )
             db_session.add(reading)
@@ -347,6 +433,72 @@ class TestGetReadings:
         data = response.json()
         assert len(data) == 10
 
+    def test_get_readings_cursor_pagination(
+        self,
+        client: TestClient,
+        auth_headers_admin: dict,
+        device: Device,
+        db_session: Session
+    ):
+        """Test de paginacion por cursor: recorre todo sin repetir ni saltear readings."""
+        now = datetime.utcnow()
+        # Timestamps repetidos para verificar el desempate por id
+        for i in range(25):
+            db_session.add(SensorReading(
+                device_id=device.id,
+                data_payload={"temp_c": 20.0 + i},
+                quality_score=0.95,
+                timestamp=now - timedelta(minutes=i // 2)
+            ))
+        db_session.commit()
+
+        seen_ids = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 10}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/readings", params=params, headers=auth_headers_admin)
+            assert response.status_code == 200
+
+            seen_ids.extend(reading["id"] for reading in response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert pages == 3
+        assert len(seen_ids) == 25
+        assert len(set(seen_ids)) == 25
+
+    def test_get_readings_cursor_last_page_has_no_cursor(
+        self,
+        client: TestClient,
+        auth_headers_admin: dict,
+        device: Device,
+        db_session: Session
+    ):
+        """Test de que la ultima pagina no devuelve X-Next-Cursor."""
+        db_session.add(SensorReading(device_id=device.id, data_payload={"temp_c": 20.0}, timestamp=datetime.utcnow()))
+        db_session.commit()
+
+        response = client.get("/api/v1/readings?limit=10", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_get_readings_invalid_cursor(
+        self,
+        client: TestClient,
+        auth_headers_admin: dict
+    ):
+        """Test de cursor manipulado (400)."""
+        response = client.get("/api/v1/readings?cursor=no-es-un-cursor", headers=auth_headers_admin)
+
+        assert response.status_code == 400
+
 
 class TestGetReadingById:
     """Tests para GET /api/v1/readings/{id}"""
@@ -447,6 +599,7 @@ class TestReadingsIntegration:
         reading_id = create_response.json()["id"]
 
         # 2. Verificar que se guardo correctamente
+        last_seen_tracker.flush(db_session)
         db_session.refresh(device)
         assert device.last_seen_at is not None
         assert device.is_online is True
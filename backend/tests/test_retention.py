@@ -0,0 +1,209 @@
+"""
+Tests para las politicas de retencion (resolucion, dry-run, borrado y drops de particion).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.asset import Asset
+from app.models.device import Device
+from app.models.retention import RetentionPolicy
+from app.models.rollup import ReadingRollup
+from app.models.sensor_reading import SensorReading
+from app.services.partitioning import ensure_partitions, list_partitions
+from app.services.retention import apply_retention, resolve_device_policies
+from app.services.rollups import refresh_rollups
+
+
+NOW = datetime(2025, 12, 1)
+
+
+def _count(db_session: Session, model, *where) -> int:
+    return db_session.execute(select(func.count()).select_from(model).where(*where)).scalar()
+
+
+def _refresh_rollups(db_session: Session) -> None:
+    refresh_rollups(db_session)
+    refresh_rollups(db_session)
+
+
+@pytest.fixture
+def old_and_new_readings(db_session: Session, device: Device) -> Device:
+    """Una medicion por dia durante los ultimos 60 dias."""
+    db_session.add_all([
+        SensorReading(device_id=device.id, data_payload={"temp_c": 4.0}, timestamp=NOW - timedelta(days=day, hours=1))
+        for day in range(60)
+    ])
+    db_session.commit()
+    return device
+
+
+class TestPolicyResolution:
+    """Tests de la politica aplicable a cada device."""
+
+    def test_most_specific_policy_wins(self, db_session: Session, device: Device, asset: Asset, location_group):
+        """Test de prioridad: grupo + tipo > grupo > tipo > global."""
+        other_asset = Asset(location_id=asset.location_id, name="Sala 1", type="room")
+        db_session.add(other_asset)
+        db_session.commit()
+        other_device = Device(asset_id=other_asset.id, device_eui="ESP32_TEST_002", name="ESP32 Test 002")
+        db_session.add(other_device)
+        db_session.commit()
+
+        policies = [
+            RetentionPolicy(id=1, name="global", raw_days=365),
+            RetentionPolicy(id=2, name="group", location_group_id=location_group.id, raw_days=90),
+            RetentionPolicy(id=3, name="type", asset_type=asset.type, raw_days=60),
+            RetentionPolicy(id=4, name="group+type", location_group_id=location_group.id, asset_type=asset.type, raw_days=30),
+        ]
+
+        assignments = resolve_device_policies(db_session, policies)
+
+        assert assignments[device.id].name == "group+type"
+        assert assignments[other_device.id].name == "group"
+        assert resolve_device_policies(db_session, policies[:1])[device.id].name == "global"
+
+
+class TestApplyRetention:
+    """Tests de apply_retention()."""
+
+    def test_dry_run_reports_without_deleting(self, db_session: Session, old_and_new_readings: Device):
+        """Test de que el dry-run reporta filas y bytes sin borrar."""
+        db_session.add(RetentionPolicy(name="default", raw_days=30))
+        db_session.commit()
+        _refresh_rollups(db_session)
+
+        report = apply_retention(db_session, dry_run=True, now=NOW)
+
+        raw = [a for a in report.actions if a.kind == "delete_readings"]
+        assert len(raw) == 1
+        assert raw[0].rows == 30
+        assert raw[0].bytes > 0
+        assert report.total_rows == 30
+        assert _count(db_session, SensorReading) == 60
+
+    def test_deletes_expired_readings_in_batches(self, db_session: Session, old_and_new_readings: Device):
+        """Test de que borra solo lo vencido, en batches chicos."""
+        db_session.add(RetentionPolicy(name="default", raw_days=30))
+        db_session.commit()
+        _refresh_rollups(db_session)
+
+        report = apply_retention(db_session, now=NOW, batch_size=7)
+
+        assert report.total_rows == 30
+        assert _count(db_session, SensorReading) == 30
+        assert _count(db_session, SensorReading, SensorReading.timestamp < NOW - timedelta(days=30)) == 0
+
+    def test_keeps_readings_not_yet_rolled_up(self, db_session: Session, old_and_new_readings: Device):
+        """Test de que no borra mediciones que el job de rollups no proceso."""
+        db_session.add(RetentionPolicy(name="default", raw_days=30))
+        db_session.commit()
+
+        report = apply_retention(db_session, now=NOW)
+
+        assert report.total_rows == 0
+        assert _count(db_session, SensorReading) == 60
+
+    def test_rollup_retention_per_resolution(self, db_session: Session, old_and_new_readings: Device):
+        """Test de rollups 1m por 10 dias y 1d para siempre."""
+        db_session.add(RetentionPolicy(name="default", rollup_1m_days=10))
+        db_session.commit()
+        _refresh_rollups(db_session)
+
+        apply_retention(db_session, now=NOW)
+
+        assert _count(db_session, ReadingRollup, ReadingRollup.resolution == "1m") == 10
+        assert _count(db_session, ReadingRollup, ReadingRollup.resolution == "1d") == 60
+        assert _count(db_session, SensorReading) == 60
+
+    def test_drops_expired_partitions(self, db_session: Session, device: Device, monkeypatch):
+        """Test de que una particion completamente vencida se elimina entera."""
+        monkeypatch.setattr(settings, "rollups_enabled", False)
+        ensure_partitions(db_session, now=datetime(2025, 6, 1), interval="month", ahead=0)
+        db_session.add_all([
+            SensorReading(device_id=device.id, data_payload={"temp_c": 1.0}, timestamp=datetime(2025, 6, day))
+            for day in range(1, 11)
+        ])
+        db_session.add(RetentionPolicy(name="default", raw_days=30))
+        db_session.commit()
+
+        report = apply_retention(db_session, now=NOW)
+
+        assert [(a.kind, a.target, a.rows) for a in report.actions] == [
+            ("drop_partition", "sensor_readings_p20250601", 10)
+        ]
+        assert "sensor_readings_p20250601" not in [p.name for p in list_partitions(db_session)]
+        assert _count(db_session, SensorReading) == 0
+
+    def test_device_without_policy_blocks_partition_drop(
+        self,
+        db_session: Session,
+        device: Device,
+        asset: Asset,
+        monkeypatch
+    ):
+        """Test de que un device sin retencion cruda impide borrar particiones enteras."""
+        monkeypatch.setattr(settings, "rollups_enabled", False)
+        ensure_partitions(db_session, now=datetime(2025, 6, 1), interval="month", ahead=0)
+        db_session.add(RetentionPolicy(name="freezers", asset_type=asset.type, raw_days=30))
+        db_session.add(Device(device_eui="ESP32_SIN_ASSET", name="Sin asset"))
+        db_session.add(SensorReading(device_id=device.id, data_payload={"temp_c": 1.0}, timestamp=datetime(2025, 6, 2)))
+        db_session.commit()
+
+        report = apply_retention(db_session, now=NOW)
+
+        assert [a.kind for a in report.actions] == ["delete_readings"]
+        assert "sensor_readings_p20250601" in [p.name for p in list_partitions(db_session)]
+
+
+class TestRetentionEndpoints:
+    """Tests para /api/v1/retention-policies"""
+
+    def test_create_and_report(
+        self,
+        client: TestClient,
+        db_session: Session,
+        old_and_new_readings: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de alta de politica y reporte dry-run."""
+        _refresh_rollups(db_session)
+        response = client.post(
+            "/api/v1/retention-policies",
+            json={"name": "default", "raw_days": 30, "rollup_1m_days": 365},
+            headers=auth_headers_admin
+        )
+        assert response.status_code == 201
+        assert response.json()["rollup_1d_days"] is None
+
+        response = client.get("/api/v1/retention-policies/report", headers=auth_headers_admin)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dry_run"] is True
+        assert data["total_rows"] > 0
+        assert _count(db_session, SensorReading) == 60
+
+    def test_duplicate_scope_conflict(self, client: TestClient, auth_headers_admin: dict):
+        """Test de que no se permiten dos politicas para el mismo alcance."""
+        body = {"name": "default", "raw_days": 30}
+        assert client.post("/api/v1/retention-policies", json=body, headers=auth_headers_admin).status_code == 201
+
+        response = client.post("/api/v1/retention-policies", json=body, headers=auth_headers_admin)
+
+        assert response.status_code == 409
+
+    def test_technician_cannot_manage_policies(self, client: TestClient, auth_headers_technician: dict):
+        """Test de que un tecnico no puede ver ni crear politicas."""
+        response = client.post(
+            "/api/v1/retention-policies",
+            json={"name": "default", "raw_days": 30},
+            headers=auth_headers_technician
+        )
+        assert response.status_code == 403
+        assert client.get("/api/v1/retention-policies/report", headers=auth_headers_technician).status_code == 403
@@ -0,0 +1,228 @@
+"""
+Tests para los rollups incrementales (1m / 1h / 1d) y su uso en agregaciones.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.device import Device
+from app.models.rollup import ReadingRollup
+from app.models.sensor_reading import SensorReading
+from app.services.rollups import choose_resolution, get_watermark, refresh_rollups
+
+
+START = datetime(2025, 10, 1)
+
+
+def _refresh(db_session: Session) -> None:
+    """Toma el candidato y lo procesa (dos pasadas del job)."""
+    refresh_rollups(db_session)
+    refresh_rollups(db_session)
+
+
+def _rollup(db_session: Session, device_id: int, resolution: str, bucket_start: datetime) -> ReadingRollup:
+    return db_session.execute(
+        select(ReadingRollup).where(
+            ReadingRollup.device_id == device_id,
+            ReadingRollup.variable == "temp_c",
+            ReadingRollup.resolution == resolution,
+            ReadingRollup.bucket_start == bucket_start,
+        )
+    ).scalar_one()
+
+
+@pytest.fixture
+def device_with_readings(db_session: Session, device: Device) -> Device:
+    """Device con una medicion cada 10 minutos durante 2 dias."""
+    readings = [
+        SensorReading(
+            device_id=device.id,
+            data_payload={"temp_c": float(i % 37), "door": "closed"},
+            timestamp=START + timedelta(minutes=10 * i)
+        )
+        for i in range(288)
+    ]
+    db_session.add_all(readings)
+    db_session.commit()
+    return device
+
+
+def _aggregate(client: TestClient, headers: dict, device_id: int, bucket: str, date_from: str, date_to: str) -> list:
+    response = client.get(
+        "/api/v1/readings/aggregate",
+        params={"device_id": device_id, "variable": "temp_c", "bucket": bucket, "from": date_from, "to": date_to},
+        headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()["series"][0]["buckets"]
+
+
+class TestRollupRefresh:
+    """Tests del job incremental."""
+
+    def test_refresh_builds_all_resolutions(self, db_session: Session, device_with_readings: Device):
+        """Test de que una pasada completa genera buckets 1m, 1h y 1d."""
+        _refresh(db_session)
+
+        hour = _rollup(db_session, device_with_readings.id, "1h", START)
+        assert hour.count == 6
+        assert hour.sum == sum(float(i) for i in range(6))
+        assert hour.min == 0.0
+        assert hour.max == 5.0
+
+        day = _rollup(db_session, device_with_readings.id, "1d", START)
+        assert day.count == 144
+
+        minute = _rollup(db_session, device_with_readings.id, "1m", START + timedelta(minutes=10))
+        assert minute.count == 1
+        assert minute.sum_sq == 1.0
+
+        # Variables no numericas no generan rollups
+        variables = db_session.execute(select(ReadingRollup.variable).distinct()).scalars().all()
+        assert variables == ["temp_c"]
+
+    def test_refresh_is_idempotent(self, db_session: Session, device_with_readings: Device):
+        """Test de que repetir el job sin mediciones nuevas no duplica sumas."""
+        _refresh(db_session)
+        watermark = get_watermark(db_session)
+        _refresh(db_session)
+        _refresh(db_session)
+
+        assert get_watermark(db_session) == watermark
+        assert _rollup(db_session, device_with_readings.id, "1d", START).count == 144
+
+    def test_refresh_merges_late_readings(self, db_session: Session, device_with_readings: Device):
+        """Test de que una medicion nueva con timestamp viejo se suma a su bucket."""
+        _refresh(db_session)
+
+        db_session.add(SensorReading(
+            device_id=device_with_readings.id,
+            data_payload={"temp_c": -10.0},
+            timestamp=START + timedelta(minutes=5)
+        ))
+        db_session.commit()
+        _refresh(db_session)
+
+        hour = _rollup(db_session, device_with_readings.id, "1h", START)
+        assert hour.count == 7
+        assert hour.min == -10.0
+        assert hour.sum == sum(float(i) for i in range(6)) - 10.0
+
+    def test_refresh_respects_batch_size(self, db_session: Session, device_with_readings: Device):
+        """Test de que cada pasada procesa a lo sumo batch_size ids."""
+        refresh_rollups(db_session, batch_size=100)
+        assert refresh_rollups(db_session, batch_size=100) == 100
+        assert refresh_rollups(db_session, batch_size=100) == 100
+        assert refresh_rollups(db_session, batch_size=100) == 88
+
+        assert _rollup(db_session, device_with_readings.id, "1d", START).count == 144
+
+
+class TestChooseResolution:
+    """Tests de la eleccion del rollup."""
+
+    def test_aligned_buckets_use_largest_divisor(self):
+        """Test de que se usa el rollup mas grueso que divide al bucket."""
+        assert choose_resolution(timedelta(minutes=15)) == "1m"
+        assert choose_resolution(timedelta(hours=6)) == "1h"
+        assert choose_resolution(timedelta(days=1)) == "1d"
+        assert choose_resolution(timedelta(seconds=90)) is None
+
+    def test_unaligned_buckets_use_largest_smaller(self):
+        """Test de buckets de ancho arbitrario (series minmax)."""
+        assert choose_resolution(timedelta(seconds=5184), aligned=False) == "1h"
+        assert choose_resolution(timedelta(seconds=30), aligned=False) is None
+
+    def test_disabled_returns_none(self, monkeypatch):
+        """Test de que con ROLLUPS_ENABLED=false no se usan rollups."""
+        monkeypatch.setattr(settings, "rollups_enabled", False)
+        assert choose_resolution(timedelta(hours=1)) is None
+
+
+class TestAggregateWithRollups:
+    """Tests de GET /readings/aggregate y series minmax leyendo rollups."""
+
+    def test_aggregate_matches_raw_including_unprocessed_readings(
+        self,
+        client: TestClient,
+        db_session: Session,
+        device_with_readings: Device,
+        auth_headers_admin: dict,
+        monkeypatch
+    ):
+        """Test de que rollups + crudos sobre el watermark dan lo mismo que solo crudos."""
+        _refresh(db_session)
+        # Mediciones que el job todavia no proceso (id > watermark)
+        db_session.add_all([
+            SensorReading(
+                device_id=device_with_readings.id,
+                data_payload={"temp_c": 50.0 + i},
+                timestamp=START + timedelta(hours=3, minutes=i)
+            )
+            for i in range(3)
+        ])
+        db_session.commit()
+
+        # Rango no alineado: los bordes se leen crudos
+        args = (device_with_readings.id, "1h", "2025-10-01T00:25:00", "2025-10-02T07:35:00")
+        with_rollups = _aggregate(client, auth_headers_admin, *args)
+        monkeypatch.setattr(settings, "rollups_enabled", False)
+        raw = _aggregate(client, auth_headers_admin, *args)
+
+        assert len(with_rollups) == len(raw) == 32
+        for rolled, expected in zip(with_rollups, raw):
+            assert rolled["bucket_start"] == expected["bucket_start"]
+            assert rolled["count"] == expected["count"]
+            assert rolled["min"] == expected["min"]
+            assert rolled["max"] == expected["max"]
+            assert rolled["avg"] == pytest.approx(expected["avg"])
+            if expected["stddev"] is None:
+                assert rolled["stddev"] is None
+            else:
+                assert rolled["stddev"] == pytest.approx(expected["stddev"])
+
+    def test_aggregate_reads_interior_from_rollups(
+        self,
+        client: TestClient,
+        db_session: Session,
+        device_with_readings: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que el interior del rango sale de reading_rollups, no de los crudos."""
+        _refresh(db_session)
+        db_session.execute(delete(SensorReading))
+        db_session.commit()
+
+        buckets = _aggregate(client, auth_headers_admin, device_with_readings.id, "1d", "2025-10-01T00:00:00", "2025-10-03T00:00:00")
+
+        assert [b["count"] for b in buckets] == [144, 144]
+
+    def test_minmax_series_uses_rollups(
+        self,
+        client: TestClient,
+        db_session: Session,
+        device_with_readings: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de series minmax: mismos totales con rollups que con crudos."""
+        _refresh(db_session)
+        db_session.execute(delete(SensorReading))
+        db_session.commit()
+
+        response = client.get(
+            f"/api/v1/devices/{device_with_readings.id}/series",
+            params={"variable": "temp_c", "from": "2025-10-01T00:00:00", "to": "2025-10-03T00:00:00", "points": 12, "mode": "minmax"},
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["raw_count"] == 288
+        assert len(data["data"]) == 12
+        assert data["data"][0]["min"] == 0.0
+        assert data["data"][0]["max"] == 23.0
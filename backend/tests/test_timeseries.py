@@ -0,0 +1,187 @@
+"""
+Tests para series downsampleadas (GET /devices/{id}/series) y LTTB.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.utils.downsampling import lttb_indices
+
+
+@pytest.fixture
+def device_with_series(db_session: Session, device: Device) -> Device:
+    """Device con 2000 mediciones (una por minuto) y un pico en el medio."""
+    start = datetime(2025, 10, 1)
+    readings = []
+    for i in range(2000):
+        temp = 4.0 + math.sin(i / 50.0)
+        if i == 1000:
+            temp = 25.0  # Pico que el downsampling no debe perder
+        readings.append(SensorReading(
+            device_id=device.id,
+            data_payload={"temp_c": temp, "door": "closed"},
+            quality_score=1.0,
+            timestamp=start + timedelta(minutes=i)
+        ))
+    # Medicion con valor no numerico (se ignora)
+    readings.append(SensorReading(
+        device_id=device.id,
+        data_payload={"temp_c": "error"},
+        timestamp=start + timedelta(minutes=500, seconds=30)
+    ))
+    db_session.add_all(readings)
+    db_session.commit()
+    return device
+
+
+class TestLTTB:
+    """Tests del algoritmo LTTB."""
+
+    def test_returns_threshold_points_keeping_endpoints(self):
+        """Test de que retorna `threshold` indices con el primero y el ultimo."""
+        x = np.arange(10000, dtype=float)
+        y = np.sin(x / 100.0)
+
+        idx = lttb_indices(x, y, 300)
+
+        assert len(idx) == 300
+        assert idx[0] == 0
+        assert idx[-1] == 9999
+        assert np.all(np.diff(idx) > 0)
+
+    def test_keeps_spike(self):
+        """Test de que un pico aislado se conserva."""
+        x = np.arange(5000, dtype=float)
+        y = np.zeros(5000)
+        y[2345] = 100.0
+
+        idx = lttb_indices(x, y, 50)
+
+        assert 2345 in idx
+
+    def test_short_series_unchanged(self):
+        """Test de que una serie mas corta que threshold no se modifica."""
+        idx = lttb_indices(np.arange(5.0), np.arange(5.0), 100)
+
+        assert list(idx) == [0, 1, 2, 3, 4]
+
+
+class TestDeviceSeries:
+    """Tests para GET /api/v1/devices/{id}/series"""
+
+    def test_series_lttb(
+        self,
+        client: TestClient,
+        device_with_series: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de serie LTTB con tamano acotado y el pico conservado."""
+        response = client.get(
+            f"/api/v1/devices/{device_with_series.id}/series",
+            params={"variable": "temp_c", "from": "2025-10-01T00:00:00", "to": "2025-10-03T00:00:00", "points": 100},
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["mode"] == "lttb"
+        assert data["raw_count"] == 2000
+        assert len(data["data"]) == 100
+        assert max(point["value"] for point in data["data"]) == 25.0
+        assert data["from"] == "2025-10-01T00:00:00"
+
+    def test_series_minmax(
+        self,
+        client: TestClient,
+        device_with_series: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de serie agregada por buckets en SQL."""
+        response = client.get(
+            f"/api/v1/devices/{device_with_series.id}/series",
+            params={
+                "variable": "temp_c",
+                "from": "2025-10-01T00:00:00",
+                "to": "2025-10-01T20:00:00",  # 1200 minutos -> buckets de 12 min
+                "points": 100,
+                "mode": "minmax"
+            },
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["raw_count"] == 1200
+        assert len(data["data"]) == 100
+        first = data["data"][0]
+        assert first["timestamp"] == "2025-10-01T00:00:00"
+        assert first["count"] == 12
+        assert first["min"] <= first["value"] <= first["max"]
+        assert any(point["max"] == 25.0 for point in data["data"])
+
+    def test_series_payload_constant_with_range(
+        self,
+        client: TestClient,
+        device_with_series: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de que rangos distintos devuelven la misma cantidad de puntos."""
+        sizes = []
+        for hours in (6, 33):
+            response = client.get(
+                f"/api/v1/devices/{device_with_series.id}/series",
+                params={
+                    "variable": "temp_c",
+                    "from": "2025-10-01T00:00:00",
+                    "to": (datetime(2025, 10, 1) + timedelta(hours=hours)).isoformat(),
+                    "points": 50
+                },
+                headers=auth_headers_admin
+            )
+            sizes.append(len(response.json()["data"]))
+
+        assert sizes == [50, 50]
+
+    def test_series_non_numeric_variable_empty(
+        self,
+        client: TestClient,
+        device_with_series: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de variable no numerica: serie vacia, sin error de cast."""
+        response = client.get(
+            f"/api/v1/devices/{device_with_series.id}/series",
+            params={"variable": "door", "from": "2025-10-01T00:00:00", "to": "2025-10-03T00:00:00"},
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"] == []
+
+    def test_series_invalid_range(
+        self,
+        client: TestClient,
+        device: Device,
+        auth_headers_admin: dict
+    ):
+        """Test de rango invertido (400)."""
+        response = client.get(
+            f"/api/v1/devices/{device.id}/series",
+            params={"variable": "temp_c", "from": "2025-10-02T00:00:00", "to": "2025-10-01T00:00:00"},
+            headers=auth_headers_admin
+        )
+
+        assert response.status_code == 400
+
+    def test_series_device_not_found(self, client: TestClient, auth_headers_admin: dict):
+        """Test de device inexistente (404)."""
+        response = client.get("/api/v1/devices/99999/series?variable=temp_c", headers=auth_headers_admin)
+
+        assert response.status_code == 404
@@ -0,0 +1,130 @@
+"""
+Tests para el cache de usuarios autenticados y la memoizacion de JWT.
+"""
+
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token, decode_access_token, verified_tokens
+from app.models.user import User
+from app.services.user_registry import user_registry
+
+
+def _users_queries(queries: list) -> list:
+    return [q for q in queries if "FROM users" in q]
+
+
+def _me(client: TestClient, db_session: Session, headers: dict):
+    # Sin el User en la sesion compartida del test, como en un request real
+    db_session.expunge_all()
+    return client.get("/api/v1/auth/me", headers=headers)
+
+
+class TestUserRegistry:
+    """Tests de user_registry en get_current_user."""
+
+    def test_cached_user_skips_users_query(
+        self,
+        client: TestClient,
+        db_session: Session,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """Test de que un request con el usuario en cache no consulta `users`."""
+        assert _me(client, db_session, auth_headers_admin).status_code == 200
+
+        query_counter.clear()
+        response = _me(client, db_session, auth_headers_admin)
+
+        assert response.status_code == 200
+        assert response.json()["email"] == "admin@test.com"
+        assert _users_queries(query_counter) == []
+
+    def test_deactivation_invalidates_cache(
+        self,
+        client: TestClient,
+        db_session: Session,
+        super_admin_user: User,
+        auth_headers_admin: dict
+    ):
+        """Test de que desactivar el usuario corta el acceso en el request siguiente."""
+        user_id = super_admin_user.id
+        assert _me(client, db_session, auth_headers_admin).status_code == 200
+
+        db_session.get(User, user_id).is_active = False
+        db_session.commit()
+
+        assert _me(client, db_session, auth_headers_admin).status_code == 400
+
+    def test_role_change_invalidates_cache(
+        self,
+        client: TestClient,
+        db_session: Session,
+        super_admin_user: User,
+        auth_headers_admin: dict
+    ):
+        """Test de que un cambio de rol se ve sin esperar el TTL."""
+        user_id = super_admin_user.id
+        assert _me(client, db_session, auth_headers_admin).json()["role"] == "super_admin"
+
+        db_session.get(User, user_id).role = "technician"
+        db_session.commit()
+
+        assert _me(client, db_session, auth_headers_admin).json()["role"] == "technician"
+
+    def test_rolled_back_change_keeps_cache(
+        self,
+        client: TestClient,
+        db_session: Session,
+        super_admin_user: User,
+        auth_headers_admin: dict,
+        query_counter: list
+    ):
+        """Test de que un cambio descartado con rollback no invalida la entrada."""
+        user_id = super_admin_user.id
+        assert _me(client, db_session, auth_headers_admin).status_code == 200
+
+        db_session.get(User, user_id).role = "guest"
+        db_session.flush()
+        db_session.rollback()
+
+        query_counter.clear()
+        assert _me(client, db_session, auth_headers_admin).json()["role"] == "super_admin"
+        assert _users_queries(query_counter) == []
+
+    def test_mutating_returned_user_does_not_touch_cache(self, db_session: Session, technician_user: User):
+        """Test de que modificar en memoria las listas del User no altera la entrada cacheada."""
+        user_id = technician_user.id
+        db_session.expunge_all()
+        user = user_registry.get(db_session, user_id)
+        allowed = list(user.allowed_location_ids)
+
+        user.allowed_location_ids.append(999)
+        db_session.expunge_all()
+
+        assert user_registry.get(db_session, user_id).allowed_location_ids == allowed
+
+
+class TestTokenMemoization:
+    """Tests de la memoizacion de decode_access_token()."""
+
+    def test_valid_token_is_verified_once(self):
+        """Test de que un token ya verificado se resuelve desde el cache."""
+        token = create_access_token(data={"sub": "admin@test.com", "user_id": 1})
+
+        assert decode_access_token(token)["user_id"] == 1
+        hits = verified_tokens.hits
+        payload = decode_access_token(token)
+
+        assert payload["sub"] == "admin@test.com"
+        assert verified_tokens.hits == hits + 1
+
+    def test_expired_and_invalid_tokens_are_not_cached(self):
+        """Test de que los tokens rechazados no entran al cache."""
+        expired = create_access_token(data={"sub": "admin@test.com", "user_id": 1}, expires_delta=timedelta(minutes=-1))
+
+        assert decode_access_token(expired) is None
+        assert decode_access_token("no.es.un.jwt") is None
+        assert len(verified_tokens) == 0
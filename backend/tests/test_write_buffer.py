@@ -0,0 +1,278 @@
+"""
+Tests para el write buffer de ingesta (INGEST_MODE=buffered).
+
+Los tests del buffer reemplazan la escritura a DB por una funcion que
+registra los batches, para verificar group commit, backpressure y drenado.
+"""
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app.api.v1 import readings as readings_module
+from app.core.config import settings
+from app.models.device import Device
+from app.models.sensor_reading import SensorReading
+from app.schemas.sensor_reading import SensorReadingCreate
+from app.services.write_buffer import ReadingWriteBuffer, WriteBufferUnavailable
+
+
+class RecordingFlush:
+    """Flush falso que guarda cada batch recibido."""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        with self.lock:
+            self.batches.append(list(batch))
+        return len(batch)
+
+    @property
+    def total(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+
+def make_reading(i: int = 0) -> SensorReadingCreate:
+    return SensorReadingCreate(device_eui="ESP32_TEST_001", data_payload={"temp_c": 20.0 + i})
+
+
+def db_down() -> OperationalError:
+    return OperationalError("COPY sensor_readings", {}, Exception("server closed the connection unexpectedly"))
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestReadingWriteBuffer:
+    """Tests unitarios del ReadingWriteBuffer."""
+
+    def test_flush_by_row_count(self):
+        """Test de que se hace flush al juntar flush_max_rows readings."""
+        flush = RecordingFlush()
+        buffer = ReadingWriteBuffer(max_size=100, flush_max_rows=5, flush_interval_ms=5000, flush_func=flush)
+        buffer.start()
+        try:
+            for i in range(10):
+                buffer.submit(make_reading(i))
+
+            assert wait_until(lambda: flush.total == 10, timeout=1.0)
+            assert [len(batch) for batch in flush.batches] == [5, 5]
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_flush_by_interval(self):
+        """Test de que un batch incompleto se escribe al vencer flush_interval_ms."""
+        flush = RecordingFlush()
+        buffer = ReadingWriteBuffer(max_size=100, flush_max_rows=500, flush_interval_ms=50, flush_func=flush)
+        buffer.start()
+        try:
+            for i in range(3):
+                buffer.submit(make_reading(i))
+
+            assert wait_until(lambda: flush.total == 3)
+            assert len(flush.batches) == 1
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_submit_sets_timestamp(self):
+        """Test de que el timestamp se fija al encolar, no al hacer flush."""
+        flush = RecordingFlush()
+        buffer = ReadingWriteBuffer(max_size=10, flush_max_rows=10, flush_interval_ms=10, flush_func=flush)
+        buffer.start()
+        try:
+            buffer.submit(make_reading())
+            assert wait_until(lambda: flush.total == 1)
+            assert flush.batches[0][0].timestamp is not None
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_backpressure_when_full(self):
+        """Test de que se rechazan readings cuando la cola esta llena."""
+        flush = RecordingFlush(delay=0.5)
+        buffer = ReadingWriteBuffer(max_size=2, flush_max_rows=1, flush_interval_ms=10, flush_func=flush)
+        buffer.start()
+        try:
+            with pytest.raises(WriteBufferUnavailable):
+                for i in range(10):
+                    buffer.submit(make_reading(i))
+
+            assert buffer.rejected_rows >= 1
+        finally:
+            buffer.stop(timeout=10)
+
+    def test_stop_drains_queue(self):
+        """Test de que stop() escribe todo lo encolado antes de terminar."""
+        flush = RecordingFlush()
+        buffer = ReadingWriteBuffer(max_size=1000, flush_max_rows=50, flush_interval_ms=5000, flush_func=flush)
+        buffer.start()
+
+        for i in range(120):
+            buffer.submit(make_reading(i))
+        buffer.stop(timeout=5)
+
+        assert flush.total == 120
+        assert not buffer.is_running
+
+        with pytest.raises(WriteBufferUnavailable):
+            buffer.submit(make_reading())
+
+    def test_flush_errors_do_not_kill_writer(self):
+        """Test de que un error no transitorio descarta el reading pero el writer sigue."""
+        calls = []
+
+        def failing_then_ok(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise RuntimeError("DB caida")
+            return len(batch)
+
+        buffer = ReadingWriteBuffer(max_size=10, flush_max_rows=1, flush_interval_ms=10, flush_func=failing_then_ok)
+        buffer.start()
+        try:
+            buffer.submit(make_reading(0))
+            assert wait_until(lambda: len(calls) == 1)
+            buffer.submit(make_reading(1))
+            assert wait_until(lambda: buffer.flushed_rows == 1)
+            assert buffer.dropped_rows == 1
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_transient_error_is_retried_without_losing_rows(self):
+        """Test de que un error transitorio de la DB se reintenta y no se pierde ningun reading."""
+        flush = RecordingFlush()
+        failures = [db_down()]
+
+        def fails_once(batch):
+            if failures:
+                raise failures.pop()
+            return flush(batch)
+
+        buffer = ReadingWriteBuffer(
+            max_size=100, flush_max_rows=5, flush_interval_ms=10, flush_func=fails_once, flush_retry_base_ms=1
+        )
+        buffer.start()
+        try:
+            for i in range(5):
+                buffer.submit(make_reading(i))
+
+            assert wait_until(lambda: flush.total == 5)
+            assert buffer.retried_flushes == 1
+            assert buffer.dropped_rows == 0
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_exhausted_retries_requeue_batch(self):
+        """Test de que al agotar los reintentos el batch vuelve a la cola en lugar de descartarse."""
+        flush = RecordingFlush()
+        failures = [db_down() for _ in range(3)]
+
+        def fails_three_times(batch):
+            if failures:
+                raise failures.pop()
+            return flush(batch)
+
+        buffer = ReadingWriteBuffer(
+            max_size=100, flush_max_rows=3, flush_interval_ms=10, flush_func=fails_three_times,
+            flush_max_retries=1, flush_retry_base_ms=1
+        )
+        buffer.start()
+        try:
+            for i in range(3):
+                buffer.submit(make_reading(i))
+
+            assert wait_until(lambda: flush.total == 3)
+            assert [r.data_payload["temp_c"] for r in flush.batches[0]] == [20.0, 21.0, 22.0]
+            assert buffer.requeued_batches >= 1
+            assert buffer.dropped_rows == 0
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_invalid_row_is_isolated(self):
+        """Test de que un error no transitorio descarta solo la fila que falla."""
+        flush = RecordingFlush()
+
+        def rejects_bad_row(batch):
+            if any(r.data_payload["temp_c"] == 23.0 for r in batch):
+                raise ValueError("fila invalida")
+            return flush(batch)
+
+        buffer = ReadingWriteBuffer(max_size=100, flush_max_rows=8, flush_interval_ms=10, flush_func=rejects_bad_row)
+        buffer.start()
+        try:
+            for i in range(8):
+                buffer.submit(make_reading(i))
+
+            assert wait_until(lambda: flush.total == 7)
+            assert buffer.dropped_rows == 1
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_write_batch_group_commit(self, db_session, device: Device):
+        """Test de escritura real a DB con un solo group commit."""
+        device_id = device.id
+        buffer = ReadingWriteBuffer(
+            max_size=100,
+            flush_max_rows=100,
+            flush_interval_ms=10,
+            durability="relaxed",
+            session_factory=lambda: db_session,
+        )
+
+        written = buffer._write_batch([make_reading(i) for i in range(5)] + [
+            SensorReadingCreate(device_eui="ESP32_NONEXISTENT", data_payload={"temp_c": 1.0})
+        ])
+
+        assert written == 5
+        assert db_session.query(SensorReading).filter(SensorReading.device_id == device_id).count() == 5
+
+
+class TestBufferedCreateReading:
+    """Tests de POST /api/v1/readings con INGEST_MODE=buffered."""
+
+    def test_buffered_mode_returns_202(self, client: TestClient, monkeypatch):
+        """Test de que el endpoint encola y responde 202."""
+        flush = RecordingFlush()
+        buffer = ReadingWriteBuffer(max_size=10, flush_max_rows=10, flush_interval_ms=10, flush_func=flush)
+        buffer.start()
+        monkeypatch.setattr(settings, "ingest_mode", "buffered")
+        monkeypatch.setattr(readings_module, "write_buffer", buffer)
+
+        try:
+            response = client.post(
+                "/api/v1/readings",
+                json={"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 25.0}}
+            )
+
+            assert response.status_code == 202
+            assert response.json()["status"] == "queued"
+            assert wait_until(lambda: flush.total == 1)
+        finally:
+            buffer.stop(timeout=5)
+
+    def test_buffered_mode_returns_503_when_full(self, client: TestClient, monkeypatch):
+        """Test de backpressure: 503 + Retry-After cuando la cola esta llena."""
+        buffer = ReadingWriteBuffer(max_size=1, flush_max_rows=10, flush_interval_ms=10, flush_func=RecordingFlush())
+        # Sin start(): el buffer no acepta readings
+        monkeypatch.setattr(settings, "ingest_mode", "buffered")
+        monkeypatch.setattr(readings_module, "write_buffer", buffer)
+
+        response = client.post(
+            "/api/v1/readings",
+            json={"device_eui": "ESP32_TEST_001", "data_payload": {"temp_c": 25.0}}
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
@@ -3,7 +3,15 @@
  */
 
 import api from './api';
-import type { Device, DeviceSchema } from '@/types';
+import type { Device, DeviceSchema, DeviceSeries } from '@/types';
+
+export interface GetDeviceSeriesParams {
+  variable: string;
+  from?: string;
+  to?: string;
+  points?: number;
+  mode?: 'lttb' | 'minmax';
+}
 
 export const deviceService = {
   /**
@@ -30,6 +38,14 @@ export const deviceService = {
     return response.data;
   },
 
+  /**
+   * Obtener serie downsampleada de una variable (tamaño constante para gráficos)
+   */
+  async getDeviceSeries(deviceId: number, params: GetDeviceSeriesParams): Promise<DeviceSeries> {
+    const response = await api.get<DeviceSeries>(`/devices/${deviceId}/series`, { params });
+    return response.data;
+  },
+
   /**
    * Crear nuevo device (solo admins)
    */
@@ -9,10 +9,18 @@ export interface GetReadingsParams {
   device_id?: number;
   date_from?: string;
   date_to?: string;
+  cursor?: string;
+  /** @deprecated usar cursor (paginacion por offset) */
   skip?: number;
   limit?: number;
 }
 
+export interface ReadingsPage {
+  items: SensorReading[];
+  /** Cursor para la pagina siguiente (null si no hay mas) */
+  nextCursor: string | null;
+}
+
 export const readingService = {
   /**
    * Obtener lista de readings con filtros
@@ -22,6 +30,17 @@ export const readingService = {
     return response.data;
   },
 
+  /**
+   * Obtener una pagina de readings (paginacion por cursor)
+   */
+  async getReadingsPage(params?: GetReadingsParams): Promise<ReadingsPage> {
+    const response = await api.get<SensorReading[]>('/readings', { params });
+    return {
+      items: response.data,
+      nextCursor: response.headers['x-next-cursor'] ?? null,
+    };
+  },
+
   /**
    * Obtener readings de un device específico en un rango de tiempo
    */
@@ -30,10 +30,28 @@ export interface SensorReading {
   device_id: number;
   data_payload: Record<string, any>;
   quality_score: number | null;
-  processed: boolean;
   timestamp: string;
 }
 
+export interface SeriesPoint {
+  timestamp: string;
+  value: number;
+  min?: number | null;
+  max?: number | null;
+  count?: number | null;
+}
+
+export interface DeviceSeries {
+  device_id: number;
+  variable: string;
+  mode: 'lttb' | 'minmax';
+  from: string;
+  to: string;
+  points: number;
+  raw_count: number;
+  data: SeriesPoint[];
+}
+
 export interface LoginRequest {
   email: string;
   password: string;
@@ -6,12 +6,17 @@ Uso:
     python simulate_esp32.py                    # Envía 1 lectura
     python simulate_esp32.py --count 10         # Envía 10 lecturas
     python simulate_esp32.py --interval 5       # Envía lecturas cada 5 segundos (infinito)
+    python simulate_esp32.py --api-key <key>    # Con DEVICE_API_KEY_REQUIRED=true en el backend
+
+La API key del device se obtiene con generate_device_api_key("ESP32_LAB_001")
+(backend/app/core/security.py) o desde la variable de entorno DEVICE_API_KEY.
 """
 
 import requests
 import random
 import time
 import argparse
+import os
 from datetime import datetime
 
 # Configuración
@@ -31,10 +36,11 @@ def generate_reading():
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
 
-def send_reading(reading):
+def send_reading(reading, api_key=None):
     """Envía una lectura al backend"""
+    headers = {"X-API-Key": api_key} if api_key else {}
     try:
-        response = requests.post(API_URL, json=reading)
+        response = requests.post(API_URL, json=reading, headers=headers)
         if response.status_code == 201:
             data = response.json()
             print(f"✓ Lectura enviada - ID: {data['id']} | Temp: {reading['data_payload']['temp_c']}°C | Humedad: {reading['data_payload']['humidity_pct']}%")
@@ -53,6 +59,7 @@ def main():
     parser = argparse.ArgumentParser(description="Simulador de ESP32 para testing")
     parser.add_argument("--count", type=int, help="Número de lecturas a enviar (default: 1)")
     parser.add_argument("--interval", type=int, help="Intervalo en segundos entre lecturas (modo continuo)")
+    parser.add_argument("--api-key", default=os.environ.get("DEVICE_API_KEY"), help="API key del device (header X-API-Key)")
     args = parser.parse_args()
 
     print("=" * 60)
@@ -72,7 +79,7 @@ def main():
                 count += 1
                 print(f"[{count}] ", end="")
                 reading = generate_reading()
-                send_reading(reading)
+                send_reading(reading, args.api_key)
                 time.sleep(args.interval)
         except KeyboardInterrupt:
             print(f"\n\n✓ Detenido. Total de lecturas enviadas: {count}")
@@ -83,7 +90,7 @@ def main():
         success = 0
         for i in range(count):
             reading = generate_reading()
-            if send_reading(reading):
+            if send_reading(reading, args.api_key):
                 success += 1
             if i < count - 1:
                 time.sleep(1)  # 1 segundo entre lecturas